@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-call latency with and without the shared provider client pool.
+
+Starts a local stub of the Ollama /api/chat endpoint (HTTP/1.1 keep-alive) and
+sends the same chat request through:
+
+  - a new ollama.Client per call (the previous adapter behavior), and
+  - the pooled client from talkpipe.llm.client_pool,
+
+then through OllamaPromptAdapter.execute, which now uses the pool.  Reports
+mean/p50/p95 latency per call and the number of TCP connections the stub
+server accepted.  No model server is needed.
+
+Usage:
+    python scripts/benchmarks/benchmark_client_pool.py [--calls 500]
+"""
+
+import argparse
+import json
+import socket
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+_project_root = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(_project_root / "src"))
+
+import ollama  # noqa: E402
+
+from talkpipe.llm.client_pool import clear_client_pool, ollama_client  # noqa: E402
+from talkpipe.llm.prompt_adapters import OllamaPromptAdapter  # noqa: E402
+
+_CHAT_REPLY = json.dumps({
+    "model": "stub",
+    "created_at": "2024-01-01T00:00:00Z",
+    "message": {"role": "assistant", "content": "ok"},
+    "done": True,
+}).encode("utf-8")
+
+
+class _StubOllamaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    connections = set()
+    lock = threading.Lock()
+
+    def setup(self):
+        super().setup()
+        # Headers and body go out in separate writes; without TCP_NODELAY the
+        # delayed-ACK interaction adds ~40 ms to every keep-alive response.
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def do_POST(self):
+        with self.lock:
+            self.connections.add(self.client_address)
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(_CHAT_REPLY)))
+        self.end_headers()
+        self.wfile.write(_CHAT_REPLY)
+
+    def log_message(self, *_args):
+        pass
+
+
+def _measure(label, calls, fn):
+    _StubOllamaHandler.connections = set()
+    fn()  # warm-up outside the timings
+    timings = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(
+        f"{label:<34} mean {statistics.mean(timings):7.3f} ms   p50 {statistics.median(timings):7.3f} ms   "
+        f"p95 {p95:7.3f} ms   connections {len(_StubOllamaHandler.connections)}"
+    )
+    return statistics.mean(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=500, help="Timed calls per scenario (default 500).")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubOllamaHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    messages = [{"role": "user", "content": "hello"}]
+
+    try:
+        clear_client_pool()
+        per_call = _measure(
+            "new ollama.Client per call", args.calls,
+            lambda: ollama.Client(url).chat("stub", messages=messages),
+        )
+        pooled = _measure(
+            "pooled client", args.calls,
+            lambda: ollama_client(ollama, url).chat("stub", messages=messages),
+        )
+        adapter = OllamaPromptAdapter("stub", server_url=url, multi_turn=False)
+        _measure("OllamaPromptAdapter.execute", args.calls, lambda: adapter.execute("hello"))
+        print(f"\nSaved per call by pooling: {per_call - pooled:.3f} ms ({(1 - pooled / per_call) * 100:.0f}%)")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Load-test llmPrompt and llmEmbed offline against the mock-latency sources.
+
+The mock-latency sources answer locally after a simulated provider delay, and
+can inject 429s, errors and capacity limits (see talkpipe.llm.mock_latency).
+This benchmark runs the same prompts through llmPrompt at several
+max_concurrency levels and embeds texts through llmEmbed at several batch
+sizes, reporting wall time, throughput and the simulated server's counters.
+No network access or model server is needed.
+
+Usage:
+    python scripts/benchmarks/benchmark_mock_latency.py [--items 200] \
+        [--model "latency:lognormal,median:0.05,tail_rate:0.01"] [--concurrency 1,4,16]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+_project_root = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(_project_root / "src"))
+
+from talkpipe.llm.chat import LLMPrompt  # noqa: E402
+from talkpipe.llm.embedding import LLMEmbed  # noqa: E402
+from talkpipe.llm.mock_latency import getMockLatencyStats, resetMockLatencyServers  # noqa: E402
+
+
+def _run(label, make_segment, items):
+    # Fresh simulated servers per run; adapters bind to theirs when the segment is built.
+    resetMockLatencyServers()
+    segment = make_segment()
+    start = time.perf_counter()
+    count = sum(1 for _ in segment(items))
+    elapsed = time.perf_counter() - start
+    stats = getMockLatencyStats()[0]
+    print(
+        f"{label:<28} {elapsed:8.2f}s {count / elapsed:9.1f} items/s"
+        f"  calls={stats['completed']:<5} peak_in_flight={stats['peak_in_flight']}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=200)
+    parser.add_argument("--model", default="latency:lognormal,median:0.05,tail_rate:0.01")
+    parser.add_argument("--concurrency", default="1,4,16")
+    parser.add_argument("--batch-sizes", default="1,8,32")
+    args = parser.parse_args()
+
+    prompts = [f"Question number {i}: what is {i} squared?" for i in range(args.items)]
+    print(f"llmPrompt, {args.items} distinct prompts, model '{args.model}'")
+    for level in (int(c) for c in args.concurrency.split(",")):
+        _run(
+            f"max_concurrency={level}",
+            lambda: LLMPrompt(model=args.model, source="mock-latency", multi_turn=False, max_concurrency=level),
+            prompts,
+        )
+
+    embed_model = f"{args.model},per_item:0.001,dimensions:384"
+    print(f"\nllmEmbed, {args.items} distinct texts, model '{embed_model}'")
+    for size in (int(b) for b in args.batch_sizes.split(",")):
+        _run(
+            f"batch_size={size}",
+            lambda: LLMEmbed(model=embed_model, source="mock-latency", batch_size=size),
+            prompts,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Benchmark time to first token with and without streaming.
+
+Starts a local stub of the Ollama /api/chat endpoint that "generates" a reply
+one token at a time with a fixed delay per token.  Streaming requests get
+NDJSON chunks as tokens are produced; non-streaming requests get the whole
+reply once generation finishes, as a real model server would do.
+
+For each mode the benchmark reports the time until the first text is available
+to the caller (TTFT) and the time until the full reply is available, first for
+OllamaPromptAdapter.execute / execute_stream and then for an llmPrompt pipeline
+with stream=True.  No model server is needed.
+
+Usage:
+    python scripts/benchmarks/benchmark_streaming_ttft.py [--tokens 40] [--token-delay-ms 20] [--calls 10]
+"""
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+_project_root = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(_project_root / "src"))
+
+from talkpipe.llm.chat import LLMPrompt  # noqa: E402
+from talkpipe.llm.prompt_adapters import OllamaPromptAdapter  # noqa: E402
+
+
+def _chunk(content, done):
+    return json.dumps({
+        "model": "stub",
+        "created_at": "2024-01-01T00:00:00Z",
+        "message": {"role": "assistant", "content": content},
+        "done": done,
+    }).encode("utf-8") + b"\n"
+
+
+class _StubOllamaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    tokens = 40
+    token_delay = 0.02
+
+    def setup(self):
+        super().setup()
+        # Chunks are small writes; without TCP_NODELAY they can sit in the send buffer.
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        words = [f"tok{i} " for i in range(self.tokens)]
+        if not request.get("stream", True):
+            time.sleep(self.token_delay * self.tokens)
+            body = _chunk("".join(words), True)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for word in words:
+            time.sleep(self.token_delay)
+            self._write_chunk(_chunk(word, False))
+        self._write_chunk(_chunk("", True))
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _write_chunk(self, data):
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def log_message(self, *_args):
+        pass
+
+
+def _time_stream(chunks):
+    """Return (ms to first chunk, ms to last chunk) for an iterator of text."""
+    start = time.perf_counter()
+    first = None
+    for _ in chunks:
+        if first is None:
+            first = time.perf_counter()
+    end = time.perf_counter()
+    return (first - start) * 1000, (end - start) * 1000
+
+
+def _blocking(adapter, prompt):
+    # Without streaming the whole reply is the first text the caller sees.
+    yield adapter.execute(prompt)
+
+
+def _report(label, samples):
+    ttft = statistics.median(s[0] for s in samples)
+    total = statistics.median(s[1] for s in samples)
+    print(f"{label:<36} TTFT p50 {ttft:8.1f} ms   full reply p50 {total:8.1f} ms")
+    return ttft
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tokens", type=int, default=40, help="Tokens per reply (default 40).")
+    parser.add_argument("--token-delay-ms", type=float, default=20.0, help="Stub delay per token (default 20).")
+    parser.add_argument("--calls", type=int, default=10, help="Timed calls per scenario (default 10).")
+    args = parser.parse_args()
+
+    _StubOllamaHandler.tokens = args.tokens
+    _StubOllamaHandler.token_delay = args.token_delay_ms / 1000
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubOllamaHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    try:
+        adapter = OllamaPromptAdapter("stub", server_url=url, multi_turn=False)
+        adapter.execute("warm up")
+
+        blocking = _report(
+            "OllamaPromptAdapter.execute",
+            [_time_stream(_blocking(adapter, "hello")) for _ in range(args.calls)],
+        )
+        streamed = _report(
+            "OllamaPromptAdapter.execute_stream",
+            [_time_stream(adapter.execute_stream("hello")) for _ in range(args.calls)],
+        )
+        # llmPrompt has no server_url parameter; point the ollama client at the stub instead.
+        os.environ["OLLAMA_HOST"] = url
+        segment = LLMPrompt(model="stub", source="ollama", multi_turn=False, stream=True)
+        _report(
+            "llmPrompt(stream=True)",
+            [_time_stream(segment(["hello"])) for _ in range(args.calls)],
+        )
+        print(f"\nTime to first token improved {blocking / streamed:.1f}x "
+              f"({blocking - streamed:.1f} ms sooner)")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Time llmEmbed's token estimate and max_estimated_tokens truncation on large texts.
+
+Compares the per-character estimate llmEmbed used before (re-run on every
+candidate prefix by the truncation bisect) with the vectorized estimate_tokens
+and the prefix-sum TokenEstimate the truncation now builds once per text.  Runs
+on English prose, prose mixed with CJK and base64-like encoded text of several
+sizes, and checks that both versions agree.
+
+Usage:
+    python scripts/benchmarks/benchmark_token_estimation.py [--megabytes 1,4] \
+        [--budget 8192] [--no-reference]
+"""
+
+import argparse
+import base64
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+_project_root = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(_project_root / "src"))
+
+from talkpipe.llm.embedding import LLMEmbed, TokenEstimate, estimate_tokens  # noqa: E402
+
+_WORDS = "the quick brown fox jumps over a lazy dog while seven wizards quietly judge boxing matches".split()
+
+
+def _reference_estimate(text):
+    """The per-character estimate llmEmbed used before prefix sums."""
+    chars = len(text)
+    words = len(re.findall(r"\S+", text))
+    non_ascii = sum(1 for char in text if not char.isascii())
+    non_ascii_floor = chars * 1.5 if chars and non_ascii / chars >= 0.05 else non_ascii + (chars - non_ascii) / 4
+    encoded = 0.0
+    letters = [char for char in text if char.isascii() and char.isalpha()]
+    if chars >= 80 and len(letters) >= chars * 0.55:
+        vowel_ratio = sum(1 for char in letters if char in "aeiouAEIOU") / len(letters)
+        uppercase_ratio = sum(1 for char in letters if char.isupper()) / len(letters)
+        suspicious_ratio = sum(1 for char in text if char in "\\+^~[]{}|") / chars
+        if suspicious_ratio >= 0.01 and uppercase_ratio >= 0.35 and vowel_ratio <= 0.30:
+            encoded = chars * 0.75
+    return int(max(words * 1.3, chars / 4, non_ascii_floor, encoded))
+
+
+def _reference_truncate(text, budget):
+    if _reference_estimate(text) <= budget:
+        return text
+    low, high = 0, len(text)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if _reference_estimate(text[-mid:]) <= budget:
+            low = mid
+        else:
+            high = mid - 1
+    return text[-low:] if low else ""
+
+
+def _documents(size):
+    rng = random.Random(0)
+    english = " ".join(rng.choice(_WORDS) for _ in range(size // 5))[:size]
+    cjk = "".join(rng.choice(_WORDS) + " " if rng.random() < 0.9 else "汽車行駛速度很快" for _ in range(size // 5))[:size]
+    encoded = base64.b64encode(rng.randbytes(size)).decode("ascii")[:size]
+    return {"english": english, "cjk-mixed": cjk, "base64": encoded}
+
+
+def _timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--megabytes", default="1,4")
+    parser.add_argument("--budget", type=int, default=8192, help="max_estimated_tokens for the truncation runs")
+    parser.add_argument("--no-reference", action="store_true", help="skip the slow per-character reference")
+    args = parser.parse_args()
+
+    embedder = LLMEmbed(model="benchmark", source="mock-latency", max_estimated_tokens=args.budget, truncate_side="tail")
+    print(f"{'document':<18} {'estimate':>10} {'reference':>10} {'prefix sums':>12} {'truncate':>10} {'reference':>10}")
+    for megabytes in (float(m) for m in args.megabytes.split(",")):
+        for name, text in _documents(int(megabytes * 1_000_000)).items():
+            tokens, estimate_seconds = _timed(estimate_tokens, text)
+            _, prefix_seconds = _timed(TokenEstimate, text)
+            truncated, truncate_seconds = _timed(embedder._truncate_to_estimated_token_budget, text)
+            reference = "-"
+            reference_truncate = "-"
+            if not args.no_reference:
+                expected, seconds = _timed(_reference_estimate, text)
+                assert expected == tokens, (name, expected, tokens)
+                reference = f"{seconds:9.3f}s"
+                expected, seconds = _timed(_reference_truncate, text, args.budget)
+                assert expected == truncated, name
+                reference_truncate = f"{seconds:9.3f}s"
+            print(
+                f"{name + f' {megabytes:g}MB':<18} {estimate_seconds:9.3f}s {reference:>10} "
+                f"{prefix_seconds:11.3f}s {truncate_seconds:9.3f}s {reference_truncate:>10}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,7 @@ import logging
 import argparse
 import sys
 from talkpipe.chatterlang import compiler
+from talkpipe.chatterlang.explain import analyze_script, explain_script, format_plan, plan_to_json
 from talkpipe.pipe.core import RuntimeComponent
 from talkpipe.util import config
 from talkpipe.util.config import load_module_file, load_script, parse_unknown_args, add_config_values
@@ -25,6 +26,10 @@ def main():
         --load-module: Path(s) to custom module file(s) to import before running the script (can be specified multiple times)  
         --logger_levels: Logger levels in format 'logger:level,logger:level,...'
         --logger_files: Logger files in format 'logger:file,logger:file,...'
+        --explain: Print the compiled plan instead of running the script
+        --analyze: Run the script and print the plan with per-stage measurements
+        --plan-format: Plan output format, text (default) or json
+        --plan-output: File to write the plan to instead of stdout
 
     Raises:
         ValueError: If the script cannot be found or loaded
@@ -39,6 +44,10 @@ def main():
     parser.add_argument("--logger_levels", type=str, help="Logger levels in format 'logger:level,logger:level,...'")
     parser.add_argument("--logger_files", type=str, help="Logger files in format 'logger:file,logger:file,...'")
     parser.add_argument("--verbose", action='store_true', help="Show the full Python traceback on script compile and runtime errors (for debugging), instead of just the error message.")
+    parser.add_argument("--explain", action='store_true', help="Print the compiled plan (pipelines, forks, loops, stages and resolved parameters) without running the script.")
+    parser.add_argument("--analyze", action='store_true', help="Run the script and print the plan with per-stage item counts, throughput, latency percentiles and peak memory.")
+    parser.add_argument("--plan-format", choices=["text", "json"], default="text", help="Output format for --explain/--analyze (default: text).")
+    parser.add_argument("--plan-output", type=str, default=None, help="Write the --explain/--analyze plan to this file instead of stdout.")
 
     # Parse known arguments and capture unknown ones as potential constants
     args, unknown_args = parser.parse_known_args()
@@ -60,6 +69,10 @@ def main():
     
     script = load_script(script_input)
 
+    if getattr(args, "explain", False) or getattr(args, "analyze", False):
+        _print_plan(script, args)
+        return
+
     # Compile script - configuration values are now accessible via $key syntax
     try:
         compiled = compiler.compile(script).as_function()
@@ -78,5 +91,23 @@ def main():
         sys.exit(1)
 
 
+def _print_plan(script: str, args):
+    """Explain or analyze the script and emit the plan in the requested format."""
+    try:
+        plan = analyze_script(script) if args.analyze else explain_script(script)
+    except Exception as e:
+        if args.verbose:
+            raise
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    rendered = plan_to_json(plan) if args.plan_format == "json" else format_plan(plan)
+    if args.plan_output:
+        with open(args.plan_output, "w", encoding="utf-8") as f:
+            f.write(rendered + "\n")
+    else:
+        print(rendered)
+
+
 if __name__ == '__main__':
     main()
@@ -29,6 +29,7 @@ from talkpipe.pipe.core import AbstractSource, RuntimeComponent
 from talkpipe.chatterlang import register_source
 from talkpipe.chatterlang import compile
 from talkpipe.chatterlang.compiler import CompileError
+from talkpipe.llm.content import StreamChunk
 from talkpipe.util.config import get_config, load_script
 from talkpipe.util.config import load_module_file, parse_unknown_args, add_config_values
 from talkpipe.util.data_manipulation import extract_property
@@ -56,7 +57,8 @@ class UserSession:
         """Compile a Chatterlang script for this session"""
         # Compile script - configuration values are accessible via $key syntax
         self.compiled_script = compile(script_content)
-        self.compiled_script = self.compiled_script.as_function(single_in=True, single_out=False)
+        # Lazy so streamed chunks reach the SSE stream while the script is still running.
+        self.compiled_script = self.compiled_script.as_function(single_in=True, single_out=False, lazy=True)
         logger.info(f"Session {self.session_id}: Script compiled successfully")
     
     def add_to_history(self, entry: dict):
@@ -424,15 +426,21 @@ class ChatterlangServer:
     async def _generate_output_stream(self, session: UserSession):
         """Generate Server-Sent Events stream for a specific session"""
         while True:
-            try:
-                # Check for new output in this session's queue
-                output = session.output_queue.get(timeout=0.1)
+            # Forward everything queued since the last tick so streamed chunks are not
+            # rate-limited to one per tick, and never block the event loop waiting.
+            sent = False
+            while True:
+                try:
+                    output = session.output_queue.get_nowait()
+                except Empty:
+                    break
                 yield f"data: {json.dumps(output)}\n\n"
-            except Empty:
+                sent = True
+            if not sent:
                 # Send heartbeat to keep connection alive
                 yield f": heartbeat\n\n"
             
-            await asyncio.sleep(0.1)
+            await asyncio.sleep(0.05)
    
     async def _process_json(self, data: Dict[str, Any], session: UserSession) -> DataResponse:
         """Process JSON data and return response"""
@@ -447,22 +455,15 @@ class ChatterlangServer:
                 result = processor(data, session)
             
             # Collect all output items for the API response
-            output_items = []
-            
-            # If result is iterable (like a generator), process each item
             if hasattr(result, '__iter__') and not isinstance(result, (str, bytes, dict)):
-                try:
-                    for item in result:
-                        if item is not None:
-                            output_items.append(item)
-                except Exception as e:
-                    error_msg = f"Error processing iterator: {str(e)}"
-                    session.add_output(error_msg, "error")
-                    output_items.append({"error": error_msg})
+                # Script errors keep failing the request (HTTP 500), as they did when
+                # scripts were drained eagerly; other iterators report errors inline.
+                output_items = await asyncio.to_thread(
+                    self._collect_output_items, result, session, not session.compiled_script
+                )
             else:
                 # Single result
-                if result is not None:
-                    output_items.append(result)
+                output_items = [result] if result is not None else []
 
             # Do not add response items to output_queue - the stream UI displays from the
             # /process response to avoid duplicates. SSE output_queue is only used for errors.
@@ -490,6 +491,44 @@ class ChatterlangServer:
             logger.error(f"Port {self.port} Session {session.session_id}: {error_msg}")
             raise HTTPException(status_code=500, detail=error_msg)
     
+    def _collect_output_items(self, result, session: UserSession, catch_errors: bool = True) -> list:
+        """Drain an iterable result, forwarding streamed chunks to the session's SSE queue.
+
+        Consecutive StreamChunk items with the same stream_id are sent as "chunk"
+        events as they arrive and joined into a single output item for the
+        /process response.
+        """
+        output_items = []
+        stream_id, parts = None, []
+
+        def flush_stream():
+            if parts:
+                output_items.append("".join(parts))
+                parts.clear()
+
+        try:
+            for item in result:
+                if isinstance(item, StreamChunk):
+                    if item.stream_id != stream_id:
+                        flush_stream()
+                        stream_id = item.stream_id
+                    parts.append(str(item))
+                    session.add_output(str(item), "chunk")
+                    continue
+                flush_stream()
+                stream_id = None
+                if item is not None:
+                    output_items.append(item)
+            flush_stream()
+        except Exception as e:
+            if not catch_errors:
+                raise
+            flush_stream()
+            error_msg = f"Error processing iterator: {str(e)}"
+            session.add_output(error_msg, "error")
+            output_items.append({"error": error_msg})
+        return output_items
+
     def _get_history(self, limit: int, session: UserSession) -> DataHistory:
         """Get processing history for a session"""
         entries = session.history[-limit:] if limit > 0 else session.history
@@ -1128,6 +1167,11 @@ class ChatterlangServer:
                             if (data.type === 'user' && data.output === lastUserMessage) {{
                                 return;
                             }}
+                            // Streamed chunks render live; the final text comes from the /process response
+                            if (data.type === 'chunk') {{
+                                appendStreamChunk(data.output, data.timestamp);
+                                return;
+                            }}
                             // Buffer SSE during /process request - we'll display from response to avoid duplicates
                             if (pendingRequest && data.type === 'response') {{
                                 sseBuffer.push(data);
@@ -1204,6 +1248,31 @@ class ChatterlangServer:
                     }}
                 }}
                 
+                let streamingMessage = null;  // Message div receiving streamed chunks
+                
+                function appendStreamChunk(text, timestamp) {{
+                    if (!streamingMessage) {{
+                        addMessage('', 'response', timestamp);
+                        const messages = document.getElementById('chatMessages').querySelectorAll('.message.response');
+                        streamingMessage = messages[messages.length - 1];
+                        streamingMessage.classList.add('streaming');
+                        streamingMessage.dataset.text = '';
+                    }}
+                    streamingMessage.dataset.text += text;
+                    streamingMessage.querySelector('.message-content').textContent = streamingMessage.dataset.text;
+                    if (autoScroll) {{
+                        const messagesContainer = document.getElementById('chatMessages');
+                        messagesContainer.scrollTop = messagesContainer.scrollHeight;
+                    }}
+                }}
+                
+                function clearStreamingMessage() {{
+                    if (streamingMessage) {{
+                        streamingMessage.remove();
+                        streamingMessage = null;
+                    }}
+                }}
+                
                 function clearChat() {{
                     const messagesContainer = document.getElementById('chatMessages');
                     messagesContainer.innerHTML = '<div class="initial-message">Chat cleared. Send a message to continue.</div>';
@@ -1317,6 +1386,7 @@ class ChatterlangServer:
                         
                         // Display results from response - more reliable than SSE for batch results
                         // (avoids race where SSE may not deliver all items before next interaction)
+                        clearStreamingMessage();
                         if (result.data && result.data.output && Array.isArray(result.data.output)) {{
                             const timestamp = result.timestamp || new Date().toISOString();
                             for (const item of result.data.output) {{
@@ -1336,6 +1406,7 @@ class ChatterlangServer:
                         status.className = 'status error';
                         status.style.display = 'block';
                         
+                        clearStreamingMessage();
                         addMessage(`Error: ${{error.message}}`, 'error', new Date().toISOString());
                         lastUserMessage = null; // Clear on error
                         sseBuffer = [];
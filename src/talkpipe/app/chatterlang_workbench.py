@@ -14,7 +14,7 @@ from talkpipe.chatterlang import registry
 from talkpipe.chatterlang.compiler import compile
 from talkpipe.util.config import load_module_file, parse_unknown_args, add_config_values
 from talkpipe.app.chatterlang_reference_generator import analyze_registered_items, generate_html, generate_text
-from talkpipe.app.workbench import reference_api, workspace_api, suggest_api
+from talkpipe.app.workbench import reference_api, workspace_api, suggest_api, explain_api
 
 logger = logging.getLogger(__name__)
 
@@ -59,6 +59,7 @@ WORKBENCH_STATIC_DIR = Path(__file__).parent / 'static' / 'workbench'
 app.include_router(reference_api.router)
 app.include_router(workspace_api.router)
 app.include_router(suggest_api.router)
+app.include_router(explain_api.router)
 
 # Configure logging
 log_queue = queue.Queue()
@@ -32,6 +32,9 @@ def main():
     parser.add_argument('--embedding_fail_on_error', action='store_true', help='If set, fail on error when embedding', default=False)
     parser.add_argument('--on_token_overflow', type=str, choices=['error', 'truncate', 'chunk_pool'], default='truncate',
                         help='What to do when a chunk is too long for the embedding model: error (abort the run), truncate (shrink and retry; default), or chunk_pool (split, embed, and mean-pool)')
+    parser.add_argument('--embedding_batch_size', type=int, default=1, help='Number of chunks to embed per provider call (default: 1)')
+    parser.add_argument('--embedding_max_concurrency', type=int, default=1,
+                        help='Maximum number of embedding batches in flight at once while documents are read (default: 1)')
 
     # Other LanceDB options
     parser.add_argument('--table_name', type=str, default='docs', help='Name of the table to create (default: "docs")')
@@ -100,6 +103,8 @@ def main():
             batch_size=args.batch_size,
             fail_on_error=args.embedding_fail_on_error,
             on_token_overflow=args.on_token_overflow,
+            embedding_batch_size=args.embedding_batch_size,
+            embedding_max_concurrency=args.embedding_max_concurrency,
         )
     except RagIngestError as exc:
         print(f"\nerror: {exc}", file=sys.stderr)
@@ -26,7 +26,7 @@ export const editor = createEditor($("editor"), {
 
 // --- Bottom tabs ----------------------------------------------------------
 
-const tabPanes = { output: $("output"), logs: $("log-content") };
+const tabPanes = { output: $("output"), logs: $("log-content"), plan: $("plan-content") };
 
 for (const tab of document.querySelectorAll("#bottom-tabs .tab")) {
   tab.addEventListener("click", () => {
@@ -251,6 +251,40 @@ fetch("/api/lint", {
   .then((r) => { if (r.ok) $("checkButton").hidden = false; })
   .catch(() => {});
 
+// --- Explain / analyze plan -----------------------------------------------
+
+async function explainScript(analyze) {
+  setBusy(true, analyze ? "Analyzing…" : "Explaining…");
+  const pane = $("plan-content");
+  selectTab("plan");
+  pane.textContent = "";
+  try {
+    const response = await fetch("/api/explain", {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({ script: editor.getValue(), analyze }),
+    });
+    const data = await response.json();
+    if (!response.ok) throw new Error(data.detail || "Unknown error");
+    for (const line of data.text.split("\n")) {
+      const entry = document.createElement("div");
+      entry.className = "plan-line";
+      entry.textContent = line;
+      pane.appendChild(entry);
+    }
+  } catch (error) {
+    const entry = document.createElement("div");
+    entry.className = "output-item output-error";
+    entry.textContent = "Error: " + error.message;
+    pane.appendChild(entry);
+  } finally {
+    setBusy(false);
+  }
+}
+
+$("explainButton").addEventListener("click", () => explainScript(false));
+$("analyzeButton").addEventListener("click", () => explainScript(true));
+
 // --- Examples menu ---------------------------------------------------------
 
 async function loadExamples() {
@@ -0,0 +1,40 @@
+"""Plan explanation endpoint for the workbench.
+
+``POST /api/explain`` returns the compiled plan of a script (see
+``talkpipe.chatterlang.explain``) as both JSON and text. With
+``analyze=true`` the script is also run with per-stage instrumentation, so
+it has the same side effects as pressing Run.
+"""
+
+import json
+import logging
+
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel
+
+from talkpipe.chatterlang.compiler import CompileError
+from talkpipe.chatterlang.explain import analyze_script, explain_script, format_plan, plan_to_json
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api")
+
+
+class ExplainRequest(BaseModel):
+    script: str
+    analyze: bool = False
+
+
+@router.post("/explain")
+def api_explain(request: ExplainRequest):
+    if not request.script.strip():
+        raise HTTPException(status_code=400, detail="Script content is required")
+    try:
+        plan = analyze_script(request.script) if request.analyze else explain_script(request.script)
+    except CompileError as e:
+        raise HTTPException(status_code=400, detail=f"Compilation error: {e}")
+    except Exception as e:
+        logger.error(f"Explain failed: {e}")
+        raise HTTPException(status_code=400, detail=f"Execution error: {e}")
+    # Round-trip through the diffable serializer so arbitrary parameter values stay JSON-safe.
+    return {"plan": json.loads(plan_to_json(plan)), "text": format_plan(plan)}
@@ -349,6 +349,15 @@ def _resolve_params(params, runtime):
     """ Resolve the parameters for a segment """
     return {k: _resolve_value(params[k], runtime) for k in params}
 
+def _attach_profiler(runtime, component, node):
+    """Let the runtime's profiler (if any) instrument a freshly built component.
+
+    The parsed node is passed along so the profiler can map measurements back
+    onto the plan produced by :mod:`talkpipe.chatterlang.explain`.
+    """
+    if runtime.profiler is not None:
+        runtime.profiler.attach(component, node)
+
 @compile.register(ParsedPipeline)
 def _(pipeline: ParsedPipeline, runtime: RuntimeComponent) -> Pipeline:
     """ Compile a parsed pipeline into a Pipeline object 
@@ -385,6 +394,7 @@ def _(pipeline: ParsedPipeline, runtime: RuntimeComponent) -> Pipeline:
                 ) from None
             logger.debug(f"Created registered input {source_name}")
         ans.runtime = runtime
+        _attach_profiler(runtime, ans, pipeline.input_node)
 
     logger.debug(f"Processing {len(pipeline.transforms)} transforms")
     for transform in pipeline.transforms:
@@ -414,6 +424,7 @@ def _(pipeline: ParsedPipeline, runtime: RuntimeComponent) -> Pipeline:
             logger.error(f"Unknown segment type: {transform}")
             raise ValueError(f"Unknown segment type: {transform}")
         next_transform.runtime = runtime
+        _attach_profiler(runtime, next_transform, transform)
 
         if ans is None:
             ans = next_transform
@@ -480,24 +491,34 @@ def remove_comments(text: str) -> str:
             i += 1
     return "".join(result)
 
-@compile.register(str)
-def _(script: str, runtime: RuntimeComponent = None) -> Callable:
-    """ Compile a script into a callable function 
-    
+def parse_script(script: str) -> ParsedScript:
+    """ Parse a script into its ParsedScript form without compiling it
+
     Args:
-        script (str): The script to compile
-        v_store (VariableStore): The variable store to use
+        script (str): The script to parse
+
+    Raises:
+        CompileError: If the script has a syntax error
     """
     preprocessed_script = remove_comments(script)
     try:
-        parsed = script_parser.parse(preprocessed_script)
+        return script_parser.parse(preprocessed_script)
     except ParseError as e:
         line, column = parse_error_location(preprocessed_script, e)
         raise CompileError(
             _format_parse_error(preprocessed_script, e),
             line=line, column=column, kind="syntax",
         ) from None
-    return compile(parsed, runtime)
+
+@compile.register(str)
+def _(script: str, runtime: RuntimeComponent = None) -> Callable:
+    """ Compile a script into a callable function 
+    
+    Args:
+        script (str): The script to compile
+        v_store (VariableStore): The variable store to use
+    """
+    return compile(parse_script(script), runtime)
 
 class ArrowForkSegment:
     """A coordinator for named forks using ThreadedQueue.
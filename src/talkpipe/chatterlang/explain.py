@@ -0,0 +1,421 @@
+"""Explain and analyze the plan the compiler builds for a chatterlang script.
+
+``explain_script`` describes a script without running it: its pipelines,
+loops, forks, the stages in each pipeline, and the parameters each stage is
+constructed with after constants are resolved.  ``analyze_script`` builds the
+same plan, then compiles and runs the script with every stage instrumented,
+adding per-stage item counts, throughput, latency percentiles and the peak
+memory of the run.
+
+Both return plain dictionaries so the plan can be written as JSON and diffed
+between releases; ``format_plan`` renders the same data as text.
+"""
+
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+import inspect
+import json
+import logging
+import re
+import threading
+import time
+import tracemalloc
+
+import numpy as np
+
+from talkpipe.chatterlang import registry
+from talkpipe.chatterlang import compiler
+from talkpipe.chatterlang.parsers import (
+    ForkNode,
+    InputNode,
+    ParsedLoop,
+    ParsedPipeline,
+    ParsedScript,
+    SegmentNode,
+    VariableName,
+)
+from talkpipe.pipe.core import AbstractSource, RuntimeComponent
+
+logger = logging.getLogger(__name__)
+
+LATENCY_PERCENTILES = (50, 90, 95, 99)
+
+
+def _component_path(component) -> str:
+    """Dotted import path for a component class, preferring the decorated function."""
+    original = getattr(component, "_original_func", None)
+    target = original if original is not None else component
+    return f"{target.__module__}.{target.__qualname__}"
+
+
+def _default_params(component, given: Dict[str, Any]) -> Dict[str, Any]:
+    """Constructor defaults for parameters the script did not set explicitly."""
+    try:
+        parameters = inspect.signature(component).parameters.values()
+    except (TypeError, ValueError):
+        return {}
+    return {
+        p.name: p.default
+        for p in parameters
+        if p.default is not inspect.Parameter.empty
+        and p.kind in (p.POSITIONAL_OR_KEYWORD, p.KEYWORD_ONLY)
+        and p.name not in given
+    }
+
+
+class _PlanBuilder:
+    """Walks a ParsedScript and produces the plan dictionary.
+
+    Keeps each parsed node next to its stage entry so a profiler can attach
+    measurements to the right stage after compilation.
+    """
+
+    def __init__(self, runtime: RuntimeComponent):
+        self.runtime = runtime
+        self.stages: List[tuple] = []
+
+    def _register(self, node, stage: dict) -> dict:
+        self.stages.append((node, stage))
+        return stage
+
+    def _registered_stage(self, kind: str, name: str, reg, node) -> dict:
+        try:
+            component = reg.get(name)
+        except KeyError:
+            raise compiler.CompileError(
+                compiler._not_found_message(kind, name, reg),
+                kind="unknown_name", bad_name=name,
+            ) from None
+        params = compiler._resolve_params(node.params, self.runtime)
+        return {
+            "name": name,
+            "component": _component_path(component),
+            "params": params,
+            "defaults": _default_params(component, params),
+        }
+
+    def source_stage(self, stage_id: str, node: InputNode) -> dict:
+        if isinstance(node.source, str):
+            stage = {"name": "echo", "component": "talkpipe.pipe.io.echo",
+                     "params": {"data": node.source}, "defaults": {}}
+        elif node.is_variable:
+            stage = {"name": f"@{node.source.name}", "component": "talkpipe.chatterlang.compiler.VariableSource",
+                     "params": {}, "defaults": {}}
+        else:
+            stage = self._registered_stage("Source", node.source.name, registry.input_registry, node)
+        return self._register(node, {"id": stage_id, "role": "source", "buffers": False, **stage})
+
+    def transform_stage(self, stage_id: str, node) -> dict:
+        if isinstance(node, VariableName):
+            # Variable stores drain their whole input before emitting anything.
+            stage = {"id": stage_id, "role": "variable", "name": f"@{node.name}",
+                     "component": "talkpipe.chatterlang.compiler.VariableSetSegment",
+                     "params": {}, "defaults": {}, "buffers": True}
+        elif isinstance(node, SegmentNode):
+            stage = {"id": stage_id, "role": "segment", "buffers": False,
+                     **self._registered_stage("Segment", node.operation.name, registry.segment_registry, node)}
+        elif isinstance(node, ForkNode):
+            stage = {"id": stage_id, "role": "fork", "name": "fork",
+                     "component": "talkpipe.pipe.fork.ForkSegment", "mode": "broadcast",
+                     "params": compiler._resolve_params(node.params, self.runtime), "defaults": {},
+                     "buffers": False,
+                     "branches": [self.pipeline(f"{stage_id}/{b}", branch)
+                                  for b, branch in enumerate(node.branches)]}
+        else:
+            raise ValueError(f"Unknown segment type: {node}")
+        return self._register(node, stage)
+
+    def pipeline(self, path: str, pipeline: ParsedPipeline) -> dict:
+        stages = []
+        if pipeline.input_node is not None:
+            stages.append(self.source_stage(f"{path}:0", pipeline.input_node))
+        for transform in pipeline.transforms:
+            stages.append(self.transform_stage(f"{path}:{len(stages)}", transform))
+        return {
+            "id": path,
+            "kind": "pipeline",
+            "reads_from_fork": pipeline.fork_source,
+            "feeds_fork": pipeline.fork_target,
+            "stages": stages,
+            "fused_groups": _fused_groups(stages),
+        }
+
+    def loop(self, path: str, loop: ParsedLoop) -> dict:
+        return {
+            "id": path,
+            "kind": "loop",
+            "iterations": loop.iterations,
+            "pipelines": [self.entry(f"{path}.{j}", p) for j, p in enumerate(loop.pipelines)],
+        }
+
+    def entry(self, path: str, entry) -> dict:
+        if isinstance(entry, ParsedLoop):
+            return self.loop(path, entry)
+        return self.pipeline(path, entry)
+
+    def script(self, parsed: ParsedScript) -> dict:
+        entries = [self.entry(str(idx), p) for idx, p in enumerate(parsed.pipelines)]
+        forks: Dict[str, dict] = {}
+        for entry in entries:
+            if entry["kind"] != "pipeline":
+                continue
+            if entry["feeds_fork"]:
+                forks.setdefault(entry["feeds_fork"], {"producers": [], "consumers": []})["producers"].append(entry["id"])
+            if entry["reads_from_fork"]:
+                forks.setdefault(entry["reads_from_fork"], {"producers": [], "consumers": []})["consumers"].append(entry["id"])
+        return {
+            "constants": dict(self.runtime.const_store),
+            "pipelines": entries,
+            "forks": [{"name": name, **links} for name, links in sorted(forks.items())],
+        }
+
+
+def _fused_groups(stages: List[dict]) -> List[List[str]]:
+    """Split a pipeline's stages into runs that stream items without buffering.
+
+    Stages chained with ``|`` execute as one pull-based generator chain, so
+    they are effectively fused; a variable store drains its input first and
+    ends the run it belongs to.
+    """
+    groups: List[List[str]] = []
+    current: List[str] = []
+    for stage in stages:
+        current.append(stage["id"])
+        if stage["buffers"]:
+            groups.append(current)
+            current = []
+    if current:
+        groups.append(current)
+    return groups
+
+
+class _TimedIterator:
+    """Iterator wrapper that counts items and accumulates time spent upstream."""
+
+    def __init__(self, source: Iterable):
+        self._source = iter(source)
+        self.count = 0
+        self.elapsed = 0.0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        start = time.perf_counter()
+        try:
+            item = next(self._source)
+        finally:
+            self.elapsed += time.perf_counter() - start
+        self.count += 1
+        return item
+
+
+class _StageStats:
+    def __init__(self):
+        self.items_in = 0
+        self.latencies: List[float] = []
+        self.first_start: Optional[float] = None
+        self.last_end: Optional[float] = None
+
+    def as_dict(self) -> dict:
+        latencies = np.asarray(self.latencies, dtype=float)
+        busy = float(latencies.sum()) if latencies.size else 0.0
+        wall = (self.last_end - self.first_start) if self.first_start is not None and self.last_end is not None else 0.0
+        ans = {
+            "items_in": self.items_in,
+            "items_out": int(latencies.size),
+            "busy_seconds": busy,
+            "wall_seconds": wall,
+            "throughput_items_per_sec": (latencies.size / busy) if busy > 0 else None,
+            "latency_ms": {},
+        }
+        if latencies.size:
+            for pct, value in zip(LATENCY_PERCENTILES, np.percentile(latencies, LATENCY_PERCENTILES)):
+                ans["latency_ms"][f"p{pct}"] = float(value) * 1000
+            ans["latency_ms"]["max"] = float(latencies.max()) * 1000
+        return ans
+
+
+class StageProfiler:
+    """Instruments compiled components and records per-stage measurements.
+
+    Assigned to ``RuntimeComponent.profiler`` before compiling; the compiler
+    calls :meth:`attach` for every source and segment it builds.  Latency is
+    the time a stage spends producing each output item, excluding the time
+    spent waiting on its upstream.
+    """
+
+    def __init__(self):
+        self._stats: Dict[int, _StageStats] = {}
+        self._lock = threading.Lock()
+
+    def stats_for(self, node) -> Optional[dict]:
+        stats = self._stats.get(id(node))
+        return stats.as_dict() if stats is not None else None
+
+    def attach(self, component, node) -> None:
+        with self._lock:
+            stats = self._stats.setdefault(id(node), _StageStats())
+        if isinstance(component, AbstractSource):
+            original = component.generate
+            component.generate = lambda: self._measure(stats, None, lambda _: original())
+        else:
+            original = component.transform
+            component.transform = lambda input_iter=None: self._measure(stats, input_iter, original)
+
+    def _measure(self, stats: _StageStats, input_iter, produce) -> Iterator[Any]:
+        upstream = _TimedIterator(input_iter) if input_iter is not None else None
+        output = iter(produce(upstream))
+        while True:
+            start = time.perf_counter()
+            waited = upstream.elapsed if upstream is not None else 0.0
+            try:
+                item = next(output)
+            except StopIteration:
+                break
+            finally:
+                end = time.perf_counter()
+                with self._lock:
+                    if stats.first_start is None:
+                        stats.first_start = start
+                    stats.last_end = end
+                    if upstream is not None:
+                        stats.items_in += upstream.count
+                        upstream.count = 0
+            latency = (end - start) - ((upstream.elapsed if upstream is not None else 0.0) - waited)
+            with self._lock:
+                stats.latencies.append(max(0.0, latency))
+            yield item
+
+
+def explain_script(script: str, runtime: RuntimeComponent = None) -> dict:
+    """Describe the compiled plan for a script without running it.
+
+    Components are not instantiated, so explaining a script never opens
+    files, connections or models.
+
+    Raises:
+        CompileError: If the script cannot be parsed or names unknown components.
+    """
+    runtime = runtime or RuntimeComponent()
+    parsed = compiler.parse_script(script)
+    runtime.add_constants(parsed.constants, override=False)
+    return _PlanBuilder(runtime).script(parsed)
+
+
+def analyze_script(script: str, runtime: RuntimeComponent = None, input_items: Iterable = None) -> dict:
+    """Run a script with per-stage instrumentation and return its annotated plan.
+
+    Each stage in the plan gains a ``stats`` entry and the plan gains a
+    ``run`` entry with the total wall time, the number of items the script
+    emitted and the peak traced memory.  Script output is discarded.
+    """
+    runtime = runtime or RuntimeComponent()
+    parsed = compiler.parse_script(script)
+    runtime.add_constants(parsed.constants, override=False)
+    builder = _PlanBuilder(runtime)
+    plan = builder.script(parsed)
+
+    profiler = StageProfiler()
+    runtime.profiler = profiler
+    already_tracing = tracemalloc.is_tracing()
+    if not already_tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    start = time.perf_counter()
+    try:
+        compiled = compiler.compile(parsed, runtime)
+        items_out = sum(1 for _ in compiled(list(input_items or [])))
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        runtime.profiler = None
+        if not already_tracing:
+            tracemalloc.stop()
+
+    for node, stage in builder.stages:
+        stage["stats"] = profiler.stats_for(node)
+    plan["run"] = {"wall_seconds": elapsed, "items_out": items_out, "peak_memory_bytes": peak}
+    return plan
+
+
+_ADDRESS = re.compile(r" at 0x[0-9a-fA-F]+")
+
+
+def _stable_json_value(value: Any) -> Any:
+    """JSON stand-in for a value json cannot encode that is the same on every run."""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=repr)
+    # Default reprs embed memory addresses, e.g. "<function f at 0x7f...>".
+    return _ADDRESS.sub("", repr(value))
+
+
+def plan_to_json(plan: dict) -> str:
+    """Serialize a plan to stable, diffable JSON."""
+    return json.dumps(plan, indent=2, sort_keys=True, default=_stable_json_value)
+
+
+def _format_params(params: Dict[str, Any]) -> str:
+    return ", ".join(f"{k}={v!r}" for k, v in params.items())
+
+
+def _format_stats(stats: Optional[dict]) -> str:
+    if not stats:
+        return "not run"
+    throughput = stats["throughput_items_per_sec"]
+    parts = [
+        f"in={stats['items_in']}",
+        f"out={stats['items_out']}",
+        f"busy={stats['busy_seconds']:.4f}s",
+        f"rate={throughput:.1f}/s" if throughput is not None else "rate=n/a",
+    ]
+    parts.extend(f"{k}={v:.3f}ms" for k, v in stats["latency_ms"].items())
+    return " ".join(parts)
+
+
+def _format_entry(entry: dict, indent: int, lines: List[str]) -> None:
+    pad = "  " * indent
+    if entry["kind"] == "loop":
+        lines.append(f"{pad}loop {entry['id']} ({entry['iterations']} times)")
+        for inner in entry["pipelines"]:
+            _format_entry(inner, indent + 1, lines)
+        return
+    links = []
+    if entry["reads_from_fork"]:
+        links.append(f"reads {entry['reads_from_fork']}")
+    if entry["feeds_fork"]:
+        links.append(f"feeds {entry['feeds_fork']}")
+    suffix = f" ({', '.join(links)})" if links else ""
+    lines.append(f"{pad}pipeline {entry['id']}{suffix}")
+    if len(entry["fused_groups"]) > 1:
+        groups = " | ".join("+".join(group) for group in entry["fused_groups"])
+        lines.append(f"{pad}  fused: {groups}")
+    for stage in entry["stages"]:
+        params = _format_params(stage["params"])
+        lines.append(f"{pad}  [{stage['id']}] {stage['role']} {stage['name']}[{params}] -> {stage['component']}")
+        if "stats" in stage:
+            lines.append(f"{pad}      {_format_stats(stage['stats'])}")
+        for branch in stage.get("branches", []):
+            _format_entry(branch, indent + 2, lines)
+
+
+def format_plan(plan: dict) -> str:
+    """Render a plan from explain_script or analyze_script as indented text."""
+    lines = []
+    if plan["constants"]:
+        lines.append(f"constants: {_format_params(plan['constants'])}")
+    for entry in plan["pipelines"]:
+        _format_entry(entry, 0, lines)
+    for fork in plan["forks"]:
+        lines.append(
+            f"fork {fork['name']}: producers={','.join(fork['producers']) or '-'} "
+            f"consumers={','.join(fork['consumers']) or '-'}"
+        )
+    if "run" in plan:
+        run = plan["run"]
+        lines.append(
+            f"run: wall={run['wall_seconds']:.4f}s items_out={run['items_out']} "
+            f"peak_memory={run['peak_memory_bytes']} bytes"
+        )
+    return "\n".join(lines)
@@ -2,7 +2,10 @@
 
 from __future__ import annotations
 
+import hashlib
 import logging
+import threading
+from collections import OrderedDict
 from pathlib import Path
 from typing import Annotated, Union
 from urllib.parse import urlparse
@@ -140,45 +143,102 @@ def load_image(
     return load_image_from_path(source)
 
 
-def normalize_image(
-    result: ImageResult,
-    *,
-    max_dimension: int | None = None,
-    format: str | None = None,
-) -> ImageResult:
-    """Resize and/or re-encode an image. Requires Pillow."""
-    _require_pillow()
+NORMALIZED_IMAGE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+_normalized_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+_normalized_cache_bytes = 0
+_normalized_cache_lock = threading.Lock()
+
+_MIME_BY_FORMAT = {
+    "PNG": "image/png",
+    "JPEG": "image/jpeg",
+    "GIF": "image/gif",
+    "WEBP": "image/webp",
+}
+
+
+def image_digest(data: bytes) -> str:
+    """Content hash identifying an image independently of where it came from."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def _scale_to_fit(width: int, height: int, max_dimension: int | None, max_short_side: int | None) -> float:
+    scale = 1.0
+    if max_dimension:
+        scale = min(scale, max_dimension / max(width, height))
+    if max_short_side:
+        scale = min(scale, max_short_side / min(width, height))
+    return scale
+
+
+def _normalize_image_data(
+    data: bytes, mime_type: str, max_dimension: int | None, max_short_side: int | None, format: str | None
+) -> tuple:
     from io import BytesIO
 
     from PIL import Image
 
-    image = Image.open(BytesIO(result.data))
-    if max_dimension is not None:
-        image.thumbnail((max_dimension, max_dimension))
-
-    output_format = format or image.format or "PNG"
-    mime_map = {
-        "PNG": "image/png",
-        "JPEG": "image/jpeg",
-        "GIF": "image/gif",
-        "WEBP": "image/webp",
-    }
+    # Image.open only reads the header; pixels are decoded when the image is resized or saved.
+    image = Image.open(BytesIO(data))
+    scale = _scale_to_fit(image.width, image.height, max_dimension, max_short_side)
+    output_format = (format or image.format or "PNG").upper()
+    if scale >= 1 and output_format == (image.format or "").upper():
+        return data, mime_type, image.width, image.height
+
+    if scale < 1:
+        image.thumbnail((max(1, round(image.width * scale)), max(1, round(image.height * scale))))
     buffer = BytesIO()
     save_kwargs = {}
-    if output_format.upper() == "JPEG":
+    if output_format == "JPEG":
         save_kwargs["quality"] = 85
         if image.mode in ("RGBA", "P"):
             image = image.convert("RGB")
     image.save(buffer, format=output_format, **save_kwargs)
-    normalized = buffer.getvalue()
+    return buffer.getvalue(), _MIME_BY_FORMAT.get(output_format, mime_type), image.width, image.height
+
+
+def normalize_image(
+    result: ImageResult,
+    *,
+    max_dimension: int | None = None,
+    format: str | None = None,
+    max_short_side: int | None = None,
+) -> ImageResult:
+    """Resize and/or re-encode an image. Requires Pillow.
+
+    The image is scaled down (never up) so its longer side is at most
+    ``max_dimension`` and its shorter side at most ``max_short_side``.  An image
+    that already fits and is already in ``format`` is returned with its original
+    bytes.  Results are cached by content hash, up to
+    ``NORMALIZED_IMAGE_CACHE_MAX_BYTES`` of image data, so normalizing the same
+    image again costs one hash instead of a decode and re-encode.
+    """
+    global _normalized_cache_bytes
+    _require_pillow()
+    key = (image_digest(result.data), max_dimension, max_short_side, (format or "").upper())
+    with _normalized_cache_lock:
+        cached = _normalized_cache.get(key)
+        if cached is not None:
+            _normalized_cache.move_to_end(key)
+    if cached is None:
+        cached = _normalize_image_data(result.data, result.mime_type, max_dimension, max_short_side, format)
+        size = len(cached[0])
+        with _normalized_cache_lock:
+            if size <= NORMALIZED_IMAGE_CACHE_MAX_BYTES and key not in _normalized_cache:
+                _normalized_cache[key] = cached
+                _normalized_cache_bytes += size
+                while _normalized_cache_bytes > NORMALIZED_IMAGE_CACHE_MAX_BYTES:
+                    _, (old_data, *_) = _normalized_cache.popitem(last=False)
+                    _normalized_cache_bytes -= len(old_data)
+    data, mime_type, width, height = cached
     return ImageResult(
-        data=normalized,
-        mime_type=mime_map.get(output_format.upper(), result.mime_type),
+        data=data,
+        mime_type=mime_type,
         source=result.source,
         id=result.id,
         title=result.title,
-        width=image.width,
-        height=image.height,
+        width=width,
+        height=height,
     )
 
 
@@ -0,0 +1,331 @@
+"""Offline batch submission for bulk prompt and embedding jobs.
+
+In batch mode a segment collects every request into a provider-neutral JSONL job
+file, submits it through a batch backend and polls until the backend reports the
+batch complete.  Results are matched back to requests by ``custom_id``.
+
+A job lives in ``<llm_batch_dir>/<fingerprint>/``, where the fingerprint is a
+hash of the request file.  ``job.json`` in that directory records the backend
+and batch id.  Re-running the same pipeline after a restart therefore finds the
+job already submitted and resumes polling instead of paying for it twice.  Once
+a job's results have been read its directory is removed, so only interrupted or
+pending jobs are resumed and a later run with the same requests gets fresh
+answers.
+
+Request lines look like::
+
+    {"custom_id": "0", "kind": "chat", "source": "openai", "model": "gpt-4.1-nano",
+     "prompt": "...", "messages": [...], "temperature": 0, "output_schema": {...}}
+    {"custom_id": "0", "kind": "embed", "source": "openai", "model": "text-embedding-3-small",
+     "input": "..."}
+
+and result lines carry ``response`` (chat), ``embedding`` (embed) or ``error``.
+
+Backends are pluggable via :func:`registerBatchBackend`.  ``local`` stores
+batches on disk and processes them in-process when polled, so batch pipelines
+can be run and tested offline.  ``openai`` uses the OpenAI Batch API.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+import uuid
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Type
+
+from talkpipe.util.config import get_config
+from talkpipe.util.constants import LLM_BATCH_DIR
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_DIR = "~/.talkpipe/batches"
+
+BATCH_PENDING = "pending"
+BATCH_COMPLETED = "completed"
+BATCH_FAILED = "failed"
+
+
+class AbstractBatchBackend(ABC):
+    """Submits JSONL job files to a batch service and fetches their results.
+
+    ``processor`` maps one request line to one result line.  Backends that run
+    requests themselves (such as ``local``) call it; provider backends ignore it.
+    """
+
+    # Model sources whose requests this backend can run; None accepts any source.
+    sources: Optional[Tuple[str, ...]] = None
+
+    def __init__(self, processor: Optional[Callable[[dict], dict]] = None):
+        self.processor = processor
+
+    @abstractmethod
+    def submit(self, requests_path: str) -> str:
+        """Submit the job file at ``requests_path`` and return the batch id."""
+
+    @abstractmethod
+    def poll(self, batch_id: str) -> str:
+        """Return BATCH_PENDING, BATCH_COMPLETED or BATCH_FAILED."""
+
+    @abstractmethod
+    def results(self, batch_id: str) -> Iterator[dict]:
+        """Yield the result lines of a completed batch, in any order."""
+
+    def discard(self, batch_id: str) -> None:
+        """Drop local state for a batch whose results have been read.  The default keeps nothing."""
+
+
+def _read_jsonl(path: str) -> Iterator[dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+class LocalBatchBackend(AbstractBatchBackend):
+    """File-based backend that runs the job in-process when it is polled.
+
+    Each batch is a directory holding the submitted ``input.jsonl``, an
+    ``output.jsonl`` written line by line as requests finish, and a ``status``
+    file.  Work interrupted part-way resumes with the requests that have no
+    result yet.
+    """
+
+    def __init__(self, processor: Optional[Callable[[dict], dict]] = None, root: Optional[str] = None):
+        super().__init__(processor)
+        self.root = os.path.expanduser(root or os.path.join(batch_dir(), "local"))
+
+    def _path(self, batch_id: str, name: str) -> str:
+        return os.path.join(self.root, batch_id, name)
+
+    def submit(self, requests_path: str) -> str:
+        batch_id = f"batch_{uuid.uuid4().hex}"
+        os.makedirs(os.path.join(self.root, batch_id))
+        with open(requests_path, "rb") as src, open(self._path(batch_id, "input.jsonl"), "wb") as dst:
+            dst.write(src.read())
+        self._set_status(batch_id, BATCH_PENDING)
+        return batch_id
+
+    def _set_status(self, batch_id: str, status: str) -> None:
+        with open(self._path(batch_id, "status"), "w", encoding="utf-8") as f:
+            f.write(status)
+
+    def poll(self, batch_id: str) -> str:
+        with open(self._path(batch_id, "status"), "r", encoding="utf-8") as f:
+            status = f.read().strip()
+        if status != BATCH_PENDING:
+            return status
+        if self.processor is None:
+            raise RuntimeError("LocalBatchBackend needs a processor to run pending batches.")
+
+        output_path = self._path(batch_id, "output.jsonl")
+        done = {line["custom_id"] for line in _read_jsonl(output_path)} if os.path.exists(output_path) else set()
+        with open(output_path, "a", encoding="utf-8") as out:
+            for request in _read_jsonl(self._path(batch_id, "input.jsonl")):
+                if request["custom_id"] in done:
+                    continue
+                try:
+                    result = dict(self.processor(request))
+                    result["custom_id"] = request["custom_id"]
+                    line = json.dumps(result)
+                except Exception as exc:
+                    line = json.dumps({"error": str(exc), "custom_id": request["custom_id"]})
+                out.write(line + "\n")
+                out.flush()
+        self._set_status(batch_id, BATCH_COMPLETED)
+        return BATCH_COMPLETED
+
+    def results(self, batch_id: str) -> Iterator[dict]:
+        return _read_jsonl(self._path(batch_id, "output.jsonl"))
+
+    def discard(self, batch_id: str) -> None:
+        shutil.rmtree(os.path.join(self.root, batch_id), ignore_errors=True)
+
+
+class OpenAIBatchBackend(AbstractBatchBackend):
+    """Backend for the OpenAI Batch API (/v1/chat/completions and /v1/embeddings)."""
+
+    sources = ("openai",)
+    _FAILED_STATES = {"failed", "expired", "cancelled", "cancelling"}
+
+    def __init__(self, processor: Optional[Callable[[dict], dict]] = None, client=None,
+                 completion_window: str = "24h"):
+        super().__init__(processor)
+        if client is None:
+            try:
+                import openai
+            except ImportError as exc:
+                raise ImportError(
+                    "OpenAI is not installed. Please install it with: pip install talkpipe[openai]"
+                ) from exc
+            from .client_pool import openai_client
+            client = openai_client(openai)
+        self.client = client
+        self.completion_window = completion_window
+
+    @staticmethod
+    def to_openai_line(request: dict) -> dict:
+        """Translate a provider-neutral request line into an OpenAI batch line."""
+        if request["kind"] == "embed":
+            return {
+                "custom_id": request["custom_id"],
+                "method": "POST",
+                "url": "/v1/embeddings",
+                "body": {"model": request["model"], "input": request["input"]},
+            }
+        body = {"model": request["model"], "messages": request["messages"]}
+        if request.get("temperature") is not None:
+            body["temperature"] = request["temperature"]
+        if request.get("output_schema") is not None:
+            body["response_format"] = {
+                "type": "json_schema",
+                "json_schema": {"name": "output", "schema": request["output_schema"]},
+            }
+        return {"custom_id": request["custom_id"], "method": "POST", "url": "/v1/chat/completions", "body": body}
+
+    def submit(self, requests_path: str) -> str:
+        lines = [self.to_openai_line(request) for request in _read_jsonl(requests_path)]
+        endpoints = {line["url"] for line in lines}
+        if len(endpoints) != 1:
+            raise ValueError(f"An OpenAI batch must target one endpoint, got {sorted(endpoints)}")
+        payload = "".join(json.dumps(line) + "\n" for line in lines).encode("utf-8")
+        uploaded = self.client.files.create(file=("batch.jsonl", payload), purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=uploaded.id,
+            endpoint=endpoints.pop(),
+            completion_window=self.completion_window,
+        )
+        return batch.id
+
+    def poll(self, batch_id: str) -> str:
+        status = self.client.batches.retrieve(batch_id).status
+        if status == "completed":
+            return BATCH_COMPLETED
+        if status in self._FAILED_STATES:
+            return BATCH_FAILED
+        return BATCH_PENDING
+
+    def results(self, batch_id: str) -> Iterator[dict]:
+        batch = self.client.batches.retrieve(batch_id)
+        for file_id in (batch.output_file_id, getattr(batch, "error_file_id", None)):
+            if not file_id:
+                continue
+            for line in self.client.files.content(file_id).text.splitlines():
+                if line.strip():
+                    yield self.from_openai_line(json.loads(line))
+
+    @staticmethod
+    def from_openai_line(line: dict) -> dict:
+        """Translate an OpenAI batch output line into a provider-neutral result line."""
+        result = {"custom_id": line["custom_id"]}
+        response = line.get("response") or {}
+        body = response.get("body") or {}
+        if line.get("error") or response.get("status_code", 200) >= 400:
+            result["error"] = json.dumps(line.get("error") or body.get("error") or body)
+        elif "data" in body:
+            result["embedding"] = body["data"][0]["embedding"]
+        else:
+            result["response"] = body["choices"][0]["message"]["content"]
+        return result
+
+
+_batchBackend: Dict[str, Type[AbstractBatchBackend]] = {
+    "local": LocalBatchBackend,
+    "openai": OpenAIBatchBackend,
+}
+
+
+def registerBatchBackend(name: str, backend: Type[AbstractBatchBackend]):
+    _batchBackend[name] = backend
+
+
+def getBatchBackend(name: str) -> Type[AbstractBatchBackend]:
+    return _batchBackend[name]
+
+
+def getBatchBackends() -> List[str]:
+    return list(_batchBackend.keys())
+
+
+def validate_batch_mode(batch_mode: str, source: str) -> None:
+    """Raise ValueError unless ``batch_mode`` names a backend that can run ``source`` models."""
+    if batch_mode not in _batchBackend:
+        raise ValueError(f"Unknown batch backend: {batch_mode}. Expected one of: {', '.join(_batchBackend)}.")
+    sources = _batchBackend[batch_mode].sources
+    if sources is not None and source not in sources:
+        raise ValueError(
+            f"Batch backend '{batch_mode}' only runs {', '.join(sources)} models, not source '{source}'. "
+            "Use batch_mode='local' for other sources."
+        )
+
+
+def batch_dir() -> str:
+    """Directory holding batch jobs, from the llm_batch_dir configuration key."""
+    return os.path.expanduser(get_config().get(LLM_BATCH_DIR, None) or DEFAULT_BATCH_DIR)
+
+
+def run_batch(
+    requests: Iterable[dict],
+    backend: AbstractBatchBackend,
+    poll_interval: float = 60.0,
+    root: Optional[str] = None,
+    sleep: Callable[[float], None] = time.sleep,
+) -> List[dict]:
+    """Submit ``requests`` (or resume the matching job) and return results in request order.
+
+    Each request must have a unique ``custom_id``.  The returned list holds one
+    result line per request.
+    """
+    requests = list(requests)
+    if not requests:
+        return []
+    payload = "".join(json.dumps(request, sort_keys=True) + "\n" for request in requests).encode("utf-8")
+    job_dir = os.path.join(os.path.expanduser(root or batch_dir()), hashlib.sha256(payload).hexdigest()[:16])
+    job_path = os.path.join(job_dir, "job.json")
+    os.makedirs(job_dir, exist_ok=True)
+
+    job = None
+    if os.path.exists(job_path):
+        with open(job_path, "r", encoding="utf-8") as f:
+            job = json.load(f)
+        if job.get("backend") != type(backend).__name__:
+            job = None
+    if job is None:
+        requests_path = os.path.join(job_dir, "requests.jsonl")
+        with open(requests_path, "wb") as f:
+            f.write(payload)
+        batch_id = backend.submit(requests_path)
+        job = {"backend": type(backend).__name__, "batch_id": batch_id, "count": len(requests)}
+        with open(job_path, "w", encoding="utf-8") as f:
+            json.dump(job, f)
+        logger.info(f"Submitted batch {batch_id} with {len(requests)} requests ({job_dir})")
+    else:
+        logger.info(f"Resuming batch {job['batch_id']} from {job_dir}")
+
+    batch_id = job["batch_id"]
+    while True:
+        status = backend.poll(batch_id)
+        if status == BATCH_COMPLETED:
+            break
+        if status == BATCH_FAILED:
+            # Forget the job so the next run submits a fresh batch.
+            os.remove(job_path)
+            raise RuntimeError(f"Batch {batch_id} failed ({job_dir})")
+        logger.debug(f"Batch {batch_id} still pending; polling again in {poll_interval}s")
+        sleep(poll_interval)
+
+    by_id = {result["custom_id"]: result for result in backend.results(batch_id)}
+    ordered = []
+    for request in requests:
+        result = by_id.get(request["custom_id"])
+        if result is None:
+            result = {"custom_id": request["custom_id"], "error": "No result returned for this request."}
+        ordered.append(result)
+    # The results are in hand; only unfinished jobs are worth resuming.
+    backend.discard(batch_id)
+    shutil.rmtree(job_dir, ignore_errors=True)
+    return ordered
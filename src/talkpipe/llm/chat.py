@@ -4,23 +4,36 @@ Contains an abstract class for a chat model, as well as two
 concrete classes for chatting with models from Ollama.
 """
 
-from typing import Optional, Iterable, Iterator, Annotated
+from typing import Optional, Iterable, Iterator, Annotated, Literal
 from abc import ABC, abstractmethod
+from collections import deque
 import inspect
+import itertools
 import logging
-from pydantic import BaseModel
+import queue
+import threading
+import time
+from pydantic import BaseModel, ValidationError, create_model
 
 from talkpipe.util.constants import TALKPIPE_MODEL_NAME, TALKPIPE_SOURCE
 from talkpipe.util.data_manipulation import extract_property, assign_property
+from talkpipe.util.iterators import ordered_concurrent_map
 
 
+from .batch import getBatchBackend, run_batch, validate_batch_mode
 from .config import getPromptAdapter, getPromptSources
+from .content import StreamChunk
+from .conversation_store import DEFAULT_MAX_CONVERSATIONS, ConversationStore
+from .embedding import estimate_tokens
+from .rate_limit import getRateLimiter
 from talkpipe.pipe.core import AbstractSegment
 from talkpipe.chatterlang.registry import register_segment
 from talkpipe.util.config import get_config
 
 logger = logging.getLogger(__name__)
 
+_stream_ids = itertools.count(1)
+
 PROMPT_ADAPTER_COMPAT_KWARG_DEFAULTS = {
     "memory_mode": "full",
     "unsummarized_message_count": 6,
@@ -30,6 +43,32 @@ PROMPT_ADAPTER_COMPAT_KWARG_DEFAULTS = {
     "debug_messages": False,
 }
 
+class PromptAdapterPool:
+    """Hands out independent prompt adapters so single-turn calls can run concurrently.
+
+    Adapters keep per-call message state, so two threads must never share one.
+    The pool starts with an existing adapter and creates more with ``factory``
+    only when every adapter is busy, so it never grows past the number of
+    concurrent callers.
+    """
+
+    def __init__(self, first_adapter, factory):
+        self._factory = factory
+        self._idle = queue.SimpleQueue()
+        self._idle.put(first_adapter)
+
+    def call(self, method: str, *args, **kwargs):
+        """Invoke ``method`` on an idle adapter, returning the adapter to the pool afterwards."""
+        try:
+            adapter = self._idle.get_nowait()
+        except queue.Empty:
+            adapter = self._factory()
+        try:
+            return getattr(adapter, method)(*args, **kwargs)
+        finally:
+            self._idle.put(adapter)
+
+
 @register_segment("llmPrompt")
 class LLMPrompt(AbstractSegment):
     """Interactive, optionally multi-turn, chat with an llm.
@@ -60,6 +99,57 @@ class LLMPrompt(AbstractSegment):
     - unsummarized_message_count controls how many recent messages are kept verbatim during compaction.
       This is a message count, not a user+assistant turn-pair count.
     - memory_size controls the target max tokens for summaries created during compaction.
+
+    Concurrency:
+    - max_concurrency > 1 sends up to that many prompts to the model at once, each
+      on its own adapter instance with no shared history.  Output order is the
+      same as input order.  Only valid when multi_turn is False.
+
+    Streaming:
+    - stream=True emits the response as it is generated.  Without set_as each text
+      chunk is emitted as its own item (a str subclass, StreamChunk); with set_as the
+      item is emitted at once with an iterator of chunks in that field.  The complete
+      response is still recorded in multi-turn history.  An iterator left unconsumed
+      is drained before the next prompt is sent.
+
+    Batch mode:
+    - batch_mode="<backend>" collects every prompt into one job file, submits it through
+      that batch backend (e.g. "openai", or "local" for offline runs) and polls every
+      batch_poll_interval seconds until it completes.  Responses are emitted in input
+      order.  A job that was already submitted is resumed rather than resubmitted when
+      the same prompts are run again.  Only valid when multi_turn is False.  A failed
+      request raises unless fail_on_error=False, which logs it and skips that item.
+
+    Conversations:
+    - conversation_field="<field>" keeps a separate multi-turn history for each value
+      of that field, so one segment can serve many sessions.  Up to max_conversations
+      histories are held in memory; the least recently used are written to the
+      SQLite file conversation_spill_path (and reloaded on their next message) or
+      dropped when no path is set.  Memory compaction runs on each history on its
+      own.  Only valid when multi_turn is True and stream is False.
+
+    Memory:
+    - background_summary=True (with memory_mode="summary_llm") writes the history
+      summary in a background thread once the context nears context_token_trigger,
+      so no turn waits for the summary call.  A turn that reaches the trigger before
+      the summary is ready truncates the oldest messages instead, and the summary is
+      added when it arrives.
+
+    Caching:
+    - cache="deterministic" stores responses to temperature-0 requests in a persistent
+      SQLite cache and replays them for identical requests without calling the model;
+      cache="always" caches regardless of temperature.  When cache is omitted the
+      llm_cache, llm_cache_path, llm_cache_max_entries and llm_cache_ttl_seconds
+      configuration keys apply.
+    - prompt_caching (default True) lets the provider reuse the prefill of a repeated
+      prefix.  The Anthropic adapter marks the system prompt, role_map/memory preamble
+      and prior history with cache breakpoints once they are long enough to be cached;
+      the OpenAI adapter sends a prompt_cache_key derived from the static prefix.
+      Cached and uncached input tokens are reported by
+      talkpipe.llm.prompt_cache.getPromptCacheStats().
+    - single_flight lets a request share the reply of an identical one already in
+      flight.  By default that happens only for temperature 0 or cache="always",
+      so sampled requests each get their own reply; True or False overrides it.
     """
 
     def __init__(
@@ -78,7 +168,19 @@ class LLMPrompt(AbstractSegment):
             unsummarized_message_count: Annotated[int, "Recent message count kept out of summary compaction"] = 6,
             context_token_trigger: Annotated[Optional[float], "Approximate context-token trigger for rolling memory compaction (values < 1 are ignored)"] = None,
             memory_size: Annotated[int, "Target max tokens for generated summary memory"] = 512,
-            debug_messages: Annotated[bool, "Whether to log outbound LLM request messages"] = False):
+            debug_messages: Annotated[bool, "Whether to log outbound LLM request messages"] = False,
+            max_concurrency: Annotated[int, "Maximum number of prompts in flight at once (single-turn only)"] = 1,
+            cache: Annotated[Optional[str], "Response cache: off, deterministic (temperature 0 only) or always; defaults to the llm_cache config key"] = None,
+            stream: Annotated[bool, "Emit the response incrementally: text chunks as items, or a chunk iterator in set_as"] = False,
+            batch_mode: Annotated[Optional[str], "Submit all prompts as one offline batch through this backend (e.g. local or openai)"] = None,
+            batch_poll_interval: Annotated[float, "Seconds between batch status checks in batch mode"] = 60.0,
+            prompt_caching: Annotated[bool, "Let the provider cache the repeated prompt prefix (Anthropic and OpenAI)"] = True,
+            conversation_field: Annotated[Optional[str], "Field holding a conversation id; each id gets its own multi-turn history"] = None,
+            max_conversations: Annotated[int, "Conversation histories kept in memory when conversation_field is set"] = DEFAULT_MAX_CONVERSATIONS,
+            conversation_spill_path: Annotated[Optional[str], "SQLite file that receives histories evicted from memory"] = None,
+            background_summary: Annotated[bool, "Write summary_llm summaries in the background instead of during a turn"] = False,
+            fail_on_error: Annotated[bool, "In batch mode, raise on a failed request instead of logging it and skipping the item"] = True,
+            single_flight: Annotated[Optional[bool], "Share the reply of an identical request already in flight; by default only at temperature 0 or with cache='always'"] = None):
         super().__init__()
         logging.debug(f"Initializing LLMPrompt with name={model}, source={source}")
         cfg = get_config()
@@ -94,6 +196,28 @@ class LLMPrompt(AbstractSegment):
             logging.error(f"Unknown source: {source}")
             raise ValueError(f"Unknown source: {source}")
 
+        if max_concurrency < 1:
+            raise ValueError(f"max_concurrency must be at least 1, got {max_concurrency}")
+        if max_concurrency > 1 and multi_turn:
+            raise ValueError("max_concurrency > 1 requires multi_turn=False; multi-turn chats must run sequentially.")
+        if stream and max_concurrency > 1:
+            raise ValueError("stream=True cannot be combined with max_concurrency > 1.")
+        if stream and output_format is not None:
+            raise ValueError("stream=True cannot be combined with output_format; guided output needs the full response.")
+        if batch_mode is not None:
+            validate_batch_mode(batch_mode, source)
+            if multi_turn:
+                raise ValueError("batch_mode requires multi_turn=False; batched requests are independent.")
+            if stream or max_concurrency > 1:
+                raise ValueError("batch_mode cannot be combined with stream or max_concurrency > 1.")
+        if background_summary and memory_mode != "summary_llm":
+            raise ValueError("background_summary requires memory_mode='summary_llm'.")
+        if conversation_field is not None:
+            if not multi_turn:
+                raise ValueError("conversation_field requires multi_turn=True.")
+            if stream:
+                raise ValueError("conversation_field cannot be combined with stream=True.")
+
         logging.debug(f"Creating chat model with name: {model}")
         adapter_kwargs = {
             "model": model,
@@ -109,8 +233,42 @@ class LLMPrompt(AbstractSegment):
             "memory_size": memory_size,
             "debug_messages": debug_messages,
         }
-        self.chat = self._create_prompt_adapter(getPromptAdapter(source), source, adapter_kwargs)
-
+        adapter_cls = getPromptAdapter(source)
+
+        def new_prompt_adapter(**overrides):
+            adapter = self._create_prompt_adapter(adapter_cls, source, {**adapter_kwargs, **overrides})
+            if cache is not None:
+                if not hasattr(adapter, "set_response_cache"):
+                    raise ValueError(f"Prompt adapter '{source}' does not support response caching.")
+                adapter.set_response_cache(cache)
+            if not prompt_caching and hasattr(adapter, "set_prompt_caching"):
+                adapter.set_prompt_caching(False)
+            if single_flight is not None and hasattr(adapter, "set_single_flight"):
+                adapter.set_single_flight(single_flight)
+            if background_summary:
+                if not hasattr(adapter, "set_background_summarization"):
+                    raise ValueError(f"Prompt adapter '{source}' does not support background_summary.")
+                adapter.set_background_summarization(True)
+            return adapter
+
+        self._new_prompt_adapter = new_prompt_adapter
+        self.chat = new_prompt_adapter()
+        if conversation_field is not None and not hasattr(self.chat, "set_conversation_state"):
+            raise ValueError(f"Prompt adapter '{source}' does not support conversation_field.")
+
+        self.max_concurrency = max_concurrency
+        self.stream = stream
+        self.batch_mode = batch_mode
+        self.batch_poll_interval = batch_poll_interval
+        self.fail_on_error = fail_on_error
+        self.conversation_field = conversation_field
+        self._conversations = (
+            ConversationStore(max_conversations, conversation_spill_path) if conversation_field is not None else None
+        )
+        self._temperature = temperature
+        self._output_format = output_format
+        self._source = source
+        self._model = model
         self.pass_prompts = pass_prompts
         self.field = field
         self.set_as = set_as
@@ -155,37 +313,189 @@ class LLMPrompt(AbstractSegment):
             if name in signature.parameters
         }
 
+    def _extract_prompt(self, item):
+        logger.debug(f"Processing input item: {item}")
+        if self.field is not None:
+            prompt = extract_property(item, self.field)
+            logger.debug(f"Extracted prompt from field {self.field}: {prompt}")
+        else:
+            prompt = item
+            logger.debug(f"Using item as prompt: {prompt}")
+        return prompt
+
+    def _emit(self, item, ans):
+        logger.debug(f"Received response: {ans}")
+        if self.set_as is not None:
+            logger.debug(f"Appending response to field {self.set_as}")
+            assign_property(item, self.set_as, ans)
+            return item
+        logger.debug("Yielding response directly")
+        return ans
+
+    def _limited(self, prompt: str, func, *args, adapter=None):
+        """Run one provider call under the shared rate limiter for this source and model.
+
+        A prompt the response cache of ``adapter`` (default: this segment's) already
+        answers skips the limiter, so cache hits use no request or token budget and
+        stay out of the latency average.
+        """
+        has_cached_response = getattr(adapter or self.chat, "has_cached_response", None)
+        if has_cached_response is not None and has_cached_response(prompt):
+            return func(*args)
+        limiter = getRateLimiter(self._source, self._model)
+        return limiter.call(func, *args, estimated_tokens=estimate_tokens(prompt))
+
     def transform(self, input_iter: Iterable) -> Iterator:
+        if self.max_concurrency > 1:
+            yield from self._transform_concurrent(input_iter)
+            return
+        if self.stream:
+            yield from self._transform_stream(input_iter)
+            return
+        if self.batch_mode is not None:
+            yield from self._transform_batch(input_iter)
+            return
+
         for item in input_iter:
-            logger.debug(f"Processing input item: {item}")
-            if self.field is not None:
-                prompt = extract_property(item, self.field)
-                logger.debug(f"Extracted prompt from field {self.field}: {prompt}")
-            else:
-                prompt = item
-                logger.debug(f"Using item as prompt: {prompt}")
+            prompt = self._extract_prompt(item)
             
             if self.pass_prompts:
                 logger.debug("Passing prompt through")
                 yield prompt
             
             logger.debug(f"Executing chat with prompt: {prompt}")
-            ans = self.chat.execute(str(prompt))
-            logger.debug(f"Received response: {ans}")
-            
+            if self._conversations is not None:
+                ans = self._execute_in_conversation(item, str(prompt))
+            else:
+                ans = self._limited(str(prompt), self.chat.execute, str(prompt))
+            yield self._emit(item, ans)
+
+        if self._conversations is not None:
+            # Persist the histories still in memory so a restarted pipeline can pick them up.
+            self._conversations.flush()
+
+    def _execute_in_conversation(self, item, prompt: str):
+        """Run one turn against the history of the item's conversation."""
+        conversation_id = extract_property(item, self.conversation_field, fail_on_missing=True)
+        self.chat.set_conversation_state(self._conversations.get(conversation_id))
+        try:
+            return self._limited(prompt, self.chat.execute, prompt)
+        finally:
+            self._conversations.put(conversation_id, self.chat.get_conversation_state())
+
+    def _stream_chunks(self, prompt: str) -> Iterator[StreamChunk]:
+        stream_id = next(_stream_ids)
+        execute_stream = getattr(self.chat, "execute_stream", None)
+        limiter = getRateLimiter(self._source, self._model)
+        with limiter.slot(estimate_tokens(prompt)):
+            if execute_stream is None:
+                yield StreamChunk(self.chat.execute(prompt), stream_id)
+                return
+            for text in execute_stream(prompt):
+                yield StreamChunk(text, stream_id)
+
+    def _transform_stream(self, input_iter: Iterable) -> Iterator:
+        pending = None
+        for item in input_iter:
+            if pending is not None:
+                # The adapter holds one conversation; finish the previous reply first.
+                deque(pending, maxlen=0)
+                pending = None
+            prompt = self._extract_prompt(item)
+            if self.pass_prompts:
+                yield prompt
+
+            chunks = self._stream_chunks(str(prompt))
             if self.set_as is not None:
-                logger.debug(f"Appending response to field {self.set_as}")
-                assign_property(item, self.set_as, ans)
+                assign_property(item, self.set_as, chunks)
+                pending = chunks
                 yield item
             else:
-                logger.debug("Yielding response directly")
-                yield ans
+                yield from chunks
+        if pending is not None:
+            deque(pending, maxlen=0)
+
+    def _transform_concurrent(self, input_iter: Iterable) -> Iterator:
+        pool = PromptAdapterPool(self.chat, self._new_prompt_adapter)
+
+        def run(item):
+            prompt = self._extract_prompt(item)
+            return item, prompt, self._limited(str(prompt), pool.call, "execute", str(prompt))
+
+        for item, prompt, ans in ordered_concurrent_map(run, input_iter, self.max_concurrency):
+            if self.pass_prompts:
+                yield prompt
+            yield self._emit(item, ans)
+
+    def _batch_request(self, custom_id: str, prompt: str) -> dict:
+        turn = {"role": "user", "content": prompt}
+        request_messages = getattr(self.chat, "_request_messages", None)
+        return {
+            "custom_id": custom_id,
+            "kind": "chat",
+            "source": self._source,
+            "model": self._model,
+            "prompt": prompt,
+            "messages": request_messages([turn]) if request_messages else [turn],
+            "temperature": self._temperature,
+            "output_schema": self._output_format.model_json_schema() if self._output_format else None,
+        }
+
+    def _process_batch_request(self, request: dict) -> dict:
+        """Answer one batch request with this segment's adapter (used by the local backend)."""
+        ans = self._limited(request["prompt"], self.chat.execute, request["prompt"])
+        return {"response": ans.model_dump_json() if isinstance(ans, BaseModel) else str(ans)}
+
+    def _transform_batch(self, input_iter: Iterable) -> Iterator:
+        items = list(input_iter)
+        prompts = [self._extract_prompt(item) for item in items]
+        requests = [self._batch_request(str(i), str(prompt)) for i, prompt in enumerate(prompts)]
+        backend = getBatchBackend(self.batch_mode)(processor=self._process_batch_request)
+        results = run_batch(requests, backend, poll_interval=self.batch_poll_interval)
+
+        for item, prompt, result in zip(items, prompts, results):
+            try:
+                if "error" in result:
+                    raise RuntimeError(f"Batch request {result['custom_id']} failed: {result['error']}")
+                ans = result["response"]
+                if self._output_format:
+                    ans = self._output_format.model_validate_json(ans)
+            except Exception as exc:
+                logger.error(f"Error during batch prompt: {exc}")
+                if self.fail_on_error:
+                    raise
+                continue
+            if self.pass_prompts:
+                yield prompt
+            yield self._emit(item, ans)
+
+PACKED_PROMPT_INSTRUCTIONS = (
+    "\n\nThe user message contains several numbered inputs. Apply the instructions above to each "
+    "input independently and return one entry in \"results\" per input, with \"index\" set to "
+    "that input's number."
+)
+
+
+def packed_output_format(output_format: type[BaseModel]) -> type[BaseModel]:
+    """Build the list-shaped schema used to answer several inputs in one call.
+
+    Each entry is ``output_format`` plus the ``index`` of the input it answers.
+    """
+    entry = create_model(f"Indexed{output_format.__name__}", __base__=output_format, index=(int, ...))
+    return create_model(f"Packed{output_format.__name__}", results=(list[entry], ...))
+
 
 class AbstractLLMGuidedGeneration(LLMPrompt):
     """Abstract class for LLM-guided generation segments.
     This class is used to create segments that generate output based on LLM responses.
     It is an abstract class and should not be used directly.
     Subclasses must implement the get_output_format method to specify the output format.
+
+    items_per_call > 1 packs that many inputs into one numbered prompt and asks for a
+    list of results, each tagged with the index of its input.  Results are unpacked back
+    to their items in input order; inputs whose result is missing or invalid, or whose
+    whole pack failed to parse, are retried one at a time.  Only valid when multi_turn
+    is False.
     """
 
     @staticmethod
@@ -209,7 +519,22 @@ class AbstractLLMGuidedGeneration(LLMPrompt):
             unsummarized_message_count: Annotated[int, "Recent message count kept out of summary compaction"] = 6,
             context_token_trigger: Annotated[Optional[float], "Approximate context-token trigger for rolling memory compaction (values < 1 are ignored)"] = None,
             memory_size: Annotated[int, "Target max tokens for generated summary memory"] = 512,
-            debug_messages: Annotated[bool, "Whether to log outbound LLM request messages"] = False):
+            debug_messages: Annotated[bool, "Whether to log outbound LLM request messages"] = False,
+            max_concurrency: Annotated[int, "Maximum number of prompts in flight at once (single-turn only)"] = 1,
+            cache: Annotated[Optional[str], "Response cache: off, deterministic (temperature 0 only) or always; defaults to the llm_cache config key"] = None,
+            batch_mode: Annotated[Optional[str], "Submit all prompts as one offline batch through this backend (e.g. local or openai)"] = None,
+            batch_poll_interval: Annotated[float, "Seconds between batch status checks in batch mode"] = 60.0,
+            prompt_caching: Annotated[bool, "Let the provider cache the repeated prompt prefix (Anthropic and OpenAI)"] = True,
+            items_per_call: Annotated[int, "Number of inputs packed into one LLM call (single-turn only)"] = 1,
+            fail_on_error: Annotated[bool, "In batch mode, raise on a failed request instead of logging it and skipping the item"] = True,
+            single_flight: Annotated[Optional[bool], "Share the reply of an identical request already in flight; by default only at temperature 0 or with cache='always'"] = None):
+
+        if items_per_call < 1:
+            raise ValueError(f"items_per_call must be at least 1, got {items_per_call}")
+        if items_per_call > 1 and multi_turn:
+            raise ValueError("items_per_call > 1 requires multi_turn=False; packed inputs are independent.")
+        if items_per_call > 1 and batch_mode is not None:
+            raise ValueError("items_per_call > 1 cannot be combined with batch_mode.")
 
         super().__init__(
             model,
@@ -226,8 +551,75 @@ class AbstractLLMGuidedGeneration(LLMPrompt):
             unsummarized_message_count=unsummarized_message_count,
             context_token_trigger=context_token_trigger,
             memory_size=memory_size,
-            debug_messages=debug_messages)
-        
+            debug_messages=debug_messages,
+            max_concurrency=max_concurrency,
+            cache=cache,
+            batch_mode=batch_mode,
+            batch_poll_interval=batch_poll_interval,
+            prompt_caching=prompt_caching,
+            fail_on_error=fail_on_error,
+            single_flight=single_flight)
+
+        self.items_per_call = items_per_call
+        self._packed_format = None
+        if items_per_call > 1:
+            self._packed_format = packed_output_format(self._output_format)
+            self._new_packed_adapter = lambda: self._new_prompt_adapter(
+                output_format=self._packed_format,
+                system_prompt=(system_prompt or "") + PACKED_PROMPT_INSTRUCTIONS,
+            )
+            self.packed_chat = self._new_packed_adapter()
+
+    def transform(self, input_iter: Iterable) -> Iterator:
+        if self.items_per_call > 1:
+            yield from self._transform_packed(input_iter)
+            return
+        yield from super().transform(input_iter)
+
+    @staticmethod
+    def _pack_prompt(prompts: list) -> str:
+        return "\n\n".join(f"Input {i}:\n{prompt}" for i, prompt in enumerate(prompts))
+
+    def _answer_pack(self, prompts: list, packed_pool: PromptAdapterPool, single_pool: PromptAdapterPool) -> list:
+        """Answer a pack of prompts with one call, retrying unanswered prompts singly."""
+        answers = [None] * len(prompts)
+        packed_prompt = self._pack_prompt(prompts)
+        try:
+            packed = self._limited(packed_prompt, packed_pool.call, "execute", packed_prompt, adapter=self.packed_chat)
+            for entry in packed.results:
+                if 0 <= entry.index < len(prompts) and answers[entry.index] is None:
+                    answers[entry.index] = self._output_format.model_validate(entry.model_dump(exclude={"index"}))
+        except ValidationError as exc:
+            logger.warning(f"Packed call for {len(prompts)} inputs could not be parsed, retrying singly: {exc}")
+
+        for i, prompt in enumerate(prompts):
+            if answers[i] is None:
+                logger.debug(f"Retrying packed input {i} on its own")
+                answers[i] = self._limited(prompt, single_pool.call, "execute", prompt)
+        return answers
+
+    def _transform_packed(self, input_iter: Iterable) -> Iterator:
+        packed_pool = PromptAdapterPool(self.packed_chat, self._new_packed_adapter)
+        single_pool = PromptAdapterPool(self.chat, self._new_prompt_adapter)
+        input_iter = iter(input_iter)
+
+        def packs():
+            while True:
+                items = list(itertools.islice(input_iter, self.items_per_call))
+                if not items:
+                    return
+                yield items
+
+        def run(items):
+            prompts = [self._extract_prompt(item) for item in items]
+            return items, prompts, self._answer_pack([str(p) for p in prompts], packed_pool, single_pool)
+
+        for items, prompts, answers in ordered_concurrent_map(run, packs(), self.max_concurrency):
+            for item, prompt, ans in zip(items, prompts, answers):
+                if self.pass_prompts:
+                    yield prompt
+                yield self._emit(item, ans)
+
 
 @register_segment("llmScore")
 class LlmScore(AbstractLLMGuidedGeneration):
@@ -376,4 +768,167 @@ class LlmBinaryAnswer(AbstractLLMGuidedGeneration):
 
     @staticmethod
     def get_output_format() -> BaseModel:
-        return LlmBinaryAnswer.Answer
\ No newline at end of file
+        return LlmBinaryAnswer.Answer
+
+CASCADE_CONFIDENCE_INSTRUCTIONS = (
+    "\n\nAlso rate how confident you are that your answer is correct, from 0 (guessing) to 1 "
+    "(certain), and return it as \"confidence\"."
+)
+CASCADE_ANSWER_FORMATS = {"score": LlmScore.Score, "binary": LlmBinaryAnswer.Answer}
+
+
+def parse_cascade_tiers(spec: str) -> list:
+    """Parse ``source:model,source:model,...`` into (source, model) tiers, cheapest first."""
+    tiers = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        source, sep, model = part.partition(":")
+        if not sep or not source or not model:
+            raise ValueError(f"Cascade tier '{part}' must look like source:model")
+        tiers.append((source.strip(), model.strip()))
+    if not tiers:
+        raise ValueError("llmCascade needs at least one source:model tier.")
+    return tiers
+
+
+@register_segment("llmCascade")
+class LlmCascade(AbstractSegment):
+    """Answer each item with the cheapest model that is confident, escalating the rest.
+
+    ``models`` lists the tiers from cheapest to most capable as ``source:model``
+    pairs.  Each item is asked of the first tier; it moves on to the next tier only
+    when the answer fails a confidence check:
+
+    - the response could not be parsed into the answer format;
+    - ``score_threshold`` is set and the score is within ``score_margin`` of it
+      (the decision it feeds could go either way);
+    - ``min_confidence`` is set and the model's self-reported confidence is lower.
+      The answer format then gains a ``confidence`` field from 0 to 1.
+
+    The last tier's answer is always accepted.  ``answer_type`` is ``score``
+    (LlmScore.Score) or ``binary`` (LlmBinaryAnswer.Answer), and the system prompt
+    is written as for llmScore or llmBinaryAnswer.  Call counts, resolutions,
+    escalation reasons and latency per tier are kept in :meth:`tier_stats`.
+
+    Example::
+
+        | llmCascade[system_prompt="Is this text about dogs?", answer_type="binary",
+                     models="ollama:llama3.2:1b,openai:gpt-4.1", min_confidence=0.8, field="text", set_as="about_dogs"]
+    """
+
+    def __init__(
+            self,
+            system_prompt: Annotated[str, "The system prompt for every tier"],
+            models: Annotated[str, "Tiers from cheapest to most capable as comma-separated source:model"],
+            answer_type: Annotated[Literal["score", "binary"], "Answer format: score (LlmScore) or binary (LlmBinaryAnswer)"] = "score",
+            score_threshold: Annotated[Optional[float], "Escalate scores within score_margin of this decision threshold"] = None,
+            score_margin: Annotated[float, "Distance from score_threshold that counts as uncertain"] = 1.0,
+            min_confidence: Annotated[Optional[float], "Escalate answers whose self-reported confidence (0-1) is lower"] = None,
+            field: Annotated[Optional[str], "The field in the input item containing the prompt"] = None,
+            set_as: Annotated[Optional[str], "The field to append the answer to"] = None,
+            temperature: Annotated[Optional[float], "The temperature to use for every tier"] = None,
+            max_concurrency: Annotated[int, "Maximum number of items in flight at once"] = 1,
+            cache: Annotated[Optional[str], "Response cache: off, deterministic (temperature 0 only) or always; defaults to the llm_cache config key"] = None):
+        super().__init__()
+        if answer_type not in CASCADE_ANSWER_FORMATS:
+            raise ValueError(f"answer_type must be one of {', '.join(CASCADE_ANSWER_FORMATS)}, got {answer_type!r}")
+        if score_threshold is not None and answer_type != "score":
+            raise ValueError("score_threshold requires answer_type='score'.")
+        if score_margin < 0:
+            raise ValueError(f"score_margin must not be negative, got {score_margin}")
+        if min_confidence is not None and not 0 <= min_confidence <= 1:
+            raise ValueError(f"min_confidence must be between 0 and 1, got {min_confidence}")
+        if max_concurrency < 1:
+            raise ValueError(f"max_concurrency must be at least 1, got {max_concurrency}")
+
+        output_format = CASCADE_ANSWER_FORMATS[answer_type]
+        if min_confidence is not None:
+            output_format = create_model(
+                f"Confident{output_format.__name__}", __base__=output_format, confidence=(float, ...)
+            )
+            system_prompt = system_prompt + CASCADE_CONFIDENCE_INSTRUCTIONS
+        self.tiers = [
+            LLMPrompt(model=model, source=source, system_prompt=system_prompt, multi_turn=False,
+                      temperature=temperature, output_format=output_format, cache=cache)
+            for source, model in parse_cascade_tiers(models)
+        ]
+        self.score_threshold = score_threshold
+        self.score_margin = score_margin
+        self.min_confidence = min_confidence
+        self.field = field
+        self.set_as = set_as
+        self.max_concurrency = max_concurrency
+        self._stats_lock = threading.Lock()
+        self._stats = [self._empty_stats(tier) for tier in self.tiers]
+
+    @staticmethod
+    def _empty_stats(tier: LLMPrompt) -> dict:
+        return {"source": tier._source, "model": tier._model, "calls": 0, "resolved": 0, "escalated": 0,
+                "parse_failure": 0, "near_threshold": 0, "low_confidence": 0, "seconds": 0.0}
+
+    def tier_stats(self) -> list:
+        """Per-tier calls, resolved and escalated items (by reason) and latency."""
+        with self._stats_lock:
+            return [
+                {**stats, "mean_seconds": stats["seconds"] / stats["calls"] if stats["calls"] else 0.0}
+                for stats in self._stats
+            ]
+
+    def _record(self, tier_index: int, seconds: float, reason: Optional[str]) -> None:
+        with self._stats_lock:
+            stats = self._stats[tier_index]
+            stats["calls"] += 1
+            stats["seconds"] += seconds
+            if reason is None:
+                stats["resolved"] += 1
+            else:
+                stats["escalated"] += 1
+                stats[reason] += 1
+
+    def _escalation_reason(self, ans) -> Optional[str]:
+        if self.min_confidence is not None and ans.confidence < self.min_confidence:
+            return "low_confidence"
+        if self.score_threshold is not None and abs(ans.score - self.score_threshold) <= self.score_margin:
+            return "near_threshold"
+        return None
+
+    def _answer(self, prompt: str, pools: list):
+        last = len(self.tiers) - 1
+        for i, (tier, pool) in enumerate(zip(self.tiers, pools)):
+            start = time.perf_counter()
+            try:
+                ans = tier._limited(prompt, pool.call, "execute", prompt)
+            except ValueError as exc:
+                # Covers ValidationError and JSON decoding errors from guided generation.
+                self._record(i, time.perf_counter() - start, "parse_failure")
+                if i == last:
+                    raise
+                logger.debug(f"Cascade tier {i} could not parse an answer, escalating: {exc}")
+                continue
+            reason = None if i == last else self._escalation_reason(ans)
+            self._record(i, time.perf_counter() - start, reason)
+            if reason is None:
+                return ans
+            logger.debug(f"Cascade tier {i} answer escalated ({reason})")
+
+    def transform(self, input_iter: Iterable) -> Iterator:
+        pools = [PromptAdapterPool(tier.chat, tier._new_prompt_adapter) for tier in self.tiers]
+
+        def run(item):
+            prompt = extract_property(item, self.field) if self.field is not None else item
+            return item, self._answer(str(prompt), pools)
+
+        for item, ans in ordered_concurrent_map(run, input_iter, self.max_concurrency):
+            if self.set_as is not None:
+                assign_property(item, self.set_as, ans)
+                yield item
+            else:
+                yield ans
+
+        for i, stats in enumerate(self.tier_stats()):
+            logger.info(
+                f"Cascade tier {i} ({stats['source']}:{stats['model']}): {stats['calls']} calls, "
+                f"{stats['resolved']} resolved, {stats['escalated']} escalated, {stats['mean_seconds']:.3f}s mean latency"
+            )
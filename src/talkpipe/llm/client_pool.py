@@ -0,0 +1,162 @@
+"""Process-wide pool of provider SDK clients.
+
+Creating an SDK client also creates a new HTTP connection pool, so a client per
+call (or per adapter) pays for a fresh TCP/TLS handshake on every request.  The
+functions here hand out one client per (provider, SDK client class, base URL,
+credential) and share it between all prompt and embedding adapters, so
+keep-alive connections are reused across calls and segments.
+
+Async clients (``ollama.AsyncClient``, ``openai.AsyncOpenAI``,
+``anthropic.AsyncAnthropic``) are pooled the same way, but per event loop: an
+async HTTP connection is bound to the loop that opened it.
+
+Connection limits come from configuration: ``llm_http_max_connections``
+(default 100), ``llm_http_max_keepalive_connections`` (default 20) and
+``llm_http_keepalive_expiry`` in seconds (default 30).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import inspect
+import os
+import threading
+import weakref
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from talkpipe.util.config import get_config
+from talkpipe.util.constants import (
+    LLM_HTTP_KEEPALIVE_EXPIRY,
+    LLM_HTTP_MAX_CONNECTIONS,
+    LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+)
+
+_clients: Dict[Tuple[Any, ...], Any] = {}
+_clients_lock = threading.Lock()
+# event loop -> {key: client}; entries disappear with their loop.
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Tuple[Any, ...], Any]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _fingerprint(credential: Optional[str]) -> Optional[str]:
+    # Keys are kept in memory only, but there is no reason to hold the raw secret.
+    if not credential:
+        return None
+    return hashlib.sha256(credential.encode("utf-8")).hexdigest()[:16]
+
+
+def http_limits():
+    """Return the httpx connection limits configured for provider clients."""
+    import httpx
+
+    cfg = get_config()
+    return httpx.Limits(
+        max_connections=int(cfg.get(LLM_HTTP_MAX_CONNECTIONS, 100)),
+        max_keepalive_connections=int(cfg.get(LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS, 20)),
+        keepalive_expiry=float(cfg.get(LLM_HTTP_KEEPALIVE_EXPIRY, 30.0)),
+    )
+
+
+def shared_client(provider: str, client_cls, base_url: Optional[str], credential: Optional[str],
+                  factory: Callable[[], Any]):
+    """Return the pooled client for this key, building it with ``factory`` on first use."""
+    key = (provider, client_cls, base_url, _fingerprint(credential))
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = factory()
+            _clients[key] = client
+        return client
+
+
+def shared_async_client(provider: str, client_cls, base_url: Optional[str], credential: Optional[str],
+                        factory: Callable[[], Any]):
+    """Return the pooled async client for this key on the running event loop."""
+    loop = asyncio.get_running_loop()
+    key = (provider, client_cls, base_url, _fingerprint(credential))
+    with _clients_lock:
+        clients = _async_clients.setdefault(loop, {})
+        client = clients.get(key)
+        if client is None:
+            client = factory()
+            clients[key] = client
+        return client
+
+
+def _accepts_httpx_kwargs(client_cls) -> bool:
+    try:
+        parameters = inspect.signature(client_cls).parameters.values()
+    except (TypeError, ValueError):
+        return False
+    return any(p.kind == inspect.Parameter.VAR_KEYWORD or p.name == "limits" for p in parameters)
+
+
+def ollama_client(ollama, server_url: Optional[str] = None):
+    """Shared ``ollama.Client`` for ``server_url`` (or OLLAMA_HOST when not given)."""
+    client_cls = ollama.Client
+
+    def factory():
+        # ollama.Client forwards extra keyword arguments to its httpx.Client.
+        if _accepts_httpx_kwargs(client_cls):
+            return client_cls(server_url, limits=http_limits())
+        return client_cls(server_url)
+
+    base_url = server_url or os.getenv("OLLAMA_HOST")
+    return shared_client("ollama", client_cls, base_url, os.getenv("OLLAMA_API_KEY"), factory)
+
+
+def ollama_async_client(ollama, server_url: Optional[str] = None):
+    """Shared ``ollama.AsyncClient`` for ``server_url`` on the running event loop."""
+    client_cls = ollama.AsyncClient
+
+    def factory():
+        if _accepts_httpx_kwargs(client_cls):
+            return client_cls(server_url, limits=http_limits())
+        return client_cls(server_url)
+
+    base_url = server_url or os.getenv("OLLAMA_HOST")
+    return shared_async_client("ollama", client_cls, base_url, os.getenv("OLLAMA_API_KEY"), factory)
+
+
+def _sdk_client(provider: str, sdk, client_cls, base_url_env: str, api_key_env: str,
+                http_client_name: str = "DefaultHttpxClient", pool=shared_client):
+    # Older SDKs (and test doubles) have no DefaultHttpxClient; fall back to the SDK's own pool.
+    http_client_cls = getattr(sdk, http_client_name, None)
+
+    def factory():
+        if http_client_cls is None:
+            return client_cls()
+        return client_cls(http_client=http_client_cls(limits=http_limits()))
+
+    return pool(provider, client_cls, os.getenv(base_url_env), os.getenv(api_key_env), factory)
+
+
+def openai_client(openai):
+    """Shared ``openai.OpenAI`` client for the current OPENAI_BASE_URL and OPENAI_API_KEY."""
+    return _sdk_client("openai", openai, openai.OpenAI, "OPENAI_BASE_URL", "OPENAI_API_KEY")
+
+
+def anthropic_client(anthropic):
+    """Shared ``anthropic.Anthropic`` client for the current ANTHROPIC_BASE_URL and ANTHROPIC_API_KEY."""
+    return _sdk_client("anthropic", anthropic, anthropic.Anthropic, "ANTHROPIC_BASE_URL", "ANTHROPIC_API_KEY")
+
+
+def openai_async_client(openai):
+    """Shared ``openai.AsyncOpenAI`` client for the running event loop."""
+    return _sdk_client("openai", openai, openai.AsyncOpenAI, "OPENAI_BASE_URL", "OPENAI_API_KEY",
+                       "DefaultAsyncHttpxClient", shared_async_client)
+
+
+def anthropic_async_client(anthropic):
+    """Shared ``anthropic.AsyncAnthropic`` client for the running event loop."""
+    return _sdk_client("anthropic", anthropic, anthropic.AsyncAnthropic, "ANTHROPIC_BASE_URL", "ANTHROPIC_API_KEY",
+                       "DefaultAsyncHttpxClient", shared_async_client)
+
+
+def clear_client_pool() -> None:
+    """Drop all pooled clients so the next request builds fresh ones."""
+    with _clients_lock:
+        _clients.clear()
+        _async_clients.clear()
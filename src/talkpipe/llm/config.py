@@ -1,8 +1,9 @@
 from typing import Dict, Type, TypeVar, List
-from .prompt_adapters import AbstractLLMPromptAdapter, OllamaPromptAdapter, OpenAIPromptAdapter, AnthropicPromptAdapter, ElizaPromptAdapter
+from .prompt_adapters import AbstractLLMPromptAdapter, OllamaPromptAdapter, OpenAIPromptAdapter, AnthropicPromptAdapter, ElizaPromptAdapter, RouterPromptAdapter, MockLatencyPromptAdapter
 from .embedding_adapters import AbstractEmbeddingAdapter, OllamaEmbedderAdapter
 from .embedding_adapters_openai import OpenAIEmbeddingAdapter
 from .embedding_adapters_model2vec import Model2VecEmbeddingAdapter
+from .embedding_adapters_mock import MockLatencyEmbeddingAdapter
 
 T_PROMPTADAPTER = TypeVar("T_PROMPTADAPTER", bound=AbstractLLMPromptAdapter)
 T_EMBEDDINGADAPTER = TypeVar("T_EMBEDDINGADAPTER", bound=AbstractEmbeddingAdapter)
@@ -12,6 +13,8 @@ _promptAdapter:Dict[str, Type[T_PROMPTADAPTER]] = {
     "openai": OpenAIPromptAdapter,
     "anthropic": AnthropicPromptAdapter,
     "eliza": ElizaPromptAdapter,
+    "router": RouterPromptAdapter,
+    "mock-latency": MockLatencyPromptAdapter,
 }
 
 def registerPromptAdapter(name:str, promptAdapter:Type[T_PROMPTADAPTER]):
@@ -27,6 +30,7 @@ _embeddingAdapter:Dict[str, Type[T_EMBEDDINGADAPTER]] = {
     "ollama": OllamaEmbedderAdapter,
     "openai": OpenAIEmbeddingAdapter,
     "model2vec": Model2VecEmbeddingAdapter,
+    "mock-latency": MockLatencyEmbeddingAdapter,
 }
 
 def registerEmbeddingAdapter(name:str, embeddingAdapter:Type[T_EMBEDDINGADAPTER]):
@@ -11,6 +11,22 @@ from talkpipe.data.image import ImageResult, load_image
 DEFAULT_VISION_PROMPT = "Explains the contents of this image."
 
 
+class StreamChunk(str):
+    """A piece of a streamed model response.
+
+    Behaves as a plain string so downstream segments need no changes.  All chunks
+    of one response share the same ``stream_id``, which lets consumers such as
+    chatterlang_serve tell where one response ends and the next begins.
+    """
+
+    stream_id: int
+
+    def __new__(cls, text: str, stream_id: int):
+        chunk = super().__new__(cls, text)
+        chunk.stream_id = stream_id
+        return chunk
+
+
 class TextPart(BaseModel):
     """A text fragment within a user turn."""
 
@@ -0,0 +1,113 @@
+"""Bounded store of per-conversation chat state for multi-conversation prompting.
+
+``llmPrompt[conversation_field=...]`` keeps one history per conversation id in a
+:class:`ConversationStore`.  The store holds at most ``max_conversations``
+states in memory, least recently used first out.  With a ``spill_path`` the
+evicted states are written to SQLite and loaded back the next time their
+conversation sends a message; without one they are dropped and the
+conversation starts over.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+from .prompt_adapter_memory import settle_conversation_state
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_CONVERSATIONS = 1000
+
+
+class ConversationStore:
+    """LRU map from conversation id to ``{"messages": [...], "summary": ...}`` state."""
+
+    def __init__(self, max_conversations: int = DEFAULT_MAX_CONVERSATIONS, spill_path: Optional[str] = None):
+        if max_conversations < 1:
+            raise ValueError(f"max_conversations must be positive, got {max_conversations}")
+        self.max_conversations = max_conversations
+        self._states: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        if spill_path is not None:
+            path = spill_path if spill_path == ":memory:" else os.path.expanduser(spill_path)
+            if path != ":memory:":
+                os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS conversations ("
+                "id TEXT PRIMARY KEY, state TEXT NOT NULL, updated REAL NOT NULL)"
+            )
+            self._conn.commit()
+
+    @staticmethod
+    def _key(conversation_id: Hashable) -> str:
+        return str(conversation_id)
+
+    def get(self, conversation_id: Hashable) -> Optional[dict]:
+        """Return the state of a conversation, loading it from the spill file if needed."""
+        key = self._key(conversation_id)
+        with self._lock:
+            state = self._states.get(key)
+            if state is not None:
+                self._states.move_to_end(key)
+                return state
+            if self._conn is None:
+                return None
+            row = self._conn.execute("SELECT state FROM conversations WHERE id = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            logger.debug(f"Loaded spilled conversation {key}")
+            state = json.loads(row[0])
+            self._states[key] = state
+            self._evict_overflow()
+            return state
+
+    def put(self, conversation_id: Hashable, state: dict) -> None:
+        """Store the state of a conversation, evicting the least recently used if full."""
+        key = self._key(conversation_id)
+        with self._lock:
+            self._states[key] = state
+            self._states.move_to_end(key)
+            self._evict_overflow()
+
+    def flush(self) -> None:
+        """Write every in-memory conversation to the spill file."""
+        with self._lock:
+            if self._conn is None:
+                return
+            for key, state in self._states.items():
+                self._write(key, state)
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._states)
+
+    def __contains__(self, conversation_id: Hashable) -> bool:
+        with self._lock:
+            return self._key(conversation_id) in self._states
+
+    def _write(self, key: str, state: dict) -> None:
+        payload = json.dumps(settle_conversation_state(state), default=str)
+        self._conn.execute(
+            "INSERT OR REPLACE INTO conversations (id, state, updated) VALUES (?, ?, ?)",
+            (key, payload, time.time()),
+        )
+
+    def _evict_overflow(self) -> None:
+        while len(self._states) > self.max_conversations:
+            key, state = self._states.popitem(last=False)
+            if self._conn is None:
+                logger.debug(f"Dropped least recently used conversation {key}")
+                continue
+            self._write(key, state)
+            self._conn.commit()
+            logger.debug(f"Spilled least recently used conversation {key}")
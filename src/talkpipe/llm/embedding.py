@@ -1,18 +1,31 @@
 """Module for embedding text using different models"""
 
 import logging
-import re
-from typing import Optional, Annotated, Iterator, Any, List, Literal
+import time
+from typing import Optional, Annotated, Iterator, Any, List, Literal, Tuple, Union
 
 import numpy as np
 
 from talkpipe.pipe.core import AbstractFieldSegment, is_metadata
 from talkpipe.chatterlang.registry import register_segment
 from talkpipe.util.data_manipulation import extract_property, assign_property
+from talkpipe.util.iterators import ordered_concurrent_map
+from .batch import getBatchBackend, run_batch, validate_batch_mode
 from .config import getEmbeddingAdapter, getEmbeddingSources
+from .embedding_adapters import VECTOR_FORMATS
+from .embedding_batching import AdaptiveBatchSizer
+from .embedding_cache import DEFAULT_EMBEDDING_CACHE_MAX_BYTES, DEFAULT_EMBEDDING_CACHE_PATH, getEmbeddingCache, make_embedding_cache_key
 from .embedding_errors import is_token_overflow_error
+from .rate_limit import getRateLimiter
+from .tokenizers import getTokenCounter, getTokenizers
 from talkpipe.util.config import get_config
-from talkpipe.util.constants import TALKPIPE_EMBEDDING_MODEL_NAME, TALKPIPE_EMBEDDING_MODEL_SOURCE
+from talkpipe.util.constants import (
+    EMBEDDING_CACHE,
+    EMBEDDING_CACHE_MAX_BYTES,
+    EMBEDDING_CACHE_PATH,
+    TALKPIPE_EMBEDDING_MODEL_NAME,
+    TALKPIPE_EMBEDDING_MODEL_SOURCE,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -27,31 +40,54 @@ _MIN_TRUNCATE_CHARS = 1
 _MAX_TRUNCATE_ATTEMPTS = 8
 
 
-def _encoded_ascii_token_floor(text: str) -> float:
-    if len(text) < 80:
-        return 0.0
+# Per-character class bits for the token estimate.  Every character str.isspace()
+# accepts (which is what the regex \s matches) is below U+3001, so code points are
+# clamped into this table and anything above it has no class bits.
+_SPACE, _LETTER, _VOWEL, _UPPER, _SUSPICIOUS = 1, 2, 4, 8, 16
+_CHAR_CLASSES = np.zeros(0x3002, dtype=np.uint8)
+for _code in range(0x3001):
+    _char = chr(_code)
+    if _char.isspace():
+        _CHAR_CLASSES[_code] |= _SPACE
+    if _char.isascii() and _char.isalpha():
+        _CHAR_CLASSES[_code] |= _LETTER | (_UPPER if _char.isupper() else 0)
+    if _char in "aeiouAEIOU":
+        _CHAR_CLASSES[_code] |= _VOWEL
+    if _char in "\\+^~[]{}|":
+        _CHAR_CLASSES[_code] |= _SUSPICIOUS
+del _code, _char
+
+
+def _char_classes(text: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Return (class bits, non-ASCII mask) per character of ``text``."""
+    codes = np.frombuffer(text.encode("utf-32-le", "surrogatepass"), dtype=np.uint32)
+    return _CHAR_CLASSES[np.minimum(codes, len(_CHAR_CLASSES) - 1)], codes >= 128
+
+
+def _word_starts(classes: np.ndarray) -> np.ndarray:
+    starts = (classes & _SPACE) == 0
+    starts[1:] &= (classes[:-1] & _SPACE) != 0
+    return starts
 
-    letters = [char for char in text if char.isascii() and char.isalpha()]
-    if len(letters) < len(text) * 0.55:
+
+def _encoded_ascii_token_floor(chars: int, letters: int, vowels: int, uppercase: int, suspicious: int) -> float:
+    if chars < 80:
+        return 0.0
+    if letters < chars * 0.55:
         return 0.0
 
-    vowels = sum(1 for char in letters if char in "aeiouAEIOU")
-    uppercase = sum(1 for char in letters if char.isupper())
-    vowel_ratio = vowels / len(letters)
-    uppercase_ratio = uppercase / len(letters)
-    suspicious_chars = sum(1 for char in text if char in "\\+^~[]{}|")
-    suspicious_ratio = suspicious_chars / len(text)
+    vowel_ratio = vowels / letters
+    uppercase_ratio = uppercase / letters
+    suspicious_ratio = suspicious / chars
 
     if suspicious_ratio >= 0.01 and uppercase_ratio >= 0.35 and vowel_ratio <= 0.30:
-        return len(text) * 0.75
+        return chars * 0.75
     return 0.0
 
 
-def estimate_tokens(text: str) -> int:
-    """Estimate token count without using a provider-specific tokenizer."""
-    chars = len(text)
-    words = len(re.findall(r"\S+", text))
-    non_ascii_chars = sum(1 for char in text if not char.isascii())
+def _estimate_from_counts(
+    chars: int, words: int, non_ascii_chars: int, letters: int, vowels: int, uppercase: int, suspicious: int
+) -> int:
     non_ascii_weighted_chars = non_ascii_chars + ((chars - non_ascii_chars) / 4)
     non_ascii_ratio = non_ascii_chars / chars if chars else 0
     non_ascii_floor = chars * 1.5 if non_ascii_ratio >= 0.05 else non_ascii_weighted_chars
@@ -60,11 +96,72 @@ def estimate_tokens(text: str) -> int:
             words * 1.3,
             chars / 4,
             non_ascii_floor,
-            _encoded_ascii_token_floor(text),
+            _encoded_ascii_token_floor(chars, letters, vowels, uppercase, suspicious),
         )
     )
 
 
+def estimate_tokens(text: str) -> int:
+    """Estimate token count without using a provider-specific tokenizer."""
+    if not text:
+        return 0
+    classes, non_ascii = _char_classes(text)
+    return _estimate_from_counts(
+        len(text),
+        int(np.count_nonzero(_word_starts(classes))),
+        int(np.count_nonzero(non_ascii)),
+        int(np.count_nonzero(classes & _LETTER)),
+        int(np.count_nonzero(classes & _VOWEL)),
+        int(np.count_nonzero(classes & _UPPER)),
+        int(np.count_nonzero(classes & _SUSPICIOUS)),
+    )
+
+
+class TokenEstimate:
+    """Prefix sums of the counts behind :func:`estimate_tokens` for one text.
+
+    Built once in linear time; :meth:`count` then estimates any slice of the text in
+    constant time, giving the same value as ``estimate_tokens(text[start:end])``.
+    """
+
+    def __init__(self, text: str):
+        self.length = len(text)
+        classes, non_ascii = _char_classes(text)
+        self._non_space = (classes & _SPACE) == 0
+
+        dtype = np.int32 if self.length < 2**31 else np.int64
+
+        def prefix(mask):
+            sums = np.zeros(self.length + 1, dtype=dtype)
+            np.cumsum(mask, out=sums[1:])
+            return sums
+
+        self._words = prefix(_word_starts(classes))
+        self._non_ascii = prefix(non_ascii)
+        self._letters = prefix((classes & _LETTER) != 0)
+        self._vowels = prefix((classes & _VOWEL) != 0)
+        self._upper = prefix((classes & _UPPER) != 0)
+        self._suspicious = prefix((classes & _SUSPICIOUS) != 0)
+
+    def count(self, start: int = 0, end: Optional[int] = None) -> int:
+        end = self.length if end is None else end
+        if end <= start:
+            return 0
+        words = int(self._words[end] - self._words[start])
+        # A slice that starts inside a word still counts that word.
+        if start > 0 and self._non_space[start] and self._non_space[start - 1]:
+            words += 1
+        return _estimate_from_counts(
+            end - start,
+            words,
+            int(self._non_ascii[end] - self._non_ascii[start]),
+            int(self._letters[end] - self._letters[start]),
+            int(self._vowels[end] - self._vowels[start]),
+            int(self._upper[end] - self._upper[start]),
+            int(self._suspicious[end] - self._suspicious[start]),
+        )
+
+
 class EmbeddingTokenOverflowError(RuntimeError):
     """Raised when embedding fails due to input length and on_token_overflow is error."""
 
@@ -85,8 +182,30 @@ class LLMEmbed(AbstractFieldSegment):
     upstream chunking when possible.
 
     ``max_estimated_tokens`` optionally truncates text before the provider call using
-    a lightweight estimate, not a tokenizer. ``truncate_side`` controls both that
-    proactive truncation and reactive ``on_token_overflow="truncate"`` retry behavior.
+    a lightweight estimate, or the counts of ``tokenizer`` (see
+    :mod:`talkpipe.llm.tokenizers`) when one is named. ``truncate_side`` controls both
+    that proactive truncation and reactive ``on_token_overflow="truncate"`` retry behavior.
+
+    ``batch_mode`` names a batch backend (e.g. ``openai``, or ``local`` for offline
+    runs).  All texts are then submitted as one offline batch job and vectors are
+    emitted in input order once it completes; see :mod:`talkpipe.llm.batch`.
+
+    ``max_concurrency`` greater than 1 keeps up to that many batches in flight on a
+    thread pool while upstream keeps producing items.  Output order is unchanged and
+    input is read only as fast as results are consumed, so memory stays bounded by
+    ``max_concurrency * batch_size`` items.
+
+    ``max_batch_tokens`` also closes a batch before its estimated tokens would pass
+    the budget, so short texts share large batches and long ones go in small batches.
+    ``adaptive_batch_size`` tunes the number of texts per batch, up to ``batch_size``,
+    to the size with the best observed tokens per second.  A batch the server rejects
+    as too large caps later batches at half its size in either mode.  ``batch_stats()``
+    reports the batch sizes used and the throughput; see
+    :class:`~talkpipe.llm.embedding_batching.AdaptiveBatchSizer`.
+
+    ``vector_format="numpy"`` emits each vector as a contiguous 1-D float32 NumPy
+    array instead of a list of floats, and has the adapter return each provider
+    batch as one 2-D float32 array, so no per-element Python floats are created.
     """
 
     def __init__(
@@ -97,6 +216,15 @@ class LLMEmbed(AbstractFieldSegment):
         set_as: Annotated[Optional[str], "If provided, append embeddings to input items under this field name"] = None,
         fail_on_error: Annotated[bool, "Whether to raise an error on failure or to silently ignore it"] = True,
         batch_size: Annotated[int, "Number of stream items to embed per provider API call"] = 1,
+        max_concurrency: Annotated[int, "Maximum number of batches in flight at once"] = 1,
+        max_batch_tokens: Annotated[
+            Optional[int],
+            "Close a batch before its estimated tokens would exceed this budget",
+        ] = None,
+        adaptive_batch_size: Annotated[
+            bool,
+            "Tune texts per batch (up to batch_size) to the best observed tokens per second",
+        ] = False,
         on_token_overflow: Annotated[
             Literal["error", "truncate", "chunk_pool"],
             "When embed fails as too long: error, truncate (shrink and retry), or chunk_pool",
@@ -113,6 +241,23 @@ class LLMEmbed(AbstractFieldSegment):
             Optional[int],
             "If set, pre-truncate text to this estimated token budget before embedding",
         ] = None,
+        tokenizer: Annotated[
+            Optional[str],
+            "Count tokens for max_estimated_tokens with this tokenizer (e.g. tiktoken) instead of the estimate",
+        ] = None,
+        batch_mode: Annotated[
+            Optional[str],
+            "Submit all texts as one offline batch through this backend (e.g. local or openai)",
+        ] = None,
+        batch_poll_interval: Annotated[float, "Seconds between batch status checks in batch mode"] = 60.0,
+        cache: Annotated[
+            Optional[bool],
+            "Reuse vectors from the persistent embedding cache; defaults to the embedding_cache config key",
+        ] = None,
+        vector_format: Annotated[
+            Literal["list", "numpy"],
+            "Emit vectors as lists of floats or as float32 NumPy arrays",
+        ] = "list",
     ):
         """Initialize the embedding segment with the specified parameters.
 
@@ -132,6 +277,14 @@ class LLMEmbed(AbstractFieldSegment):
             )
         if batch_size < 1:
             raise ValueError("batch_size must be a positive integer")
+        if max_concurrency < 1:
+            raise ValueError(f"max_concurrency must be at least 1, got {max_concurrency}")
+        if batch_mode is not None and max_concurrency > 1:
+            raise ValueError("batch_mode cannot be combined with max_concurrency > 1.")
+        if max_batch_tokens is not None and max_batch_tokens < 1:
+            raise ValueError(f"max_batch_tokens must be at least 1, got {max_batch_tokens}")
+        if adaptive_batch_size and batch_size < 2:
+            raise ValueError("adaptive_batch_size needs batch_size > 1 as the largest batch to try")
         if on_token_overflow not in _ON_TOKEN_OVERFLOW_CHOICES:
             raise ValueError(
                 f"on_token_overflow must be one of {_ON_TOKEN_OVERFLOW_CHOICES}, "
@@ -145,20 +298,61 @@ class LLMEmbed(AbstractFieldSegment):
             raise ValueError("num_chunks must be at least 2")
         if max_estimated_tokens is not None and max_estimated_tokens < 1:
             raise ValueError("max_estimated_tokens must be a positive integer")
+        if tokenizer is not None and tokenizer not in getTokenizers():
+            raise ValueError(f"Unknown tokenizer: {tokenizer}. Expected one of: {', '.join(getTokenizers())}.")
+        if batch_mode is not None:
+            validate_batch_mode(batch_mode, source)
+        if vector_format not in VECTOR_FORMATS:
+            raise ValueError(f"vector_format must be one of {VECTOR_FORMATS}, got {vector_format!r}")
         self.embedder = getEmbeddingAdapter(source)(model=model)
+        self.embedder.set_vector_format(vector_format)
+        self.vector_format = vector_format
         self.fail_on_error = fail_on_error
         self.batch_size = batch_size
+        self.max_concurrency = max_concurrency
+        self.max_batch_tokens = max_batch_tokens
+        self.adaptive_batch_size = adaptive_batch_size
+        self._batch_sizer = AdaptiveBatchSizer(batch_size, max_tokens=max_batch_tokens, adaptive=adaptive_batch_size)
         self.on_token_overflow = on_token_overflow
         self.truncate_side = truncate_side
         self.num_chunks = num_chunks
         self.max_estimated_tokens = max_estimated_tokens
+        self.tokenizer = tokenizer
+        self._token_counter_fn = None
+        self.batch_mode = batch_mode
+        self.batch_poll_interval = batch_poll_interval
         self._embedding_source = source
         self._embedding_model = model
-
-    def process_value(self, value: Any) -> List[float]:
+        if cache is None:
+            cache = str(cfg.get(EMBEDDING_CACHE, "off")).strip().lower() in ("on", "true", "1", "yes")
+        self._embedding_cache = None
+        if cache:
+            max_bytes = cfg.get(EMBEDDING_CACHE_MAX_BYTES, DEFAULT_EMBEDDING_CACHE_MAX_BYTES)
+            self._embedding_cache = getEmbeddingCache(
+                cfg.get(EMBEDDING_CACHE_PATH, None) or DEFAULT_EMBEDDING_CACHE_PATH,
+                max_bytes=int(max_bytes) if max_bytes is not None else None,
+            )
+        # Everything besides source, model and text that can change the vector.
+        self._cache_settings = {
+            "on_token_overflow": on_token_overflow,
+            "truncate_side": truncate_side,
+            "num_chunks": num_chunks,
+            "max_estimated_tokens": max_estimated_tokens,
+        }
+        if tokenizer is not None:
+            # Only added when set, so existing cache entries keep their keys.
+            self._cache_settings["tokenizer"] = tokenizer
+
+    def process_value(self, value: Any) -> Union[List[float], np.ndarray]:
         """Embed one extracted field value (AbstractFieldSegment hook)."""
         text = self._truncate_to_estimated_token_budget(str(value))
-        return self._embed_one_with_overflow_policy(None, text)
+        return self._output_vector(self._embed_one_with_overflow_policy(None, text))
+
+    def _output_vector(self, vector: Any) -> Union[List[float], np.ndarray]:
+        """Return ``vector`` in this segment's vector_format (a no-op for adapter output)."""
+        if self.vector_format == "numpy":
+            return np.ascontiguousarray(vector, dtype=np.float32)
+        return vector
 
     def _input_value(self, item: Any) -> Any:
         """Extract the value to embed (same rule as AbstractFieldSegment)."""
@@ -174,32 +368,51 @@ class LLMEmbed(AbstractFieldSegment):
             )
 
     @staticmethod
-    def _slice_text(text: str, length: int, side: str) -> str:
+    def _slice_bounds(text_length: int, length: int, side: str) -> Tuple[int, int]:
+        """Return the (start, end) offsets of the ``length`` characters kept from ``side``."""
         if length <= 0:
-            return ""
+            return 0, 0
+        length = min(length, text_length)
         if side == "head":
-            return text[:length]
+            return 0, length
         if side == "tail":
-            return text[-length:]
+            return text_length - length, text_length
         if side == "middle":
-            if length >= len(text):
-                return text
-            start = (len(text) - length) // 2
-            return text[start : start + length]
+            start = (text_length - length) // 2
+            return start, start + length
         raise ValueError(f"Unknown truncate_side: {side!r}")
 
+    @classmethod
+    def _slice_text(cls, text: str, length: int, side: str) -> str:
+        start, end = cls._slice_bounds(len(text), length, side)
+        return text[start:end]
+
+    def _token_counter(self):
+        if self._token_counter_fn is None:
+            self._token_counter_fn = getTokenCounter(self.tokenizer, self._embedding_model)
+        return self._token_counter_fn
+
     def _truncate_to_estimated_token_budget(self, text: str) -> str:
         if self.max_estimated_tokens is None:
             return text
-        if estimate_tokens(text) <= self.max_estimated_tokens:
-            return text
+        if self.tokenizer is not None:
+            counter = self._token_counter()
+
+            def count(start, end):
+                return counter(text[start:end])
+            if count(0, len(text)) <= self.max_estimated_tokens:
+                return text
+        else:
+            if estimate_tokens(text) <= self.max_estimated_tokens:
+                return text
+            # Prefix sums make each probe O(1), so the bisect costs one pass over the text.
+            count = TokenEstimate(text).count
 
         low = 0
         high = len(text)
         while low < high:
             mid = (low + high + 1) // 2
-            candidate = self._slice_text(text, mid, self.truncate_side)
-            if estimate_tokens(candidate) <= self.max_estimated_tokens:
+            if count(*self._slice_bounds(len(text), mid, self.truncate_side)) <= self.max_estimated_tokens:
                 low = mid
             else:
                 high = mid - 1
@@ -248,7 +461,14 @@ class LLMEmbed(AbstractFieldSegment):
         return EmbeddingTokenOverflowError(message)
 
     def _execute_one_raw(self, text: str) -> List[float]:
-        return self.embedder.execute_one(text)
+        limiter = getRateLimiter(self._embedding_source, self._embedding_model)
+        return limiter.call(self.embedder.execute_one, text, estimated_tokens=estimate_tokens(text))
+
+    def _execute_batch_raw(self, texts: List[str], estimated: Optional[int] = None) -> List[List[float]]:
+        limiter = getRateLimiter(self._embedding_source, self._embedding_model)
+        if estimated is None:
+            estimated = sum(estimate_tokens(text) for text in texts)
+        return limiter.call(self.embedder.execute_batch, texts, estimated_tokens=estimated)
 
     def _embed_truncate(self, item: Any, text: str) -> List[float]:
         current = text
@@ -284,7 +504,7 @@ class LLMEmbed(AbstractFieldSegment):
             if len(segments) == 1:
                 vectors = [self._execute_one_raw(segments[0])]
             else:
-                vectors = self.embedder.execute_batch(segments)
+                vectors = self._execute_batch_raw(segments)
         except Exception as exc:
             if is_token_overflow_error(exc):
                 raise self._wrap_token_overflow(
@@ -314,14 +534,16 @@ class LLMEmbed(AbstractFieldSegment):
     def _yield_results(self, item: Any, results: List[Any]) -> Iterator[Any]:
         """Emit results using AbstractFieldSegment assign/yield semantics."""
         for result in results:
+            result = self._output_vector(result)
             if self.set_as:
                 assign_property(item, self.set_as, result)
                 yield item
             else:
                 yield result
 
-    def _embed_items_pair(self, items: List[Any], texts: List[str]) -> Iterator[Any]:
-        for item, text in zip(items, texts):
+    def _embed_pairs(self, items: List[Any], texts: List[str]) -> Iterator[Tuple[int, List[float]]]:
+        """Embed texts one at a time, yielding (index, vector); failures are skipped unless fail_on_error."""
+        for index, (item, text) in enumerate(zip(items, texts)):
             try:
                 vector = self._embed_one_with_overflow_policy(item, text)
             except EmbeddingTokenOverflowError:
@@ -331,25 +553,157 @@ class LLMEmbed(AbstractFieldSegment):
                 if self.fail_on_error:
                     raise
                 continue
-            yield from self._yield_results(item, [vector])
+            yield index, vector
+
+    def _embed_vectors(self, items: List[Any], texts: List[str]) -> Iterator[Tuple[int, List[float]]]:
+        tokens = sum(estimate_tokens(text) for text in texts)
+        start = time.perf_counter()
+        if len(texts) == 1:
+            pairs = list(self._embed_pairs(items, texts))
+        else:
+            try:
+                pairs = list(enumerate(self._execute_batch_raw(texts, tokens)))
+            except Exception as e:
+                logger.info(f"Error during batch embedding: {e}")
+                self._batch_sizer.record_failure(len(texts), tokens, e)
+                yield from self._embed_pairs(items, texts)
+                return
+        self._batch_sizer.record_success(len(texts), tokens, time.perf_counter() - start)
+        yield from pairs
+
+    def _embed_cached(self, items: List[Any], texts: List[str]) -> List[Optional[List[float]]]:
+        """Serve vectors from the embedding cache, embedding each distinct missing text once."""
+        keys = [
+            make_embedding_cache_key(self._embedding_source, self._embedding_model, text, self._cache_settings)
+            for text in texts
+        ]
+        vectors = self._embedding_cache.get_many(keys)
+        if self.vector_format == "list":
+            vectors = [None if vector is None else vector.tolist() for vector in vectors]
+        missing: dict = {}
+        for index, vector in enumerate(vectors):
+            if vector is None:
+                missing.setdefault(keys[index], index)
+        if missing:
+            logger.debug(f"Embedding cache: {len(texts) - len(missing)} of {len(texts)} texts cached")
+            first = list(missing.values())
+            fresh = list(self._embed_vectors([items[i] for i in first], [texts[i] for i in first]))
+            self._embedding_cache.put_many([(keys[first[j]], vector) for j, vector in fresh])
+            by_key = {keys[first[j]]: vector for j, vector in fresh}
+            vectors = [by_key.get(key) if vector is None else vector for key, vector in zip(keys, vectors)]
+        return vectors
 
     def _embed_buffered(self, items: List[Any], texts: List[str]) -> Iterator[Any]:
         if not items or not texts:
             return
         logger.debug(f"Embedding batch of {len(texts)} texts")
-        if len(texts) == 1:
-            yield from self._embed_items_pair(items, texts)
+        if self._embedding_cache is not None:
+            for item, vector in zip(items, self._embed_cached(items, texts)):
+                if vector is not None:
+                    yield from self._yield_results(item, [vector])
             return
-        try:
-            vectors = self.embedder.execute_batch(texts)
-            for item, vector in zip(items, vectors):
-                yield from self._yield_results(item, [vector])
-        except Exception as e:
-            logger.info(f"Error during batch embedding: {e}")
-            yield from self._embed_items_pair(items, texts)
+        for index, vector in self._embed_vectors(items, texts):
+            yield from self._yield_results(items[index], [vector])
+
+    def _process_batch_request(self, request: dict) -> dict:
+        """Embed one batch request with this segment's adapter (used by the local backend)."""
+        # Results are stored as JSON lines, so numpy vectors go back to lists here.
+        vector = self._embed_one_with_overflow_policy(None, request["input"])
+        return {"embedding": vector.tolist() if isinstance(vector, np.ndarray) else list(vector)}
+
+    def _transform_batch(self, input_iter) -> Iterator[Any]:
+        entries = []
+        requests = []
+        for item in input_iter:
+            if is_metadata(item):
+                entries.append((item, None))
+                continue
+            self._ensure_scalar_item(item)
+            text = self._truncate_to_estimated_token_budget(str(self._input_value(item)))
+            entries.append((item, len(requests)))
+            requests.append({
+                "custom_id": str(len(requests)),
+                "kind": "embed",
+                "source": self._embedding_source,
+                "model": self._embedding_model,
+                "input": text,
+            })
+
+        backend = getBatchBackend(self.batch_mode)(processor=self._process_batch_request)
+        results = run_batch(requests, backend, poll_interval=self.batch_poll_interval)
+        for item, index in entries:
+            if index is None:
+                yield item
+                continue
+            result = results[index]
+            if "error" in result:
+                logger.error(f"Error during batch embedding: {result['error']}")
+                if self.fail_on_error:
+                    raise RuntimeError(f"Batch request {result['custom_id']} failed: {result['error']}")
+                continue
+            yield from self._yield_results(item, [list(result["embedding"])])
+
+    def _batches(self, input_iter) -> Iterator[Tuple[List[Any], Optional[List[str]]]]:
+        """Group the stream into (items, texts) batches within the batch sizer's limits.
+
+        A metadata item ends the current batch and is yielded on its own as
+        ``([item], None)``, so it passes through in stream order.
+        """
+        buffer_items: List[Any] = []
+        buffer_texts: List[str] = []
+        buffer_tokens = 0
+        for item in input_iter:
+            if is_metadata(item):
+                if buffer_items:
+                    yield buffer_items, buffer_texts
+                    buffer_items, buffer_texts, buffer_tokens = [], [], 0
+                yield [item], None
+                continue
+            self._ensure_scalar_item(item)
+            text = self._truncate_to_estimated_token_budget(str(self._input_value(item)))
+            tokens = estimate_tokens(text)
+            if not self._batch_sizer.fits(len(buffer_items), buffer_tokens, tokens):
+                yield buffer_items, buffer_texts
+                buffer_items, buffer_texts, buffer_tokens = [], [], 0
+            buffer_items.append(item)
+            buffer_texts.append(text)
+            buffer_tokens += tokens
+            if len(buffer_items) >= self._batch_sizer.item_limit:
+                yield buffer_items, buffer_texts
+                buffer_items, buffer_texts, buffer_tokens = [], [], 0
+        if buffer_items:
+            yield buffer_items, buffer_texts
+
+    def _transform_pipelined(self, input_iter) -> Iterator[Any]:
+        def run(batch):
+            items, texts = batch
+            if texts is None:
+                return items
+            return list(self._embed_buffered(items, texts))
+
+        for results in ordered_concurrent_map(run, self._batches(input_iter), self.max_concurrency):
+            yield from results
+        stats = self._batch_sizer.stats()
+        if stats["batches"]:
+            logger.info(
+                f"llmEmbed {self._embedding_source}/{self._embedding_model}: {stats['batches']} batches, "
+                f"mean {stats['mean_batch_size']:.1f} texts, {stats['tokens_per_second']:.0f} tokens/s, "
+                f"batch sizes {stats['batch_sizes']}"
+            )
+
+    def batch_stats(self) -> dict:
+        """Batches sent so far: count, sizes, estimated tokens, throughput and any learned limits."""
+        return self._batch_sizer.stats()
 
     def transform(self, input_iter):
         """Transform one stream item at a time; batching is internal only."""
+        if self.batch_mode is not None:
+            yield from self._transform_batch(input_iter)
+            return
+        if self.max_concurrency > 1 or self.max_batch_tokens is not None or self.adaptive_batch_size:
+            yield from self._transform_pipelined(input_iter)
+            return
+
         buffer_items: List[Any] = []
         buffer_texts: List[str] = []
 
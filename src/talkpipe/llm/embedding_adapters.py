@@ -1,13 +1,17 @@
 from __future__ import annotations
 
+import asyncio
 import warnings
-from typing import List, overload, Sequence, Union
+from typing import Awaitable, Callable, List, Optional, overload, Sequence, Union
 
 import numpy as np
 
 from talkpipe.util.config import get_config
 from talkpipe.util.constants import OLLAMA_SERVER_URL
 
+from .client_pool import ollama_async_client, ollama_client
+from .single_flight import getSingleFlight, request_key, singleFlightEnabled
+
 
 def _vector_to_list(vec) -> List[float]:
     return np.asarray(vec, dtype=float).tolist()
@@ -22,6 +26,19 @@ def _vectors_to_lists(arr) -> List[List[float]]:
     return [_vector_to_list(row) for row in a]
 
 
+def _vectors_to_array(arr) -> np.ndarray:
+    """Stack vectors into one C-contiguous 2-D float32 array, copying only when needed."""
+    a = np.ascontiguousarray(arr, dtype=np.float32)
+    if a.size == 0:
+        return np.empty((0, 0), dtype=np.float32)
+    if a.ndim == 1:
+        return a.reshape(1, -1)
+    return a
+
+
+VECTOR_FORMATS = ("list", "numpy")
+
+
 class AbstractEmbeddingAdapter:
     """Abstract class for embedding text.
 
@@ -32,6 +49,7 @@ class AbstractEmbeddingAdapter:
 
     _model_name: str
     _source: str
+    _vector_format: str = "list"
 
     def __init__(self, model: str, source: str):
         self._model_name = model
@@ -45,6 +63,27 @@ class AbstractEmbeddingAdapter:
     def source(self) -> str:
         return self._source
 
+    @property
+    def vector_format(self) -> str:
+        return self._vector_format
+
+    def set_vector_format(self, vector_format: str) -> None:
+        """Choose what the adapter returns.
+
+        ``"list"`` (the default) returns Python lists of floats.  ``"numpy"``
+        returns a batch as one C-contiguous 2-D float32 array, and a single
+        vector as a 1-D float32 array.
+        """
+        if vector_format not in VECTOR_FORMATS:
+            raise ValueError(f"vector_format must be one of {VECTOR_FORMATS}, got {vector_format!r}")
+        self._vector_format = vector_format
+
+    def _format_vectors(self, vectors) -> Union[List[List[float]], np.ndarray]:
+        """Convert provider vectors to the adapter's ``vector_format``."""
+        if self._vector_format == "numpy":
+            return _vectors_to_array(vectors)
+        return _vectors_to_lists(vectors)
+
     def description(self):
         """Return a description of the embedding model, including the name and source."""
         return f"Embedding using {self.model_name} ({self._source})"
@@ -58,10 +97,43 @@ class AbstractEmbeddingAdapter:
     def execute_one(self, text: str) -> List[float]:
         raise NotImplementedError("Subclasses must implement execute_one.")
 
-    def execute_batch(self, texts: Sequence[str]) -> List[List[float]]:
+    def _endpoint(self) -> Optional[str]:
+        """Server the adapter talks to, so single flight never merges requests across servers."""
+        return None
+
+    def _flight_keys(self, texts: Sequence[str]) -> List[str]:
+        endpoint = self._endpoint()
+        return [request_key(self._source, endpoint, self._model_name, text) for text in texts]
+
+    def _single_flight_batch(
+        self, texts: Sequence[str], embed: Callable[[list], List[List[float]]]
+    ) -> Union[List[List[float]], np.ndarray]:
+        """Embed ``texts``, sending only those no other caller is already embedding.
+
+        Vectors are converted to the adapter's ``vector_format``, so each caller
+        gets its own copy of shared vectors.
+        """
+        texts = list(texts)
+        if not singleFlightEnabled():
+            return self._format_vectors(embed(texts))
+        flight = getSingleFlight("embedding", self._source)
+        return self._format_vectors(flight.do_many(self._flight_keys(texts), texts, embed))
+
+    async def _asingle_flight_batch(
+        self, texts: Sequence[str], embed: Callable[[list], Awaitable[List[List[float]]]]
+    ) -> Union[List[List[float]], np.ndarray]:
+        """Coroutine version of :meth:`_single_flight_batch`."""
+        texts = list(texts)
+        if not singleFlightEnabled():
+            return self._format_vectors(await embed(texts))
+        flight = getSingleFlight("embedding", self._source)
+        return self._format_vectors(await flight.ado_many(self._flight_keys(texts), texts, embed))
+
+    def execute_batch(self, texts: Sequence[str]) -> Union[List[List[float]], np.ndarray]:
         if not texts:
-            return []
-        return [self.execute_one(t) for t in texts]
+            return self._format_vectors([])
+        vectors = [self.execute_one(t) for t in texts]
+        return self._format_vectors(vectors) if self._vector_format == "numpy" else vectors
 
     def execute(self, text: str) -> List[float]:
         """Embed a single string (deprecated).
@@ -78,6 +150,30 @@ class AbstractEmbeddingAdapter:
         )
         return self.execute_one(text)
 
+    async def aexecute_batch(self, texts: Sequence[str]) -> Union[List[List[float]], np.ndarray]:
+        """Coroutine version of :meth:`execute_batch`.
+
+        Adapters with an async provider client override this; the default runs
+        ``execute_batch`` in a worker thread.
+        """
+        if not texts:
+            return self._format_vectors([])
+        return await asyncio.to_thread(self.execute_batch, list(texts))
+
+    @overload
+    async def aembed(self, text: str) -> List[float]: ...
+
+    @overload
+    async def aembed(self, text: Sequence[str]) -> List[List[float]]: ...
+
+    async def aembed(
+        self, text: Union[str, Sequence[str]]
+    ) -> Union[List[float], List[List[float]]]:
+        """Coroutine version of calling the adapter: one string or a batch of strings."""
+        if isinstance(text, str):
+            return (await self.aexecute_batch([text]))[0]
+        return await self.aexecute_batch(list(text))
+
     @overload
     def __call__(self, text: str) -> List[float]: ...
 
@@ -112,25 +208,55 @@ class OllamaEmbedderAdapter(AbstractEmbeddingAdapter):
             raise ImportError(
                 "Ollama is not installed. Please install it with: pip install talkpipe[ollama]"
             )
+        return ollama_client(ollama, self._resolve_server_url())
+
+    def _async_client(self):
+        try:
+            import ollama
+        except ImportError:
+            raise ImportError(
+                "Ollama is not installed. Please install it with: pip install talkpipe[ollama]"
+            )
+        return ollama_async_client(ollama, self._resolve_server_url())
+
+    def _connection_error(self, exc: ConnectionError) -> ConnectionError:
         server_url = self._resolve_server_url()
-        return ollama.Client(server_url) if server_url else ollama
+        return ConnectionError(
+            f"Failed to connect to Ollama at '{server_url or 'http://localhost:11434'}'. "
+            "If your Ollama server is remote, set the TALKPIPE_OLLAMA_SERVER_URL environment "
+            "variable (e.g. `export TALKPIPE_OLLAMA_SERVER_URL=http://your-ollama-host:11434`) "
+            "or OLLAMA_SERVER_URL in ~/.talkpipe.toml. "
+            f"Original error: {exc}"
+        )
+
+    def _endpoint(self) -> Optional[str]:
+        return self._resolve_server_url()
 
-    def execute_batch(self, texts: Sequence[str]) -> List[List[float]]:
+    def execute_batch(self, texts: Sequence[str]) -> Union[List[List[float]], np.ndarray]:
         if not texts:
-            return []
+            return self._format_vectors([])
+        return self._single_flight_batch(texts, self._embed)
+
+    def _embed(self, texts: list) -> List[List[float]]:
         client = self._client()
         try:
-            response = client.embed(model=self.model_name, input=list(texts))
+            response = client.embed(model=self.model_name, input=texts)
         except ConnectionError as exc:
-            server_url = self._resolve_server_url()
-            raise ConnectionError(
-                f"Failed to connect to Ollama at '{server_url or 'http://localhost:11434'}'. "
-                "If your Ollama server is remote, set the TALKPIPE_OLLAMA_SERVER_URL environment "
-                "variable (e.g. `export TALKPIPE_OLLAMA_SERVER_URL=http://your-ollama-host:11434`) "
-                "or OLLAMA_SERVER_URL in ~/.talkpipe.toml. "
-                f"Original error: {exc}"
-            ) from exc
-        return _vectors_to_lists(response["embeddings"])
+            raise self._connection_error(exc) from exc
+        return response["embeddings"]
 
-    def execute_one(self, text: str) -> List[float]:
+    async def aexecute_batch(self, texts: Sequence[str]) -> Union[List[List[float]], np.ndarray]:
+        if not texts:
+            return self._format_vectors([])
+        return await self._asingle_flight_batch(texts, self._aembed)
+
+    async def _aembed(self, texts: list) -> List[List[float]]:
+        client = self._async_client()
+        try:
+            response = await client.embed(model=self.model_name, input=texts)
+        except ConnectionError as exc:
+            raise self._connection_error(exc) from exc
+        return response["embeddings"]
+
+    def execute_one(self, text: str) -> Union[List[float], np.ndarray]:
         return self.execute_batch([text])[0]
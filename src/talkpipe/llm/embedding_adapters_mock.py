@@ -0,0 +1,66 @@
+import asyncio
+import hashlib
+import time
+from typing import List, Sequence, Union
+
+import numpy as np
+
+from .embedding_adapters import AbstractEmbeddingAdapter
+from .mock_latency import getMockServer
+
+
+def fake_embedding(text: str, dimensions: int) -> List[float]:
+    """Deterministic unit vector for a text: the same text always gets the same vector."""
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+    vector = np.random.default_rng(seed).standard_normal(dimensions)
+    return (vector / np.linalg.norm(vector)).tolist()
+
+
+class MockLatencyEmbeddingAdapter(AbstractEmbeddingAdapter):
+    """Local embedding adapter with simulated provider latency, faults and capacity limits.
+
+    Returns deterministic fake vectors.  See :mod:`talkpipe.llm.mock_latency`
+    for the settings written into the ``model`` string.
+    """
+
+    def __init__(self, model: str):
+        super().__init__(model, "mock-latency")
+        self._server = getMockServer("embedding", model)
+        self._dimensions = self._server.settings["dimensions"]
+
+    def execute_batch(self, texts: Sequence[str]) -> Union[List[List[float]], np.ndarray]:
+        if not texts:
+            return self._format_vectors([])
+        return self._single_flight_batch(texts, self._embed)
+
+    def _embed(self, texts: list) -> List[List[float]]:
+        latency, error = self._server.begin(len(texts))
+        try:
+            time.sleep(latency)
+            if error is not None:
+                raise error
+        except BaseException as exc:
+            self._server.end(exc)
+            raise
+        self._server.end()
+        return [fake_embedding(text, self._dimensions) for text in texts]
+
+    async def aexecute_batch(self, texts: Sequence[str]) -> Union[List[List[float]], np.ndarray]:
+        if not texts:
+            return self._format_vectors([])
+        return await self._asingle_flight_batch(texts, self._aembed)
+
+    async def _aembed(self, texts: list) -> List[List[float]]:
+        latency, error = self._server.begin(len(texts))
+        try:
+            await asyncio.sleep(latency)
+            if error is not None:
+                raise error
+        except BaseException as exc:
+            self._server.end(exc)
+            raise
+        self._server.end()
+        return [fake_embedding(text, self._dimensions) for text in texts]
+
+    def execute_one(self, text: str) -> Union[List[float], np.ndarray]:
+        return self.execute_batch([text])[0]
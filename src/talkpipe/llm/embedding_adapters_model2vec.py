@@ -1,9 +1,11 @@
-from typing import List, Optional, Sequence
+from typing import List, Optional, Sequence, Union
+
+import numpy as np
 
 from talkpipe.util.config import get_config
 from talkpipe.util.constants import MODEL2VEC_CACHE_DIR, MODEL2VEC_REVISION
 
-from .embedding_adapters import AbstractEmbeddingAdapter, _vectors_to_lists
+from .embedding_adapters import AbstractEmbeddingAdapter
 from .model2vec_embeddings import DEFAULT_MODEL, Model2VecEmbedder
 
 
@@ -20,10 +22,10 @@ class Model2VecEmbeddingAdapter(AbstractEmbeddingAdapter):
             cache_folder=cfg.get(MODEL2VEC_CACHE_DIR),
         )
 
-    def execute_batch(self, texts: Sequence[str]) -> List[List[float]]:
+    def execute_batch(self, texts: Sequence[str]) -> Union[List[List[float]], np.ndarray]:
         if not texts:
-            return []
-        return _vectors_to_lists(self._embedder.embed(list(texts)))
+            return self._format_vectors([])
+        return self._format_vectors(self._embedder.embed(list(texts)))
 
-    def execute_one(self, text: str) -> List[float]:
+    def execute_one(self, text: str) -> Union[List[float], np.ndarray]:
         return self.execute_batch([text])[0]
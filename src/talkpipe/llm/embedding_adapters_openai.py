@@ -1,5 +1,8 @@
-from typing import List, Sequence
+from typing import List, Optional, Sequence, Union
 
+import numpy as np
+
+from .client_pool import openai_async_client, openai_client
 from .embedding_adapters import AbstractEmbeddingAdapter
 
 
@@ -19,20 +22,42 @@ class OpenAIEmbeddingAdapter(AbstractEmbeddingAdapter):
     def __init__(self, model: str):
         super().__init__(model, "openai")
         openai = _require_openai()
-        self.client = openai.OpenAI()
+        self.client = openai_client(openai)
+
+    def _endpoint(self) -> Optional[str]:
+        return str(getattr(self.client, "base_url", ""))
 
-    def execute_batch(self, texts: Sequence[str]) -> List[List[float]]:
+    def execute_batch(self, texts: Sequence[str]) -> Union[List[List[float]], np.ndarray]:
         if not texts:
-            return []
+            return self._format_vectors([])
+        return self._single_flight_batch(texts, self._embed)
+
+    def _embed(self, texts: list) -> List[List[float]]:
         response = self.client.embeddings.create(
             model=self.model_name,
-            input=list(texts),
+            input=texts,
         )
-        return [list(d.embedding) for d in response.data]
+        return [d.embedding for d in response.data]
+
+    async def aexecute_batch(self, texts: Sequence[str]) -> Union[List[List[float]], np.ndarray]:
+        if not texts:
+            return self._format_vectors([])
+        return await self._asingle_flight_batch(texts, self._aembed)
+
+    async def _aembed(self, texts: list) -> List[List[float]]:
+        client = openai_async_client(_require_openai())
+        response = await client.embeddings.create(
+            model=self.model_name,
+            input=texts,
+        )
+        return [d.embedding for d in response.data]
+
+    def execute_one(self, text: str) -> Union[List[float], np.ndarray]:
+        return self._single_flight_batch([text], self._embed_one)[0]
 
-    def execute_one(self, text: str) -> List[float]:
+    def _embed_one(self, texts: list) -> List[List[float]]:
         response = self.client.embeddings.create(
             model=self.model_name,
-            input=text,
+            input=texts[0],
         )
-        return list(response.data[0].embedding)
+        return [response.data[0].embedding]
@@ -0,0 +1,203 @@
+"""Batch sizing for llmEmbed by item count, estimated tokens and observed throughput.
+
+A batch closes once it holds ``target_items`` texts, or before the next text would
+take its estimated tokens past the token limit.  Two things move those limits while
+a stream runs:
+
+- A batch that fails with an error saying the request was too large (HTTP 413, too
+  many inputs, too many tokens per request) caps later batches at half of its items
+  and tokens.  An error about one input being too long leaves the limits alone.
+  After ``recover_after`` successful batches in a row the learned caps are raised
+  by ``growth`` again, until they reach the configured limits.
+- With ``adaptive`` on, the item target hill-climbs on tokens per second.  It grows
+  while throughput improves, falls back to the best size measured once throughput
+  drops, and probes one step larger again every ``probe_every`` batches so it can
+  follow a server whose load changes.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from collections import Counter
+from typing import Dict, Optional
+
+from .embedding_errors import is_batch_too_large_error
+
+logger = logging.getLogger(__name__)
+
+
+class AdaptiveBatchSizer:
+    """Thread-safe batch limits and throughput statistics for one llmEmbed segment."""
+
+    def __init__(
+        self,
+        max_items: int,
+        max_tokens: Optional[int] = None,
+        adaptive: bool = False,
+        initial_items: Optional[int] = None,
+        growth: float = 2.0,
+        samples_per_step: int = 2,
+        probe_every: int = 20,
+        recover_after: int = 50,
+    ):
+        if max_items < 1:
+            raise ValueError(f"max_items must be at least 1, got {max_items}")
+        if max_tokens is not None and max_tokens < 1:
+            raise ValueError(f"max_tokens must be at least 1, got {max_tokens}")
+        if recover_after < 1:
+            raise ValueError(f"recover_after must be at least 1, got {recover_after}")
+        if growth <= 1:
+            raise ValueError(f"growth must be greater than 1, got {growth}")
+        self.max_items = max_items
+        self.max_tokens = max_tokens
+        self.adaptive = adaptive
+        self.growth = growth
+        self.samples_per_step = samples_per_step
+        self.probe_every = probe_every
+        self.recover_after = recover_after
+        if initial_items is None:
+            initial_items = min(max_items, 8) if adaptive else max_items
+        self.target_items = max(1, min(max_items, initial_items))
+        self.learned_max_items: Optional[int] = None
+        self.learned_max_tokens: Optional[int] = None
+        self._lock = threading.Lock()
+        self._rates: Dict[int, float] = {}
+        self._samples_at_target = 0
+        self._settled_batches = 0
+        self._successes_since_failure = 0
+        self.batches = 0
+        self.items = 0
+        self.tokens = 0
+        self.seconds = 0.0
+        self.failures = 0
+        self.batch_sizes: Counter = Counter()
+
+    @property
+    def item_limit(self) -> int:
+        with self._lock:
+            return self._item_cap(self.target_items)
+
+    @property
+    def token_limit(self) -> Optional[int]:
+        with self._lock:
+            limits = [limit for limit in (self.max_tokens, self.learned_max_tokens) if limit is not None]
+            return min(limits) if limits else None
+
+    def fits(self, items: int, tokens: int, next_tokens: int) -> bool:
+        """Whether a text of ``next_tokens`` can join a batch of ``items`` texts and ``tokens`` tokens.
+
+        An empty batch always takes the next text, however long it is.
+        """
+        if items == 0:
+            return True
+        if items >= self.item_limit:
+            return False
+        limit = self.token_limit
+        return limit is None or tokens + next_tokens <= limit
+
+    def record_success(self, items: int, tokens: int, seconds: float) -> None:
+        with self._lock:
+            self.batches += 1
+            self.items += items
+            self.tokens += tokens
+            self.seconds += seconds
+            self.batch_sizes[items] += 1
+            self._successes_since_failure += 1
+            if self._successes_since_failure >= self.recover_after:
+                self._relax_learned_limits()
+            if not self.adaptive or seconds <= 0:
+                return
+            size = self.target_items
+            rate = tokens / seconds
+            previous = self._rates.get(size)
+            self._rates[size] = rate if previous is None else 0.7 * previous + 0.3 * rate
+            self._samples_at_target += 1
+            if self._samples_at_target >= self.samples_per_step:
+                self._step()
+
+    def record_failure(self, items: int, tokens: int, exc: BaseException) -> bool:
+        """Learn tighter limits if ``exc`` says the batch was too large; return whether it did."""
+        with self._lock:
+            self.failures += 1
+            self._successes_since_failure = 0
+            if items < 2 or not is_batch_too_large_error(exc):
+                return False
+            self.learned_max_items = min(self.learned_max_items or items, max(1, items // 2))
+            self.learned_max_tokens = min(self.learned_max_tokens or tokens, max(1, tokens // 2))
+            self.target_items = self._item_cap(self.target_items)
+            for size in [size for size in self._rates if size > self.learned_max_items]:
+                del self._rates[size]
+            self._samples_at_target = 0
+            logger.info(
+                f"Embedding batch of {items} texts (~{tokens} tokens) was too large; limiting batches to "
+                f"{self.learned_max_items} texts and ~{self.learned_max_tokens} tokens"
+            )
+            return True
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "batches": self.batches,
+                "items": self.items,
+                "tokens": self.tokens,
+                "seconds": self.seconds,
+                "tokens_per_second": self.tokens / self.seconds if self.seconds else 0.0,
+                "mean_batch_size": self.items / self.batches if self.batches else 0.0,
+                "batch_sizes": dict(sorted(self.batch_sizes.items())),
+                "target_items": self._item_cap(self.target_items),
+                "max_tokens": self.max_tokens,
+                "learned_max_items": self.learned_max_items,
+                "learned_max_tokens": self.learned_max_tokens,
+                "failures": self.failures,
+                "tokens_per_second_by_target": dict(sorted(self._rates.items())),
+            }
+
+    def _item_cap(self, items: int) -> int:
+        cap = self.max_items if self.learned_max_items is None else min(self.max_items, self.learned_max_items)
+        return max(1, min(items, cap))
+
+    def _relax_learned_limits(self) -> None:
+        """Raise learned caps by ``growth`` after a run of successes; drop them at the configured limits."""
+        self._successes_since_failure = 0
+        if self.learned_max_items is None and self.learned_max_tokens is None:
+            return
+        if self.learned_max_items is not None:
+            relaxed = max(self.learned_max_items + 1, int(self.learned_max_items * self.growth))
+            self.learned_max_items = None if relaxed >= self.max_items else relaxed
+        if self.learned_max_tokens is not None:
+            relaxed = max(self.learned_max_tokens + 1, int(self.learned_max_tokens * self.growth))
+            at_limit = relaxed >= self.max_tokens if self.max_tokens is not None else self.learned_max_items is None
+            self.learned_max_tokens = None if at_limit else relaxed
+        if not self.adaptive:
+            # The adaptive target climbs back on its own; a fixed one goes straight to the new cap.
+            self.target_items = self.max_items
+        tokens = self.learned_max_tokens if self.learned_max_tokens is not None else self.max_tokens
+        logger.info(
+            f"Embedding batches succeeded {self.recover_after} times in a row; allowing batches of up to "
+            f"{self._item_cap(self.max_items)} texts" + (f" and ~{tokens} tokens" if tokens is not None else "")
+        )
+
+    def _step(self) -> None:
+        """Move the item target after enough samples at the current one."""
+        self._samples_at_target = 0
+        size = self.target_items
+        best = max(self._rates, key=self._rates.get)
+        larger = self._item_cap(max(size + 1, int(size * self.growth)))
+        if best == size and larger > size:
+            if larger not in self._rates or self._settled_batches >= self.probe_every:
+                self._grow_to(larger)
+                return
+            self._settled_batches += self.samples_per_step
+            return
+        if best != size:
+            logger.debug(f"Embedding batch target back to {best} texts ({self._rates[best]:.0f} tokens/s)")
+            self.target_items = best
+        self._settled_batches += self.samples_per_step
+
+    def _grow_to(self, size: int) -> None:
+        # Remeasure the larger size from scratch; the server may have changed since it was last tried.
+        self._rates.pop(size, None)
+        self._settled_batches = 0
+        logger.debug(f"Embedding batch target up to {size} texts")
+        self.target_items = size
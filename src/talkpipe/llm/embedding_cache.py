@@ -0,0 +1,255 @@
+"""Persistent content-addressed cache for embedding vectors.
+
+Vectors are stored as raw float32 in an append-only blob file that is read
+through ``mmap``.  A SQLite index next to it maps each key to the vector's
+offset and length and records when it was last used.  Keys hash everything
+that determines a vector: the embedding source and model, the llmEmbed
+truncation settings and the text.  Once the live vectors take more than
+``max_bytes``, the least recently used are evicted.  The blob file is rewritten
+without dead space when more than half of it is dead; each rewrite goes to a
+new file generation, so a crash never leaves the index pointing into a
+half-written file.
+
+Only one process should write to a cache directory at a time.
+"""
+
+from __future__ import annotations
+
+import glob
+import hashlib
+import json
+import logging
+import mmap
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EMBEDDING_CACHE_PATH = "~/.talkpipe/embedding_cache"
+DEFAULT_EMBEDDING_CACHE_MAX_BYTES = 1 << 30
+
+_ITEM_BYTES = np.dtype(np.float32).itemsize
+_COMPACT_MIN_BYTES = 1 << 20
+# SQLite's default limit on host parameters is 999 in older builds.
+_SQL_CHUNK = 500
+
+
+def make_embedding_cache_key(source: str, model: str, text: str, settings: Optional[dict] = None) -> str:
+    """Hash the parts of an embedding request that determine the vector."""
+    payload = json.dumps(
+        {
+            "source": source,
+            "model": model,
+            "settings": settings or {},
+            "text": hashlib.sha256(text.encode("utf-8")).hexdigest(),
+        },
+        sort_keys=True,
+        default=repr,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _chunks(values: Sequence, size: int = _SQL_CHUNK):
+    for start in range(0, len(values), size):
+        yield values[start : start + size]
+
+
+class EmbeddingCache:
+    """Thread-safe on-disk store of float32 vectors keyed by request hash."""
+
+    def __init__(
+        self,
+        path: str = DEFAULT_EMBEDDING_CACHE_PATH,
+        max_bytes: Optional[int] = DEFAULT_EMBEDDING_CACHE_MAX_BYTES,
+        clock=time.time,
+    ):
+        if max_bytes is not None and max_bytes < 1:
+            raise ValueError(f"max_bytes must be positive, got {max_bytes}")
+        self.path = os.path.expanduser(path)
+        os.makedirs(self.path, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(self.path, "index.sqlite"), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS vectors ("
+            "key TEXT PRIMARY KEY, offset INTEGER NOT NULL, dims INTEGER NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS vectors_accessed ON vectors(accessed)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        self.hits = 0
+        self.misses = 0
+        self._map: Optional[mmap.mmap] = None
+        self._mapped_size = 0
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE name = 'generation'").fetchone()
+            self._generation = row[0] if row else 0
+            self._remove_stale_generations()
+            self._blob = open(self._blob_path(self._generation), "a+b")
+            size = self._blob_size()
+            # Rows past the end of the blob belong to writes lost in a crash.
+            self._conn.execute("DELETE FROM vectors WHERE offset + dims * ? > ?", (_ITEM_BYTES, size))
+            self._live_bytes = self._conn.execute("SELECT COALESCE(SUM(dims), 0) FROM vectors").fetchone()[0] * _ITEM_BYTES
+            self._evict_overflow()
+            self._conn.commit()
+
+    def get_many(self, keys: Sequence[str]) -> List[Optional[np.ndarray]]:
+        """Return the cached vector for each key, or None for misses."""
+        found: Dict[str, Tuple[int, int]] = {}
+        with self._lock:
+            for chunk in _chunks(list(set(keys))):
+                marks = ",".join("?" * len(chunk))
+                for key, offset, dims in self._conn.execute(
+                    f"SELECT key, offset, dims FROM vectors WHERE key IN ({marks})", chunk  # nosec B608
+                ):
+                    found[key] = (offset, dims)
+            view = self._view() if found else None
+            vectors = []
+            for key in keys:
+                if key in found:
+                    offset, dims = found[key]
+                    vectors.append(np.frombuffer(view, dtype=np.float32, count=dims, offset=offset).copy())
+                else:
+                    vectors.append(None)
+            if found:
+                now = self._clock()
+                self._conn.executemany("UPDATE vectors SET accessed = ? WHERE key = ?", [(now, key) for key in found])
+                self._conn.commit()
+            hits = sum(vector is not None for vector in vectors)
+            self.hits += hits
+            self.misses += len(keys) - hits
+        return vectors
+
+    def put_many(self, entries: Sequence[Tuple[str, Sequence[float]]]) -> None:
+        """Store vectors, evicting the least recently used ones if the cache is over ``max_bytes``."""
+        if not entries:
+            return
+        arrays = [(key, np.ascontiguousarray(vector, dtype=np.float32).ravel()) for key, vector in entries]
+        with self._lock:
+            replaced = 0
+            for chunk in _chunks([key for key, _ in arrays]):
+                marks = ",".join("?" * len(chunk))
+                replaced += self._conn.execute(
+                    f"SELECT COALESCE(SUM(dims), 0) FROM vectors WHERE key IN ({marks})", chunk  # nosec B608
+                ).fetchone()[0]
+            offset = self._blob_size()
+            # Vectors reach the blob before the index rows that point at them.
+            self._blob.write(b"".join(array.tobytes() for _, array in arrays))
+            self._blob.flush()
+            now = self._clock()
+            rows = []
+            for key, array in arrays:
+                rows.append((key, offset, len(array), now))
+                offset += array.nbytes
+            self._conn.executemany("INSERT OR REPLACE INTO vectors (key, offset, dims, accessed) VALUES (?, ?, ?, ?)", rows)
+            self._live_bytes += sum(array.nbytes for _, array in arrays) - replaced * _ITEM_BYTES
+            self._evict_overflow()
+            self._conn.commit()
+            if self._blob_size() > max(_COMPACT_MIN_BYTES, 2 * self._live_bytes):
+                self._compact()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM vectors")
+            self._conn.commit()
+            self._live_bytes = 0
+            self._compact()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM vectors").fetchone()[0]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "path": self.path,
+                "entries": self._conn.execute("SELECT COUNT(*) FROM vectors").fetchone()[0],
+                "live_bytes": self._live_bytes,
+                "file_bytes": self._blob_size(),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    def _blob_path(self, generation: int) -> str:
+        return os.path.join(self.path, f"vectors.{generation}.f32")
+
+    def _remove_stale_generations(self) -> None:
+        current = self._blob_path(self._generation)
+        for stale in glob.glob(os.path.join(self.path, "vectors.*.f32")):
+            if stale != current:
+                os.remove(stale)
+
+    def _blob_size(self) -> int:
+        self._blob.seek(0, os.SEEK_END)
+        return self._blob.tell()
+
+    def _view(self) -> mmap.mmap:
+        size = self._blob_size()
+        if self._map is None or size != self._mapped_size:
+            if self._map is not None:
+                self._map.close()
+            self._map = mmap.mmap(self._blob.fileno(), 0, access=mmap.ACCESS_READ)
+            self._mapped_size = size
+        return self._map
+
+    def _evict_overflow(self) -> None:
+        while self.max_bytes is not None and self._live_bytes > self.max_bytes:
+            victims = self._conn.execute("SELECT key, dims FROM vectors ORDER BY accessed ASC LIMIT 256").fetchall()
+            if not victims:
+                self._live_bytes = 0
+                return
+            for key, dims in victims:
+                if self._live_bytes <= self.max_bytes:
+                    break
+                self._conn.execute("DELETE FROM vectors WHERE key = ?", (key,))
+                self._live_bytes -= dims * _ITEM_BYTES
+
+    def _compact(self) -> None:
+        """Copy the live vectors into a new blob generation and switch the index over to it."""
+        rows = self._conn.execute("SELECT key, offset, dims FROM vectors ORDER BY offset").fetchall()
+        generation = self._generation + 1
+        view = self._view() if rows else None
+        moved = []
+        with open(self._blob_path(generation), "wb") as blob:
+            for key, offset, dims in rows:
+                moved.append((blob.tell(), key))
+                blob.write(view[offset : offset + dims * _ITEM_BYTES])
+            blob.flush()
+            os.fsync(blob.fileno())
+        self._conn.executemany("UPDATE vectors SET offset = ? WHERE key = ?", moved)
+        self._conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('generation', ?)", (generation,))
+        self._conn.commit()
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._blob.close()
+        os.remove(self._blob_path(self._generation))
+        self._generation = generation
+        self._blob = open(self._blob_path(generation), "a+b")
+        logger.debug(f"Compacted embedding cache {self.path} to {self._live_bytes} bytes")
+
+
+_caches: Dict[str, EmbeddingCache] = {}
+_caches_lock = threading.Lock()
+
+
+def getEmbeddingCache(
+    path: str = DEFAULT_EMBEDDING_CACHE_PATH,
+    max_bytes: Optional[int] = DEFAULT_EMBEDDING_CACHE_MAX_BYTES,
+) -> EmbeddingCache:
+    """Return the process-wide cache for ``path``, opening it on first use.
+
+    ``max_bytes`` applies when the cache is opened; later calls share it.
+    """
+    key = os.path.expanduser(path)
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            cache = _caches[key] = EmbeddingCache(path, max_bytes=max_bytes)
+        return cache
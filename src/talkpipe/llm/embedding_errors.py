@@ -26,3 +26,32 @@ def is_token_overflow_error(exc: BaseException) -> bool:
     if not message:
         message = repr(exc)
     return any(pattern.search(message) for pattern in _TOKEN_OVERFLOW_PATTERNS)
+
+
+# Substrings seen when a whole embedding request (not one input) is over a server limit.
+_BATCH_TOO_LARGE_PATTERNS = tuple(
+    re.compile(p, re.IGNORECASE)
+    for p in (
+        r"\b413\b",
+        r"payload too large",
+        r"request (entity )?too large",
+        r"too many inputs",
+        r"batch size",
+        r"max.*(inputs|items|array)",
+        r"array too long",
+        r"tokens per request",
+    )
+)
+
+
+def is_batch_too_large_error(exc: BaseException) -> bool:
+    """Return True if the exception likely means a batch request was too large for the server.
+
+    One input over the model's context length is not a too-large batch; see
+    :func:`is_token_overflow_error`.
+    """
+    for candidate in (exc, getattr(exc, "response", None)):
+        if getattr(candidate, "status_code", None) == 413:
+            return True
+    message = str(exc) or repr(exc)
+    return any(pattern.search(message) for pattern in _BATCH_TOO_LARGE_PATTERNS)
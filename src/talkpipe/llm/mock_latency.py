@@ -0,0 +1,199 @@
+"""Simulated provider behaviour for the ``mock-latency`` prompt and embedding sources.
+
+The mock sources answer locally but behave like a remote provider under load,
+so concurrency, rate limiting, single flight and streaming can be exercised and
+benchmarked without network access.  Settings are written into the ``model``
+string as comma-separated ``key:value`` pairs after an optional name::
+
+    llmPrompt[source="mock-latency", model="slow,latency:lognormal,median:0.4,throttle_rate:0.05"]
+    llmEmbed[source="mock-latency", model="emb,latency:fixed,median:0.02,dimensions:768"]
+
+Settings (defaults in brackets):
+
+- ``latency``: ``fixed``, ``lognormal`` or ``none`` [fixed]
+- ``median``: seconds per call; the fixed latency or the lognormal median [0.05]
+- ``sigma``: lognormal shape [0.5]
+- ``tail_rate`` / ``tail_multiplier``: chance that a call is this many times slower [0 / 10]
+- ``per_item``: extra seconds per embedded text [0]
+- ``error_rate``: chance of a simulated 500 error after the latency [0]
+- ``throttle_rate``: chance of an immediate simulated 429 [0]
+- ``max_rps``: requests per second the simulated server accepts before answering 429 [unlimited]
+- ``max_concurrency``: in-flight requests it accepts before answering 503 [unlimited]
+- ``tokens_per_second``: streaming cadence after the first token [50]
+- ``response_words``: words in a streamed reply, padded when shorter [0, no padding]
+- ``dimensions``: length of fake embedding vectors [384]
+- ``seed``: random seed for latency and fault injection [0]
+
+Every adapter with the same ``model`` string shares one simulated server, so
+limits hold across segments and adapter pools.  :func:`getMockLatencyStats`
+reports each server's traffic.
+"""
+
+from __future__ import annotations
+
+import math
+import random
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+_DEFAULTS = {
+    "latency": "fixed",
+    "median": 0.05,
+    "sigma": 0.5,
+    "tail_rate": 0.0,
+    "tail_multiplier": 10.0,
+    "per_item": 0.0,
+    "error_rate": 0.0,
+    "throttle_rate": 0.0,
+    "max_rps": None,
+    "max_concurrency": None,
+    "tokens_per_second": 50.0,
+    "response_words": 0,
+    "dimensions": 384,
+    "seed": 0,
+}
+_INT_SETTINGS = ("max_concurrency", "response_words", "dimensions", "seed")
+_LATENCY_MODELS = ("fixed", "lognormal", "none")
+
+
+class MockProviderError(RuntimeError):
+    """A simulated provider failure carrying an HTTP-style ``status_code``."""
+
+    def __init__(self, status_code: int, message: str):
+        super().__init__(f"{status_code} {message}")
+        self.status_code = status_code
+
+
+def parse_mock_spec(spec: str) -> Tuple[str, dict]:
+    """Split a ``name,key:value,...`` model string into (name, settings)."""
+    name = "mock"
+    settings = dict(_DEFAULTS)
+    for part in (spec or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        key, sep, value = part.partition(":")
+        key = key.strip()
+        if not sep:
+            name = key
+            continue
+        if key not in _DEFAULTS:
+            raise ValueError(f"Unknown mock-latency setting '{key}'. Expected one of: {', '.join(_DEFAULTS)}.")
+        value = value.strip()
+        if key == "latency":
+            if value not in _LATENCY_MODELS:
+                raise ValueError(f"latency must be one of {', '.join(_LATENCY_MODELS)}, got '{value}'")
+            settings[key] = value
+        elif key in _INT_SETTINGS:
+            settings[key] = int(value)
+        else:
+            settings[key] = float(value)
+    return name, settings
+
+
+class MockServer:
+    """Latency, fault injection and capacity limits of one simulated endpoint."""
+
+    def __init__(self, spec: str, clock=time.monotonic):
+        self.spec = spec
+        self.name, self.settings = parse_mock_spec(spec)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._rng = random.Random(self.settings["seed"])
+        self._recent = deque()
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.requests = 0
+        self.completed = 0
+        self.errors = 0
+        self.throttled = 0
+
+    def sample_latency(self, items: int = 1) -> float:
+        s = self.settings
+        with self._lock:
+            if s["latency"] == "none":
+                latency = 0.0
+            elif s["latency"] == "lognormal":
+                latency = self._rng.lognormvariate(math.log(max(s["median"], 1e-9)), s["sigma"])
+            else:
+                latency = s["median"]
+            if s["tail_rate"] and self._rng.random() < s["tail_rate"]:
+                latency *= s["tail_multiplier"]
+        return latency + s["per_item"] * items
+
+    def begin(self, items: int = 1) -> Tuple[float, Optional[MockProviderError]]:
+        """Admit a request: return (latency, error to raise after the latency) or raise a 429/503 now."""
+        s = self.settings
+        with self._lock:
+            self.requests += 1
+            now = self._clock()
+            while self._recent and now - self._recent[0] >= 1.0:
+                self._recent.popleft()
+            if s["max_rps"] is not None and len(self._recent) >= s["max_rps"]:
+                self.throttled += 1
+                raise MockProviderError(429, "Too Many Requests: simulated rate limit")
+            if s["throttle_rate"] and self._rng.random() < s["throttle_rate"]:
+                self.throttled += 1
+                raise MockProviderError(429, "Too Many Requests: simulated throttling")
+            if s["max_concurrency"] is not None and self.in_flight >= s["max_concurrency"]:
+                self.throttled += 1
+                raise MockProviderError(503, "Service Unavailable: simulated server overloaded")
+            self._recent.append(now)
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            fail = bool(s["error_rate"]) and self._rng.random() < s["error_rate"]
+        error = MockProviderError(500, "Internal Server Error: simulated failure") if fail else None
+        return self.sample_latency(items), error
+
+    def end(self, error: Optional[BaseException] = None) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            if error is None:
+                self.completed += 1
+            else:
+                self.errors += 1
+
+    def token_interval(self) -> float:
+        rate = self.settings["tokens_per_second"]
+        return 1.0 / rate if rate > 0 else 0.0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "model": self.spec,
+                "requests": self.requests,
+                "completed": self.completed,
+                "errors": self.errors,
+                "throttled": self.throttled,
+                "in_flight": self.in_flight,
+                "peak_in_flight": self.peak_in_flight,
+            }
+
+
+_servers: Dict[Tuple[str, str], MockServer] = {}
+_registry_lock = threading.Lock()
+
+
+def getMockServer(kind: str, spec: str) -> MockServer:
+    """Return the shared simulated server for a kind ("prompt" or "embedding") and model string."""
+    key = (kind, spec)
+    with _registry_lock:
+        server = _servers.get(key)
+        if server is None:
+            server = _servers[key] = MockServer(spec)
+        return server
+
+
+def getMockLatencyStats() -> List[dict]:
+    """Return a traffic snapshot for every simulated server used in this process."""
+    with _registry_lock:
+        servers = list(_servers.items())
+    return [{"kind": kind, **server.stats()} for (kind, _), server in servers]
+
+
+def resetMockLatencyServers() -> None:
+    """Forget all simulated servers, their limits and counts (mainly for tests)."""
+    with _registry_lock:
+        _servers.clear()
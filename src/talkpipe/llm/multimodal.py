@@ -1,16 +1,116 @@
-"""Multimodal translation helpers for LLM prompt adapters."""
+"""Multimodal translation helpers for LLM prompt adapters.
+
+Images are downscaled to the largest size each provider actually uses before
+they are base64-encoded; anything larger only adds upload time, because the
+provider shrinks it on arrival.  Encoded images are cached by content, so an
+image sent again (by another item, or in a multi-turn history) is neither
+decoded nor encoded a second time, and every history entry shares the same
+encoded string.  Downscaling needs Pillow; without it images are sent as-is.
+The encoding is shared, but the chat APIs are stateless, so each request still
+carries every image in its history.
+"""
 
 from __future__ import annotations
 
 import base64
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
 
 from .content import ImagePart, TextPart, UserTurn
 
+logger = logging.getLogger(__name__)
+
+# (longest side, shortest side) in pixels beyond which the provider downscales anyway.
+# OpenAI fits high-detail images into 2048x2048 and then scales the short side to 768;
+# Anthropic resizes anything whose long edge exceeds 1568.  Ollama depends on the model,
+# so its images are not downscaled.
+PROVIDER_IMAGE_LIMITS: Dict[str, Tuple[Optional[int], Optional[int]]] = {
+    "openai": (2048, 768),
+    "anthropic": (1568, None),
+}
+
+_DOWNSCALABLE_TYPES = ("image/png", "image/jpeg", "image/webp")
+
+IMAGE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+_encoded: "OrderedDict[tuple, Tuple[str, str]]" = OrderedDict()
+_encoded_bytes = 0
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "original_bytes": 0, "sent_bytes": 0}
+
+
+def _downscaled(part: ImagePart, provider: Optional[str]) -> Tuple[bytes, str]:
+    max_dimension, max_short_side = PROVIDER_IMAGE_LIMITS.get(provider, (None, None))
+    if (max_dimension is None and max_short_side is None) or part.mime_type not in _DOWNSCALABLE_TYPES:
+        return part.data, part.mime_type
+    from talkpipe.data.image import load_image_from_bytes, normalize_image
+
+    try:
+        result = normalize_image(
+            load_image_from_bytes(part.data, mime_type=part.mime_type),
+            max_dimension=max_dimension,
+            max_short_side=max_short_side,
+        )
+    except ImportError:
+        logger.debug("Pillow is not installed; sending images without downscaling")
+        return part.data, part.mime_type
+    except Exception as exc:
+        logger.warning(f"Could not downscale image, sending it as-is: {exc}")
+        return part.data, part.mime_type
+    return result.data, result.mime_type
+
+
+def encoded_image(part: ImagePart, provider: Optional[str] = None) -> Tuple[str, str]:
+    """Return (mime_type, base64 data) for an image, downscaled for ``provider``."""
+    global _encoded_bytes
+    # Keyed by the bytes themselves: Python caches a bytes object's hash, so
+    # looking up the same image object again is cheap.
+    key = (provider, part.mime_type, part.data)
+    with _lock:
+        cached = _encoded.get(key)
+        if cached is not None:
+            _encoded.move_to_end(key)
+            _stats["hits"] += 1
+            return cached
+
+    data, mime_type = _downscaled(part, provider)
+    encoded = (mime_type, base64.b64encode(data).decode("ascii"))
+    size = len(part.data) + len(encoded[1])
+    with _lock:
+        _stats["misses"] += 1
+        _stats["original_bytes"] += len(part.data)
+        _stats["sent_bytes"] += len(data)
+        if size <= IMAGE_CACHE_MAX_BYTES and key not in _encoded:
+            _encoded[key] = encoded
+            _encoded_bytes += size
+            while _encoded_bytes > IMAGE_CACHE_MAX_BYTES:
+                (_, _, old_data), (_, old_encoded) = _encoded.popitem(last=False)
+                _encoded_bytes -= len(old_data) + len(old_encoded)
+    return encoded
+
+
+def getImageCacheStats() -> dict:
+    """Hits and misses of the encoded-image cache, and raw vs. downscaled bytes of encoded images."""
+    with _lock:
+        return {**_stats, "entries": len(_encoded), "cached_bytes": _encoded_bytes}
+
+
+def resetImageCache() -> None:
+    """Drop cached encodings and zero the counters (mainly for tests)."""
+    global _encoded_bytes
+    with _lock:
+        _encoded.clear()
+        _encoded_bytes = 0
+        for name in _stats:
+            _stats[name] = 0
+
 
 def to_ollama_user_message(user_turn: UserTurn) -> dict:
     text = "\n".join(part.text for part in user_turn.parts if isinstance(part, TextPart))
     images = [
-        base64.b64encode(part.data).decode("ascii")
+        encoded_image(part, "ollama")[1]
         for part in user_turn.parts
         if isinstance(part, ImagePart)
     ]
@@ -26,11 +126,11 @@ def to_openai_user_message(user_turn: UserTurn) -> dict:
         if isinstance(part, TextPart):
             content.append({"type": "input_text", "text": part.text})
         elif isinstance(part, ImagePart):
-            encoded = base64.b64encode(part.data).decode("ascii")
+            mime_type, encoded = encoded_image(part, "openai")
             content.append(
                 {
                     "type": "input_image",
-                    "image_url": f"data:{part.mime_type};base64,{encoded}",
+                    "image_url": f"data:{mime_type};base64,{encoded}",
                 }
             )
     return {"role": "user", "content": content}
@@ -42,13 +142,13 @@ def to_anthropic_user_message(user_turn: UserTurn) -> dict:
         if isinstance(part, TextPart):
             content.append({"type": "text", "text": part.text})
         elif isinstance(part, ImagePart):
-            encoded = base64.b64encode(part.data).decode("ascii")
+            mime_type, encoded = encoded_image(part, "anthropic")
             content.append(
                 {
                     "type": "image",
                     "source": {
                         "type": "base64",
-                        "media_type": part.mime_type,
+                        "media_type": mime_type,
                         "data": encoded,
                     },
                 }
@@ -1,13 +1,20 @@
 from abc import ABC, abstractmethod
+import asyncio
+import contextlib
 import json
 import logging
-from typing import Annotated, Optional, Union
+from typing import Annotated, Awaitable, Callable, Iterator, Optional, Tuple, Union
 
 from pydantic import BaseModel
 
+from talkpipe.util.config import get_config
+from talkpipe.util.constants import LLM_CACHE, LLM_CACHE_MAX_ENTRIES, LLM_CACHE_PATH, LLM_CACHE_TTL_SECONDS
 from talkpipe.util.data_manipulation import parse_key_value_str
 
 from .prompt_adapter_memory import PromptAdapterMemoryMixin
+from .prompt_cache import recordPromptCacheUsage, usage_counts
+from .single_flight import getSingleFlight, request_key, singleFlightEnabled
+from .response_cache import CACHE_MODES, DEFAULT_CACHE_MAX_ENTRIES, DEFAULT_CACHE_PATH, getResponseCache, make_cache_key
 
 # Keep the historical logger name for compatibility with existing monkeypatches.
 logger = logging.getLogger("talkpipe.llm.prompt_adapters")
@@ -49,6 +56,7 @@ class AbstractLLMPromptAdapter(PromptAdapterMemoryMixin, ABC):
         self._temperature = temperature
         self._temperature_explicit = temperature is not None
         self._output_format = output_format
+        self.set_tokenizer(None)
         self._messages = []
         self._summary_message = None
         self._memory_mode = memory_mode
@@ -59,6 +67,15 @@ class AbstractLLMPromptAdapter(PromptAdapterMemoryMixin, ABC):
         self._summary_max_chars = 2400
         self._summary_model = None
         self._configure_memory_mode(memory_mode)
+        self.set_background_summarization(False)
+        self._response_cache = None
+        self._cache_mode = "off"
+        self.set_response_cache(None)
+        self._prompt_caching = True
+        self._single_flight_setting: Optional[bool] = None
+        self.last_prompt_cache_usage = None
+        self._async_lock = None
+        self._async_lock_loop = None
 
         # Initialize system message and prefix messages.
         # Only create system message if system_prompt is not None.
@@ -80,10 +97,112 @@ class AbstractLLMPromptAdapter(PromptAdapterMemoryMixin, ABC):
             self._system_message = {"role": "system", "content": system_prompt}
             self._prefix_messages = [self._system_message]
 
-    def _request_messages(self) -> list:
+    def set_response_cache(
+        self,
+        mode: Optional[str],
+        path: Optional[str] = None,
+        max_entries: Optional[int] = None,
+        ttl_seconds: Optional[float] = None,
+    ) -> None:
+        """Configure the persistent response cache.
+
+        ``mode`` is "off", "deterministic" (only requests sent with temperature 0)
+        or "always".  Any argument left as None falls back to the llm_cache*
+        configuration keys.
+        """
+        cfg = get_config()
+        mode = (mode or cfg.get(LLM_CACHE, None) or "off").strip().lower()
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Unknown cache mode: {mode}. Expected one of: {', '.join(CACHE_MODES)}.")
+        self._cache_mode = mode
+        if mode == "off":
+            self._response_cache = None
+            return
+        max_entries = max_entries if max_entries is not None else cfg.get(LLM_CACHE_MAX_ENTRIES, DEFAULT_CACHE_MAX_ENTRIES)
+        ttl_seconds = ttl_seconds if ttl_seconds is not None else cfg.get(LLM_CACHE_TTL_SECONDS, None)
+        self._response_cache = getResponseCache(
+            path or cfg.get(LLM_CACHE_PATH, None) or DEFAULT_CACHE_PATH,
+            max_entries=int(max_entries) if max_entries is not None else None,
+            ttl_seconds=float(ttl_seconds) if ttl_seconds is not None else None,
+        )
+
+    def set_single_flight(self, enabled: Optional[bool]) -> None:
+        """Choose whether identical in-flight requests share one reply.
+
+        None (the default) merges them only when the reply would be reused anyway:
+        requests sent with temperature 0, or with the response cache in "always"
+        mode, and only while the llm_single_flight configuration key is on.  True
+        or False overrides that for this adapter.
+        """
+        self._single_flight_setting = enabled
+
+    def _merges_in_flight(self) -> bool:
+        if self._single_flight_setting is not None:
+            return self._single_flight_setting
+        # Sampled requests must each get their own reply.
+        return singleFlightEnabled() and (self._temperature == 0 or self._cache_mode == "always")
+
+    def set_prompt_caching(self, enabled: bool) -> None:
+        """Enable or disable provider prompt-prefix caching for adapters that support it."""
+        self._prompt_caching = bool(enabled)
+
+    def _record_prompt_cache_usage(self, usage) -> None:
+        # Keeps the last response's counts on the adapter and adds them to the process-wide totals.
+        counts = usage_counts(usage)
+        if counts is None:
+            return
+        self.last_prompt_cache_usage = counts
+        recordPromptCacheUsage(self._source, self._model_name, counts)
+
+    def _cached_response(self, turns: Optional[list] = None) -> tuple:
+        """Look up the pending request in the response cache.
+
+        Returns (cache_key, cached_text).  cache_key is None when caching does not
+        apply to this request; cached_text is None on a miss.
+        """
+        key = self._cache_key(turns)
+        if key is None:
+            return None, None
+        return key, self._response_cache.get(key)
+
+    def _cache_key(self, turns: Optional[list] = None) -> Optional[str]:
+        if self._response_cache is None:
+            return None
+        if self._cache_mode == "deterministic" and self._temperature != 0:
+            return None
+        schema = self._output_format.model_json_schema() if self._output_format else None
+        return make_cache_key(self._source, self._model_name, self._request_messages(turns), self._temperature, schema)
+
+    def has_cached_response(self, prompt: str) -> bool:
+        """Whether the response cache already answers ``prompt`` sent as the next user turn.
+
+        Only reads state.  With memory compaction on, the request that ``execute``
+        sends may differ from the one checked here, so the answer is False.
+        """
+        if self._summarization_mode != "off":
+            return False
+        turn = {"role": "user", "content": prompt}
+        key = self._cache_key(list(self._messages) + [turn] if self._multi_turn else [turn])
+        return key is not None and self._response_cache.contains(key)
+
+    def _store_response(self, cache_key: Optional[str], response_text: str) -> None:
+        if cache_key is not None:
+            self._response_cache.put(cache_key, response_text)
+
+    def _finish_cached_response(self, response_text: str):
+        logger.debug(f"Response cache hit for {self._model_name} ({self._source})")
+        self._record_assistant_response(response_text)
+        return self._parse_response(response_text)
+
+    def _parse_response(self, response_text: str):
+        if self._output_format:
+            return self._output_format.model_validate_json(response_text)
+        return response_text
+
+    def _request_messages(self, turns: Optional[list] = None) -> list:
         # Providers consume the same assembled order: static prefix, rolling summary, then live turns.
         summary_messages = [self._summary_message] if self._summary_message else []
-        return self._prefix_messages + summary_messages + self._messages
+        return self._prefix_messages + summary_messages + (self._messages if turns is None else turns)
 
     def _require_dependency(self, module_name: str, display_name: str, extra_name: str):
         try:
@@ -131,6 +250,22 @@ class AbstractLLMPromptAdapter(PromptAdapterMemoryMixin, ABC):
         if self._temperature_explicit:
             request_params["temperature"] = self._temperature
 
+    def _single_flight(self, call: Callable[[], object], *key_parts):
+        """Send a non-streaming request, sharing the result of an identical one already in flight.
+
+        ``key_parts`` must cover everything that affects the response (endpoint,
+        model, messages, schema and options).
+        """
+        if not self._merges_in_flight():
+            return call()
+        return getSingleFlight("prompt", self._source).do(request_key(self._source, *key_parts), call)
+
+    async def _asingle_flight(self, call: Callable[[], Awaitable[object]], *key_parts):
+        """Coroutine version of :meth:`_single_flight`."""
+        if not self._merges_in_flight():
+            return await call()
+        return await getSingleFlight("prompt", self._source).ado(request_key(self._source, *key_parts), call)
+
     def _record_assistant_response(self, response_text: str) -> None:
         # Single helper keeps history mutation consistent across providers.
         if self._multi_turn:
@@ -228,6 +363,104 @@ class AbstractLLMPromptAdapter(PromptAdapterMemoryMixin, ABC):
         This method is used to execute the chat model with a given input.
         """
 
+    def execute_stream(self, prompt: str) -> Iterator[str]:
+        """Execute the chat model, yielding the response text in incremental chunks.
+
+        Adapters without provider streaming yield the whole response as one chunk.
+        """
+        yield self.execute(prompt)
+
+    def _streamed_turn(self, user_message: dict, stream_request: Callable[[], Iterator[str]]) -> Iterator[str]:
+        """Run one streamed turn: record the user message, stream, then record the reply.
+
+        ``stream_request`` sends the assembled request and yields text deltas.  The
+        complete reply is added to history (and the response cache) once the stream
+        ends; if the consumer stops early, the text received so far is recorded.
+        """
+        if self._output_format is not None:
+            raise ValueError("Streaming is not supported together with output_format.")
+        self._messages.append(user_message)
+        self._compact_context_if_needed()
+
+        cache_key, cached_text = self._cached_response()
+        if cached_text is not None:
+            self._record_assistant_response(cached_text)
+            yield cached_text
+            return
+
+        parts = []
+        try:
+            for delta in stream_request():
+                if delta:
+                    parts.append(delta)
+                    yield delta
+        except GeneratorExit:
+            self._record_assistant_response("".join(parts))
+            raise
+        response_text = "".join(parts)
+        self._store_response(cache_key, response_text)
+        self._record_assistant_response(response_text)
+
+    async def achat(self, prompt: str):
+        """Coroutine version of :meth:`execute`.
+
+        Adapters with an async provider client override this so that many calls
+        can be in flight without a thread each.  The default runs ``execute`` in
+        a worker thread, one call at a time per adapter.
+        """
+        async with self._history_lock(always=True):
+            return await asyncio.to_thread(self.execute, prompt)
+
+    @contextlib.asynccontextmanager
+    async def _history_lock(self, always: bool = False):
+        # Single-turn requests share no history, so they run concurrently unless
+        # the caller needs exclusive use of the adapter.
+        if not (always or self._multi_turn):
+            yield
+            return
+        loop = asyncio.get_running_loop()
+        if self._async_lock_loop is not loop:
+            self._async_lock = asyncio.Lock()
+            self._async_lock_loop = loop
+        async with self._async_lock:
+            yield
+
+    async def _achat_turn(
+        self,
+        user_message: dict,
+        send: Callable[[list], Awaitable[Tuple[str, object]]],
+    ):
+        """Run one async turn around ``send``.
+
+        ``send(turns)`` sends the request built from the live ``turns`` and returns
+        (response_text, result), where result may be None to parse response_text.
+        Multi-turn adapters record the exchange in history and run one turn at a
+        time; single-turn requests never touch the shared message list, so any
+        number of them can be awaited concurrently on one adapter.
+        """
+        async with self._history_lock():
+            if self._multi_turn:
+                self._messages.append(user_message)
+                if self._summarizes_in_background():
+                    self._compact_context_if_needed()
+                elif self._needs_compaction():
+                    # summary_llm compaction makes a blocking provider call.
+                    await asyncio.to_thread(self._compact_context_if_needed)
+                turns = list(self._messages)
+            else:
+                turns = [user_message]
+
+            cache_key, cached_text = self._cached_response(turns)
+            if cached_text is not None:
+                logger.debug(f"Response cache hit for {self._model_name} ({self._source})")
+                response_text, result = cached_text, None
+            else:
+                response_text, result = await send(turns)
+                self._store_response(cache_key, response_text)
+            if self._multi_turn:
+                self._record_assistant_response(response_text)
+            return self._parse_response(response_text) if result is None else result
+
     def execute_turn(self, user_turn) -> str:
         """Execute the chat model with a multimodal user turn."""
         raise NotImplementedError(
@@ -1,16 +1,206 @@
+import concurrent.futures
 import logging
-from typing import Optional
+import threading
+from typing import Callable, Iterable, List, Optional
 
 from talkpipe.data.text.englishnormalize import summarize
+from talkpipe.util.config import get_config
+from talkpipe.util.constants import LLM_TOKENIZER
+
+from .tokenizers import DEFAULT_TOKENIZER, MessageTokenCounter, count_chars, getTokenCounter
 
 logger = logging.getLogger("talkpipe.llm.prompt_adapters")
 
 
+
+def _quarter_chars(text: str) -> float:
+    # The chars heuristic, left fractional so the context estimate floors once over the whole
+    # request (len // 4 of all content plus the per-message overhead), exactly as before
+    # counts were kept per message.
+    return len(text) / 4
+
+
+_DEFAULT_MESSAGE_COUNTER = MessageTokenCounter(_quarter_chars)
+
+# Background summaries start once the context passes this fraction of context_token_trigger.
+DEFAULT_SUMMARY_SOFT_RATIO = 0.75
+
+_summary_executor = None
+_summary_executor_lock = threading.Lock()
+
+
+def _background_executor() -> concurrent.futures.ThreadPoolExecutor:
+    global _summary_executor
+    with _summary_executor_lock:
+        if _summary_executor is None:
+            _summary_executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=4, thread_name_prefix="talkpipe-summary"
+            )
+        return _summary_executor
+
+
+class TokenCountedMessages(list):
+    """Chat history that keeps a running token estimate.
+
+    Each message is counted once when it is added and its count is subtracted
+    when it is removed, so ``tokens`` is available without rescanning the history.
+    """
+
+    def __init__(self, messages: Iterable[dict] = (), counter: Callable[[dict], int] = _DEFAULT_MESSAGE_COUNTER):
+        super().__init__()
+        self._counter = counter
+        self._counts = []
+        self.tokens = 0
+        self.extend(messages)
+
+    def __reduce__(self):
+        return (self.__class__, (list(self), self._counter))
+
+    def append(self, message: dict) -> None:
+        count = self._counter(message)
+        super().append(message)
+        self._counts.append(count)
+        self.tokens += count
+
+    def extend(self, messages: Iterable[dict]) -> None:
+        for message in messages:
+            self.append(message)
+
+    def __iadd__(self, messages: Iterable[dict]):
+        self.extend(messages)
+        return self
+
+    def insert(self, index: int, message: dict) -> None:
+        count = self._counter(message)
+        super().insert(index, message)
+        self._counts.insert(index, count)
+        self.tokens += count
+
+    def pop(self, index: int = -1) -> dict:
+        message = super().pop(index)
+        self.tokens -= self._counts.pop(index)
+        return message
+
+    def remove(self, message: dict) -> None:
+        self.pop(self.index(message))
+
+    def clear(self) -> None:
+        super().clear()
+        self._counts.clear()
+        self.tokens = 0
+
+    def __setitem__(self, index, value) -> None:
+        if isinstance(index, slice):
+            value = list(value)
+            counts = [self._counter(message) for message in value]
+            super().__setitem__(index, value)
+            self.tokens += sum(counts) - sum(self._counts[index])
+            self._counts[index] = counts
+        else:
+            count = self._counter(value)
+            super().__setitem__(index, value)
+            self.tokens += count - self._counts[index]
+            self._counts[index] = count
+
+    def __delitem__(self, index) -> None:
+        super().__delitem__(index)
+        removed = self._counts[index]
+        self.tokens -= sum(removed) if isinstance(index, slice) else removed
+        del self._counts[index]
+
+
+class _BackgroundSummary:
+    """A summary being written in the background for the oldest messages of one history."""
+
+    def __init__(self, history: TokenCountedMessages, covered: List[dict], previous_summary: str, dropped: bool):
+        self.history = history
+        self.covered = covered
+        self.previous_summary = previous_summary
+        # True once the covered messages have been truncated from the history.
+        self.dropped = dropped
+        # Messages truncated while this summary was running; they go into the next one.
+        self.backlog: List[dict] = []
+        self.future: Optional[concurrent.futures.Future] = None
+
+
+def settle_conversation_state(state: dict) -> dict:
+    """Return ``{"messages", "summary"}`` for ``state`` with any pending background summary folded in.
+
+    Used before a conversation is stored outside the process.  A finished summary is
+    applied; messages truncated for a summary that is not ready (or failed) are put
+    back at the front of the history, so the next compaction covers them again.
+    """
+    messages = list(state.get("messages") or [])
+    summary = state.get("summary")
+    job = state.get("pending_summary")
+    if job is None or not job.dropped:
+        return {"messages": messages, "summary": summary}
+    future = job.future
+    if future is not None and future.done() and future.exception() is None and future.result():
+        return {"messages": job.backlog + messages, "summary": {"role": "system", "content": future.result()}}
+    return {"messages": job.covered + job.backlog + messages, "summary": summary}
+
+
 class PromptAdapterMemoryMixin:
+    @property
+    def _messages(self) -> TokenCountedMessages:
+        return self._message_history
+
+    @_messages.setter
+    def _messages(self, messages: Iterable[dict]) -> None:
+        self._message_history = TokenCountedMessages(messages, self._message_token_counter())
+
+    def set_tokenizer(self, name: Optional[str] = None) -> None:
+        """Choose the tokenizer used for context accounting.
+
+        ``name`` is one of :func:`talkpipe.llm.tokenizers.getTokenizers`; None uses
+        the llm_tokenizer configuration key, falling back to the character heuristic.
+        The existing history is recounted.
+        """
+        name = name or get_config().get(LLM_TOKENIZER, None) or DEFAULT_TOKENIZER
+        self._tokenizer = name
+        counter = getTokenCounter(name, self._model_name)
+        self._message_counter = MessageTokenCounter(_quarter_chars if counter is count_chars else counter)
+        if "_message_history" in self.__dict__:
+            self._messages = list(self._message_history)
+
+    def get_conversation_state(self) -> dict:
+        """Return the live conversation (history, rolling summary and any pending background summary)."""
+        state = {"messages": self._messages, "summary": self._summary_message}
+        job = self.__dict__.get("_background_summary")
+        if job is not None and job.history is self._messages:
+            state["pending_summary"] = job
+        return state
+
+    def set_conversation_state(self, state: Optional[dict]) -> None:
+        """Replace the conversation with one from :meth:`get_conversation_state`, or start fresh on None."""
+        state = state or {}
+        messages = state.get("messages") or []
+        if isinstance(messages, TokenCountedMessages) and messages._counter is self._message_token_counter():
+            # Reuse the running counts rather than recounting the history.
+            self._message_history = messages
+        else:
+            self._messages = messages
+        self._summary_message = state.get("summary")
+        # A background summary started for this conversation follows it; one for another is kept in its state.
+        job = state.get("pending_summary")
+        if job is not None:
+            job.history = self._messages
+        self._background_summary = job
+
+    def _message_token_counter(self) -> Callable[[dict], int]:
+        return self.__dict__.get("_message_counter", _DEFAULT_MESSAGE_COUNTER)
+
     def _estimate_tokens(self, messages: list) -> int:
         # Provider-agnostic approximation to stay lightweight and deterministic.
-        content_size = sum(len(str(message.get("content", ""))) for message in messages)
-        return (content_size // 4) + (6 * len(messages))
+        counter = self._message_token_counter()
+        return int(sum(counter(message) for message in messages))
+
+    def _context_token_estimate(self) -> int:
+        # The history keeps a running count, so only the fixed prefix and summary are counted here.
+        counter = self._message_token_counter()
+        summary_messages = [self._summary_message] if self._summary_message else []
+        return int(sum(counter(message) for message in self._prefix_messages + summary_messages) + self._messages.tokens)
 
     def _needs_compaction(self) -> bool:
         if self._summarization_mode != "rolling":
@@ -18,7 +208,7 @@ class PromptAdapterMemoryMixin:
         effective_budget = self._get_effective_context_token_trigger()
         if not effective_budget:
             return False
-        return self._estimate_tokens(self._request_messages()) > max(1, int(effective_budget))
+        return self._context_token_estimate() > max(1, int(effective_budget))
 
     def _configure_memory_mode(self, memory_mode: str) -> None:
         mode = (memory_mode or "full").strip().lower()
@@ -111,11 +301,113 @@ class PromptAdapterMemoryMixin:
             return deterministic_summary.strip()[: self._summary_max_chars]
         return self._summarize_truncate(previous_summary, archived_messages)
 
+    def set_background_summarization(self, enabled: bool, soft_ratio: float = DEFAULT_SUMMARY_SOFT_RATIO) -> None:
+        """Write LLM summaries in a background thread instead of during a turn.
+
+        Applies to ``memory_mode="summary_llm"``.  Once the context passes
+        ``soft_ratio`` of ``context_token_trigger``, the messages that would be
+        archived are summarized in the background while the conversation goes on;
+        the next turn swaps in the finished summary.  A turn that reaches the
+        trigger before the summary is ready truncates those messages instead of
+        waiting, and the summary is added when it arrives.
+        """
+        if not 0 < soft_ratio <= 1:
+            raise ValueError(f"soft_ratio must be in (0, 1], got {soft_ratio}")
+        self._background_summaries = bool(enabled)
+        self._summary_soft_ratio = soft_ratio
+        self._background_summary = None
+
+    def _summarizes_in_background(self) -> bool:
+        return (
+            self.__dict__.get("_background_summaries", False)
+            and self._summarization_mode == "rolling"
+            and self._memory_mode != "recent_only"
+            and self._summary_strategy == "llm"
+        )
+
+    def _start_background_summary(self, covered: List[dict], dropped: bool) -> _BackgroundSummary:
+        previous_summary = self._summary_message["content"] if self._summary_message else ""
+        job = _BackgroundSummary(self._messages, list(covered), previous_summary, dropped)
+        logger.debug(
+            "Starting background summary of %s messages for %s (%s)", len(covered), self._model_name, self._source
+        )
+        job.future = _background_executor().submit(self._summarize_history, previous_summary, job.covered)
+        self._background_summary = job
+        return job
+
+    def _apply_background_summary(self) -> None:
+        job = self._background_summary
+        if job is None or not job.future.done():
+            return
+        self._background_summary = None
+        if job.history is not self._messages:
+            logger.debug("Discarding background summary for a history that is no longer active")
+            return
+        try:
+            new_summary = job.future.result()
+        except Exception as exc:
+            logger.warning(f"Background summary failed, using truncation: {exc}")
+            new_summary = self._summarize_truncate(job.previous_summary, job.covered)
+        if not job.dropped:
+            count = len(job.covered)
+            if len(self._messages) < count or any(a is not b for a, b in zip(self._messages, job.covered)):
+                logger.debug("History changed while summarizing; discarding background summary")
+                return
+            del self._messages[:count]
+        self._summary_message = {"role": "system", "content": new_summary} if new_summary else None
+        logger.info(
+            "Background summary applied for %s (%s): summarized_messages=%s summary_chars=%s",
+            self._model_name,
+            self._source,
+            len(job.covered),
+            len(new_summary) if new_summary else 0,
+        )
+        if job.backlog:
+            self._start_background_summary(job.backlog, dropped=True)
+
+    def _compact_in_background(self) -> None:
+        # Never blocks on the summary model: swap in finished summaries, truncate when over budget.
+        self._apply_background_summary()
+        keep_count = max(0, self._unsummarized_message_count)
+        job = self._background_summary
+        if job is not None and job.history is not self._messages:
+            job = self._background_summary = None
+
+        if self._needs_compaction():
+            if job is not None and not job.dropped:
+                count = len(job.covered)
+                if all(a is b for a, b in zip(self._messages, job.covered)) and len(self._messages) >= count:
+                    logger.info("Summary not ready; truncating %s messages until it arrives", count)
+                    del self._messages[:count]
+                    job.dropped = True
+            archived_count = len(self._messages) - keep_count
+            if self._needs_compaction() and archived_count > 0:
+                archived = list(self._messages[:archived_count])
+                del self._messages[:archived_count]
+                if job is None:
+                    self._start_background_summary(archived, dropped=True)
+                else:
+                    job.backlog.extend(archived)
+            return
+
+        budget = self._get_effective_context_token_trigger()
+        archived_count = len(self._messages) - keep_count
+        if (
+            job is None
+            and budget
+            and archived_count > 0
+            and self._context_token_estimate() > budget * self._summary_soft_ratio
+        ):
+            self._start_background_summary(self._messages[:archived_count], dropped=False)
+
     def _compact_context_if_needed(self) -> None:
+        if self._summarizes_in_background():
+            self._compact_in_background()
+            return
         if not self._needs_compaction():
             return
 
-        current_estimate = self._estimate_tokens(self._request_messages())
+        current_estimate = self._context_token_estimate()
         logger.info(
             "Context compaction triggered for %s (%s): estimated_tokens=%s",
             self._model_name,
@@ -132,8 +424,9 @@ class PromptAdapterMemoryMixin:
             return
 
         # Compact only the oldest messages; retain the newest unsummarized messages verbatim.
-        archived_messages = self._messages[:-keep_count]
-        recent_messages = self._messages[-keep_count:] if keep_count > 0 else []
+        archived_count = len(self._messages) - keep_count
+        archived_messages = self._messages[:archived_count]
+        recent_messages = self._messages[archived_count:]
         logger.debug(
             "Compacting context: archived_messages=%s recent_messages_kept=%s strategy=%s",
             len(archived_messages),
@@ -158,7 +451,8 @@ class PromptAdapterMemoryMixin:
                 self._clip_debug_text(previous_summary),
                 self._clip_debug_text(new_summary),
             )
-        self._messages = recent_messages
+        # Dropping the archived messages keeps the running counts of the recent ones.
+        del self._messages[:archived_count]
         logger.info(
             "Context compaction complete: summary_created=%s summary_chars=%s remaining_messages=%s",
             bool(self._summary_message),
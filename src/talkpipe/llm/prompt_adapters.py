@@ -1,8 +1,10 @@
 from .prompt_adapter_base import AbstractLLMPromptAdapter, logger
 from .prompt_adapters_anthropic import AnthropicPromptAdapter
 from .prompt_adapters_eliza import ElizaPromptAdapter
+from .prompt_adapters_mock import MockLatencyPromptAdapter
 from .prompt_adapters_ollama import OllamaPromptAdapter
 from .prompt_adapters_openai import OpenAIPromptAdapter
+from .prompt_adapters_router import RouterPromptAdapter
 
 # Compatibility facade: keep legacy import path stable while internals live in split modules.
 __all__ = [
@@ -11,5 +13,7 @@ __all__ = [
     "AnthropicPromptAdapter",
     "OpenAIPromptAdapter",
     "ElizaPromptAdapter",
+    "RouterPromptAdapter",
+    "MockLatencyPromptAdapter",
     "logger",
 ]
\ No newline at end of file
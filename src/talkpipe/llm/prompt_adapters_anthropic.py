@@ -3,9 +3,11 @@ from typing import Optional, Union
 
 from pydantic import BaseModel
 
+from .client_pool import anthropic_async_client, anthropic_client
 from .prompt_adapter_base import AbstractLLMPromptAdapter, logger
 from .content import UserTurn
 from .multimodal import to_anthropic_user_message
+from .prompt_cache import ANTHROPIC_MIN_CACHEABLE_TOKENS, EPHEMERAL_CACHE_CONTROL, mark_cache_breakpoint
 
 
 class AnthropicPromptAdapter(AbstractLLMPromptAdapter):
@@ -51,7 +53,7 @@ class AnthropicPromptAdapter(AbstractLLMPromptAdapter):
             debug_messages,
         )
         self.client = self._build_client(
-            anthropic.Anthropic, "Anthropic", "ANTHROPIC_API_KEY"
+            lambda: anthropic_client(anthropic), "Anthropic", "ANTHROPIC_API_KEY"
         )
         self._max_tokens = 4096  # Default max tokens for response
 
@@ -66,6 +68,10 @@ class AnthropicPromptAdapter(AbstractLLMPromptAdapter):
         self._messages.append({"role": "user", "content": prompt})
         self._compact_context_if_needed()
 
+        cache_key, cached_text = self._cached_response()
+        if cached_text is not None:
+            return self._finish_cached_response(cached_text)
+
         logger.debug(f"Sending chat request to Anthropic model {self._model_name}")
 
         request_params = self._build_messages_request_params()
@@ -81,6 +87,7 @@ class AnthropicPromptAdapter(AbstractLLMPromptAdapter):
         response = self._messages_create(**request_params)
 
         response_text = self._extract_anthropic_text(response)
+        self._store_response(cache_key, response_text)
         self._record_assistant_response(response_text)
 
         if self._output_format:
@@ -100,6 +107,10 @@ class AnthropicPromptAdapter(AbstractLLMPromptAdapter):
         self._messages.append(user_message)
         self._compact_context_if_needed()
 
+        cache_key, cached_text = self._cached_response()
+        if cached_text is not None:
+            return self._finish_cached_response(cached_text)
+
         logger.debug(f"Sending chat request to Anthropic model {self._model_name}")
         request_params = self._build_messages_request_params()
         self._log_message_payload("messages", request_params["messages"])
@@ -113,6 +124,7 @@ class AnthropicPromptAdapter(AbstractLLMPromptAdapter):
         response = self._messages_create(**request_params)
 
         response_text = self._extract_anthropic_text(response)
+        self._store_response(cache_key, response_text)
         self._record_assistant_response(response_text)
 
         if self._output_format:
@@ -123,7 +135,36 @@ class AnthropicPromptAdapter(AbstractLLMPromptAdapter):
         logger.debug(f"Returning response: {result}")
         return result
 
-    def _build_messages_request_params(self) -> dict:
+    async def achat(self, prompt: str):
+        """Coroutine version of execute() using anthropic.AsyncAnthropic."""
+        self._require_dependency("anthropic", "Anthropic", "anthropic")
+
+        async def send(turns):
+            logger.debug(f"Sending async chat request to Anthropic model {self._model_name}")
+            request_params = self._build_messages_request_params(turns)
+            self._log_message_payload("messages", request_params["messages"])
+            response = await self._amessages_create(**request_params)
+            return self._extract_anthropic_text(response), None
+
+        return await self._achat_turn({"role": "user", "content": prompt}, send)
+
+    def execute_stream(self, prompt: str):
+        """Execute the chat model, yielding response text deltas as they arrive."""
+        self._require_dependency("anthropic", "Anthropic", "anthropic")
+        return self._streamed_turn({"role": "user", "content": prompt}, self._stream_messages)
+
+    def _stream_messages(self):
+        logger.debug(f"Sending streaming request to Anthropic model {self._model_name}")
+        request_params = self._build_messages_request_params()
+        self._log_message_payload("messages", request_params["messages"])
+        for event in self._messages_create(stream=True, **request_params):
+            event_type = getattr(event, "type", None)
+            if event_type == "content_block_delta":
+                yield getattr(event.delta, "text", "")
+            elif event_type == "message_start":
+                self._record_prompt_cache_usage(getattr(getattr(event, "message", None), "usage", None))
+
+    def _build_messages_request_params(self, turns: Optional[list] = None) -> dict:
         non_system_prefix = [msg for msg in self._prefix_messages if msg["role"].lower() != "system"]
         non_system_summary = []
         if self._summary_message:
@@ -132,7 +173,7 @@ class AnthropicPromptAdapter(AbstractLLMPromptAdapter):
             ]
         request_params = {
             "model": self._model_name,
-            "messages": non_system_prefix + non_system_summary + self._messages,
+            "messages": non_system_prefix + non_system_summary + (self._messages if turns is None else turns),
             "max_tokens": self._max_tokens,
         }
         if self._system_message:
@@ -141,20 +182,83 @@ class AnthropicPromptAdapter(AbstractLLMPromptAdapter):
             )
             request_params["system"] = self._system_message["content"] + summary_text
         self._apply_temperature_if_explicit(request_params)
+        if self._prompt_caching:
+            self._add_cache_breakpoints(request_params, len(non_system_prefix) + len(non_system_summary), turns)
         return request_params
 
+    def _add_cache_breakpoints(self, request_params: dict, prefix_count: int, turns: Optional[list] = None) -> None:
+        """Mark the stable parts of the request so Anthropic can reuse their prefill.
+
+        Breakpoints go after the system prompt, after the role_map/memory preamble and,
+        in multi-turn chats, after the history preceding the new user turn.  Requests
+        whose reusable part is below Anthropic's minimum cacheable size are left as is.
+        """
+        messages = request_params["messages"]
+        system_text = self._system_message["content"] if self._system_message else ""
+        # Everything except the new user turn; the history's running count avoids rescanning it.
+        history_tokens = self._messages.tokens if turns is None else self._estimate_tokens(turns)
+        reusable_tokens = (
+            self._estimate_tokens(messages[:prefix_count])
+            + history_tokens
+            - self._estimate_tokens(messages[-1:])
+            + len(str(request_params.get("system", ""))) // 4
+        )
+        if reusable_tokens < ANTHROPIC_MIN_CACHEABLE_TOKENS:
+            return
+
+        if system_text and "system" in request_params:
+            # Keep the system prompt in its own block so a changing summary does not invalidate it.
+            blocks = [{"type": "text", "text": system_text, "cache_control": EPHEMERAL_CACHE_CONTROL}]
+            summary_text = request_params["system"][len(system_text):]
+            if summary_text:
+                blocks.append({"type": "text", "text": summary_text})
+            request_params["system"] = blocks
+
+        messages = list(messages)
+        breakpoints = {prefix_count - 1, len(messages) - 2}
+        for index in sorted(breakpoints):
+            if 0 <= index < len(messages) - 1:
+                messages[index] = mark_cache_breakpoint(messages[index])
+        request_params["messages"] = messages
+
     def _messages_create(self, **request_params):
-        try:
-            return self.client.messages.create(**request_params)
-        except Exception as exc:
-            msg = str(exc).lower()
-            if any(kw in msg for kw in ("authentication", "api_key", "api key", "auth_token", "credentials", "could not resolve")):
-                raise RuntimeError(
-                    "Could not authenticate with Anthropic. Set the ANTHROPIC_API_KEY environment variable "
-                    "to your API key (see https://console.anthropic.com/). "
-                    "See https://github.com/sandialabs/talkpipe/blob/main/docs/guides/model-and-source-configuration.md."
-                ) from exc
-            raise
+        def send():
+            try:
+                response = self.client.messages.create(**request_params)
+            except Exception as exc:
+                self._raise_if_auth_error(exc)
+                raise
+            if not request_params.get("stream"):
+                self._record_prompt_cache_usage(getattr(response, "usage", None))
+            return response
+
+        if request_params.get("stream"):
+            return send()
+        return self._single_flight(send, str(getattr(self.client, "base_url", "")), request_params)
+
+    async def _amessages_create(self, **request_params):
+        anthropic = self._require_dependency("anthropic", "Anthropic", "anthropic")
+        client = self._build_client(lambda: anthropic_async_client(anthropic), "Anthropic", "ANTHROPIC_API_KEY")
+
+        async def send():
+            try:
+                response = await client.messages.create(**request_params)
+            except Exception as exc:
+                self._raise_if_auth_error(exc)
+                raise
+            self._record_prompt_cache_usage(getattr(response, "usage", None))
+            return response
+
+        return await self._asingle_flight(send, str(getattr(client, "base_url", "")), request_params)
+
+    def _raise_if_auth_error(self, exc: Exception) -> None:
+        msg = str(exc).lower()
+        if any(kw in msg for kw in ("authentication", "api_key", "api key", "auth_token", "credentials", "could not resolve")):
+            raise RuntimeError(
+                "Could not authenticate with Anthropic. Set the ANTHROPIC_API_KEY environment variable "
+                "to your API key (see https://console.anthropic.com/). "
+                "See https://github.com/sandialabs/talkpipe/blob/main/docs/guides/model-and-source-configuration.md."
+            ) from exc
 
     def _extract_anthropic_text(self, response) -> str:
         response_text = ""
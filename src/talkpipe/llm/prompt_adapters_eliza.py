@@ -118,6 +118,10 @@ class ElizaPromptAdapter(AbstractLLMPromptAdapter):
         logger.debug(f"Returning response: {result}")
         return result
 
+    async def achat(self, prompt: str) -> str:
+        # Replies are computed locally without blocking, so no worker thread is needed.
+        return self.execute(prompt)
+
     def execute_turn(self, user_turn: UserTurn) -> str:
         prompt = user_turn_text(user_turn)
         if not prompt.strip():
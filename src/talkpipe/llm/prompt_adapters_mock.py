@@ -0,0 +1,108 @@
+import asyncio
+import contextvars
+import time
+from typing import Optional, Union
+
+from pydantic import BaseModel
+
+from .mock_latency import getMockServer
+from .prompt_adapter_base import logger
+from .prompt_adapters_eliza import ElizaPromptAdapter
+
+# Set while an async call has already waited out its simulated latency.
+_latency_paid = contextvars.ContextVar("mock_latency_paid", default=False)
+
+
+class MockLatencyPromptAdapter(ElizaPromptAdapter):
+    """Local prompt adapter with simulated provider latency, faults and capacity limits.
+
+    Replies (including guided output) come from the ELIZA-like adapter; each call
+    first waits and may fail as configured in the ``model`` string.  See
+    :mod:`talkpipe.llm.mock_latency` for the settings.
+    """
+
+    def __init__(
+        self,
+        model: str,
+        system_prompt: Optional[str] = "You are a helpful assistant.",
+        multi_turn: bool = True,
+        temperature: float = None,
+        output_format: BaseModel = None,
+        role_map: str = None,
+        memory_mode: str = "full",
+        unsummarized_message_count: int = 6,
+        context_token_trigger: Optional[Union[int, float]] = None,
+        memory_size: int = 512,
+        debug_messages: bool = False,
+    ):
+        super().__init__(
+            model,
+            system_prompt,
+            multi_turn,
+            temperature,
+            output_format,
+            role_map,
+            memory_mode,
+            unsummarized_message_count,
+            context_token_trigger,
+            memory_size,
+            debug_messages,
+        )
+        self._source = "mock-latency"
+        self._server = getMockServer("prompt", model)
+
+    def _messages_create(self, model: str, messages: list, output_format=None) -> dict:
+        def send():
+            if not _latency_paid.get():
+                latency, error = self._server.begin()
+                try:
+                    time.sleep(latency)
+                    if error is not None:
+                        raise error
+                except BaseException as exc:
+                    self._server.end(exc)
+                    raise
+                self._server.end()
+            response = super(MockLatencyPromptAdapter, self)._messages_create(model, messages, output_format)
+            response["text"] = self._padded(response["text"])
+            return response
+
+        return self._single_flight(send, model, messages, output_format)
+
+    def _padded(self, text: str) -> str:
+        missing = self._server.settings["response_words"] - len(text.split())
+        if missing <= 0:
+            return text
+        return text + "".join(f" word{i}" for i in range(missing))
+
+    async def achat(self, prompt: str) -> str:
+        latency, error = self._server.begin()
+        try:
+            await asyncio.sleep(latency)
+            if error is not None:
+                raise error
+        except BaseException as exc:
+            self._server.end(exc)
+            raise
+        self._server.end()
+        token = _latency_paid.set(True)
+        try:
+            return self.execute(prompt)
+        finally:
+            _latency_paid.reset(token)
+
+    def execute_stream(self, prompt: str):
+        """Stream the reply word by word at the configured ``tokens_per_second``."""
+        return self._streamed_turn({"role": "user", "content": prompt}, self._stream_reply)
+
+    def _stream_reply(self):
+        # The first word arrives after the call latency, the rest at the token cadence.
+        reply = self._messages_create(self._model_name, self._request_messages())["text"]
+        interval = self._server.token_interval()
+        logger.debug(f"Streaming mock reply at {interval:.4f}s per token")
+        for i, word in enumerate(reply.split(" ")):
+            if i:
+                time.sleep(interval)
+                yield " " + word
+            else:
+                yield word
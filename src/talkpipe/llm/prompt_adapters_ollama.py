@@ -5,6 +5,7 @@ from pydantic import BaseModel
 from talkpipe.util.config import get_config
 from talkpipe.util.constants import OLLAMA_SERVER_URL
 
+from .client_pool import ollama_async_client, ollama_client
 from .prompt_adapter_base import AbstractLLMPromptAdapter, logger
 from .content import UserTurn
 from .multimodal import to_ollama_user_message
@@ -65,6 +66,10 @@ class OllamaPromptAdapter(AbstractLLMPromptAdapter):
         # Memory compaction may update `_summary_message` and trim `_messages` before request dispatch.
         self._compact_context_if_needed()
 
+        cache_key, cached_text = self._cached_response()
+        if cached_text is not None:
+            return self._finish_cached_response(cached_text)
+
         logger.debug(f"Sending chat request to Ollama model {self._model_name}")
         self._log_message_payload("messages", self._request_messages())
         response = self._chat_completion(
@@ -74,6 +79,7 @@ class OllamaPromptAdapter(AbstractLLMPromptAdapter):
             options={"temperature": self._temperature},
         )
 
+        self._store_response(cache_key, str(response.message.content))
         self._record_assistant_response(str(response.message.content))
 
         result = (
@@ -93,6 +99,10 @@ class OllamaPromptAdapter(AbstractLLMPromptAdapter):
         self._messages.append(user_message)
         self._compact_context_if_needed()
 
+        cache_key, cached_text = self._cached_response()
+        if cached_text is not None:
+            return self._finish_cached_response(cached_text)
+
         logger.debug(f"Sending chat request to Ollama model {self._model_name}")
         self._log_message_payload("messages", self._request_messages())
         response = self._chat_completion(
@@ -102,6 +112,7 @@ class OllamaPromptAdapter(AbstractLLMPromptAdapter):
             options={"temperature": self._temperature},
         )
 
+        self._store_response(cache_key, str(response.message.content))
         self._record_assistant_response(str(response.message.content))
 
         result = (
@@ -112,16 +123,82 @@ class OllamaPromptAdapter(AbstractLLMPromptAdapter):
         logger.debug(f"Returning response: {result}")
         return result
 
-    def _chat_completion(self, model: str, messages: list, format_schema=None, options=None):
+    def execute_stream(self, prompt: str):
+        """Execute the chat model, yielding response text as Ollama generates it."""
+        self._require_dependency("ollama", "Ollama", "ollama")
+        return self._streamed_turn({"role": "user", "content": prompt}, self._stream_chat)
+
+    async def achat(self, prompt: str):
+        """Coroutine version of execute() using ollama.AsyncClient."""
+        self._require_dependency("ollama", "Ollama", "ollama")
+
+        async def send(turns):
+            messages = self._request_messages(turns)
+            logger.debug(f"Sending async chat request to Ollama model {self._model_name}")
+            self._log_message_payload("messages", messages)
+            response = await self._achat_completion(
+                model=self._model_name,
+                messages=messages,
+                format_schema=self._output_format.model_json_schema() if self._output_format else None,
+                options={"temperature": self._temperature},
+            )
+            return str(response.message.content), None
+
+        return await self._achat_turn({"role": "user", "content": prompt}, send)
+
+    def _stream_chat(self):
+        logger.debug(f"Sending streaming chat request to Ollama model {self._model_name}")
+        self._log_message_payload("messages", self._request_messages())
+        for chunk in self._chat_completion(
+            model=self._model_name,
+            messages=self._request_messages(),
+            options={"temperature": self._temperature},
+            stream=True,
+        ):
+            yield chunk.message.content
+
+    def _chat_completion(self, model: str, messages: list, format_schema=None, options=None, stream: bool = False):
         ollama = self._require_dependency("ollama", "Ollama", "ollama")
 
         server_url = self._server_url
         if not server_url:
             server_url = get_config().get(OLLAMA_SERVER_URL, None)
-        client = ollama.Client(server_url) if server_url else ollama
-        try:
-            return client.chat(model, messages=messages, format=format_schema, options=options)
-        except ConnectionError as exc:
+        client = ollama_client(ollama, server_url)
+
+        def send():
+            try:
+                if stream:
+                    return client.chat(model, messages=messages, format=format_schema, options=options, stream=True)
+                return client.chat(model, messages=messages, format=format_schema, options=options)
+            except ConnectionError as exc:
+                self._raise_friendly_error(ollama, exc, model, server_url)
+            except ollama.ResponseError as exc:
+                self._raise_friendly_error(ollama, exc, model, server_url)
+
+        if stream:
+            return send()
+        return self._single_flight(send, server_url, model, messages, format_schema, options)
+
+    async def _achat_completion(self, model: str, messages: list, format_schema=None, options=None):
+        ollama = self._require_dependency("ollama", "Ollama", "ollama")
+
+        server_url = self._server_url
+        if not server_url:
+            server_url = get_config().get(OLLAMA_SERVER_URL, None)
+        client = ollama_async_client(ollama, server_url)
+
+        async def send():
+            try:
+                return await client.chat(model, messages=messages, format=format_schema, options=options)
+            except ConnectionError as exc:
+                self._raise_friendly_error(ollama, exc, model, server_url)
+            except ollama.ResponseError as exc:
+                self._raise_friendly_error(ollama, exc, model, server_url)
+
+        return await self._asingle_flight(send, server_url, model, messages, format_schema, options)
+
+    def _raise_friendly_error(self, ollama, exc: Exception, model: str, server_url: Optional[str]):
+        if isinstance(exc, ConnectionError):
             raise ConnectionError(
                 f"Failed to connect to Ollama at '{server_url or 'http://localhost:11434'}'. "
                 "If your Ollama server is remote, set the TALKPIPE_OLLAMA_SERVER_URL environment "
@@ -129,15 +206,14 @@ class OllamaPromptAdapter(AbstractLLMPromptAdapter):
                 "or OLLAMA_SERVER_URL in ~/.talkpipe.toml. "
                 f"Original error: {exc}"
             ) from exc
-        except ollama.ResponseError as exc:
-            if exc.status_code == 404:
-                raise ollama.ResponseError(
-                    f"Model '{model}' is not available on the Ollama server"
-                    f"{f' at {server_url}' if server_url else ''}. "
-                    f"Run `ollama pull {model}` to download it. Original error: {exc.error}",
-                    status_code=exc.status_code,
-                ) from exc
-            raise
+        if exc.status_code == 404:
+            raise ollama.ResponseError(
+                f"Model '{model}' is not available on the Ollama server"
+                f"{f' at {server_url}' if server_url else ''}. "
+                f"Run `ollama pull {model}` to download it. Original error: {exc.error}",
+                status_code=exc.status_code,
+            ) from exc
+        raise exc
 
     def complete_text_without_context(
         self,
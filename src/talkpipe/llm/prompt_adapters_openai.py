@@ -2,9 +2,11 @@ from typing import Optional, Union
 
 from pydantic import BaseModel
 
+from .client_pool import openai_async_client, openai_client
 from .prompt_adapter_base import AbstractLLMPromptAdapter, logger
 from .content import UserTurn
 from .multimodal import to_openai_user_message
+from .prompt_cache import prefix_cache_key
 
 
 class OpenAIPromptAdapter(AbstractLLMPromptAdapter):
@@ -40,7 +42,7 @@ class OpenAIPromptAdapter(AbstractLLMPromptAdapter):
             debug_messages,
         )
         self.client = self._build_client(
-            openai.OpenAI, "OpenAI", "OPENAI_API_KEY"
+            lambda: openai_client(openai), "OpenAI", "OPENAI_API_KEY"
         )
 
     def execute(self, prompt: str) -> str:
@@ -54,6 +56,10 @@ class OpenAIPromptAdapter(AbstractLLMPromptAdapter):
         self._messages.append({"role": "user", "content": prompt})
         self._compact_context_if_needed()
 
+        cache_key, cached_text = self._cached_response()
+        if cached_text is not None:
+            return self._finish_cached_response(cached_text)
+
         logger.debug(f"Sending chat request to OpenAI model {self._model_name}")
 
         # Build request parameters, only including temperature if explicitly set.
@@ -64,10 +70,12 @@ class OpenAIPromptAdapter(AbstractLLMPromptAdapter):
         }
 
         self._apply_temperature_if_explicit(request_params)
+        self._apply_prompt_cache_key(request_params)
 
         self._log_message_payload("input", request_params["input"])
         response = self._responses_request(parse=True, **request_params)
 
+        self._store_response(cache_key, response.output_text)
         self._record_assistant_response(response.output_text)
 
         result = response.output_parsed if self._output_format else response.output_text
@@ -83,6 +91,10 @@ class OpenAIPromptAdapter(AbstractLLMPromptAdapter):
         self._messages.append(user_message)
         self._compact_context_if_needed()
 
+        cache_key, cached_text = self._cached_response()
+        if cached_text is not None:
+            return self._finish_cached_response(cached_text)
+
         logger.debug(f"Sending chat request to OpenAI model {self._model_name}")
         request_params = {
             "model": self._model_name,
@@ -90,19 +102,90 @@ class OpenAIPromptAdapter(AbstractLLMPromptAdapter):
             "text_format": openai.NOT_GIVEN if self._output_format is None else self._output_format,
         }
         self._apply_temperature_if_explicit(request_params)
+        self._apply_prompt_cache_key(request_params)
         self._log_message_payload("input", request_params["input"])
         response = self._responses_request(parse=True, **request_params)
 
+        self._store_response(cache_key, response.output_text)
         self._record_assistant_response(response.output_text)
         result = response.output_parsed if self._output_format else response.output_text
         logger.debug(f"Returning response: {result}")
         return result
 
+    async def achat(self, prompt: str):
+        """Coroutine version of execute() using openai.AsyncOpenAI."""
+        openai = self._require_dependency("openai", "OpenAI", "openai")
+
+        async def send(turns):
+            logger.debug(f"Sending async chat request to OpenAI model {self._model_name}")
+            request_params = {
+                "model": self._model_name,
+                "input": self._request_messages(turns),
+                "text_format": openai.NOT_GIVEN if self._output_format is None else self._output_format,
+            }
+            self._apply_temperature_if_explicit(request_params)
+            self._apply_prompt_cache_key(request_params)
+            self._log_message_payload("input", request_params["input"])
+            response = await self._aresponses_request(parse=True, **request_params)
+            return response.output_text, response.output_parsed if self._output_format else response.output_text
+
+        return await self._achat_turn({"role": "user", "content": prompt}, send)
+
+    def execute_stream(self, prompt: str):
+        """Execute the chat model, yielding response text deltas as they arrive."""
+        self._require_dependency("openai", "OpenAI", "openai")
+        return self._streamed_turn({"role": "user", "content": prompt}, self._stream_response)
+
+    def _stream_response(self):
+        logger.debug(f"Sending streaming request to OpenAI model {self._model_name}")
+        request_params = {"model": self._model_name, "input": self._request_messages(), "stream": True}
+        self._apply_temperature_if_explicit(request_params)
+        self._apply_prompt_cache_key(request_params)
+        self._log_message_payload("input", request_params["input"])
+        for event in self._responses_request(parse=False, **request_params):
+            event_type = getattr(event, "type", None)
+            if event_type == "response.output_text.delta":
+                yield event.delta
+            elif event_type == "response.completed":
+                self._record_prompt_cache_usage(getattr(getattr(event, "response", None), "usage", None))
+
+    def _apply_prompt_cache_key(self, request_params: dict) -> None:
+        # OpenAI caches matching prefixes automatically; the static prefix always comes
+        # first in the input, and a key derived from it routes requests sharing that
+        # prefix to the same cache.
+        if self._prompt_caching and self._prefix_messages:
+            request_params["prompt_cache_key"] = prefix_cache_key(
+                self._source, self._model_name, self._prefix_messages
+            )
+
     def _responses_request(self, parse: bool, **request_params):
         # `parse=True` preserves guided-generation behavior when an output schema is provided.
-        if parse:
-            return self.client.responses.parse(**request_params)
-        return self.client.responses.create(**request_params)
+        def send():
+            if parse:
+                response = self.client.responses.parse(**request_params)
+            else:
+                response = self.client.responses.create(**request_params)
+            if not request_params.get("stream"):
+                self._record_prompt_cache_usage(getattr(response, "usage", None))
+            return response
+
+        if request_params.get("stream"):
+            return send()
+        return self._single_flight(send, str(getattr(self.client, "base_url", "")), parse, request_params)
+
+    async def _aresponses_request(self, parse: bool, **request_params):
+        openai = self._require_dependency("openai", "OpenAI", "openai")
+        client = self._build_client(lambda: openai_async_client(openai), "OpenAI", "OPENAI_API_KEY")
+
+        async def send():
+            if parse:
+                response = await client.responses.parse(**request_params)
+            else:
+                response = await client.responses.create(**request_params)
+            self._record_prompt_cache_usage(getattr(response, "usage", None))
+            return response
+
+        return await self._asingle_flight(send, str(getattr(client, "base_url", "")), parse, request_params)
 
     def complete_text_without_context(
         self,
@@ -0,0 +1,407 @@
+"""Prompt adapter that routes each request to the fastest healthy endpoint.
+
+The router's ``model`` is a comma-separated list of endpoints, each written as
+``source:model`` or ``source:model@server_url``::
+
+    llmPrompt[source="router",
+              model="ollama:llama3.2@http://gpu1:11434,ollama:llama3.2@http://gpu2:11434,openai:gpt-4.1-nano"]
+
+Each request goes to the healthy endpoint with the lowest exponentially weighted
+moving average (EWMA) latency, scaled by its in-flight requests.  Endpoints
+without measurements yet are tried first.  Once an endpoint has enough latency
+samples, a request that outlives its p95 latency is hedged: a duplicate goes to
+the next best endpoint and whichever answers first wins.  An endpoint that raises
+is put on cooldown and the request fails over to the next one; after the cooldown
+the endpoint is tried again, and :meth:`RouterPromptAdapter.is_available` probes
+every endpoint explicitly.  When a hedged request has been answered, a failure
+of the losing call does not count against its endpoint.
+
+Endpoint statistics, load and health are process-wide and keyed by endpoint
+name, so routers in different workers (or segments) share what they learn;
+:func:`getRouterStats` reports them.  Each router keeps its own endpoint
+adapters.
+
+The router owns the conversation history and memory compaction; endpoint
+adapters receive the assembled history with each request.
+"""
+
+from __future__ import annotations
+
+import concurrent.futures
+import inspect
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional, Union
+
+from pydantic import BaseModel
+
+from .prompt_adapter_base import AbstractLLMPromptAdapter, logger
+
+EWMA_ALPHA = 0.2
+HEDGE_PERCENTILE = 0.95
+HEDGE_MIN_SAMPLES = 20
+LATENCY_SAMPLES = 200
+DEFAULT_FAILURE_COOLDOWN = 30.0
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _hedge_executor() -> concurrent.futures.ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = concurrent.futures.ThreadPoolExecutor(max_workers=32, thread_name_prefix="talkpipe-router")
+        return _executor
+
+
+def parse_endpoints(spec: str) -> List[dict]:
+    """Parse ``source:model[@server_url],...`` into endpoint dicts."""
+    endpoints = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        source, sep, rest = part.partition(":")
+        model, _, server_url = rest.partition("@")
+        if not sep or not source or not model:
+            raise ValueError(f"Router endpoint '{part}' must look like source:model or source:model@server_url")
+        endpoints.append({"source": source, "model": model, "server_url": server_url or None})
+    if not endpoints:
+        raise ValueError("The router needs at least one endpoint.")
+    return endpoints
+
+
+class RouterEndpoint:
+    """Latency statistics, load and health of one endpoint, shared by every router using it."""
+
+    def __init__(self, name: str, clock=time.monotonic):
+        self.name = name
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.ewma: Optional[float] = None
+        self.in_flight = 0
+        self.completed = 0
+        self.failures = 0
+        self.unhealthy_until = 0.0
+        self._samples = deque(maxlen=LATENCY_SAMPLES)
+
+    def score(self) -> float:
+        with self._lock:
+            return (self.ewma or 0.0) * (1 + self.in_flight) + (self.in_flight if self.ewma is None else 0)
+
+    def healthy(self) -> bool:
+        return self._clock() >= self.unhealthy_until
+
+    def hedge_delay(self) -> Optional[float]:
+        """The p95 latency once enough samples exist, else None (no hedging)."""
+        with self._lock:
+            if len(self._samples) < HEDGE_MIN_SAMPLES:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * HEDGE_PERCENTILE))]
+
+    def run(
+        self,
+        pool: "_AdapterPool",
+        call: Callable[[AbstractLLMPromptAdapter], tuple],
+        failure_cooldown: float,
+        settled: Optional[threading.Event] = None,
+    ) -> tuple:
+        """Run ``call`` on an adapter from ``pool``, recording its latency or failure.
+
+        ``settled`` is shared by the calls of one hedged request and set by the
+        first to succeed; a call that fails after that has lost the race and
+        leaves the endpoint's health alone.
+        """
+        with self._lock:
+            self.in_flight += 1
+        adapter = None
+        try:
+            adapter = pool.acquire()
+            start = self._clock()
+            result = call(adapter)
+        except Exception:
+            if settled is None or not settled.is_set():
+                self.mark_unhealthy(failure_cooldown)
+            raise
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+            if adapter is not None:
+                pool.release(adapter)
+        if settled is not None:
+            settled.set()
+        self.record_latency(self._clock() - start)
+        return result
+
+    def record_latency(self, latency: float) -> None:
+        with self._lock:
+            self.ewma = latency if self.ewma is None else EWMA_ALPHA * latency + (1 - EWMA_ALPHA) * self.ewma
+            self._samples.append(latency)
+            self.completed += 1
+            self.unhealthy_until = 0.0
+
+    def mark_unhealthy(self, failure_cooldown: float) -> None:
+        with self._lock:
+            self.failures += 1
+            self.unhealthy_until = self._clock() + failure_cooldown
+
+    def check_health(self, pool: "_AdapterPool", failure_cooldown: float) -> bool:
+        try:
+            ok = pool.factory().is_available()
+        except Exception as exc:
+            logger.warning(f"Router endpoint {self.name} failed its health check: {exc}")
+            ok = False
+        if ok:
+            with self._lock:
+                self.unhealthy_until = 0.0
+        else:
+            self.mark_unhealthy(failure_cooldown)
+        return ok
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "endpoint": self.name,
+                "ewma_latency": self.ewma,
+                "in_flight": self.in_flight,
+                "completed": self.completed,
+                "failures": self.failures,
+                "healthy": self._clock() >= self.unhealthy_until,
+            }
+
+
+class _AdapterPool:
+    """Idle adapters of one endpoint for one router.
+
+    Adapters carry the router's system prompt and output format, so unlike the
+    endpoint statistics they are not shared between routers.
+    """
+
+    def __init__(self, factory: Callable[[], AbstractLLMPromptAdapter]):
+        self.factory = factory
+        self._lock = threading.Lock()
+        # A hedged straggler may still hold an adapter while the next request runs.
+        self._idle: List[AbstractLLMPromptAdapter] = []
+
+    def acquire(self) -> AbstractLLMPromptAdapter:
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        return self.factory()
+
+    def release(self, adapter: AbstractLLMPromptAdapter) -> None:
+        with self._lock:
+            self._idle.append(adapter)
+
+
+def endpoint_name(spec: dict) -> str:
+    """The ``source:model[@server_url]`` name identifying an endpoint."""
+    return f"{spec['source']}:{spec['model']}" + (f"@{spec['server_url']}" if spec["server_url"] else "")
+
+
+_endpoints: Dict[str, RouterEndpoint] = {}
+_registry_lock = threading.Lock()
+
+
+def getRouterEndpoint(name: str) -> RouterEndpoint:
+    """Return the process-wide state for an endpoint, creating it on first use.
+
+    Every router (for example one per worker of a PromptAdapterPool) sees the
+    same latency, load and health for an endpoint.
+    """
+    with _registry_lock:
+        endpoint = _endpoints.get(name)
+        if endpoint is None:
+            endpoint = RouterEndpoint(name)
+            _endpoints[name] = endpoint
+        return endpoint
+
+
+def getRouterStats() -> List[dict]:
+    """Latency, load and health of every endpoint any router has used."""
+    with _registry_lock:
+        endpoints = list(_endpoints.values())
+    return [endpoint.stats() for endpoint in endpoints]
+
+
+def resetRouterEndpoints() -> None:
+    """Forget all endpoint statistics and health (mainly for tests)."""
+    with _registry_lock:
+        _endpoints.clear()
+
+
+class RouterPromptAdapter(AbstractLLMPromptAdapter):
+    """Prompt adapter that load-balances, hedges and fails over across endpoints."""
+
+    def __init__(
+        self,
+        model: str,
+        system_prompt: Optional[str] = "You are a helpful assistant.",
+        multi_turn: bool = True,
+        temperature: float = None,
+        output_format: BaseModel = None,
+        role_map: str = None,
+        memory_mode: str = "full",
+        unsummarized_message_count: int = 6,
+        context_token_trigger: Optional[Union[int, float]] = None,
+        memory_size: int = 512,
+        debug_messages: bool = False,
+        hedge: bool = True,
+        failure_cooldown: float = DEFAULT_FAILURE_COOLDOWN,
+    ):
+        super().__init__(
+            model,
+            "router",
+            system_prompt,
+            multi_turn,
+            temperature,
+            output_format,
+            role_map,
+            memory_mode,
+            unsummarized_message_count,
+            context_token_trigger,
+            memory_size,
+            debug_messages,
+        )
+        self._hedge = hedge
+        self._failure_cooldown = failure_cooldown
+        endpoint_kwargs = {
+            "system_prompt": system_prompt,
+            "multi_turn": True,
+            "temperature": temperature,
+            "output_format": output_format,
+            "role_map": role_map,
+            "debug_messages": debug_messages,
+        }
+        self._endpoints: List[RouterEndpoint] = []
+        self._pools: Dict[str, _AdapterPool] = {}
+        for spec in parse_endpoints(model):
+            name = endpoint_name(spec)
+            if name not in self._pools:
+                self._pools[name] = _AdapterPool(self._endpoint_factory(spec, endpoint_kwargs))
+                self._endpoints.append(getRouterEndpoint(name))
+
+    @staticmethod
+    def _endpoint_factory(spec: dict, endpoint_kwargs: dict) -> Callable[[], AbstractLLMPromptAdapter]:
+        from .config import getPromptAdapter, getPromptSources
+
+        if spec["source"] not in getPromptSources() or spec["source"] == "router":
+            raise ValueError(f"Unknown router endpoint source: {spec['source']}")
+        adapter_cls = getPromptAdapter(spec["source"])
+        accepted = inspect.signature(adapter_cls).parameters
+        kwargs = {name: value for name, value in endpoint_kwargs.items() if name in accepted}
+        if spec["server_url"]:
+            if "server_url" not in accepted:
+                raise ValueError(f"Router endpoint source '{spec['source']}' does not accept a server URL")
+            kwargs["server_url"] = spec["server_url"]
+        return lambda: adapter_cls(spec["model"], **kwargs)
+
+    def endpoint_stats(self) -> List[dict]:
+        """Latency, load and health of each endpoint."""
+        return [endpoint.stats() for endpoint in self._endpoints]
+
+    def _pick(self, exclude) -> Optional[RouterEndpoint]:
+        candidates = [e for e in self._endpoints if e not in exclude]
+        if not candidates:
+            return None
+        healthy = [e for e in candidates if e.healthy()]
+        if not healthy:
+            # Everything left is cooling down; try the one that failed longest ago.
+            return min(candidates, key=lambda e: e.unhealthy_until)
+        return min(healthy, key=lambda e: e.score())
+
+    def _route(self, call: Callable[[AbstractLLMPromptAdapter], tuple]) -> tuple:
+        tried = []
+        last_exc = None
+        while True:
+            endpoint = self._pick(tried)
+            if endpoint is None:
+                raise RuntimeError(
+                    f"All router endpoints failed: {', '.join(e.name for e in tried)}"
+                ) from last_exc
+            tried.append(endpoint)
+            try:
+                return self._hedged(endpoint, call, tried)
+            except Exception as exc:
+                logger.warning(f"Router endpoint {endpoint.name} failed, failing over: {exc}")
+                last_exc = exc
+
+    def _hedged(self, primary: RouterEndpoint, call, tried: list) -> tuple:
+        delay = primary.hedge_delay() if self._hedge else None
+        if delay is None:
+            return primary.run(self._pools[primary.name], call, self._failure_cooldown)
+
+        executor = _hedge_executor()
+        settled = threading.Event()
+        futures = {executor.submit(primary.run, self._pools[primary.name], call, self._failure_cooldown, settled)}
+        done, _ = concurrent.futures.wait(futures, timeout=delay)
+        if not done:
+            backup = self._pick(tried)
+            if backup is not None:
+                logger.debug(f"Hedging request from {primary.name} to {backup.name} after {delay:.3f}s")
+                tried.append(backup)
+                futures.add(
+                    executor.submit(backup.run, self._pools[backup.name], call, self._failure_cooldown, settled)
+                )
+
+        pending = futures
+        first_error = None
+        while pending:
+            done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                first_error = first_error or future.exception()
+        raise first_error
+
+    def execute(self, prompt: str):
+        """Execute the chat model on the best endpoint.
+
+        Handles its own multi-turn conversation state.
+        """
+        logger.debug(f"Adding user message to chat history: {prompt}")
+        self._messages.append({"role": "user", "content": prompt})
+        self._compact_context_if_needed()
+
+        cache_key, cached_text = self._cached_response()
+        if cached_text is not None:
+            return self._finish_cached_response(cached_text)
+
+        state = {"messages": list(self._messages[:-1]), "summary": self._summary_message}
+
+        def call(adapter):
+            adapter.set_conversation_state({"messages": list(state["messages"]), "summary": state["summary"]})
+            result = adapter.execute(prompt)
+            return result, adapter.get_conversation_state()["messages"][-1]["content"]
+
+        result, response_text = self._route(call)
+        self._store_response(cache_key, response_text)
+        self._record_assistant_response(response_text)
+        logger.debug(f"Returning response: {result}")
+        return result
+
+    def complete_text_without_context(
+        self,
+        prompt: str,
+        *,
+        model: Optional[str] = None,
+        temperature: float = 0.0,
+        max_tokens: Optional[int] = None,
+    ) -> str:
+        # ``model`` names a model of one source, so endpoints keep their own.
+        result, _ = self._route(
+            lambda adapter: (
+                adapter.complete_text_without_context(prompt, temperature=temperature, max_tokens=max_tokens),
+                None,
+            )
+        )
+        return result
+
+    def is_available(self) -> bool:
+        """Probe every endpoint, update its health, and report whether any is up."""
+        return any(
+            [endpoint.check_health(self._pools[endpoint.name], self._failure_cooldown) for endpoint in self._endpoints]
+        )
@@ -0,0 +1,116 @@
+"""Provider prompt-prefix caching and its hit/miss accounting.
+
+Anthropic and OpenAI can reuse the prefill work for a request prefix they have
+seen recently, which cuts latency and input-token cost for pipelines that resend
+the same system prompt, few-shot preamble or conversation history on every call.
+
+- Anthropic caches only up to explicit ``cache_control`` breakpoints;
+  :func:`mark_cache_breakpoint` adds one to a message or content block.
+- OpenAI caches matching prefixes automatically.  :func:`prefix_cache_key`
+  derives a ``prompt_cache_key`` from the static prefix so requests sharing it
+  are routed to the same cache.
+
+Adapters report the cache counters from each response with
+:func:`recordPromptCacheUsage`; :func:`getPromptCacheStats` returns the totals
+per (source, model).
+"""
+
+from __future__ import annotations
+
+import copy
+import hashlib
+import json
+import threading
+from typing import Dict, List, Optional, Tuple
+
+# Anthropic ignores breakpoints on prefixes shorter than this (2048 for Haiku models).
+ANTHROPIC_MIN_CACHEABLE_TOKENS = 1024
+
+EPHEMERAL_CACHE_CONTROL = {"type": "ephemeral"}
+
+
+def mark_cache_breakpoint(message: dict) -> dict:
+    """Return a copy of an Anthropic message with a cache breakpoint on its last content block."""
+    message = dict(message)
+    content = message.get("content")
+    if isinstance(content, str):
+        message["content"] = [{"type": "text", "text": content, "cache_control": EPHEMERAL_CACHE_CONTROL}]
+    elif isinstance(content, list) and content:
+        blocks = copy.copy(content)
+        blocks[-1] = dict(blocks[-1], cache_control=EPHEMERAL_CACHE_CONTROL)
+        message["content"] = blocks
+    return message
+
+
+def prefix_cache_key(source: str, model: str, prefix_messages: list) -> str:
+    """Stable key for a request prefix, used as OpenAI's ``prompt_cache_key``."""
+    payload = json.dumps([source, model, prefix_messages], sort_keys=True, default=str)
+    return "talkpipe-" + hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+def usage_counts(usage) -> Optional[dict]:
+    """Normalize a provider usage object to input, cached and cache-write token counts.
+
+    ``input_tokens`` is the full prompt size including cached tokens.  Anthropic
+    reports cache reads and writes separately from ``input_tokens``; OpenAI
+    reports cached tokens as part of ``input_tokens``.
+    """
+    if usage is None:
+        return None
+    input_tokens = int(getattr(usage, "input_tokens", None) or 0)
+    cache_read = getattr(usage, "cache_read_input_tokens", None)
+    if cache_read is not None or hasattr(usage, "cache_creation_input_tokens"):
+        cache_write = int(getattr(usage, "cache_creation_input_tokens", None) or 0)
+        cache_read = int(cache_read or 0)
+        return {
+            "input_tokens": input_tokens + cache_read + cache_write,
+            "cached_tokens": cache_read,
+            "cache_write_tokens": cache_write,
+        }
+    details = getattr(usage, "input_tokens_details", None)
+    return {
+        "input_tokens": input_tokens,
+        "cached_tokens": int(getattr(details, "cached_tokens", None) or 0) if details is not None else 0,
+        "cache_write_tokens": 0,
+    }
+
+
+_COUNTERS = ("requests", "cache_hits", "input_tokens", "cached_tokens", "cache_write_tokens")
+
+_usage: Dict[Tuple[str, str], Dict[str, int]] = {}
+_usage_lock = threading.Lock()
+
+
+def recordPromptCacheUsage(source: str, model: str, counts: Optional[dict]) -> None:
+    """Add one response's counts (from :func:`usage_counts`) to the process-wide totals."""
+    if counts is None:
+        return
+    with _usage_lock:
+        totals = _usage.setdefault((source, model), dict.fromkeys(_COUNTERS, 0))
+        totals["requests"] += 1
+        totals["cache_hits"] += 1 if counts["cached_tokens"] else 0
+        for name in ("input_tokens", "cached_tokens", "cache_write_tokens"):
+            totals[name] += counts[name]
+
+
+def getPromptCacheStats() -> List[dict]:
+    """Return prompt-cache totals for every (source, model) that reported usage."""
+    with _usage_lock:
+        snapshot = [(key, dict(totals)) for key, totals in _usage.items()]
+    stats = []
+    for (source, model), totals in snapshot:
+        input_tokens = totals["input_tokens"]
+        stats.append({
+            "source": source,
+            "model": model,
+            **totals,
+            "cache_misses": totals["requests"] - totals["cache_hits"],
+            "cached_token_ratio": totals["cached_tokens"] / input_tokens if input_tokens else 0.0,
+        })
+    return stats
+
+
+def resetPromptCacheStats() -> None:
+    """Forget all recorded usage (mainly for tests)."""
+    with _usage_lock:
+        _usage.clear()
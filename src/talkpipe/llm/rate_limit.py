@@ -0,0 +1,337 @@
+"""Process-wide rate limiting and adaptive concurrency for LLM provider calls.
+
+Every prompt, vision and embedding segment routes its provider calls through the
+:class:`ProviderLimiter` for its (source, model) pair, so limits hold no matter how
+many segments share a model.  A limiter combines:
+
+- token buckets for requests per minute and estimated tokens per minute, and
+- an AIMD (additive-increase, multiplicative-decrease) cap on in-flight calls that
+  halves on 429/overload errors or latency spikes and creeps back up on success.
+
+Limits are configured with :func:`configureRateLimit` or through configuration keys
+``rate_limit_<source>_requests_per_minute``, ``rate_limit_<source>_tokens_per_minute``
+and ``rate_limit_<source>_max_concurrency`` (``TALKPIPE_*`` environment variables or
+``~/.talkpipe.toml``).  Pairs without limits still pass through a limiter so that
+:func:`getRateLimitStats` can report their traffic.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+from talkpipe.util.config import get_config
+
+logger = logging.getLogger(__name__)
+
+_OVERLOAD_STATUS_CODES = (429, 503, 529)
+_OVERLOAD_PATTERNS = tuple(
+    re.compile(p, re.IGNORECASE)
+    for p in (
+        r"rate.?limit",
+        r"too many requests",
+        r"overloaded",
+        r"server (is )?busy",
+        r"\b429\b",
+    )
+)
+
+_RATE_WINDOW_SECONDS = 60.0
+
+
+def is_overload_error(exc: BaseException) -> bool:
+    """Return True if the exception indicates the provider is throttling or overloaded."""
+    for candidate in (exc, getattr(exc, "response", None)):
+        status = getattr(candidate, "status_code", None)
+        if status in _OVERLOAD_STATUS_CODES:
+            return True
+    message = str(exc) or repr(exc)
+    return any(pattern.search(message) for pattern in _OVERLOAD_PATTERNS)
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at ``per_minute`` tokens per minute.
+
+    Reservations larger than the remaining balance put the bucket into debt and return
+    the time the caller must wait, so a single oversized request is delayed rather than
+    rejected.
+    """
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None, clock=time.monotonic):
+        if per_minute <= 0:
+            raise ValueError(f"per_minute must be positive, got {per_minute}")
+        self.per_minute = float(per_minute)
+        self.capacity = float(capacity) if capacity is not None else self.per_minute
+        self._rate = self.per_minute / 60.0
+        self._clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float = 1.0) -> float:
+        """Take ``amount`` tokens and return how many seconds the caller should wait."""
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self._rate)
+            self._updated = now
+            self._tokens -= amount
+            return 0.0 if self._tokens >= 0 else -self._tokens / self._rate
+
+    @property
+    def available(self) -> float:
+        with self._lock:
+            elapsed = self._clock() - self._updated
+            return min(self.capacity, self._tokens + elapsed * self._rate)
+
+
+class AIMDController:
+    """Additive-increase / multiplicative-decrease concurrency limit.
+
+    Each success raises the limit by ``increase / limit`` (about one slot per round of
+    calls).  An overload error, or a latency above ``latency_spike_factor`` times the
+    running average, multiplies the limit by ``decrease``.  Decreases are applied at
+    most once per average latency so a burst of failures from one round counts once.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        min_concurrency: int = 1,
+        initial_concurrency: Optional[int] = None,
+        increase: float = 1.0,
+        decrease: float = 0.5,
+        latency_spike_factor: float = 3.0,
+        warmup_samples: int = 5,
+        clock=time.monotonic,
+    ):
+        if min_concurrency < 1 or max_concurrency < min_concurrency:
+            raise ValueError("concurrency limits must satisfy 1 <= min_concurrency <= max_concurrency")
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.limit = float(initial_concurrency if initial_concurrency is not None else max_concurrency)
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_spike_factor = latency_spike_factor
+        self.warmup_samples = warmup_samples
+        self.average_latency: Optional[float] = None
+        self._samples = 0
+        self._last_decrease = None
+        self._clock = clock
+
+    def on_success(self, latency: float) -> None:
+        spike = (
+            self.average_latency is not None
+            and self._samples >= self.warmup_samples
+            and latency > self.average_latency * self.latency_spike_factor
+        )
+        if spike:
+            self._back_off("latency spike")
+        else:
+            self.limit = min(float(self.max_concurrency), self.limit + self.increase / self.limit)
+        # Spikes are not folded into the average so one slow call cannot mask the next.
+        if not spike:
+            self._samples += 1
+            self.average_latency = latency if self.average_latency is None else (
+                0.8 * self.average_latency + 0.2 * latency
+            )
+
+    def on_overload(self) -> None:
+        self._back_off("overload")
+
+    def _back_off(self, reason: str) -> None:
+        now = self._clock()
+        if self._last_decrease is not None and self.average_latency is not None:
+            if now - self._last_decrease < self.average_latency:
+                return
+        self._last_decrease = now
+        self.limit = max(float(self.min_concurrency), self.limit * self.decrease)
+        logger.info(f"Reducing concurrency limit to {self.limit:.2f} after {reason}")
+
+    @property
+    def slots(self) -> int:
+        return max(self.min_concurrency, int(self.limit))
+
+
+class ProviderLimiter:
+    """Rate and concurrency limiter shared by every call to one (source, model) pair."""
+
+    def __init__(
+        self,
+        source: str,
+        model: Optional[str],
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        max_concurrency: Optional[int] = None,
+        min_concurrency: int = 1,
+        clock=time.monotonic,
+        sleep=time.sleep,
+    ):
+        self.source = source
+        self.model = model
+        self.requests = TokenBucket(requests_per_minute, clock=clock) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute, clock=clock) if tokens_per_minute else None
+        self.concurrency = (
+            AIMDController(max_concurrency, min_concurrency=min_concurrency, clock=clock)
+            if max_concurrency else None
+        )
+        self._clock = clock
+        self._sleep = sleep
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._waiting = 0
+        self._throttled = 0
+        self._overloads = 0
+        self._completed = 0
+        self._recent: deque = deque()
+
+    @contextmanager
+    def slot(self, estimated_tokens: int = 0):
+        """Hold one call slot for the duration of the ``with`` block."""
+        with self._cond:
+            self._waiting += 1
+            try:
+                while self.concurrency is not None and self._in_flight >= self.concurrency.slots:
+                    self._cond.wait()
+            finally:
+                self._waiting -= 1
+            self._in_flight += 1
+
+        try:
+            delay = 0.0
+            if self.requests is not None:
+                delay = max(delay, self.requests.reserve(1))
+            if self.tokens is not None and estimated_tokens:
+                delay = max(delay, self.tokens.reserve(estimated_tokens))
+            if delay > 0:
+                with self._cond:
+                    self._throttled += 1
+                logger.debug(f"Rate limit for {self.source}/{self.model}: waiting {delay:.2f}s")
+                self._sleep(delay)
+
+            start = self._clock()
+            try:
+                yield
+            except Exception as exc:
+                if is_overload_error(exc):
+                    with self._cond:
+                        self._overloads += 1
+                        if self.concurrency is not None:
+                            self.concurrency.on_overload()
+                raise
+            latency = self._clock() - start
+            with self._cond:
+                self._completed += 1
+                now = self._clock()
+                self._recent.append((now, estimated_tokens))
+                self._prune_recent(now)
+                if self.concurrency is not None:
+                    self.concurrency.on_success(latency)
+        finally:
+            with self._cond:
+                self._in_flight -= 1
+                self._cond.notify_all()
+
+    def call(self, func, *args, estimated_tokens: int = 0, **kwargs):
+        """Run ``func(*args, **kwargs)`` inside a limiter slot."""
+        with self.slot(estimated_tokens):
+            return func(*args, **kwargs)
+
+    def _prune_recent(self, now: float) -> None:
+        # Called under ``_cond``; keeps ``_recent`` to the last rate window.
+        while self._recent and now - self._recent[0][0] > _RATE_WINDOW_SECONDS:
+            self._recent.popleft()
+
+    def stats(self) -> dict:
+        """Snapshot of configured limits, observed rates and queue depth."""
+        with self._cond:
+            self._prune_recent(self._clock())
+            return {
+                "source": self.source,
+                "model": self.model,
+                "requests_per_minute_limit": self.requests.per_minute if self.requests else None,
+                "tokens_per_minute_limit": self.tokens.per_minute if self.tokens else None,
+                "requests_last_minute": len(self._recent),
+                "tokens_last_minute": sum(tokens for _, tokens in self._recent),
+                "concurrency_limit": self.concurrency.limit if self.concurrency else None,
+                "average_latency": self.concurrency.average_latency if self.concurrency else None,
+                "in_flight": self._in_flight,
+                "queue_depth": self._waiting,
+                "completed": self._completed,
+                "throttled": self._throttled,
+                "overload_errors": self._overloads,
+            }
+
+
+_LIMIT_SETTINGS = ("requests_per_minute", "tokens_per_minute", "max_concurrency", "min_concurrency")
+
+_settings: Dict[Tuple[str, Optional[str]], dict] = {}
+_limiters: Dict[Tuple[str, Optional[str]], ProviderLimiter] = {}
+_registry_lock = threading.Lock()
+
+
+def _settings_from_config(source: str) -> dict:
+    cfg = get_config()
+    found = {}
+    for name in _LIMIT_SETTINGS:
+        value = cfg.get(f"rate_limit_{source}_{name}", None)
+        if value is not None:
+            found[name] = int(value) if name.endswith("concurrency") else float(value)
+    return found
+
+
+def configureRateLimit(
+    source: str,
+    model: Optional[str] = None,
+    requests_per_minute: Optional[float] = None,
+    tokens_per_minute: Optional[float] = None,
+    max_concurrency: Optional[int] = None,
+    min_concurrency: int = 1,
+) -> None:
+    """Set limits for a source, or for one model of that source when ``model`` is given.
+
+    Source-wide settings apply to every model of the source that has no settings of
+    its own; each model still gets its own buckets.  Existing limiters affected by the
+    change are replaced, so configure limits before starting pipelines.
+    """
+    settings = {
+        "requests_per_minute": requests_per_minute,
+        "tokens_per_minute": tokens_per_minute,
+        "max_concurrency": max_concurrency,
+        "min_concurrency": min_concurrency,
+    }
+    with _registry_lock:
+        _settings[(source, model)] = settings
+        for key in list(_limiters):
+            if key[0] == source and (model is None or key[1] == model):
+                del _limiters[key]
+
+
+def getRateLimiter(source: str, model: Optional[str]) -> ProviderLimiter:
+    """Return the process-wide limiter for a (source, model) pair, creating it on first use."""
+    key = (source, model)
+    with _registry_lock:
+        limiter = _limiters.get(key)
+        if limiter is None:
+            settings = _settings.get(key) or _settings.get((source, None)) or _settings_from_config(source)
+            limiter = ProviderLimiter(source, model, **settings)
+            _limiters[key] = limiter
+        return limiter
+
+
+def getRateLimitStats() -> List[dict]:
+    """Return a stats snapshot for every limiter that has been used in this process."""
+    with _registry_lock:
+        limiters = list(_limiters.values())
+    return [limiter.stats() for limiter in limiters]
+
+
+def resetRateLimits() -> None:
+    """Forget all configured limits and limiters (mainly for tests)."""
+    with _registry_lock:
+        _settings.clear()
+        _limiters.clear()
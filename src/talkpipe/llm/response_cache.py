@@ -0,0 +1,175 @@
+"""Persistent SQLite cache for LLM responses.
+
+Prompt adapters look up a response by a hash of everything that determines it
+(source, model, the assembled request messages, temperature and the guided
+output schema).  A hit returns the stored response text without contacting the
+provider.  Entries are evicted least-recently-used once ``max_entries`` is
+exceeded and expire after ``ttl_seconds`` when a TTL is set.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CACHE_MODES = ("off", "deterministic", "always")
+DEFAULT_CACHE_PATH = "~/.talkpipe/llm_cache.sqlite"
+DEFAULT_CACHE_MAX_ENTRIES = 100000
+
+
+def make_cache_key(source: str, model: str, messages: list, temperature, output_schema) -> str:
+    """Hash the parts of a request that determine the response."""
+    payload = json.dumps(
+        {
+            "source": source,
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "output_schema": output_schema,
+        },
+        sort_keys=True,
+        default=repr,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Thread-safe SQLite store of response text keyed by request hash."""
+
+    def __init__(
+        self,
+        path: str = DEFAULT_CACHE_PATH,
+        max_entries: Optional[int] = DEFAULT_CACHE_MAX_ENTRIES,
+        ttl_seconds: Optional[float] = None,
+        clock=time.time,
+    ):
+        if max_entries is not None and max_entries < 1:
+            raise ValueError(f"max_entries must be positive, got {max_entries}")
+        if ttl_seconds is not None and ttl_seconds <= 0:
+            raise ValueError(f"ttl_seconds must be positive, got {ttl_seconds}")
+        self.path = path if path == ":memory:" else os.path.expanduser(path)
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        if self.path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, response TEXT NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses(accessed)")
+        self.hits = 0
+        self.misses = 0
+        with self._lock:
+            self._prune_expired()
+            self._count = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            self._evict_overflow()
+            self._conn.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for ``key``, or None on a miss or expired entry."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            now = self._clock()
+            if row is not None and self.ttl_seconds is not None and now - row[1] > self.ttl_seconds:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._count -= 1
+                row = None
+            if row is None:
+                self.misses += 1
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def contains(self, key: str) -> bool:
+        """Whether ``key`` has an unexpired entry; unlike :meth:`get` it changes no statistics."""
+        with self._lock:
+            row = self._conn.execute("SELECT created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return False
+            return self.ttl_seconds is None or self._clock() - row[0] <= self.ttl_seconds
+
+    def put(self, key: str, response: str) -> None:
+        """Store ``response`` under ``key``, evicting the least recently used entries if full."""
+        with self._lock:
+            now = self._clock()
+            inserted = self._conn.execute(
+                "INSERT OR IGNORE INTO responses (key, response, created, accessed) VALUES (?, ?, ?, ?)",
+                (key, response, now, now),
+            ).rowcount
+            if inserted:
+                self._count += 1
+            else:
+                self._conn.execute(
+                    "UPDATE responses SET response = ?, created = ?, accessed = ? WHERE key = ?",
+                    (response, now, now, key),
+                )
+            self._evict_overflow()
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+            self._count = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._count
+
+    def _prune_expired(self) -> None:
+        if self.ttl_seconds is not None:
+            self._conn.execute(
+                "DELETE FROM responses WHERE created < ?", (self._clock() - self.ttl_seconds,)
+            )
+
+    def _evict_overflow(self) -> None:
+        if self.max_entries is None or self._count <= self.max_entries:
+            return
+        # Expired rows go first so live entries are not evicted needlessly.
+        self._prune_expired()
+        self._count = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        surplus = self._count - self.max_entries
+        if surplus > 0:
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN "
+                "(SELECT key FROM responses ORDER BY accessed ASC LIMIT ?)",
+                (surplus,),
+            )
+            self._count -= surplus
+
+
+_caches: Dict[Tuple[str, Optional[int], Optional[float]], ResponseCache] = {}
+_caches_lock = threading.Lock()
+
+
+def getResponseCache(
+    path: str = DEFAULT_CACHE_PATH,
+    max_entries: Optional[int] = DEFAULT_CACHE_MAX_ENTRIES,
+    ttl_seconds: Optional[float] = None,
+) -> ResponseCache:
+    """Return the process-wide cache for ``path``, opening it on first use."""
+    key = (path if path == ":memory:" else os.path.expanduser(path), max_entries, ttl_seconds)
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            cache = ResponseCache(path, max_entries=max_entries, ttl_seconds=ttl_seconds)
+            _caches[key] = cache
+        return cache
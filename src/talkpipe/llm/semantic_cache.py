@@ -0,0 +1,337 @@
+"""In-memory semantic cache for LLM responses.
+
+Unlike the exact-match response cache (:mod:`talkpipe.llm.response_cache`),
+the semantic cache matches prompts by meaning: each prompt is embedded and
+compared by cosine similarity against the prompts answered before, and the
+stored response of the closest one is reused when the similarity reaches a
+threshold.  Entries live in per-namespace vector indexes (vectors from
+different embedding models, or responses from different completion models, are
+never compared), expire after ``ttl_seconds`` when a TTL is set and are evicted
+least-recently-used once ``max_entries`` is exceeded across all namespaces.
+
+The ``semanticCache`` segment puts a cache in front of any pipeline that turns
+a prompt into a response, such as ``llmPrompt`` or ``ragToText``::
+
+    CONST answer = "| ragToText[path='./kb', content_field='_']"
+    INPUT FROM echo[data="What is TalkPipe?"]
+    | semanticCache[pipeline=answer, embedding_model="nomic-embed-text", embedding_source="ollama", threshold=0.92]
+    | print
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Annotated, Any, Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+from talkpipe.chatterlang.registry import register_segment
+from talkpipe.pipe.core import AbstractSegment
+from talkpipe.util.config import get_config
+from talkpipe.util.constants import TALKPIPE_EMBEDDING_MODEL_NAME, TALKPIPE_EMBEDDING_MODEL_SOURCE
+from talkpipe.util.data_manipulation import assign_property, extract_property
+from .config import getEmbeddingAdapter, getEmbeddingSources
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SEMANTIC_CACHE_MAX_ENTRIES = 10000
+DEFAULT_SEMANTIC_CACHE_THRESHOLD = 0.95
+
+
+def _unit(vector) -> np.ndarray:
+    array = np.asarray(vector, dtype=np.float32).ravel()
+    norm = float(np.linalg.norm(array))
+    if norm == 0.0:
+        raise ValueError("Cannot cache a prompt with a zero embedding vector")
+    return array / norm
+
+
+class _Namespace:
+    """Vector index of one namespace: a growing row matrix with parallel entry lists."""
+
+    def __init__(self, dimensions: int):
+        self.dimensions = dimensions
+        self.vectors = np.empty((16, dimensions), dtype=np.float32)
+        self.created = np.empty(16, dtype=np.float64)
+        self.ids: List[int] = []
+        self.prompts: List[str] = []
+        self.responses: List[Any] = []
+        self.rows: Dict[int, int] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def append(self, entry_id: int, vector: np.ndarray, prompt: str, response: Any, now: float) -> None:
+        row = len(self.ids)
+        if row == len(self.vectors):
+            self.vectors = np.concatenate([self.vectors, np.empty_like(self.vectors)])
+            self.created = np.concatenate([self.created, np.empty_like(self.created)])
+        self.vectors[row] = vector
+        self.created[row] = now
+        self.ids.append(entry_id)
+        self.prompts.append(prompt)
+        self.responses.append(response)
+        self.rows[entry_id] = row
+
+    def remove(self, entry_id: int) -> None:
+        # Swap-remove keeps the live rows contiguous for the similarity product.
+        row = self.rows.pop(entry_id)
+        last = len(self.ids) - 1
+        if row != last:
+            self.vectors[row] = self.vectors[last]
+            self.created[row] = self.created[last]
+            self.ids[row] = self.ids[last]
+            self.prompts[row] = self.prompts[last]
+            self.responses[row] = self.responses[last]
+            self.rows[self.ids[row]] = row
+        self.ids.pop()
+        self.prompts.pop()
+        self.responses.pop()
+
+
+def _hit_rate(hits: int, misses: int) -> float:
+    total = hits + misses
+    return hits / total if total else 0.0
+
+
+class SemanticCache:
+    """Thread-safe in-memory store of responses indexed by prompt embedding."""
+
+    def __init__(
+        self,
+        name: str = "default",
+        max_entries: Optional[int] = DEFAULT_SEMANTIC_CACHE_MAX_ENTRIES,
+        ttl_seconds: Optional[float] = None,
+        clock=time.time,
+    ):
+        if max_entries is not None and max_entries < 1:
+            raise ValueError(f"max_entries must be positive, got {max_entries}")
+        if ttl_seconds is not None and ttl_seconds <= 0:
+            raise ValueError(f"ttl_seconds must be positive, got {ttl_seconds}")
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._namespaces: Dict[str, _Namespace] = {}
+        self._lru: "OrderedDict[int, str]" = OrderedDict()
+        self._next_id = 0
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.expired = 0
+
+    def lookup(self, namespace: str, vector, threshold: float) -> Optional[Tuple[Any, float]]:
+        """Return (response, similarity) of the closest live entry at or above ``threshold``, else None."""
+        query = _unit(vector)
+        with self._lock:
+            index = self._namespaces.get(namespace)
+            if index is not None:
+                self._expire(index)
+                self._check_dimensions(index, query)
+            if index is None or not len(index):
+                return self._miss(namespace)
+            similarities = index.vectors[: len(index)] @ query
+            row = int(np.argmax(similarities))
+            similarity = float(similarities[row])
+            if similarity < threshold:
+                return self._miss(namespace)
+            self._lru.move_to_end(index.ids[row])
+            self.hits += 1
+            index.hits += 1
+            return index.responses[row], similarity
+
+    def store(self, namespace: str, vector, prompt: str, response: Any) -> None:
+        """Add a prompt's response, evicting the least recently used entries if full."""
+        unit = _unit(vector)
+        with self._lock:
+            index = self._namespaces.get(namespace)
+            if index is None:
+                index = self._namespaces[namespace] = _Namespace(len(unit))
+            self._check_dimensions(index, unit)
+            entry_id = self._next_id
+            self._next_id += 1
+            index.append(entry_id, unit, prompt, response, self._clock())
+            self._lru[entry_id] = namespace
+            self.stores += 1
+            while self.max_entries is not None and len(self._lru) > self.max_entries:
+                oldest, oldest_namespace = self._lru.popitem(last=False)
+                self._namespaces[oldest_namespace].remove(oldest)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._namespaces.clear()
+            self._lru.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._lru)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "name": self.name,
+                "entries": len(self._lru),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": _hit_rate(self.hits, self.misses),
+                "stores": self.stores,
+                "evictions": self.evictions,
+                "expired": self.expired,
+                "namespaces": {
+                    namespace: {
+                        "entries": len(index),
+                        "hits": index.hits,
+                        "misses": index.misses,
+                        "hit_rate": _hit_rate(index.hits, index.misses),
+                    }
+                    for namespace, index in self._namespaces.items()
+                },
+            }
+
+    def _miss(self, namespace: str) -> None:
+        self.misses += 1
+        index = self._namespaces.get(namespace)
+        if index is not None:
+            index.misses += 1
+        return None
+
+    @staticmethod
+    def _check_dimensions(index: _Namespace, vector: np.ndarray) -> None:
+        if len(vector) != index.dimensions:
+            raise ValueError(
+                f"Embedding has {len(vector)} dimensions but the namespace holds {index.dimensions}; "
+                "use a separate namespace per embedding model"
+            )
+
+    def _expire(self, index: _Namespace) -> None:
+        if self.ttl_seconds is None or not len(index):
+            return
+        cutoff = self._clock() - self.ttl_seconds
+        stale = np.flatnonzero(index.created[: len(index)] < cutoff)
+        for row in sorted(stale, reverse=True):
+            entry_id = index.ids[row]
+            index.remove(entry_id)
+            del self._lru[entry_id]
+            self.expired += 1
+
+
+_caches: Dict[str, SemanticCache] = {}
+_caches_lock = threading.Lock()
+
+
+def getSemanticCache(
+    name: str = "default",
+    max_entries: Optional[int] = DEFAULT_SEMANTIC_CACHE_MAX_ENTRIES,
+    ttl_seconds: Optional[float] = None,
+) -> SemanticCache:
+    """Return the process-wide semantic cache called ``name``, creating it on first use.
+
+    The limits apply when the cache is created; later calls share the existing cache.
+    """
+    with _caches_lock:
+        cache = _caches.get(name)
+        if cache is None:
+            cache = _caches[name] = SemanticCache(name, max_entries=max_entries, ttl_seconds=ttl_seconds)
+        return cache
+
+
+def getSemanticCacheStats() -> List[dict]:
+    """Return entry counts and hit rates for every semantic cache used in this process."""
+    with _caches_lock:
+        caches = list(_caches.values())
+    return [cache.stats() for cache in caches]
+
+
+def resetSemanticCaches() -> None:
+    """Forget all semantic caches and their entries (mainly for tests)."""
+    with _caches_lock:
+        _caches.clear()
+
+
+@register_segment("semanticCache")
+class SemanticCacheSegment(AbstractSegment):
+    """Answer near-duplicate prompts from a semantic cache, running ``pipeline`` only on a miss.
+
+    Each prompt is embedded with the configured embedding model and looked up in
+    the named cache.  When a previous prompt in the same namespace is at least
+    ``threshold`` similar (cosine), its stored response is emitted; otherwise the
+    prompt is sent through ``pipeline`` and the response it yields is stored.
+    ``pipeline`` is a ChatterLang script (or a segment) that must yield exactly one
+    response per prompt, e.g. ``| llmPrompt[...]`` or ``| ragToText[...]``.
+
+    Namespaces always include the embedding source and model.  Set ``namespace``
+    to the completion model (or anything else that changes the answers) when
+    several cached pipelines share a cache; it defaults to the pipeline script.
+    """
+
+    def __init__(
+        self,
+        pipeline: Annotated[Union[str, AbstractSegment], "ChatterLang script (or segment) that answers a prompt on a cache miss"],
+        embedding_model: Annotated[Optional[str], "Embedding model for prompts; defaults to the configured embedding model"] = None,
+        embedding_source: Annotated[Optional[str], "Embedding source for prompts; defaults to the configured embedding source"] = None,
+        field: Annotated[Optional[str], "Field holding the prompt text; the whole item when omitted"] = None,
+        set_as: Annotated[Optional[str], "If provided, assign the response to this field of the item"] = None,
+        threshold: Annotated[float, "Minimum cosine similarity for a cache hit"] = DEFAULT_SEMANTIC_CACHE_THRESHOLD,
+        namespace: Annotated[Optional[str], "Cache namespace, e.g. the completion model; defaults to the pipeline script"] = None,
+        cache_name: Annotated[str, "Name of the process-wide cache to use"] = "default",
+        max_entries: Annotated[Optional[int], "Maximum cached responses across namespaces, applied when the cache is created"] = DEFAULT_SEMANTIC_CACHE_MAX_ENTRIES,
+        ttl_seconds: Annotated[Optional[float], "Seconds before a cached response expires, applied when the cache is created"] = None,
+    ):
+        super().__init__()
+        if not 0 < threshold <= 1:
+            raise ValueError(f"threshold must be in (0, 1], got {threshold}")
+        cfg = get_config()
+        embedding_model = embedding_model or cfg.get(TALKPIPE_EMBEDDING_MODEL_NAME, None)
+        embedding_source = embedding_source or cfg.get(TALKPIPE_EMBEDDING_MODEL_SOURCE, None)
+        if embedding_source not in getEmbeddingSources():
+            raise ValueError(
+                f"Source '{embedding_source}' is not supported. Supported sources are: {getEmbeddingSources()}"
+            )
+        self.embedder = getEmbeddingAdapter(embedding_source)(model=embedding_model)
+        self.field = field
+        self.set_as = set_as
+        self.threshold = threshold
+        if namespace is None:
+            # Segment objects are not comparable by value, so they get a namespace of their own.
+            namespace = pipeline if isinstance(pipeline, str) else f"{type(pipeline).__name__}@{id(pipeline):x}"
+        self.namespace = f"{embedding_source}:{embedding_model}:{namespace}"
+        self.cache = getSemanticCache(cache_name, max_entries=max_entries, ttl_seconds=ttl_seconds)
+        self._pipeline_source = pipeline
+        self._pipeline = None if isinstance(pipeline, str) else pipeline
+
+    def transform(self, input_iter: Iterator[Any]) -> Iterator[Any]:
+        for item in input_iter:
+            prompt = extract_property(item, self.field) if self.field else item
+            response = self._respond(str(prompt))
+            if self.set_as:
+                assign_property(item, self.set_as, response)
+                yield item
+            else:
+                yield response
+
+    def _respond(self, prompt: str) -> Any:
+        vector = self.embedder.execute_one(prompt)
+        cached = self.cache.lookup(self.namespace, vector, self.threshold)
+        if cached is not None:
+            logger.debug(f"Semantic cache hit (similarity {cached[1]:.3f}) for prompt: {prompt[:80]}")
+            return cached[0]
+        outputs = list(self._answer_pipeline()([prompt]))
+        if len(outputs) != 1:
+            raise ValueError(f"semanticCache pipeline must yield one response per prompt, got {len(outputs)}")
+        self.cache.store(self.namespace, vector, prompt, outputs[0])
+        return outputs[0]
+
+    def _answer_pipeline(self):
+        if self._pipeline is None:
+            from talkpipe.chatterlang.compiler import compile
+
+            self._pipeline = compile(self._pipeline_source, self.runtime)
+        return self._pipeline
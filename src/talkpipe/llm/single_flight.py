@@ -0,0 +1,254 @@
+"""Single-flight deduplication of identical in-flight provider requests.
+
+When a request is already on its way to a provider and an identical one arrives
+(a burst of ``chatterlang_serve`` traffic, or a fork feeding the same text to two
+branches), the later caller waits for the first call's result instead of sending
+its own.  Only requests that overlap in time are merged; nothing is kept once a
+call returns, so this is independent of the persistent response cache.
+
+Prompt adapters key a request on everything they send (messages, schema,
+temperature and other options); embedding adapters key each text separately, so
+a batch only sends the texts no other caller is already embedding.  Streaming
+requests are never merged.  Async callers are merged with other callers on the
+same event loop.
+
+Single flight is on by default.  Set the ``llm_single_flight`` configuration key
+to ``off`` (or call :func:`configureSingleFlight`) to disable it.
+:func:`getSingleFlightStats` reports, per (kind, source), how many requests were
+made, how many were sent and how many shared an in-flight result.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+from typing import Awaitable, Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+from pydantic import BaseModel
+
+from talkpipe.util.config import get_config
+from talkpipe.util.constants import LLM_SINGLE_FLIGHT
+
+logger = logging.getLogger(__name__)
+
+
+def _key_default(value):
+    if isinstance(value, type) and issubclass(value, BaseModel):
+        return value.model_json_schema()
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, (bytes, bytearray)):
+        return hashlib.sha256(value).hexdigest()
+    return repr(value)
+
+
+def request_key(*parts) -> str:
+    """Stable hash of the parts that make up a provider request."""
+    payload = json.dumps(parts, sort_keys=True, default=_key_default)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+    def wait(self):
+        self.done.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class SingleFlight:
+    """Merges identical concurrent calls for one (kind, source) pair."""
+
+    def __init__(self, kind: str, source: str):
+        self.kind = kind
+        self.source = source
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._async_calls: Dict[Tuple[int, Hashable], asyncio.Future] = {}
+        self._requests = 0
+        self._sent = 0
+        self._shared = 0
+
+    def _claim(self, keys: Sequence[Hashable]) -> Tuple[Dict[Hashable, _Call], Dict[Hashable, _Call]]:
+        # Returns (owned, joined): calls this caller must make and calls it waits on.
+        owned, joined = {}, {}
+        with self._lock:
+            for key in keys:
+                self._requests += 1
+                if key in owned or key in joined:
+                    self._shared += 1
+                    continue
+                call = self._calls.get(key)
+                if call is None:
+                    call = self._calls[key] = _Call()
+                    owned[key] = call
+                    self._sent += 1
+                else:
+                    joined[key] = call
+                    self._shared += 1
+        return owned, joined
+
+    def _release(self, owned: Dict[Hashable, _Call]) -> None:
+        with self._lock:
+            for key in owned:
+                self._calls.pop(key, None)
+        for call in owned.values():
+            call.done.set()
+
+    def do(self, key: Hashable, call: Callable[[], object]):
+        """Run ``call`` unless an identical call is in flight, in which case wait for its result."""
+        owned, joined = self._claim([key])
+        if joined:
+            logger.debug(f"Sharing in-flight {self.kind} request to {self.source}")
+            return joined[key].wait()
+        pending = owned[key]
+        try:
+            pending.result = call()
+        except BaseException as exc:
+            pending.error = exc
+            raise
+        finally:
+            self._release(owned)
+        return pending.result
+
+    def do_many(self, keys: Sequence[Hashable], values: Sequence, call: Callable[[list], list]) -> list:
+        """Batch version of :meth:`do`.
+
+        ``call`` receives the values whose keys are not already in flight (each key
+        once) and returns their results in the same order.  The results for every
+        key are returned in the order of ``keys``.
+        """
+        owned, joined = self._claim(keys)
+        if owned:
+            first_value = {}
+            for key, value in zip(keys, values):
+                first_value.setdefault(key, value)
+            try:
+                results = call([first_value[key] for key in owned])
+                for pending, result in zip(owned.values(), results):
+                    pending.result = result
+            except BaseException as exc:
+                for pending in owned.values():
+                    pending.error = exc
+                raise
+            finally:
+                self._release(owned)
+        if joined:
+            logger.debug(f"Sharing {len(joined)} in-flight {self.kind} requests to {self.source}")
+        calls = {**owned, **joined}
+        return [calls[key].wait() for key in keys]
+
+    async def ado(self, key: Hashable, call: Callable[[], Awaitable[object]]):
+        """Coroutine version of :meth:`do`; merges with callers on the same event loop."""
+        return (await self.ado_many([key], [None], lambda _values: self._single(call)))[0]
+
+    @staticmethod
+    async def _single(call):
+        return [await call()]
+
+    async def ado_many(self, keys: Sequence[Hashable], values: Sequence, call: Callable[[list], Awaitable[list]]) -> list:
+        """Coroutine version of :meth:`do_many`."""
+        loop = asyncio.get_running_loop()
+        owned, joined = {}, {}
+        with self._lock:
+            for key in keys:
+                self._requests += 1
+                flight_key = (id(loop), key)
+                if key in owned or key in joined:
+                    self._shared += 1
+                    continue
+                future = self._async_calls.get(flight_key)
+                if future is None:
+                    future = self._async_calls[flight_key] = loop.create_future()
+                    owned[key] = future
+                    self._sent += 1
+                else:
+                    joined[key] = future
+                    self._shared += 1
+        if owned:
+            first_value = {}
+            for key, value in zip(keys, values):
+                first_value.setdefault(key, value)
+            try:
+                results = await call([first_value[key] for key in owned])
+                for future, result in zip(owned.values(), results):
+                    future.set_result(result)
+            except BaseException as exc:
+                for future in owned.values():
+                    if future.done():
+                        continue
+                    if isinstance(exc, asyncio.CancelledError):
+                        future.cancel()
+                    else:
+                        future.set_exception(exc)
+                        # Mark retrieved so failures nobody waited on are not logged.
+                        future.exception()
+                raise
+            finally:
+                with self._lock:
+                    for key in owned:
+                        self._async_calls.pop((id(loop), key), None)
+        futures = {**owned, **joined}
+        return [await asyncio.shield(futures[key]) for key in keys]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "kind": self.kind,
+                "source": self.source,
+                "requests": self._requests,
+                "sent": self._sent,
+                "shared": self._shared,
+                "in_flight": len(self._calls) + len(self._async_calls),
+            }
+
+
+_enabled: Optional[bool] = None
+_flights: Dict[Tuple[str, str], SingleFlight] = {}
+_registry_lock = threading.Lock()
+
+
+def configureSingleFlight(enabled: Optional[bool]) -> None:
+    """Turn single flight on or off for this process; None falls back to ``llm_single_flight``."""
+    global _enabled
+    _enabled = enabled
+
+
+def singleFlightEnabled() -> bool:
+    if _enabled is not None:
+        return _enabled
+    setting = str(get_config().get(LLM_SINGLE_FLIGHT, "on")).strip().lower()
+    return setting not in ("off", "false", "0", "no")
+
+
+def getSingleFlight(kind: str, source: str) -> SingleFlight:
+    """Return the process-wide single-flight group for a kind ("prompt" or "embedding") and source."""
+    key = (kind, source)
+    with _registry_lock:
+        flight = _flights.get(key)
+        if flight is None:
+            flight = _flights[key] = SingleFlight(kind, source)
+        return flight
+
+
+def getSingleFlightStats() -> List[dict]:
+    """Return a stats snapshot for every single-flight group used in this process."""
+    with _registry_lock:
+        flights = list(_flights.values())
+    return [flight.stats() for flight in flights]
+
+
+def resetSingleFlightStats() -> None:
+    """Forget all single-flight groups and their counts (mainly for tests)."""
+    with _registry_lock:
+        _flights.clear()
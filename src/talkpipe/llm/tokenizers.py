@@ -0,0 +1,117 @@
+"""Pluggable token counters for conversation-memory accounting.
+
+A tokenizer name maps to a factory that takes a model name and returns a
+``count(text) -> int`` function.  Counters are built once per (tokenizer, model)
+pair and shared, since loading a real tokenizer can take seconds.
+
+Built-in tokenizers:
+
+- ``chars``: four characters per token, no dependencies (the default).
+- ``tiktoken``: OpenAI's BPE encodings via the ``tiktoken`` package; models it
+  does not know use ``o200k_base``.
+- ``huggingface``: ``transformers.AutoTokenizer`` loaded for the model name.
+
+The ``llm_tokenizer`` configuration key selects the default.
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Callable, Dict, List, Tuple
+
+TokenCounter = Callable[[str], int]
+
+DEFAULT_TOKENIZER = "chars"
+
+# Fixed per-message cost for role and framing tokens.
+MESSAGE_OVERHEAD_TOKENS = 6
+
+# Rough cost of one image at the sizes providers accept (about 1568x1568 / 750 for Anthropic).
+IMAGE_TOKENS = 1600
+
+_IMAGE_BLOCK_TYPES = ("image", "input_image", "image_url")
+
+
+def count_chars(text: str) -> int:
+    return len(text) // 4
+
+
+def _chars_counter(_model: str) -> TokenCounter:
+    return count_chars
+
+
+def _tiktoken_counter(model: str) -> TokenCounter:
+    try:
+        import tiktoken
+    except ImportError as exc:
+        raise ImportError("The tiktoken tokenizer needs the tiktoken package: pip install tiktoken") from exc
+    try:
+        encoding = tiktoken.encoding_for_model(model)
+    except KeyError:
+        encoding = tiktoken.get_encoding("o200k_base")
+    return lambda text: len(encoding.encode(text, disallowed_special=()))
+
+
+def _huggingface_counter(model: str) -> TokenCounter:
+    try:
+        from transformers import AutoTokenizer
+    except ImportError as exc:
+        raise ImportError(
+            "The huggingface tokenizer needs the transformers package: pip install transformers"
+        ) from exc
+    tokenizer = AutoTokenizer.from_pretrained(model)
+    return lambda text: len(tokenizer.encode(text, add_special_tokens=False))
+
+
+_tokenizers: Dict[str, Callable[[str], TokenCounter]] = {
+    "chars": _chars_counter,
+    "tiktoken": _tiktoken_counter,
+    "huggingface": _huggingface_counter,
+}
+_counters: Dict[Tuple[str, str], TokenCounter] = {}
+_counters_lock = threading.Lock()
+
+
+def registerTokenizer(name: str, factory: Callable[[str], TokenCounter]):
+    _tokenizers[name] = factory
+    with _counters_lock:
+        for key in [key for key in _counters if key[0] == name]:
+            del _counters[key]
+
+
+def getTokenizers() -> List[str]:
+    return list(_tokenizers.keys())
+
+
+def getTokenCounter(name: str, model: str) -> TokenCounter:
+    """Return the cached ``count(text)`` function for a tokenizer and model."""
+    if name not in _tokenizers:
+        raise ValueError(f"Unknown tokenizer: {name}. Expected one of: {', '.join(_tokenizers)}.")
+    key = (name, model)
+    with _counters_lock:
+        counter = _counters.get(key)
+    if counter is None:
+        counter = _tokenizers[name](model)
+        with _counters_lock:
+            counter = _counters.setdefault(key, counter)
+    return counter
+
+
+class MessageTokenCounter:
+    """Estimates the tokens of one chat message with a text counter plus framing overhead."""
+
+    def __init__(self, count_text: TokenCounter):
+        self.count_text = count_text
+
+    def __call__(self, message: dict) -> int:
+        content = message.get("content", "")
+        images = len(message.get("images") or [])
+        if isinstance(content, list):
+            # Content blocks: count the text and a flat cost per image, not the base64 payload.
+            text = "".join(str(block.get("text", "")) for block in content if isinstance(block, dict))
+            images += sum(
+                1 for block in content if isinstance(block, dict) and block.get("type") in _IMAGE_BLOCK_TYPES
+            )
+        else:
+            text = str(content)
+        return self.count_text(text) + MESSAGE_OVERHEAD_TOKENS + images * IMAGE_TOKENS
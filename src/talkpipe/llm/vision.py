@@ -10,9 +10,13 @@ from talkpipe.pipe.core import AbstractSegment
 from talkpipe.util.config import get_config
 from talkpipe.util.constants import TALKPIPE_MODEL_NAME, TALKPIPE_SOURCE
 from talkpipe.util.data_manipulation import assign_property, extract_property
+from talkpipe.util.iterators import ordered_concurrent_map
 
+from .chat import PromptAdapterPool
 from .config import getPromptAdapter, getPromptSources
-from .content import DEFAULT_VISION_PROMPT, user_turn_from_fields
+from .embedding import estimate_tokens
+from .rate_limit import getRateLimiter
+from .content import DEFAULT_VISION_PROMPT, user_turn_from_fields, user_turn_text
 
 logger = logging.getLogger(__name__)
 
@@ -22,7 +26,9 @@ class LLMVisionPrompt(AbstractSegment):
     """Send a multimodal prompt (text plus image) to a vision-capable LLM.
 
     Reads context, prompt, and image fields from each input item and returns the
-    model response. By default each item is handled independently (single-turn).
+    model response. By default each item is handled independently (single-turn),
+    and max_concurrency > 1 sends that many items to the model at once while
+    preserving output order.
     """
 
     def __init__(
@@ -38,6 +44,7 @@ class LLMVisionPrompt(AbstractSegment):
         multi_turn: Annotated[bool, "Whether to retain conversation history between items"] = False,
         temperature: Annotated[Optional[float], "The temperature to use for the model"] = None,
         debug_messages: Annotated[bool, "Whether to log outbound LLM request messages"] = False,
+        max_concurrency: Annotated[int, "Maximum number of items in flight at once (single-turn only)"] = 1,
     ):
         super().__init__()
         cfg = get_config()
@@ -51,6 +58,10 @@ class LLMVisionPrompt(AbstractSegment):
             )
         if source not in getPromptSources():
             raise ValueError(f"Unknown source: {source}")
+        if max_concurrency < 1:
+            raise ValueError(f"max_concurrency must be at least 1, got {max_concurrency}")
+        if max_concurrency > 1 and multi_turn:
+            raise ValueError("max_concurrency > 1 requires multi_turn=False; multi-turn chats must run sequentially.")
 
         adapter_kwargs = {
             "model": model,
@@ -59,7 +70,12 @@ class LLMVisionPrompt(AbstractSegment):
             "temperature": temperature,
             "debug_messages": debug_messages,
         }
-        self.chat = getPromptAdapter(source)(**adapter_kwargs)
+        adapter_cls = getPromptAdapter(source)
+        self.chat = adapter_cls(**adapter_kwargs)
+        self._new_prompt_adapter = lambda: adapter_cls(**adapter_kwargs)
+        self.max_concurrency = max_concurrency
+        self._source = source
+        self._model = model
 
         self.image_field = image_field
         self.context_field = context_field or ""
@@ -88,16 +104,37 @@ class LLMVisionPrompt(AbstractSegment):
             raise ValueError(f"Image field '{self.image_field}' is missing or empty on item: {item!r}")
         return value
 
+    def _user_turn(self, item):
+        return user_turn_from_fields(
+            prompt=self._resolve_prompt(item),
+            context=self._resolve_context(item),
+            images=self._resolve_image(item),
+        )
+
+    def _emit(self, item, response):
+        if self.set_as is not None:
+            assign_property(item, self.set_as, response)
+            return item
+        return response
+
+    def _limited(self, user_turn, func, *args):
+        # Images are not counted; the token estimate covers the text parts of the turn.
+        limiter = getRateLimiter(self._source, self._model)
+        return limiter.call(func, *args, estimated_tokens=estimate_tokens(user_turn_text(user_turn)))
+
     def transform(self, input_iter: Iterable) -> Iterator:
+        if self.max_concurrency > 1:
+            pool = PromptAdapterPool(self.chat, self._new_prompt_adapter)
+
+            def run(item):
+                user_turn = self._user_turn(item)
+                return item, self._limited(user_turn, pool.call, "execute_turn", user_turn)
+
+            for item, response in ordered_concurrent_map(run, input_iter, self.max_concurrency):
+                yield self._emit(item, response)
+            return
+
         for item in input_iter:
-            user_turn = user_turn_from_fields(
-                prompt=self._resolve_prompt(item),
-                context=self._resolve_context(item),
-                images=self._resolve_image(item),
-            )
-            response = self.chat.execute_turn(user_turn)
-            if self.set_as is not None:
-                assign_property(item, self.set_as, response)
-                yield item
-            else:
-                yield response
+            user_turn = self._user_turn(item)
+            response = self._limited(user_turn, self.chat.execute_turn, user_turn)
+            yield self._emit(item, response)
@@ -35,8 +35,8 @@ class ReduceTSNE(AbstractSegment):
     def transform(self, items):
         # Process each item (potentially a batch of vectors)
         for item in items:
-            # Convert items to numpy array
-            matrix = np.array(item)
+            # Arrays (e.g. float32 vectors from llmEmbed) are used without a copy
+            matrix = np.asarray(item)
             
             # Apply t-SNE
             reducer = TSNE(
@@ -111,6 +111,8 @@ class RuntimeComponent:
     """
     _variable_store: dict
     _const_store: dict
+    profiler = None
+    """Optional stage profiler; the chatterlang compiler hands it every component it builds."""
 
     def __init__(self):
         self._variable_store = {}
@@ -276,13 +278,18 @@ class AbstractSegment(ABC, HasRuntimeComponent, Generic[T, U]):
 
     def as_function(self, 
                     single_in: Annotated[bool, "If True, the function will expect a single input argument."] = False, 
-                    single_out: Annotated[bool, "If True, the function will return a single output."] = False) -> Callable:
+                    single_out: Annotated[bool, "If True, the function will return a single output."] = False,
+                    lazy: Annotated[bool, "If True (and single_out is False), return the output iterator instead of a list."] = False) -> Callable:
         """Convert the segment to a callable function.
         
         By default, the function will expect and return an iterable.
         single_in and single_out can be set to True to expect a single input and return a single output.
+        With lazy=True the function returns the pipeline's iterator without draining it, so
+        callers can act on items as they are produced.
         """
         def func(item=None):
+            if lazy and not single_out:
+                return self([item] if single_in else item)
             results = list(self([item] if single_in else item))
             if single_out:
                 if len(results) != 1:
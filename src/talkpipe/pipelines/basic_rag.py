@@ -7,6 +7,7 @@ from talkpipe.search.abstract import SearchResult
 from talkpipe.llm.chat import LlmScore, LLMPrompt, LlmBinaryAnswer
 from talkpipe.util.data_manipulation import extract_property, assign_property
 from talkpipe.pipelines.vector_databases import SearchVectorDatabaseSegment
+from talkpipe.pipelines.context_packing import pack_context
 from talkpipe.pipe.basic import DiagPrint
 
 logger = logging.getLogger(__name__)
@@ -65,18 +66,32 @@ class ConstructRAGPrompt(AbstractSegment):
                  content_field: Annotated[Any, "Field to evaluate relevance on"],
                  prompt_directive: Annotated[str, "Directive to guide the evaluation"],
                  background_field: Annotated[str, "Field containing background items"],
-                 set_as: Annotated[str, "The field to set/append the result as."] = None):
+                 set_as: Annotated[str, "The field to set/append the result as."] = None,
+                 context_token_budget: Annotated[int, "Maximum estimated tokens of background; packs the best chunks that fit"] = None,
+                 dedup_threshold: Annotated[float, "Drop background chunks at least this similar (0-1) to one already included"] = None,
+                 sentences_per_chunk: Annotated[int, "Keep only this many sentences per chunk, those most similar to the content"] = None):
         super().__init__()
         self.background_field = background_field
         self.content_field = content_field
         self.set_as = set_as
         self.prompt_directive = prompt_directive
+        self.context_token_budget = context_token_budget
+        self.dedup_threshold = dedup_threshold
+        self.sentences_per_chunk = sentences_per_chunk
 
 
     def transform(self, input_iter):
+        packing = (self.context_token_budget, self.dedup_threshold, self.sentences_per_chunk) != (None, None, None)
         for item in input_iter:
-            background = construct_background(extract_property(item, self.background_field))
+            background = extract_property(item, self.background_field)
             content = extract_property(item, self.content_field)
+            if packing:
+                background = pack_context(background,
+                                          query=str(content),
+                                          context_token_budget=self.context_token_budget,
+                                          dedup_threshold=self.dedup_threshold,
+                                          sentences_per_chunk=self.sentences_per_chunk)
+            background = construct_background(background)
 
             prompt = f"{background}\n\n{self.prompt_directive}\n\nContent:\n{content}"
             if self.set_as:
@@ -143,7 +158,10 @@ class AbstractRAGPipeline(AbstractSegment):
                  unsummarized_message_count: Annotated[int, "Recent message count kept out of summary compaction"] = 6,
                  context_token_trigger: Annotated[float, "Approximate context-token trigger for rolling memory compaction (values < 1 are ignored)"] = None,
                  memory_size: Annotated[int, "Target max tokens for generated summary memory"] = 512,
-                 debug_messages: Annotated[bool, "Whether to log outbound LLM request messages"] = False):
+                 debug_messages: Annotated[bool, "Whether to log outbound LLM request messages"] = False,
+                 context_token_budget: Annotated[int, "Maximum estimated tokens of background; packs the best chunks that fit"] = None,
+                 dedup_threshold: Annotated[float, "Drop background chunks at least this similar (0-1) to one already included"] = None,
+                 sentences_per_chunk: Annotated[int, "Keep only this many sentences per chunk, those most similar to the content"] = None):
 
         super().__init__()
         self.embedding_model = embedding_model
@@ -167,6 +185,9 @@ class AbstractRAGPipeline(AbstractSegment):
         self.context_token_trigger = context_token_trigger
         self.memory_size = memory_size
         self.debug_messages = debug_messages
+        self.context_token_budget = context_token_budget
+        self.dedup_threshold = dedup_threshold
+        self.sentences_per_chunk = sentences_per_chunk
 
     @abstractmethod
     def make_completion_segment(self) -> AbstractSegment:
@@ -186,7 +207,10 @@ class AbstractRAGPipeline(AbstractSegment):
                         ConstructRAGPrompt(prompt_directive=self.prompt_directive,
                                             background_field="_background",
                                             content_field=self.content_field,
-                                            set_as="_ragprompt") | \
+                                            set_as="_ragprompt",
+                                            context_token_budget=self.context_token_budget,
+                                            dedup_threshold=self.dedup_threshold,
+                                            sentences_per_chunk=self.sentences_per_chunk) | \
                         DiagPrint(output=self.diagPrintOutput, level=self.logging_level) | \
                         self.make_completion_segment()
 
@@ -225,7 +249,10 @@ class RAGToText(AbstractRAGPipeline):
                  context_token_trigger: Annotated[float, "Approximate context-token trigger for rolling memory compaction (values < 1 are ignored)"] = None,
                  memory_size: Annotated[int, "Target max tokens for generated summary memory"] = 512,
                  debug_messages: Annotated[bool, "Whether to log outbound LLM request messages"] = False,
-                 append_sources_to_output: Annotated[bool, "If True, append source file paths to the answer"] = True):
+                 append_sources_to_output: Annotated[bool, "If True, append source file paths to the answer"] = True,
+                 context_token_budget: Annotated[int, "Maximum estimated tokens of background; packs the best chunks that fit"] = None,
+                 dedup_threshold: Annotated[float, "Drop background chunks at least this similar (0-1) to one already included"] = None,
+                 sentences_per_chunk: Annotated[int, "Keep only this many sentences per chunk, those most similar to the content"] = None):
         super().__init__(embedding_model=embedding_model,
                          embedding_source=embedding_source,
                          completion_model=completion_model,
@@ -246,7 +273,10 @@ class RAGToText(AbstractRAGPipeline):
                          unsummarized_message_count=unsummarized_message_count,
                          context_token_trigger=context_token_trigger,
                          memory_size=memory_size,
-                         debug_messages=debug_messages)
+                         debug_messages=debug_messages,
+                         context_token_budget=context_token_budget,
+                         dedup_threshold=dedup_threshold,
+                         sentences_per_chunk=sentences_per_chunk)
         self.append_sources_to_output = append_sources_to_output
 
     def make_completion_segment(self) -> AbstractSegment:
@@ -295,7 +325,10 @@ class RAGToBinaryAnswer(AbstractRAGPipeline):
                  unsummarized_message_count: Annotated[int, "Recent message count kept out of summary compaction"] = 6,
                  context_token_trigger: Annotated[float, "Approximate context-token trigger for rolling memory compaction (values < 1 are ignored)"] = None,
                  memory_size: Annotated[int, "Target max tokens for generated summary memory"] = 512,
-                 debug_messages: Annotated[bool, "Whether to log outbound LLM request messages"] = False):
+                 debug_messages: Annotated[bool, "Whether to log outbound LLM request messages"] = False,
+                 context_token_budget: Annotated[int, "Maximum estimated tokens of background; packs the best chunks that fit"] = None,
+                 dedup_threshold: Annotated[float, "Drop background chunks at least this similar (0-1) to one already included"] = None,
+                 sentences_per_chunk: Annotated[int, "Keep only this many sentences per chunk, those most similar to the content"] = None):
         super().__init__(embedding_model=embedding_model,
                          embedding_source=embedding_source,
                          completion_model=completion_model,
@@ -316,7 +349,10 @@ class RAGToBinaryAnswer(AbstractRAGPipeline):
                          unsummarized_message_count=unsummarized_message_count,
                          context_token_trigger=context_token_trigger,
                          memory_size=memory_size,
-                         debug_messages=debug_messages)
+                         debug_messages=debug_messages,
+                         context_token_budget=context_token_budget,
+                         dedup_threshold=dedup_threshold,
+                         sentences_per_chunk=sentences_per_chunk)
 
     def make_completion_segment(self) -> AbstractSegment:
         return LlmBinaryAnswer(system_prompt=self.system_prompt,
@@ -361,7 +397,10 @@ class RAGToScore(AbstractRAGPipeline):
                  unsummarized_message_count: Annotated[int, "Recent message count kept out of summary compaction"] = 6,
                  context_token_trigger: Annotated[float, "Approximate context-token trigger for rolling memory compaction (values < 1 are ignored)"] = None,
                  memory_size: Annotated[int, "Target max tokens for generated summary memory"] = 512,
-                 debug_messages: Annotated[bool, "Whether to log outbound LLM request messages"] = False):
+                 debug_messages: Annotated[bool, "Whether to log outbound LLM request messages"] = False,
+                 context_token_budget: Annotated[int, "Maximum estimated tokens of background; packs the best chunks that fit"] = None,
+                 dedup_threshold: Annotated[float, "Drop background chunks at least this similar (0-1) to one already included"] = None,
+                 sentences_per_chunk: Annotated[int, "Keep only this many sentences per chunk, those most similar to the content"] = None):
         super().__init__(embedding_model=embedding_model,
                          embedding_source=embedding_source,
                          completion_model=completion_model,
@@ -382,7 +421,10 @@ class RAGToScore(AbstractRAGPipeline):
                          unsummarized_message_count=unsummarized_message_count,
                          context_token_trigger=context_token_trigger,
                          memory_size=memory_size,
-                         debug_messages=debug_messages)
+                         debug_messages=debug_messages,
+                         context_token_budget=context_token_budget,
+                         dedup_threshold=dedup_threshold,
+                         sentences_per_chunk=sentences_per_chunk)
 
     def make_completion_segment(self) -> AbstractSegment:
         return LlmScore(system_prompt=self.system_prompt,
@@ -0,0 +1,175 @@
+""" Token-budgeted packing of retrieved background for RAG prompts """
+from typing import Annotated, Any, Dict, List, Optional, Union
+import logging
+import math
+import re
+from collections import Counter
+
+from talkpipe import AbstractSegment, register_segment
+from talkpipe.llm.embedding import TokenEstimate, estimate_tokens
+from talkpipe.search.abstract import SearchResult
+from talkpipe.util.data_manipulation import extract_property, assign_property
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_FIELDS = ["title", "source"]
+
+_WORD = re.compile(r"\w+")
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+|\n+")
+
+
+def _term_counts(text: str) -> Counter:
+    return Counter(word.lower() for word in _WORD.findall(text))
+
+
+def _cosine(a: Counter, b: Counter) -> float:
+    if not a or not b:
+        return 0.0
+    if len(a) > len(b):
+        a, b = b, a
+    dot = sum(count * b[word] for word, count in a.items())
+    return dot / (math.sqrt(sum(v * v for v in a.values())) * math.sqrt(sum(v * v for v in b.values())))
+
+
+def compress_text(text: str, query: str, sentences: int) -> str:
+    """Keep the ``sentences`` sentences of ``text`` most similar to ``query``, in their original order."""
+    parts = [part.strip() for part in _SENTENCE_BREAK.split(text) if part.strip()]
+    if len(parts) <= sentences:
+        return text
+    query_terms = _term_counts(query)
+    ranked = sorted(range(len(parts)), key=lambda i: _cosine(_term_counts(parts[i]), query_terms), reverse=True)
+    return " ".join(parts[i] for i in sorted(ranked[:sentences]))
+
+
+def truncate_to_tokens(text: str, budget: int) -> str:
+    """Cut ``text`` to its longest prefix, ending at a word boundary where possible, within ``budget`` estimated tokens."""
+    estimate = TokenEstimate(text)
+    low, high = 0, len(text)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if estimate.count(0, mid) <= budget:
+            low = mid
+        else:
+            high = mid - 1
+    if low < len(text) and not text[low].isspace():
+        boundary = text.rfind(" ", 0, low)
+        if boundary > 0:
+            low = boundary
+    return text[:low].rstrip()
+
+
+def _chunk_text(chunk: Union[str, SearchResult], query: Optional[str], sentences_per_chunk: Optional[int]) -> str:
+    if isinstance(chunk, SearchResult):
+        document: Dict[str, Any] = dict(chunk.document or {})
+        if sentences_per_chunk is not None and query:
+            for key, value in document.items():
+                if isinstance(value, str) and key not in PRIORITY_FIELDS:
+                    document[key] = compress_text(value, query, sentences_per_chunk)
+        return chunk.model_copy(update={"document": document}).prompt_worthy_string(priority_fields=PRIORITY_FIELDS)
+    if isinstance(chunk, str):
+        if sentences_per_chunk is not None and query:
+            return compress_text(chunk, query, sentences_per_chunk)
+        return chunk
+    raise ValueError(f"Unsupported background item type: {type(chunk)}")
+
+
+def pack_context(background: Annotated[Union[str, List[Union[str, SearchResult]]], "Retrieved background items"],
+                 query: Annotated[Optional[str], "The question the background should answer"] = None,
+                 context_token_budget: Annotated[Optional[int], "Maximum estimated tokens of packed background"] = None,
+                 dedup_threshold: Annotated[Optional[float], "Drop chunks at least this similar to a chunk already packed"] = None,
+                 sentences_per_chunk: Annotated[Optional[int], "Keep only this many query-relevant sentences per chunk"] = None) -> List[str]:
+    """ Rank, deduplicate, compress and budget background chunks.
+
+    Chunks are ranked by retrieval score when every chunk is a SearchResult, otherwise by
+    word overlap with the query (or kept in order without one).  Each chunk is optionally
+    compressed to its ``sentences_per_chunk`` sentences most similar to the query, dropped
+    if it is a near-duplicate (cosine similarity of word counts at least
+    ``dedup_threshold``) of a chunk already packed, and packed while it fits the remaining
+    ``context_token_budget``.  The best chunk is cut to the budget rather than dropped, so
+    some background is always packed.
+
+    Returns:
+        The packed chunks as prompt-ready strings, best first.
+    """
+    if isinstance(background, (str, SearchResult)):
+        background = [background]
+    if dedup_threshold is not None and not 0 < dedup_threshold <= 1:
+        raise ValueError(f"dedup_threshold must be in (0, 1], got {dedup_threshold}")
+    if sentences_per_chunk is not None and sentences_per_chunk < 1:
+        raise ValueError(f"sentences_per_chunk must be at least 1, got {sentences_per_chunk}")
+    if context_token_budget is not None and context_token_budget < 1:
+        raise ValueError(f"context_token_budget must be at least 1, got {context_token_budget}")
+
+    chunks = list(background)
+    if chunks and all(isinstance(chunk, SearchResult) for chunk in chunks):
+        chunks.sort(key=lambda chunk: chunk.score, reverse=True)
+    elif query:
+        query_terms = _term_counts(query)
+        chunks.sort(key=lambda chunk: _cosine(_term_counts(_chunk_text(chunk, None, None)), query_terms), reverse=True)
+
+    packed, packed_terms = [], []
+    remaining = context_token_budget
+    for chunk in chunks:
+        text = _chunk_text(chunk, query, sentences_per_chunk)
+        if dedup_threshold is not None:
+            terms = _term_counts(text)
+            if any(_cosine(terms, other) >= dedup_threshold for other in packed_terms):
+                logger.debug("Dropping near-duplicate background chunk")
+                continue
+            packed_terms.append(terms)
+        if remaining is not None:
+            tokens = estimate_tokens(text)
+            if tokens > remaining and not packed:
+                # Never return nothing: keep as much of the best chunk as fits.
+                logger.debug(f"Truncating the top background chunk of ~{tokens} tokens to {remaining}")
+                text = truncate_to_tokens(text, remaining)
+                tokens = estimate_tokens(text)
+            if tokens > remaining or not text:
+                # A smaller, lower-ranked chunk may still fit.
+                logger.debug(f"Background chunk of ~{tokens} tokens exceeds the remaining budget of {remaining}")
+                if dedup_threshold is not None:
+                    packed_terms.pop()
+                continue
+            remaining -= tokens
+        packed.append(text)
+    return packed
+
+
+@register_segment("packRagContext")
+class PackRAGContext(AbstractSegment):
+    """ Pack retrieved background into a token budget before building a RAG prompt.
+
+    Ranks the chunks in ``background_field``, drops near-duplicates, optionally keeps only
+    the sentences most similar to the query and fills ``context_token_budget``.  Emits (or
+    assigns to ``set_as``) the packed chunks as a list of strings, which constructRagPrompt
+    accepts as background.  See :func:`pack_context`.
+    """
+
+    def __init__(self,
+                 background_field: Annotated[str, "Field containing background items"],
+                 query_field: Annotated[Optional[str], "Field containing the question, used for ranking and compression"] = None,
+                 context_token_budget: Annotated[Optional[int], "Maximum estimated tokens of packed background"] = None,
+                 dedup_threshold: Annotated[Optional[float], "Drop chunks at least this similar (0-1) to a chunk already packed"] = 0.9,
+                 sentences_per_chunk: Annotated[Optional[int], "Keep only this many query-relevant sentences per chunk"] = None,
+                 set_as: Annotated[Optional[str], "The field to set/append the result as."] = None):
+        super().__init__()
+        self.background_field = background_field
+        self.query_field = query_field
+        self.context_token_budget = context_token_budget
+        self.dedup_threshold = dedup_threshold
+        self.sentences_per_chunk = sentences_per_chunk
+        self.set_as = set_as
+
+    def transform(self, input_iter):
+        for item in input_iter:
+            query = extract_property(item, self.query_field) if self.query_field else None
+            packed = pack_context(extract_property(item, self.background_field),
+                                  query=str(query) if query is not None else None,
+                                  context_token_budget=self.context_token_budget,
+                                  dedup_threshold=self.dedup_threshold,
+                                  sentences_per_chunk=self.sentences_per_chunk)
+            if self.set_as:
+                assign_property(item, self.set_as, packed)
+                yield item
+            else:
+                yield packed
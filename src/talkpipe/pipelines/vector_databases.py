@@ -86,6 +86,8 @@ class MakeVectorDatabaseSegment(AbstractSegment):
                  optimize_on_batch: Annotated[bool, "If true, optimize the table after each batch.  Otherwise optimize after last batch."]=False,
                  optimize_every: Annotated[int, "Optimize the table after at least this many rows have been added since the last optimization. 0 disables periodic optimization."]=5000,
                  on_token_overflow: Annotated[str, "When embedding fails as too long: error, truncate (shrink and retry), or chunk_pool"]=_OVERFLOW_ERROR,
+                 embedding_batch_size: Annotated[int, "Number of chunks to embed per provider call"]=1,
+                 embedding_max_concurrency: Annotated[int, "Maximum number of embedding batches in flight at once"]=1,
                  ):
         super().__init__()
         self.embedding_model = embedding_model
@@ -102,7 +104,9 @@ class MakeVectorDatabaseSegment(AbstractSegment):
                                 field=self.embedding_field,
                                 set_as="vector",
                                 fail_on_error=self.fail_on_error,
-                                on_token_overflow=on_token_overflow) | \
+                                on_token_overflow=on_token_overflow,
+                                batch_size=embedding_batch_size,
+                                max_concurrency=embedding_max_concurrency) | \
                         add_to_lancedb(path=self.path,
                                        table_name=self.table_name,
                                        doc_id_field=self.doc_id_field,
@@ -299,6 +303,8 @@ def build_rag_database(
     batch_size: int = 100,
     fail_on_error: bool = False,
     on_token_overflow: str = _OVERFLOW_TRUNCATE,
+    embedding_batch_size: int = 1,
+    embedding_max_concurrency: int = 1,
     expected_dimension: Optional[int] = None,
     preflight: bool = True,
     progress: Optional[Callable[[int, int, str], None]] = None,
@@ -327,6 +333,12 @@ def build_rag_database(
       were extracted but none embedded, RagIngestError is raised so callers
       cannot mistake a dead embedder for empty documents.
 
+    embedding_batch_size and embedding_max_concurrency are passed to LLMEmbed
+    as batch_size and max_concurrency: chunks are sent to the embedder in
+    batches, with up to embedding_max_concurrency batches in flight while
+    documents are still being read and chunked, which keeps a remote
+    embedding server busy during bulk indexing.
+
     The optional progress callback receives (chunks_done, files_done,
     current_source_path) as chunks are stored.
     """
@@ -341,6 +353,8 @@ def build_rag_database(
         set_as="vector",
         fail_on_error=fail_on_error,
         on_token_overflow=on_token_overflow,
+        batch_size=embedding_batch_size,
+        max_concurrency=embedding_max_concurrency,
     )
 
     dimension: Optional[int] = None
@@ -364,24 +364,25 @@ class LanceDBDocumentStore(DocumentStore, VectorAddable, VectorSearchable):
         cleanup = timedelta(seconds=cleanup_older_than_seconds) if cleanup_older_than_seconds is not None else None
         table.optimize(cleanup_older_than=cleanup)
 
-    def _validate_vector(self, vector: VectorLike) -> List[float]:
-        """Validate vector and return as list of floats."""
-        if isinstance(vector, np.ndarray):
-            vec_array = vector
-        else:
-            vec_array = np.array(vector, dtype=np.float32)
+    def _validate_vector(self, vector: VectorLike) -> np.ndarray:
+        """Validate vector and return it as a contiguous float32 array.
 
-        if vec_array.ndim != 1:
-            raise ValueError("Vector must be 1-dimensional")
+        LanceDB stores float32 vectors, so float32 input passes through without a copy.
+        """
+        vec_array = np.asarray(vector)
         if not np.issubdtype(vec_array.dtype, np.number):
             raise ValueError("Vector must contain only numbers")
+        vec_array = np.ascontiguousarray(vec_array, dtype=np.float32)
+
+        if vec_array.ndim != 1:
+            raise ValueError("Vector must be 1-dimensional")
 
         if self.vector_dim is None:
             self.vector_dim = len(vec_array)
         elif len(vec_array) != self.vector_dim:
             raise ValueError(f"Vector dimension {len(vec_array)} doesn't match expected {self.vector_dim}")
 
-        return vec_array.tolist()
+        return vec_array
 
     def _serialize_document(self, document: Document) -> str:
         """Serialize document to JSON string for storage."""
@@ -431,7 +432,7 @@ class LanceDBDocumentStore(DocumentStore, VectorAddable, VectorSearchable):
         schema_data = []
         
         for vector, document, doc_id in documents:
-            vec_list = self._validate_vector(vector)
+            vec_array = self._validate_vector(vector)
             
             if doc_id is None:
                 doc_id = str(uuid.uuid4())
@@ -440,7 +441,7 @@ class LanceDBDocumentStore(DocumentStore, VectorAddable, VectorSearchable):
             
             schema_data.append({
                 "id": doc_id,
-                "vector": vec_list,
+                "vector": vec_array,
                 "document": self._serialize_document(document)
             })
         
@@ -460,11 +461,11 @@ class LanceDBDocumentStore(DocumentStore, VectorAddable, VectorSearchable):
     # VectorSearchable protocol implementation
     def vector_search(self, vector: VectorLike, limit: int = 10) -> List[SearchResult]:
         """Search for vectors similar to the given vector."""
-        vec_list = self._validate_vector(vector)
+        vec_array = self._validate_vector(vector)
 
         try:
             table, created_and_updated = self._get_table()
-            results = table.search(vec_list).limit(limit).to_list()
+            results = table.search(vec_array).limit(limit).to_list()
 
             search_results = []
             for result in results:
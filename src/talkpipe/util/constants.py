@@ -18,3 +18,29 @@ OLLAMA_SERVER_URL = "OLLAMA_SERVER_URL"
 # Model2vec embedding settings (used by talkpipe.llm.embedding_adapters_model2vec)
 MODEL2VEC_REVISION = "MODEL2VEC_REVISION"
 MODEL2VEC_CACHE_DIR = "MODEL2VEC_CACHE_DIR"
+
+# LLM response cache (used by talkpipe.llm.prompt_adapter_base)
+# Mode: off (default), deterministic (temperature 0 requests only), or always
+LLM_CACHE = "llm_cache"
+LLM_CACHE_PATH = "llm_cache_path"
+LLM_CACHE_MAX_ENTRIES = "llm_cache_max_entries"
+LLM_CACHE_TTL_SECONDS = "llm_cache_ttl_seconds"
+
+# HTTP connection pool limits for shared provider clients (used by talkpipe.llm.client_pool)
+LLM_HTTP_MAX_CONNECTIONS = "llm_http_max_connections"
+LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS = "llm_http_max_keepalive_connections"
+LLM_HTTP_KEEPALIVE_EXPIRY = "llm_http_keepalive_expiry"
+
+# Directory holding batch-mode job files (used by talkpipe.llm.batch)
+LLM_BATCH_DIR = "llm_batch_dir"
+
+# Tokenizer used for conversation-memory token accounting: chars (default), tiktoken or huggingface
+LLM_TOKENIZER = "llm_tokenizer"
+
+# Merge identical in-flight LLM and embedding requests (used by talkpipe.llm.single_flight): on (default) or off
+LLM_SINGLE_FLIGHT = "llm_single_flight"
+
+# Persistent embedding cache (used by talkpipe.llm.embedding): off (default) or on
+EMBEDDING_CACHE = "embedding_cache"
+EMBEDDING_CACHE_PATH = "embedding_cache_path"
+EMBEDDING_CACHE_MAX_BYTES = "embedding_cache_max_bytes"
@@ -1,3 +1,6 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
 from greenlet import greenlet
 
 def bypass(iterable, should_bypass_handler, handler):
@@ -99,3 +102,35 @@ def bypass(iterable, should_bypass_handler, handler):
             
         else:
             raise RuntimeError(f"Unexpected message: {msg}")
+
+
+def ordered_concurrent_map(func, iterable, max_workers: int):
+    """
+    Lazily applies func to each item using a thread pool, yielding results in input order.
+
+    At most max_workers calls are in flight at once, so the input is read only as
+    fast as results are consumed.  With max_workers <= 1 the items are processed
+    inline, exactly like a plain generator.  If a call raises, the exception is
+    re-raised when its result is reached and calls that have not started are cancelled.
+
+    Example:
+      >>> list(ordered_concurrent_map(lambda x: x * 2, [1, 2, 3], max_workers=2))
+      [2, 4, 6]
+    """
+    if max_workers <= 1:
+        for item in iterable:
+            yield func(item)
+        return
+
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        try:
+            for item in iterable:
+                pending.append(executor.submit(func, item))
+                if len(pending) >= max_workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
@@ -142,3 +142,42 @@ def test_runtime_error_verbose_raises(capsys):
             main()
 
 
+
+
+def _mock_plan_namespace(script, explain=False, analyze=False, plan_format="text", plan_output=None):
+    ns = _mock_namespace(script)
+    ns.explain = explain
+    ns.analyze = analyze
+    ns.plan_format = plan_format
+    ns.plan_output = plan_output
+    return ns
+
+
+def test_explain_prints_plan_without_running(capsys):
+    test_script = 'INPUT FROM echo[data="a,b"] | print'
+
+    with patch('argparse.ArgumentParser.parse_known_args') as mock_args:
+        mock_args.return_value = (_mock_plan_namespace(test_script, explain=True), [])
+        main()
+
+    out = capsys.readouterr().out
+    assert "pipeline 0" in out
+    assert "segment print[]" in out
+    assert "a\nb\n" not in out
+
+
+def test_analyze_writes_json_plan(tmp_path):
+    import json
+    test_script = 'INPUT FROM echo[data="a,b"] | firstN[n=1]'
+    plan_file = tmp_path / "plan.json"
+
+    with patch('argparse.ArgumentParser.parse_known_args') as mock_args:
+        mock_args.return_value = (
+            _mock_plan_namespace(test_script, analyze=True, plan_format="json", plan_output=str(plan_file)),
+            [],
+        )
+        main()
+
+    plan = json.loads(plan_file.read_text())
+    assert plan["pipelines"][0]["stages"][1]["stats"]["items_out"] == 1
+    assert plan["run"]["items_out"] == 1
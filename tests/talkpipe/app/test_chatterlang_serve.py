@@ -1143,4 +1143,28 @@ class TestAsyncFunctionality:
         
         mock_compiled.assert_called_once_with(test_data)
         assert result.status == "success"
-        assert "script output" in result.data["output"]
\ No newline at end of file
+        assert "script output" in result.data["output"]
+    
+    def test_process_json_forwards_stream_chunks(self):
+        """Streamed chunks are sent as SSE chunk events and joined in the response."""
+        from talkpipe.llm.content import StreamChunk
+
+        mock_compiled = Mock()
+        mock_compiled.return_value = iter([
+            "prompt",
+            StreamChunk("Hel", 1), StreamChunk("lo", 1),
+            StreamChunk("Bye", 2),
+        ])
+        session = UserSession("test-session")
+        session.compiled_script = mock_compiled
+
+        import asyncio
+        result = asyncio.run(ChatterlangServer()._process_json({"prompt": "x"}, session))
+
+        assert result.data["output"] == ["prompt", "Hello", "Bye"]
+        events = []
+        while not session.output_queue.empty():
+            events.append(session.output_queue.get())
+        assert [(e["type"], e["output"]) for e in events] == [
+            ("chunk", "Hel"), ("chunk", "lo"), ("chunk", "Bye"),
+        ]
@@ -47,6 +47,8 @@ def test_cli_reports_result_counts(tmp_path, monkeypatch, capsys):
     assert "skipped 1 chunk(s)" in out.err
     assert captured_kwargs["on_token_overflow"] == "truncate"
     assert captured_kwargs["fail_on_error"] is False
+    assert captured_kwargs["embedding_batch_size"] == 1
+    assert captured_kwargs["embedding_max_concurrency"] == 1
 
 
 def test_cli_exits_nonzero_on_ingest_error(tmp_path, monkeypatch, capsys):
@@ -0,0 +1,40 @@
+"""Tests for the workbench plan explanation endpoint."""
+
+from fastapi.testclient import TestClient
+
+from talkpipe.app import chatterlang_workbench
+
+
+def get_client():
+    return TestClient(chatterlang_workbench.app)
+
+
+def test_explain_returns_plan_and_text():
+    response = get_client().post("/api/explain", json={"script": "INPUT FROM range[lower=0, upper=3] | print"})
+    assert response.status_code == 200
+    data = response.json()
+    stages = data["plan"]["pipelines"][0]["stages"]
+    assert [s["name"] for s in stages] == ["range", "print"]
+    assert "stats" not in stages[0]
+    assert "source range[lower=0, upper=3]" in data["text"]
+
+
+def test_analyze_includes_stage_stats():
+    response = get_client().post(
+        "/api/explain", json={"script": "INPUT FROM range[lower=0, upper=3] | firstN[n=2]", "analyze": True}
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["plan"]["pipelines"][0]["stages"][1]["stats"]["items_out"] == 2
+    assert "run: wall=" in data["text"]
+
+
+def test_explain_compile_error_is_400():
+    response = get_client().post("/api/explain", json={"script": "INPUT FROM echo[data='a'] | notASegment"})
+    assert response.status_code == 400
+    assert "not found" in response.json()["detail"]
+
+
+def test_explain_empty_script_is_400():
+    response = get_client().post("/api/explain", json={"script": "  "})
+    assert response.status_code == 400
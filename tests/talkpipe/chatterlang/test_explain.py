@@ -0,0 +1,99 @@
+import json
+
+import numpy as np
+import pytest
+
+from talkpipe.chatterlang import compiler, explain
+from talkpipe.pipe import core
+
+
+def test_explain_describes_stages_and_resolved_params():
+    plan = explain.explain_script(
+        'CONST n=3; INPUT FROM range[lower=0, upper=5] | scale[multiplier=n] | @x; INPUT FROM @x | print'
+    )
+    first, second = plan["pipelines"]
+    assert plan["constants"] == {"n": 3}
+    assert [s["name"] for s in first["stages"]] == ["range", "scale", "@x"]
+    assert first["stages"][1]["params"] == {"multiplier": 3}
+    assert first["stages"][1]["component"] == "talkpipe.pipe.math.scale"
+    assert first["fused_groups"] == [["0:0", "0:1", "0:2"]]
+    assert second["stages"][0]["role"] == "source"
+    assert "stats" not in first["stages"][0]
+
+
+def test_explain_does_not_run_script(capsys):
+    explain.explain_script('INPUT FROM echo[data="a,b"] | print')
+    assert capsys.readouterr().out == ""
+
+
+def test_explain_forks_and_loops():
+    plan = explain.explain_script(
+        'INPUT FROM echo[data="1,2"] -> f; f -> | print; '
+        'LOOP 2 TIMES { INPUT FROM echo[data="a"] | fork(print, firstN) }'
+    )
+    assert plan["forks"] == [{"name": "f", "producers": ["0"], "consumers": ["1"]}]
+    loop = plan["pipelines"][2]
+    assert loop["kind"] == "loop"
+    assert loop["iterations"] == 2
+    fork_stage = loop["pipelines"][0]["stages"][1]
+    assert fork_stage["role"] == "fork"
+    assert [b["stages"][0]["name"] for b in fork_stage["branches"]] == ["print", "firstN"]
+
+
+def test_explain_unknown_segment_raises_compile_error():
+    with pytest.raises(compiler.CompileError, match="not found"):
+        explain.explain_script("INPUT FROM echo[data='a'] | notASegment")
+
+
+def test_analyze_records_stage_stats():
+    runtime = core.RuntimeComponent()
+    plan = explain.analyze_script(
+        'INPUT FROM range[lower=0, upper=10] | firstN[n=4] | @out', runtime=runtime
+    )
+    source, first_n, variable = plan["pipelines"][0]["stages"]
+    assert source["stats"]["items_out"] == 4
+    assert first_n["stats"]["items_in"] >= 4
+    assert first_n["stats"]["items_out"] == 4
+    assert set(first_n["stats"]["latency_ms"]) == {"p50", "p90", "p95", "p99", "max"}
+    assert variable["stats"]["items_out"] == 4
+    assert plan["run"]["items_out"] == 4
+    assert plan["run"]["peak_memory_bytes"] > 0
+    assert runtime.variable_store["out"] == [0, 1, 2, 3]
+    assert runtime.profiler is None
+
+
+def test_analyze_accumulates_loop_iterations_and_fork_branches():
+    plan = explain.analyze_script(
+        'LOOP 3 TIMES { INPUT FROM echo[data="a,b"] | fork(firstN, firstN) }'
+    )
+    stages = plan["pipelines"][0]["pipelines"][0]["stages"]
+    assert stages[0]["stats"]["items_out"] == 6
+    branch_stats = [b["stages"][0]["stats"] for b in stages[1]["branches"]]
+    assert [s["items_out"] for s in branch_stats] == [3, 3]
+
+
+def test_plan_json_and_text_rendering():
+    plan = explain.analyze_script('INPUT FROM range[lower=0, upper=3] | scale[multiplier=2]')
+    data = json.loads(explain.plan_to_json(plan))
+    assert data["pipelines"][0]["stages"][1]["stats"]["items_out"] == 3
+    text = explain.format_plan(plan)
+    assert "segment scale[multiplier=2] -> talkpipe.pipe.math.scale" in text
+    assert "out=3" in text
+    assert text.splitlines()[-1].startswith("run: wall=")
+
+
+def test_plan_json_is_stable_for_non_json_params():
+    class Opaque:
+        pass
+
+    def handler(item):
+        return item
+
+    plan = {"params": {"handler": handler, "value": Opaque(), "tags": {"b", "a"}, "score": np.float64(0.5)}}
+    data = json.loads(explain.plan_to_json(plan))
+
+    assert data["params"]["tags"] == ["a", "b"]
+    assert data["params"]["score"] == 0.5
+    assert " at 0x" not in data["params"]["handler"] and "handler" in data["params"]["handler"]
+    assert data["params"]["value"].endswith("Opaque object>")
+    assert explain.plan_to_json(plan) == explain.plan_to_json(plan)
@@ -95,3 +95,55 @@ def test_load_image_segment(png_file):
     assert len(items) == 1
     assert isinstance(items[0]["image"], ImageResult)
     assert items[0]["image"].data == MINIMAL_PNG
+
+
+def _png(width, height):
+    from io import BytesIO
+
+    from PIL import Image
+
+    buffer = BytesIO()
+    Image.new("RGB", (width, height), "red").save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def test_normalize_image_downscales_and_caches_by_content():
+    pytest.importorskip("PIL")
+    from talkpipe.data.image import normalize_image
+
+    image = load_image_from_bytes(_png(400, 100))
+    small = normalize_image(image, max_dimension=200, max_short_side=40)
+    assert (small.width, small.height) == (160, 40)
+
+    again = normalize_image(ImageResult(**{**image.model_dump(), "source": "other"}), max_dimension=200,
+                            max_short_side=40)
+    assert again.data is small.data
+    assert again.source == "other"
+
+
+def test_normalize_image_cache_is_bounded_by_bytes(monkeypatch):
+    pytest.importorskip("PIL")
+    from talkpipe.data import image as image_module
+
+    monkeypatch.setattr(image_module, "_normalized_cache", type(image_module._normalized_cache)())
+    monkeypatch.setattr(image_module, "_normalized_cache_bytes", 0)
+    images = [load_image_from_bytes(_png(30 + i, 30)) for i in range(4)]
+    monkeypatch.setattr(image_module, "NORMALIZED_IMAGE_CACHE_MAX_BYTES", 2 * max(len(i.data) for i in images))
+
+    for image in images:
+        image_module.normalize_image(image, max_dimension=100)
+
+    assert len(image_module._normalized_cache) == 2
+    assert image_module._normalized_cache_bytes == sum(len(i.data) for i in images[2:])
+    assert image_module._normalized_cache_bytes <= image_module.NORMALIZED_IMAGE_CACHE_MAX_BYTES
+
+
+def test_normalize_image_keeps_bytes_that_already_fit():
+    pytest.importorskip("PIL")
+    from talkpipe.data.image import normalize_image
+
+    data = _png(20, 10)
+    result = normalize_image(load_image_from_bytes(data), max_dimension=100)
+    assert result.data == data
+    assert (result.width, result.height) == (20, 10)
+    assert normalize_image(load_image_from_bytes(data), format="JPEG").mime_type == "image/jpeg"
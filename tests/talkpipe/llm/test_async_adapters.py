@@ -0,0 +1,186 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+from pydantic import BaseModel
+
+from talkpipe.llm.embedding_adapters import AbstractEmbeddingAdapter, OllamaEmbedderAdapter
+from talkpipe.llm.prompt_adapter_base import AbstractLLMPromptAdapter
+from talkpipe.llm.prompt_adapters import (
+    AnthropicPromptAdapter,
+    ElizaPromptAdapter,
+    OllamaPromptAdapter,
+    OpenAIPromptAdapter,
+)
+
+
+def _async_ollama(monkeypatch, delay=0.0):
+    requests = []
+
+    class DummyOllamaModule:
+        pass
+
+    async def fake_achat_completion(self, model, messages=None, **_kwargs):
+        requests.append(list(messages))
+        await asyncio.sleep(delay)
+        reply = f"echo {messages[-1]['content']}"
+        return SimpleNamespace(message=SimpleNamespace(content=reply))
+
+    monkeypatch.setattr(OllamaPromptAdapter, "_require_dependency", lambda *_args, **_kwargs: DummyOllamaModule)
+    monkeypatch.setattr(OllamaPromptAdapter, "_achat_completion", fake_achat_completion)
+    return requests
+
+
+def test_single_turn_achat_runs_concurrently_without_shared_state(monkeypatch):
+    requests = _async_ollama(monkeypatch, delay=0.05)
+    adapter = OllamaPromptAdapter("llama3.2", multi_turn=False)
+    prompts = [f"p{i}" for i in range(200)]
+
+    async def run():
+        return await asyncio.gather(*(adapter.achat(p) for p in prompts))
+
+    start = time.perf_counter()
+    results = asyncio.run(run())
+    elapsed = time.perf_counter() - start
+
+    assert results == [f"echo {p}" for p in prompts]
+    # 200 sequential calls would take 10 s; concurrently they overlap.
+    assert elapsed < 2.0
+    assert all(len(messages) == 2 for messages in requests)
+    assert adapter._messages == []
+
+
+def test_multi_turn_achat_records_history_one_turn_at_a_time(monkeypatch):
+    requests = _async_ollama(monkeypatch, delay=0.01)
+    adapter = OllamaPromptAdapter("llama3.2", multi_turn=True)
+
+    async def run():
+        return await asyncio.gather(adapter.achat("one"), adapter.achat("two"))
+
+    assert asyncio.run(run()) == ["echo one", "echo two"]
+    assert [m["content"] for m in adapter._messages] == ["one", "echo one", "two", "echo two"]
+    assert len(requests[1]) == 4
+
+    # The sync API keeps working on the same conversation.
+    monkeypatch.setattr(
+        OllamaPromptAdapter, "_chat_completion",
+        lambda self, model, messages=None, **_kwargs: SimpleNamespace(message=SimpleNamespace(content="sync")),
+    )
+    assert adapter.execute("three") == "sync"
+    assert len(adapter._messages) == 6
+
+
+def test_achat_uses_response_cache_and_output_format(monkeypatch, tmp_path):
+    class Answer(BaseModel):
+        ans: int
+
+    calls = []
+
+    async def fake_achat_completion(self, model, messages=None, **_kwargs):
+        calls.append(messages)
+        return SimpleNamespace(message=SimpleNamespace(content='{"ans": 4}'))
+
+    monkeypatch.setattr(OllamaPromptAdapter, "_require_dependency", lambda *_args, **_kwargs: object)
+    monkeypatch.setattr(OllamaPromptAdapter, "_achat_completion", fake_achat_completion)
+    adapter = OllamaPromptAdapter("llama3.2", multi_turn=False, temperature=0, output_format=Answer)
+    adapter.set_response_cache("deterministic", path=str(tmp_path / "cache.sqlite"))
+
+    async def run():
+        first = await adapter.achat("2+2?")
+        second = await adapter.achat("2+2?")
+        return first, second
+
+    assert asyncio.run(run()) == (Answer(ans=4), Answer(ans=4))
+    assert len(calls) == 1
+
+
+def test_openai_achat_uses_async_request(monkeypatch):
+    class DummyOpenAI:
+        NOT_GIVEN = object()
+
+        class OpenAI:
+            def __new__(cls):
+                return SimpleNamespace()
+
+    monkeypatch.setattr(OpenAIPromptAdapter, "_require_dependency", lambda *_args, **_kwargs: DummyOpenAI)
+    adapter = OpenAIPromptAdapter("gpt-4.1-nano", multi_turn=True)
+    seen = []
+
+    async def fake_request(parse, **params):
+        seen.append((parse, params))
+        return SimpleNamespace(output_text="hi there", output_parsed=None)
+
+    monkeypatch.setattr(adapter, "_aresponses_request", fake_request)
+
+    assert asyncio.run(adapter.achat("hello")) == "hi there"
+    assert seen[0][0] is True
+    assert seen[0][1]["input"][-1] == {"role": "user", "content": "hello"}
+    assert adapter._messages[-1] == {"role": "assistant", "content": "hi there"}
+
+
+def test_anthropic_achat_uses_async_request(monkeypatch):
+    class DummyAnthropic:
+        class Anthropic:
+            def __new__(cls):
+                return SimpleNamespace()
+
+    monkeypatch.setattr(AnthropicPromptAdapter, "_require_dependency", lambda *_args, **_kwargs: DummyAnthropic)
+    adapter = AnthropicPromptAdapter("claude-3-5-haiku-latest", multi_turn=False)
+    seen = []
+
+    async def fake_create(**params):
+        seen.append(params)
+        return SimpleNamespace(content=[SimpleNamespace(text="Bonjour")])
+
+    monkeypatch.setattr(adapter, "_amessages_create", fake_create)
+
+    assert asyncio.run(adapter.achat("hello")) == "Bonjour"
+    assert seen[0]["messages"] == [{"role": "user", "content": "hello"}]
+    assert seen[0]["system"] == "You are a helpful assistant."
+
+
+def test_eliza_achat():
+    adapter = ElizaPromptAdapter("eliza", multi_turn=True)
+
+    assert asyncio.run(adapter.achat("I am sad"))
+    assert adapter._messages[0] == {"role": "user", "content": "I am sad"}
+
+
+def test_default_achat_runs_sync_execute_in_thread():
+    class SyncOnly(AbstractLLMPromptAdapter):
+        def execute(self, prompt):
+            return prompt.upper()
+
+        def is_available(self):
+            return True
+
+    adapter = SyncOnly("m", "sync")
+
+    async def run():
+        return await asyncio.gather(adapter.achat("a"), adapter.achat("b"))
+
+    assert asyncio.run(run()) == ["A", "B"]
+
+
+def test_default_aembed_uses_execute_batch():
+    class Embedder(AbstractEmbeddingAdapter):
+        def execute_one(self, text):
+            return [float(len(text))]
+
+    embedder = Embedder("m", "test")
+
+    assert asyncio.run(embedder.aembed("abc")) == [3.0]
+    assert asyncio.run(embedder.aembed(["a", "bb"])) == [[1.0], [2.0]]
+    assert asyncio.run(embedder.aembed([])) == []
+
+
+def test_ollama_aembed_uses_async_client(monkeypatch):
+    class FakeAsyncClient:
+        async def embed(self, model, input):
+            return {"embeddings": [[float(len(t)), 0.0] for t in input]}
+
+    monkeypatch.setattr(OllamaEmbedderAdapter, "_async_client", lambda self: FakeAsyncClient())
+    embedder = OllamaEmbedderAdapter("embed")
+
+    assert asyncio.run(embedder.aembed(["a", "bbb"])) == [[1.0, 0.0], [3.0, 0.0]]
+    assert asyncio.run(embedder.aembed("xy")) == [2.0, 0.0]
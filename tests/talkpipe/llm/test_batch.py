@@ -0,0 +1,257 @@
+import json
+import os
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from talkpipe.llm.batch import (
+    BATCH_FAILED,
+    BATCH_PENDING,
+    LocalBatchBackend,
+    OpenAIBatchBackend,
+    run_batch,
+)
+from talkpipe.llm.chat import LLMPrompt, LlmScore
+from talkpipe.llm.embedding import LLMEmbed
+from talkpipe.llm.embedding_adapters import OllamaEmbedderAdapter
+from talkpipe.llm.prompt_adapters import OllamaPromptAdapter
+
+
+@pytest.fixture
+def batch_root(monkeypatch, tmp_path):
+    monkeypatch.setattr("talkpipe.llm.batch.get_config", lambda: {"llm_batch_dir": str(tmp_path)})
+    return tmp_path
+
+
+def _upper(request):
+    return {"response": request["prompt"].upper()}
+
+
+def _requests(*prompts):
+    return [{"custom_id": str(i), "kind": "chat", "prompt": p} for i, p in enumerate(prompts)]
+
+
+def test_local_backend_returns_results_in_request_order(batch_root):
+    results = run_batch(_requests("a", "b", "c"), LocalBatchBackend(_upper), sleep=lambda _s: None)
+
+    assert [r["response"] for r in results] == ["A", "B", "C"]
+    assert [r["custom_id"] for r in results] == ["0", "1", "2"]
+
+
+def test_processor_errors_become_error_results(batch_root):
+    def flaky(request):
+        if request["prompt"] == "bad":
+            raise ValueError("boom")
+        return _upper(request)
+
+    results = run_batch(_requests("ok", "bad"), LocalBatchBackend(flaky))
+
+    assert results[0] == {"custom_id": "0", "response": "OK"}
+    assert results[1]["error"] == "boom"
+
+
+def test_restart_resumes_polling_instead_of_resubmitting(batch_root):
+    submitted = []
+
+    class SlowBackend(LocalBatchBackend):
+        def __init__(self, processor=None, ready=False):
+            super().__init__(processor)
+            self.ready = ready
+
+        def submit(self, requests_path):
+            submitted.append(requests_path)
+            return super().submit(requests_path)
+
+        def poll(self, batch_id):
+            return super().poll(batch_id) if self.ready else BATCH_PENDING
+
+    class Crash(Exception):
+        pass
+
+    def crash(_seconds):
+        raise Crash()
+
+    with pytest.raises(Crash):
+        run_batch(_requests("a", "b"), SlowBackend(_upper), sleep=crash)
+
+    results = run_batch(_requests("a", "b"), SlowBackend(_upper, ready=True))
+
+    assert [r["response"] for r in results] == ["A", "B"]
+    assert len(submitted) == 1
+
+    # Different requests are a different job.
+    run_batch(_requests("c"), SlowBackend(_upper, ready=True))
+    assert len(submitted) == 2
+
+    # A finished job is cleaned up, so the same requests are submitted again.
+    run_batch(_requests("a", "b"), SlowBackend(_upper, ready=True))
+    assert len(submitted) == 3
+
+
+def test_failed_batch_is_forgotten(batch_root):
+    class FailingBackend(LocalBatchBackend):
+        def poll(self, batch_id):
+            return BATCH_FAILED
+
+    with pytest.raises(RuntimeError, match="failed"):
+        run_batch(_requests("a"), FailingBackend(_upper))
+
+    job_files = [name for _, _, names in os.walk(batch_root) for name in names if name == "job.json"]
+    assert job_files == []
+
+
+def test_openai_backend_translates_lines(tmp_path):
+    created = {}
+
+    class FakeClient:
+        class files:
+            @staticmethod
+            def create(file, purpose):
+                created["file"] = file[1].decode("utf-8")
+                created["purpose"] = purpose
+                return SimpleNamespace(id="file-in")
+
+            @staticmethod
+            def content(file_id):
+                assert file_id == "file-out"
+                lines = [
+                    {"custom_id": "1", "response": {"status_code": 200, "body": {
+                        "choices": [{"message": {"content": "second"}}]}}},
+                    {"custom_id": "0", "response": {"status_code": 200, "body": {
+                        "choices": [{"message": {"content": "first"}}]}}},
+                ]
+                return SimpleNamespace(text="\n".join(json.dumps(line) for line in lines))
+
+        class batches:
+            @staticmethod
+            def create(input_file_id, endpoint, completion_window):
+                created["endpoint"] = endpoint
+                return SimpleNamespace(id="batch-1")
+
+            @staticmethod
+            def retrieve(batch_id):
+                return SimpleNamespace(status="completed", output_file_id="file-out", error_file_id=None)
+
+    requests = [
+        {"custom_id": "0", "kind": "chat", "model": "gpt", "messages": [{"role": "user", "content": "x"}],
+         "temperature": 0, "output_schema": {"type": "object"}},
+        {"custom_id": "1", "kind": "chat", "model": "gpt", "messages": [{"role": "user", "content": "y"}],
+         "temperature": None, "output_schema": None},
+    ]
+
+    backend = OpenAIBatchBackend(client=FakeClient())
+    requests_path = tmp_path / "requests.jsonl"
+    requests_path.write_text("".join(json.dumps(r) + "\n" for r in requests))
+
+    assert backend.submit(str(requests_path)) == "batch-1"
+    assert created["purpose"] == "batch"
+    assert created["endpoint"] == "/v1/chat/completions"
+    assert len(created["file"].splitlines()) == 2
+
+    line = OpenAIBatchBackend.to_openai_line(requests[0])
+    assert line["url"] == "/v1/chat/completions"
+    assert line["body"]["temperature"] == 0
+    assert line["body"]["response_format"]["json_schema"]["schema"] == {"type": "object"}
+    assert "temperature" not in OpenAIBatchBackend.to_openai_line(requests[1])["body"]
+
+    embed = OpenAIBatchBackend.to_openai_line({"custom_id": "0", "kind": "embed", "model": "e", "input": "t"})
+    assert embed["url"] == "/v1/embeddings"
+
+    assert backend.poll("batch-1") == "completed"
+    assert {r["custom_id"]: r["response"] for r in backend.results("batch-1")} == {"0": "first", "1": "second"}
+    assert OpenAIBatchBackend.from_openai_line(
+        {"custom_id": "2", "response": {"status_code": 400, "body": {"error": {"message": "bad"}}}}
+    )["error"]
+
+
+def _ollama_echo(monkeypatch, reply=None):
+    calls = []
+
+    def fake_chat_completion(self, model, messages=None, **_kwargs):
+        calls.append(messages)
+        content = reply if reply is not None else f"re: {messages[-1]['content']}"
+        return SimpleNamespace(message=SimpleNamespace(content=content))
+
+    monkeypatch.setattr(OllamaPromptAdapter, "_require_dependency", lambda *_args, **_kwargs: object)
+    monkeypatch.setattr(OllamaPromptAdapter, "_chat_completion", fake_chat_completion)
+    return calls
+
+
+def test_llmprompt_batch_mode_local(monkeypatch, batch_root):
+    calls = _ollama_echo(monkeypatch)
+    segment = LLMPrompt(model="llama3.2", source="ollama", multi_turn=False, batch_mode="local",
+                        field="q", set_as="a")
+
+    items = [{"q": "one"}, {"q": "two"}]
+    assert list(segment(items)) == [{"q": "one", "a": "re: one"}, {"q": "two", "a": "re: two"}]
+    assert len(calls) == 2
+
+    # A completed job is not reused; running the same prompts again asks the model again.
+    again = LLMPrompt(model="llama3.2", source="ollama", multi_turn=False, batch_mode="local")
+    assert list(again(["one", "two"])) == ["re: one", "re: two"]
+    assert len(calls) == 4
+    assert [name for _, _, names in os.walk(batch_root) for name in names] == []
+
+
+def test_guided_generation_batch_mode(monkeypatch, batch_root):
+    _ollama_echo(monkeypatch, reply='{"explanation": "dogs", "score": 7}')
+    segment = LlmScore(system_prompt="Score it", model="llama3.2", source="ollama", batch_mode="local")
+
+    assert list(segment(["text"])) == [LlmScore.Score(explanation="dogs", score=7)]
+
+
+def test_batch_mode_validation(monkeypatch):
+    _ollama_echo(monkeypatch)
+    with pytest.raises(ValueError, match="Unknown batch backend"):
+        LLMPrompt(model="llama3.2", source="ollama", multi_turn=False, batch_mode="carrier-pigeon")
+    with pytest.raises(ValueError, match="multi_turn=False"):
+        LLMPrompt(model="llama3.2", source="ollama", multi_turn=True, batch_mode="local")
+    with pytest.raises(ValueError, match="Unknown batch backend"):
+        LLMEmbed(model="e", source="ollama", batch_mode="carrier-pigeon")
+    with pytest.raises(ValueError, match="only runs openai models, not source 'ollama'"):
+        LLMPrompt(model="llama3.2", source="ollama", multi_turn=False, batch_mode="openai")
+    with pytest.raises(ValueError, match="only runs openai models"):
+        LLMEmbed(model="e", source="ollama", batch_mode="openai")
+
+
+def test_llmprompt_batch_mode_skips_failed_requests_unless_fail_on_error(monkeypatch, batch_root):
+    def flaky_chat_completion(self, model, messages=None, **_kwargs):
+        if messages[-1]["content"] == "bad":
+            raise RuntimeError("model refused")
+        return SimpleNamespace(message=SimpleNamespace(content=f"re: {messages[-1]['content']}"))
+
+    monkeypatch.setattr(OllamaPromptAdapter, "_require_dependency", lambda *_args, **_kwargs: object)
+    monkeypatch.setattr(OllamaPromptAdapter, "_chat_completion", flaky_chat_completion)
+
+    lenient = LLMPrompt(model="llama3.2", source="ollama", multi_turn=False, batch_mode="local", fail_on_error=False)
+    assert list(lenient(["one", "bad", "three"])) == ["re: one", "re: three"]
+
+    strict = LLMPrompt(model="llama3.2", source="ollama", multi_turn=False, batch_mode="local")
+    with pytest.raises(RuntimeError, match="model refused"):
+        list(strict(["one", "bad", "three"]))
+
+
+def test_llmembed_batch_mode_keeps_order(monkeypatch, batch_root):
+    monkeypatch.setattr(OllamaEmbedderAdapter, "execute_one", lambda self, text: [float(len(text))])
+    segment = LLMEmbed(model="e", source="ollama", batch_mode="local", field="t", set_as="v")
+
+    assert list(segment([{"t": "a"}, {"t": "bbb"}])) == [{"t": "a", "v": [1.0]}, {"t": "bbb", "v": [3.0]}]
+
+
+def test_llmembed_batch_mode_numpy_vector_format(monkeypatch, batch_root):
+    monkeypatch.setattr(
+        OllamaEmbedderAdapter, "execute_one", lambda self, text: np.array([len(text), 0.5], dtype=np.float32)
+    )
+    segment = LLMEmbed(model="e", source="ollama", batch_mode="local", vector_format="numpy")
+
+    vectors = list(segment(["a", "bbb"]))
+
+    assert all(isinstance(v, np.ndarray) and v.dtype == np.float32 for v in vectors)
+    assert [v.tolist() for v in vectors] == [[1.0, 0.5], [3.0, 0.5]]
+
+
+def test_local_backend_unserializable_result_becomes_error(batch_root):
+    results = run_batch(_requests("a"), LocalBatchBackend(lambda request: {"response": object()}))
+
+    assert results[0]["custom_id"] == "0" and "not JSON serializable" in results[0]["error"]
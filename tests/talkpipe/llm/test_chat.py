@@ -9,7 +9,7 @@ from talkpipe.llm.prompt_adapters import (
 from testutils import monkeypatched_env, patch_get_config
 from talkpipe.util import config
 
-from talkpipe.llm.chat import LLMPrompt, LlmScore, LlmExtractTerms, LlmBinaryAnswer
+from talkpipe.llm.chat import LLMPrompt, LlmScore, LlmExtractTerms, LlmBinaryAnswer, LlmCascade
 from talkpipe.chatterlang import compiler
 
 def test_context_management_defaults_are_backward_compatible():
@@ -123,6 +123,73 @@ def test_guided_generation_passes_context_params(monkeypatch):
     assert captured["unsummarized_message_count"] == 5
     assert captured["memory_size"] == 128
 
+class _SlowEchoAdapter:
+    """Single-turn fake adapter that records how many calls overlap."""
+    instances = []
+    lock = None
+    active = 0
+    peak = 0
+
+    def __init__(self, **kwargs):
+        self.busy = False
+        _SlowEchoAdapter.instances.append(self)
+
+    def execute(self, prompt):
+        import time
+        cls = _SlowEchoAdapter
+        assert not self.busy, "adapter instance shared between concurrent calls"
+        self.busy = True
+        with cls.lock:
+            cls.active += 1
+            cls.peak = max(cls.peak, cls.active)
+        # Later prompts finish first so any reordering would show up.
+        time.sleep(0.05 - 0.004 * int(prompt))
+        with cls.lock:
+            cls.active -= 1
+        self.busy = False
+        return f"answer {prompt}"
+
+
+@pytest.fixture
+def slow_echo_adapter(monkeypatch):
+    import threading
+    _SlowEchoAdapter.instances = []
+    _SlowEchoAdapter.lock = threading.Lock()
+    _SlowEchoAdapter.active = 0
+    _SlowEchoAdapter.peak = 0
+    monkeypatch.setattr("talkpipe.llm.chat.getPromptSources", lambda: ["slow"])
+    monkeypatch.setattr("talkpipe.llm.chat.getPromptAdapter", lambda _source: _SlowEchoAdapter)
+    return _SlowEchoAdapter
+
+def test_llmprompt_max_concurrency_preserves_order(slow_echo_adapter):
+    segment = LLMPrompt(model="m", source="slow", multi_turn=False, max_concurrency=4)
+    results = list(segment(range(10)))
+
+    assert results == [f"answer {i}" for i in range(10)]
+    assert slow_echo_adapter.peak == 4
+    assert len(slow_echo_adapter.instances) == 4
+
+def test_llmprompt_max_concurrency_pass_prompts_and_set_as(slow_echo_adapter):
+    segment = LLMPrompt(model="m", source="slow", multi_turn=False, max_concurrency=3,
+                        field="q", set_as="a", pass_prompts=True)
+    items = [{"q": i} for i in range(5)]
+    results = list(segment(items))
+
+    expected = []
+    for i in range(5):
+        expected.extend([i, {"q": i, "a": f"answer {i}"}])
+    assert results == expected
+
+def test_guided_generation_inherits_max_concurrency(slow_echo_adapter):
+    segment = LlmScore(system_prompt="score it", model="m", source="slow", max_concurrency=2)
+    assert segment.max_concurrency == 2
+
+def test_llmprompt_max_concurrency_validation(slow_echo_adapter):
+    with pytest.raises(ValueError, match="multi_turn"):
+        LLMPrompt(model="m", source="slow", multi_turn=True, max_concurrency=2)
+    with pytest.raises(ValueError, match="at least 1"):
+        LLMPrompt(model="m", source="slow", multi_turn=False, max_concurrency=0)
+
 def test_llmprompt_supports_old_adapter_defaults(monkeypatch, caplog):
     captured = {}
 
@@ -412,3 +479,147 @@ def test_llmbinaryanswer(requires_ollama):
     assert isinstance(response, dict)
     assert response["sentiment"].answer is True
     assert response["sentiment"].explanation is not None
+
+
+class _PackingAdapter:
+    """Scores text by length; packed prompts get one entry per input unless the text says 'skip'."""
+
+    calls = []
+
+    def __init__(self, output_format=None, system_prompt=None, **kwargs):
+        self.output_format = output_format
+        self.system_prompt = system_prompt
+
+    def execute(self, prompt):
+        _PackingAdapter.calls.append(prompt)
+        if not self.output_format.__name__.startswith("Packed"):
+            return LlmScore.Score(explanation="single", score=len(prompt))
+        if "garble" in prompt:
+            return self.output_format.model_validate_json("not json")
+        inputs = [block.split("\n", 1) for block in prompt.split("\n\n")]
+        results = [
+            {"index": int(header.split()[1].rstrip(":")), "explanation": "packed", "score": len(text)}
+            for header, text in reversed(inputs)
+            if "skip" not in text
+        ]
+        return self.output_format.model_validate({"results": results})
+
+
+@pytest.fixture
+def packing_adapter(monkeypatch):
+    _PackingAdapter.calls = []
+    monkeypatch.setattr("talkpipe.llm.chat.getPromptSources", lambda: ["packing"])
+    monkeypatch.setattr("talkpipe.llm.chat.getPromptAdapter", lambda _source: _PackingAdapter)
+    return _PackingAdapter
+
+
+def test_guided_generation_packs_items_per_call(packing_adapter):
+    segment = LlmScore(system_prompt="score it", model="m", source="packing", items_per_call=3,
+                       field="text", set_as="score")
+    items = [{"text": "a" * n} for n in range(1, 8)]
+
+    results = list(segment(items))
+
+    assert [item["score"].score for item in results] == list(range(1, 8))
+    assert all(isinstance(item["score"], LlmScore.Score) for item in results)
+    assert len(packing_adapter.calls) == 3
+    assert segment.packed_chat.system_prompt.startswith("score it")
+    assert "numbered inputs" in segment.packed_chat.system_prompt
+
+
+def test_guided_generation_retries_unpacked_items_singly(packing_adapter):
+    segment = LlmScore(system_prompt="score it", model="m", source="packing", items_per_call=2)
+
+    results = list(segment(["one", "skip me", "three", "garble", "five"]))
+
+    # "skip me" is missing from its pack and "garble" breaks its whole pack.
+    assert [r.explanation for r in results] == ["packed", "single", "single", "single", "packed"]
+    assert [r.score for r in results] == [3, 7, 5, 6, 4]
+    assert len(packing_adapter.calls) == 6
+
+
+def test_guided_generation_packs_concurrently_in_order(packing_adapter):
+    segment = LlmScore(system_prompt="score it", model="m", source="packing", items_per_call=2,
+                       max_concurrency=3)
+
+    results = list(segment(["a" * n for n in range(1, 10)]))
+
+    assert [r.score for r in results] == list(range(1, 10))
+    assert len(packing_adapter.calls) == 5
+
+
+def test_items_per_call_validation(packing_adapter):
+    with pytest.raises(ValueError, match="at least 1"):
+        LlmScore(system_prompt="s", model="m", source="packing", items_per_call=0)
+    with pytest.raises(ValueError, match="multi_turn=False"):
+        LlmScore(system_prompt="s", model="m", source="packing", multi_turn=True, items_per_call=2)
+
+
+class _CascadeAdapter:
+    """The "small" model scores by length, garbles prompts saying 'garble' and is unsure of 'hard' ones."""
+
+    calls = []
+
+    def __init__(self, model=None, output_format=None, system_prompt=None, **kwargs):
+        self.model = model
+        self.output_format = output_format
+
+    def execute(self, prompt):
+        _CascadeAdapter.calls.append((self.model, prompt))
+        if self.model == "small" and "garble" in prompt:
+            return self.output_format.model_validate_json("not json")
+        fields = {"explanation": self.model, "score": len(prompt)}
+        if "confidence" in self.output_format.model_fields:
+            fields["confidence"] = 0.3 if self.model == "small" and "hard" in prompt else 0.9
+        return self.output_format.model_validate(fields)
+
+
+@pytest.fixture
+def cascade_adapter(monkeypatch):
+    _CascadeAdapter.calls = []
+    monkeypatch.setattr("talkpipe.llm.chat.getPromptSources", lambda: ["fake"])
+    monkeypatch.setattr("talkpipe.llm.chat.getPromptAdapter", lambda _source: _CascadeAdapter)
+    return _CascadeAdapter
+
+
+def test_cascade_escalates_unparseable_and_low_confidence_answers(cascade_adapter):
+    segment = LlmCascade(system_prompt="score it", models="fake:small,fake:large", min_confidence=0.5,
+                         field="text", set_as="score")
+
+    items = list(segment([{"text": "easy"}, {"text": "hard one"}, {"text": "garble"}, {"text": "fine"}]))
+
+    assert [item["score"].explanation for item in items] == ["small", "large", "large", "small"]
+    assert all(isinstance(item["score"], LlmScore.Score) for item in items)
+    small, large = segment.tier_stats()
+    assert (small["calls"], small["resolved"], small["escalated"]) == (4, 2, 2)
+    assert (small["low_confidence"], small["parse_failure"]) == (1, 1)
+    assert (large["model"], large["calls"], large["resolved"]) == ("large", 2, 2)
+    assert small["mean_seconds"] >= 0
+
+
+def test_cascade_escalates_scores_near_the_threshold(cascade_adapter):
+    segment = LlmCascade(system_prompt="score it", models="fake:small, fake:medium, fake:large",
+                         score_threshold=5, score_margin=1, max_concurrency=3)
+
+    results = list(segment(["a" * n for n in range(1, 9)]))
+
+    assert [r.score for r in results] == list(range(1, 9))
+    assert [r.explanation for r in results] == ["small"] * 3 + ["large"] * 3 + ["small"] * 2
+    assert [stats["calls"] for stats in segment.tier_stats()] == [8, 3, 3]
+
+
+def test_cascade_last_tier_parse_failure_raises(cascade_adapter):
+    segment = LlmCascade(system_prompt="score it", models="fake:small")
+    with pytest.raises(ValueError):
+        list(segment(["garble"]))
+
+
+def test_cascade_validation(cascade_adapter):
+    with pytest.raises(ValueError, match="source:model"):
+        LlmCascade(system_prompt="s", models="small")
+    with pytest.raises(ValueError, match="answer_type='score'"):
+        LlmCascade(system_prompt="s", models="fake:small", answer_type="binary", score_threshold=0.5)
+    with pytest.raises(ValueError, match="min_confidence"):
+        LlmCascade(system_prompt="s", models="fake:small", min_confidence=2)
+    binary = LlmCascade(system_prompt="s", models="fake:small", answer_type="binary")
+    assert binary.tiers[0]._output_format is LlmBinaryAnswer.Answer
@@ -0,0 +1,144 @@
+import sys
+
+import pytest
+
+from talkpipe.llm import client_pool
+from talkpipe.llm.client_pool import anthropic_client, clear_client_pool, ollama_client, openai_client
+
+
+@pytest.fixture(autouse=True)
+def empty_pool():
+    clear_client_pool()
+    yield
+    clear_client_pool()
+
+
+def _fake_ollama():
+    created = []
+
+    class Client:
+        def __init__(self, host=None, **kwargs):
+            self.host = host
+            self.kwargs = kwargs
+            created.append(self)
+
+    class FakeOllama:
+        pass
+
+    FakeOllama.Client = Client
+    return FakeOllama, created
+
+
+def test_ollama_clients_are_shared_per_host(monkeypatch):
+    monkeypatch.delenv("OLLAMA_HOST", raising=False)
+    ollama, created = _fake_ollama()
+
+    first = ollama_client(ollama, "http://a:11434")
+    assert ollama_client(ollama, "http://a:11434") is first
+    assert ollama_client(ollama, "http://b:11434") is not first
+    assert len(created) == 2
+    assert first.host == "http://a:11434"
+    assert first.kwargs["limits"].max_keepalive_connections == 20
+
+
+def test_ollama_clients_split_on_credentials(monkeypatch):
+    ollama, created = _fake_ollama()
+    monkeypatch.setenv("OLLAMA_API_KEY", "one")
+    first = ollama_client(ollama, "http://a:11434")
+    monkeypatch.setenv("OLLAMA_API_KEY", "two")
+
+    assert ollama_client(ollama, "http://a:11434") is not first
+    assert all("one" not in str(key) for key in client_pool._clients)
+
+
+def test_pool_limits_come_from_config(monkeypatch):
+    monkeypatch.setattr(
+        "talkpipe.llm.client_pool.get_config",
+        lambda: {"llm_http_max_connections": "8", "llm_http_max_keepalive_connections": "4",
+                 "llm_http_keepalive_expiry": "5"},
+    )
+    ollama, _ = _fake_ollama()
+
+    limits = ollama_client(ollama, "http://a:11434").kwargs["limits"]
+    assert limits.max_connections == 8
+    assert limits.max_keepalive_connections == 4
+    assert limits.keepalive_expiry == 5.0
+
+
+def test_sdk_clients_get_pooled_http_client(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "ak-test")
+
+    class FakeHttpClient:
+        def __init__(self, limits):
+            self.limits = limits
+
+    class FakeSDK:
+        DefaultHttpxClient = FakeHttpClient
+
+        class OpenAI:
+            def __init__(self, http_client=None):
+                self.http_client = http_client
+
+        class Anthropic(OpenAI):
+            pass
+
+    openai = openai_client(FakeSDK)
+    assert openai_client(FakeSDK) is openai
+    assert isinstance(openai.http_client, FakeHttpClient)
+    assert anthropic_client(FakeSDK) is not openai
+
+
+def test_prompt_and_embedding_adapters_share_ollama_client(monkeypatch):
+    from talkpipe.llm.embedding_adapters import OllamaEmbedderAdapter
+    from talkpipe.llm.prompt_adapters import OllamaPromptAdapter
+
+    ollama, created = _fake_ollama()
+
+    def chat(self, *_args, **_kwargs):
+        class DummyMessage:
+            content = "ok"
+
+        class DummyResponse:
+            message = DummyMessage()
+
+        return DummyResponse()
+
+    ollama.Client.chat = chat
+    monkeypatch.setattr(OllamaPromptAdapter, "_require_dependency", lambda *_args, **_kwargs: ollama)
+    monkeypatch.setitem(sys.modules, "ollama", ollama)
+
+    adapter = OllamaPromptAdapter("llama3.2", server_url="http://shared:11434")
+    adapter.execute("hi")
+    adapter.execute("again")
+    embedder = OllamaEmbedderAdapter("embed", server_url="http://shared:11434")
+
+    assert embedder._client() is created[0]
+    assert len(created) == 1
+
+
+def test_async_clients_are_shared_per_event_loop(monkeypatch):
+    import asyncio
+
+    from talkpipe.llm.client_pool import ollama_async_client
+
+    created = []
+
+    class AsyncClient:
+        def __init__(self, host=None, **kwargs):
+            self.kwargs = kwargs
+            created.append(self)
+
+    class FakeOllama:
+        pass
+
+    FakeOllama.AsyncClient = AsyncClient
+
+    async def two_lookups():
+        return ollama_async_client(FakeOllama, "http://a:11434"), ollama_async_client(FakeOllama, "http://a:11434")
+
+    first, again = asyncio.run(two_lookups())
+    assert first is again
+    assert "limits" in first.kwargs
+    other_loop, _ = asyncio.run(two_lookups())
+    assert other_loop is not first
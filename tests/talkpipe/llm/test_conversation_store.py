@@ -0,0 +1,117 @@
+from types import SimpleNamespace
+
+import pytest
+
+from talkpipe.llm.chat import LLMPrompt
+from talkpipe.llm.conversation_store import ConversationStore
+from talkpipe.llm.prompt_adapters import OllamaPromptAdapter
+
+
+def _state(*texts):
+    return {"messages": [{"role": "user", "content": t} for t in texts], "summary": None}
+
+
+def test_store_evicts_least_recently_used_without_spill():
+    store = ConversationStore(max_conversations=2)
+    store.put("a", _state("1"))
+    store.put("b", _state("2"))
+    store.get("a")
+    store.put("c", _state("3"))
+
+    assert "a" in store and "c" in store
+    assert store.get("b") is None
+    assert len(store) == 2
+
+
+def test_store_spills_to_sqlite_and_reloads(tmp_path):
+    path = str(tmp_path / "conversations.sqlite")
+    store = ConversationStore(max_conversations=1, spill_path=path)
+    store.put("a", _state("hello"))
+    store.put("b", _state("other"))
+
+    assert "a" not in store
+    assert store.get("a") == _state("hello")
+    assert "b" not in store
+
+    store.flush()
+    reopened = ConversationStore(max_conversations=5, spill_path=path)
+    assert reopened.get("a") == _state("hello")
+    assert reopened.get("b") == _state("other")
+
+
+def test_store_rejects_non_positive_size():
+    with pytest.raises(ValueError):
+        ConversationStore(max_conversations=0)
+
+
+def _ollama_echo(monkeypatch):
+    sent = []
+
+    def fake_chat_completion(self, model, messages=None, **_kwargs):
+        sent.append([m["content"] for m in messages])
+        return SimpleNamespace(message=SimpleNamespace(content=f"re: {messages[-1]['content']}"))
+
+    monkeypatch.setattr(OllamaPromptAdapter, "_require_dependency", lambda *_args, **_kwargs: object)
+    monkeypatch.setattr(OllamaPromptAdapter, "_chat_completion", fake_chat_completion)
+    return sent
+
+
+def test_llmprompt_keeps_one_history_per_conversation(monkeypatch):
+    sent = _ollama_echo(monkeypatch)
+    segment = LLMPrompt(model="llama3.2", source="ollama", system_prompt=None,
+                        field="text", set_as="reply", conversation_field="session")
+
+    items = [
+        {"session": "alice", "text": "hi, I'm Alice"},
+        {"session": "bob", "text": "hi, I'm Bob"},
+        {"session": "alice", "text": "who am I?"},
+    ]
+    out = list(segment(items))
+
+    assert [item["reply"] for item in out] == ["re: hi, I'm Alice", "re: hi, I'm Bob", "re: who am I?"]
+    assert sent[1] == ["hi, I'm Bob"]
+    assert sent[2] == ["hi, I'm Alice", "re: hi, I'm Alice", "who am I?"]
+
+
+def test_llmprompt_compacts_each_conversation_separately(monkeypatch):
+    sent = _ollama_echo(monkeypatch)
+    segment = LLMPrompt(model="llama3.2", source="ollama", system_prompt=None, field="text",
+                        conversation_field="session", memory_mode="recent_only",
+                        unsummarized_message_count=1, context_token_trigger=30)
+
+    long_text = "x" * 80
+    list(segment([{"session": "a", "text": long_text}, {"session": "b", "text": "short"},
+                  {"session": "a", "text": "next"}, {"session": "b", "text": "again"}]))
+
+    # Conversation a was compacted down to its newest message; b still fits.
+    assert sent[2] == ["next"]
+    assert sent[3] == ["short", "re: short", "again"]
+
+
+def test_llmprompt_reloads_spilled_conversations(monkeypatch, tmp_path):
+    sent = _ollama_echo(monkeypatch)
+    path = str(tmp_path / "conversations.sqlite")
+    segment = LLMPrompt(model="llama3.2", source="ollama", system_prompt=None, field="text",
+                        conversation_field="session", max_conversations=1, conversation_spill_path=path)
+
+    list(segment([{"session": "a", "text": "one"}, {"session": "b", "text": "two"},
+                  {"session": "a", "text": "three"}]))
+    assert sent[2] == ["one", "re: one", "three"]
+
+    # A new segment on the same spill file continues the stored conversations.
+    restarted = LLMPrompt(model="llama3.2", source="ollama", system_prompt=None, field="text",
+                          conversation_field="session", conversation_spill_path=path)
+    list(restarted([{"session": "b", "text": "four"}]))
+    assert sent[3] == ["two", "re: two", "four"]
+
+
+def test_conversation_field_validation(monkeypatch):
+    _ollama_echo(monkeypatch)
+    with pytest.raises(ValueError, match="multi_turn=True"):
+        LLMPrompt(model="llama3.2", source="ollama", multi_turn=False, conversation_field="session")
+    with pytest.raises(ValueError, match="stream"):
+        LLMPrompt(model="llama3.2", source="ollama", stream=True, conversation_field="session")
+
+    segment = LLMPrompt(model="llama3.2", source="ollama", field="text", conversation_field="session")
+    with pytest.raises(AttributeError, match="session"):
+        list(segment([{"text": "no session"}]))
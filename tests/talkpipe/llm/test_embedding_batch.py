@@ -146,6 +146,31 @@ def test_ollama_execute_one_returns_list_not_ndarray(monkeypatch):
     assert result == pytest.approx([0.1, 0.2, 0.3])
 
 
+def test_ollama_numpy_vector_format_returns_float32_matrix(monkeypatch):
+    class DummyClient:
+        def embed(self, *, model, input):
+            return {"embeddings": [[0.1, 0.2, 0.3], [0.4, 0.5, 0.6]][: len(input)]}
+
+    model = OllamaEmbedderAdapter("test-model")
+    model.set_vector_format("numpy")
+    monkeypatch.setattr(model, "_client", lambda: DummyClient())
+
+    batch = model.execute_batch(["Hello", "World"])
+    assert isinstance(batch, np.ndarray)
+    assert batch.dtype == np.float32 and batch.shape == (2, 3)
+    assert batch.flags["C_CONTIGUOUS"]
+    assert batch[1] == pytest.approx([0.4, 0.5, 0.6])
+
+    one = model.execute_one("Hello")
+    assert isinstance(one, np.ndarray) and one.shape == (3,) and one.dtype == np.float32
+    assert model.execute_batch([]).shape == (0, 0)
+
+
+def test_set_vector_format_rejects_unknown_format():
+    with pytest.raises(ValueError, match="vector_format"):
+        OllamaEmbedderAdapter("test-model").set_vector_format("tensor")
+
+
 def test_model2vec_execute_batch_mocked(monkeypatch):
     embedding = np.array([0.1, 0.2, 0.3], dtype=np.float32)
 
@@ -185,6 +210,65 @@ def test_custom_adapter_default_execute_batch_loop():
     assert adapter.execute_batch(["ab", "cde"]) == [[2.0], [3.0]]
 
 
+def test_custom_adapter_numpy_vector_format_stacks_execute_one():
+    class SimpleAdapter(AbstractEmbeddingAdapter):
+        def __init__(self):
+            super().__init__("m", "custom")
+
+        def execute_one(self, text: str):
+            return [float(len(text)), 1.0]
+
+    adapter = SimpleAdapter()
+    adapter.set_vector_format("numpy")
+    batch = adapter.execute_batch(["ab", "cde"])
+    assert batch.dtype == np.float32
+    assert batch.tolist() == [[2.0, 1.0], [3.0, 1.0]]
+
+
+def test_model2vec_numpy_vector_format_keeps_encoder_array(monkeypatch):
+    matrix = np.array([[0.1, 0.2], [0.3, 0.4]], dtype=np.float32)
+
+    class DummyModel:
+        dim = 2
+        normalize = True
+
+        @classmethod
+        def from_pretrained(cls, *args, **kwargs):
+            return cls()
+
+        def encode(self, text, **kwargs):
+            return matrix
+
+    monkeypatch.setattr("talkpipe.llm.model2vec_embeddings._require_model2vec", lambda: DummyModel)
+    model = Model2VecEmbeddingAdapter("minishlab/potion-base-8M")
+    model.set_vector_format("numpy")
+    assert model.execute_batch(["first", "second"]) is matrix
+
+
+@pytest.mark.parametrize("batch_size", [1, 3])
+def test_llmembed_numpy_vector_format_emits_float32_arrays(monkeypatch, batch_size):
+    class CountingAdapter(AbstractEmbeddingAdapter):
+        def __init__(self, model):
+            super().__init__(model, "counting")
+
+        def execute_one(self, text: str):
+            return [float(len(text)), 0.5]
+
+    monkeypatch.setattr("talkpipe.llm.embedding.getEmbeddingSources", lambda: ["counting"])
+    monkeypatch.setattr("talkpipe.llm.embedding.getEmbeddingAdapter", lambda source: CountingAdapter)
+    segment = LLMEmbed(model="m", source="counting", batch_size=batch_size, field="text",
+                       set_as="vector", vector_format="numpy")
+    assert segment.embedder.vector_format == "numpy"
+
+    out = list(segment([{"text": "a"}, {"text": "bb"}, {"text": "ccc"}]))
+    vectors = [item["vector"] for item in out]
+    assert all(isinstance(v, np.ndarray) and v.dtype == np.float32 and v.shape == (2,) for v in vectors)
+    assert [v[0] for v in vectors] == [1.0, 2.0, 3.0]
+
+    with pytest.raises(ValueError, match="vector_format"):
+        LLMEmbed(model="m", source="counting", vector_format="tensor")
+
+
 def test_llmembed_batch_size_calls_execute_batch():
     batch_calls = []
 
@@ -437,3 +521,63 @@ def test_llmembed_dict_with_list_field_scalar_path():
     assert state["batch"] == []
 
 
+
+
+def test_llmembed_max_concurrency_overlaps_batches_in_order():
+    """Batches run concurrently but come out in input order, with bounded read-ahead."""
+    import threading
+    import time
+
+    lock = threading.Lock()
+    state = {"in_flight": 0, "peak": 0, "read": 0}
+
+    def execute_batch(texts):
+        with lock:
+            state["in_flight"] += 1
+            state["peak"] = max(state["peak"], state["in_flight"])
+        # Earlier batches finish last, so reordering would show up in the output.
+        time.sleep(0.05 if texts[0] == "t0" else 0.01)
+        with lock:
+            state["in_flight"] -= 1
+        return [[float(text[1:])] for text in texts]
+
+    def source():
+        for i in range(8):
+            state["read"] += 1
+            yield f"t{i}"
+
+    mock_embedder = Mock()
+    mock_embedder.execute_batch = Mock(side_effect=execute_batch)
+    embedder = LLMEmbed(model="test-model", source="ollama", batch_size=2, max_concurrency=3)
+    embedder.embedder = mock_embedder
+
+    out = embedder(source())
+    first = next(out)
+    assert first == [0.0]
+    assert state["read"] <= 3 * 2 + 1
+    assert list(out) == [[float(i)] for i in range(1, 8)]
+    assert state["peak"] > 1
+
+
+@pytest.mark.parametrize("options", [{"max_concurrency": 2}, {"max_batch_tokens": 1000}, {"adaptive_batch_size": True}])
+def test_llmembed_pipelined_paths_pass_metadata_through_in_order(options):
+    from talkpipe.pipe.metadata import Flush
+
+    mock_embedder = Mock()
+    mock_embedder.execute_batch = Mock(side_effect=lambda texts: [[float(len(text))] for text in texts])
+    mock_embedder.execute_one = Mock(side_effect=lambda text: [float(len(text))])
+    embedder = LLMEmbed(model="test-model", source="ollama", batch_size=4, **options)
+    embedder.embedder = mock_embedder
+    marker = Flush()
+
+    out = list(embedder.transform(iter(["a", "bb", marker, "ccc"])))
+
+    assert out == [[1.0], [2.0], marker, [3.0]]
+    assert mock_embedder.execute_batch.call_args_list[0].args[0] == ["a", "bb"]
+
+
+def test_llmembed_max_concurrency_validation():
+    with pytest.raises(ValueError, match="max_concurrency"):
+        LLMEmbed(model="test-model", source="ollama", max_concurrency=0)
+    with pytest.raises(ValueError, match="batch_mode"):
+        LLMEmbed(model="test-model", source="ollama", max_concurrency=2, batch_mode="local")
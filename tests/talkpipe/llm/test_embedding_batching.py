@@ -0,0 +1,162 @@
+import pytest
+
+from talkpipe.llm.embedding import LLMEmbed, estimate_tokens
+from talkpipe.llm.embedding_adapters import AbstractEmbeddingAdapter
+from talkpipe.llm.embedding_batching import AdaptiveBatchSizer
+from talkpipe.llm.embedding_errors import is_batch_too_large_error
+
+
+class PayloadTooLarge(RuntimeError):
+    status_code = 413
+
+
+def test_fits_by_items_and_tokens():
+    sizer = AdaptiveBatchSizer(max_items=3, max_tokens=100)
+    assert sizer.fits(0, 0, 500)
+    assert sizer.fits(1, 40, 60)
+    assert not sizer.fits(1, 40, 61)
+    assert not sizer.fits(3, 10, 1)
+
+
+def test_too_large_error_halves_learned_limits():
+    sizer = AdaptiveBatchSizer(max_items=64)
+    assert not sizer.record_failure(64, 8000, ConnectionError("connection refused"))
+    assert sizer.item_limit == 64
+
+    assert sizer.record_failure(64, 8000, PayloadTooLarge("request failed"))
+    assert (sizer.item_limit, sizer.token_limit) == (32, 4000)
+    assert sizer.record_failure(32, 9000, RuntimeError("too many inputs in batch"))
+    assert (sizer.item_limit, sizer.token_limit) == (16, 4000)
+    assert sizer.stats()["failures"] == 3
+
+
+def test_one_overlong_input_does_not_shrink_batches():
+    sizer = AdaptiveBatchSizer(max_items=64)
+    assert not sizer.record_failure(64, 8000, RuntimeError("input is too long for model"))
+    assert (sizer.item_limit, sizer.token_limit) == (64, None)
+
+
+def test_learned_limits_recover_after_sustained_successes():
+    sizer = AdaptiveBatchSizer(max_items=64, max_tokens=10000, recover_after=3)
+    assert sizer.record_failure(64, 8000, PayloadTooLarge("x"))
+    assert (sizer.item_limit, sizer.token_limit) == (32, 4000)
+
+    for _ in range(2):
+        sizer.record_success(32, 4000, 0.1)
+    assert (sizer.item_limit, sizer.token_limit) == (32, 4000)
+    sizer.record_success(32, 4000, 0.1)
+    assert (sizer.item_limit, sizer.token_limit) == (64, 8000)
+    assert sizer.stats()["learned_max_items"] is None
+
+    # A failure restarts the count.
+    assert sizer.record_failure(64, 8000, PayloadTooLarge("x"))
+    sizer.record_success(32, 4000, 0.1)
+    assert not sizer.record_failure(32, 4000, ConnectionError("reset"))
+    for _ in range(2):
+        sizer.record_success(32, 4000, 0.1)
+    assert (sizer.item_limit, sizer.token_limit) == (32, 4000)
+    for _ in range(2):
+        sizer.record_success(32, 4000, 0.1)
+    assert (sizer.item_limit, sizer.token_limit) == (64, 8000)
+    for _ in range(3):
+        sizer.record_success(64, 8000, 0.1)
+    assert (sizer.item_limit, sizer.token_limit) == (64, 10000)
+
+
+def test_adaptive_target_grows_while_throughput_improves_and_settles_on_best():
+    sizer = AdaptiveBatchSizer(max_items=64, adaptive=True, initial_items=4, probe_every=4)
+    # tokens/s by batch size: rises up to 16, then falls.
+    rate = {4: 100.0, 8: 200.0, 16: 300.0, 32: 150.0}
+
+    def run_batches(count):
+        for _ in range(count):
+            size = sizer.item_limit
+            sizer.record_success(size, size * 10, size * 10 / rate[size])
+
+    run_batches(2)
+    assert sizer.item_limit == 8
+    run_batches(4)
+    assert sizer.item_limit == 32
+    run_batches(2)
+    assert sizer.item_limit == 16
+
+    # After settling, it probes the larger size again.
+    seen = set()
+    for _ in range(6):
+        run_batches(2)
+        seen.add(sizer.item_limit)
+    assert seen == {16, 32}
+    stats = sizer.stats()
+    assert stats["tokens_per_second_by_target"][16] == pytest.approx(300.0)
+    assert set(stats["batch_sizes"]) == {4, 8, 16, 32}
+
+
+def test_is_batch_too_large_error():
+    assert is_batch_too_large_error(PayloadTooLarge("x"))
+    assert is_batch_too_large_error(RuntimeError("max 2048 inputs per request"))
+    assert is_batch_too_large_error(RuntimeError("Requested 400000 tokens, max 300000 tokens per request"))
+    # One input over the context length is not a too-large batch.
+    assert not is_batch_too_large_error(RuntimeError("maximum context length exceeded"))
+    assert not is_batch_too_large_error(RuntimeError("invalid api key"))
+
+
+class LimitedAdapter(AbstractEmbeddingAdapter):
+    """Rejects batches of more than ``limit`` texts, like a server with a request size cap."""
+
+    limit = 4
+    batches = []
+
+    def __init__(self, model):
+        super().__init__(model, "limited")
+
+    def execute_batch(self, texts):
+        LimitedAdapter.batches.append(list(texts))
+        if len(texts) > LimitedAdapter.limit:
+            raise PayloadTooLarge("413 Request Entity Too Large")
+        return [[float(len(text))] for text in texts]
+
+    def execute_one(self, text):
+        return self.execute_batch([text])[0]
+
+
+@pytest.fixture
+def limited_adapter(monkeypatch):
+    LimitedAdapter.batches = []
+    monkeypatch.setattr("talkpipe.llm.embedding.getEmbeddingSources", lambda: ["limited"])
+    monkeypatch.setattr("talkpipe.llm.embedding.getEmbeddingAdapter", lambda source: LimitedAdapter)
+    return LimitedAdapter
+
+
+def test_llmembed_forms_batches_by_token_budget(limited_adapter):
+    texts = ["word " * 50, "a", "b", "word " * 50, "c"]
+    budget = estimate_tokens(texts[0]) + 2 * estimate_tokens("a")
+    segment = LLMEmbed(model="m", source="limited", batch_size=4, max_batch_tokens=budget)
+
+    out = list(segment(texts))
+
+    assert out == [[float(len(text))] for text in texts]
+    assert limited_adapter.batches == [texts[:3], texts[3:]]
+    assert segment.batch_stats()["batch_sizes"] == {2: 1, 3: 1}
+
+
+def test_llmembed_learns_server_batch_limit(limited_adapter):
+    segment = LLMEmbed(model="m", source="limited", batch_size=8, max_batch_tokens=10_000)
+
+    out = list(segment([f"text {i}" for i in range(20)]))
+
+    assert len(out) == 20
+    # The first batch of 8 fails and is retried one text at a time; later batches hold 4.
+    assert [len(batch) for batch in limited_adapter.batches[9:]] == [4, 4, 4]
+    stats = segment.batch_stats()
+    assert stats["learned_max_items"] == 4
+    assert stats["failures"] == 1
+    assert stats["batch_sizes"] == {4: 3}
+
+
+def test_llmembed_adaptive_validation(limited_adapter):
+    with pytest.raises(ValueError, match="adaptive_batch_size"):
+        LLMEmbed(model="m", source="limited", adaptive_batch_size=True)
+    with pytest.raises(ValueError, match="max_batch_tokens"):
+        LLMEmbed(model="m", source="limited", max_batch_tokens=0)
+    segment = LLMEmbed(model="m", source="limited", batch_size=32, adaptive_batch_size=True)
+    assert segment.batch_stats()["target_items"] == 8
@@ -0,0 +1,114 @@
+import os
+
+import numpy as np
+import pytest
+
+from talkpipe.llm.embedding import LLMEmbed
+from talkpipe.llm.embedding_adapters import AbstractEmbeddingAdapter
+from talkpipe.llm.embedding_cache import EmbeddingCache, make_embedding_cache_key
+
+
+class CountingEmbedder(AbstractEmbeddingAdapter):
+    batches = []
+
+    def __init__(self, model):
+        super().__init__(model, "counting")
+
+    def execute_batch(self, texts):
+        CountingEmbedder.batches.append(list(texts))
+        return [[float(len(text)), 1.0, 0.5] for text in texts]
+
+    def execute_one(self, text):
+        return self.execute_batch([text])[0]
+
+
+@pytest.fixture
+def cached_embed(monkeypatch, tmp_path):
+    CountingEmbedder.batches = []
+    monkeypatch.setattr("talkpipe.llm.embedding.getEmbeddingSources", lambda: ["counting"])
+    monkeypatch.setattr("talkpipe.llm.embedding.getEmbeddingAdapter", lambda source: CountingEmbedder)
+    monkeypatch.setattr("talkpipe.llm.embedding.get_config", lambda: {"embedding_cache": "on", "embedding_cache_path": str(tmp_path / "cache")})
+    return CountingEmbedder
+
+
+def test_round_trip_and_persistence(tmp_path):
+    cache = EmbeddingCache(str(tmp_path))
+    cache.put_many([("a", [1.0, 2.0]), ("b", np.array([3.0, 4.0, 5.0]))])
+
+    a, missing, b = cache.get_many(["a", "zzz", "b"])
+    assert missing is None
+    assert a.dtype == np.float32 and a.tolist() == [1.0, 2.0]
+    assert b.tolist() == [3.0, 4.0, 5.0]
+    assert (cache.hits, cache.misses) == (2, 1)
+
+    reopened = EmbeddingCache(str(tmp_path))
+    assert reopened.get_many(["b"])[0].tolist() == [3.0, 4.0, 5.0]
+    assert len(reopened) == 2
+
+
+def test_keys_cover_model_source_settings_and_text():
+    base = make_embedding_cache_key("ollama", "m", "text", {"truncate_side": "tail"})
+    assert base == make_embedding_cache_key("ollama", "m", "text", {"truncate_side": "tail"})
+    assert base != make_embedding_cache_key("openai", "m", "text", {"truncate_side": "tail"})
+    assert base != make_embedding_cache_key("ollama", "m2", "text", {"truncate_side": "tail"})
+    assert base != make_embedding_cache_key("ollama", "m", "text", {"truncate_side": "head"})
+    assert base != make_embedding_cache_key("ollama", "m", "text2", {"truncate_side": "tail"})
+
+
+def test_size_bound_evicts_least_recently_used(tmp_path):
+    now = [0.0]
+
+    def clock():
+        now[0] += 1
+        return now[0]
+
+    cache = EmbeddingCache(str(tmp_path), max_bytes=3 * 4 * 4, clock=clock)
+    cache.put_many([(k, [1.0, 2.0, 3.0, 4.0]) for k in "abc"])
+    cache.get_many(["a"])
+    cache.put_many([("d", [5.0, 6.0, 7.0, 8.0])])
+
+    assert [v is not None for v in cache.get_many(["a", "b", "c", "d"])] == [True, False, True, True]
+    assert cache.stats()["live_bytes"] == 48
+
+
+def test_compaction_keeps_live_vectors(tmp_path, monkeypatch):
+    monkeypatch.setattr("talkpipe.llm.embedding_cache._COMPACT_MIN_BYTES", 0)
+    cache = EmbeddingCache(str(tmp_path), max_bytes=64)
+    for i in range(20):
+        cache.put_many([(f"k{i}", [float(i)] * 4)])
+
+    assert cache.stats()["file_bytes"] <= 2 * 64
+    assert cache.get_many(["k19"])[0].tolist() == [19.0] * 4
+    assert len([name for name in os.listdir(tmp_path) if name.endswith(".f32")]) == 1
+    assert EmbeddingCache(str(tmp_path)).get_many(["k18"])[0].tolist() == [18.0] * 4
+
+
+def test_index_rows_past_a_truncated_blob_are_dropped(tmp_path):
+    cache = EmbeddingCache(str(tmp_path))
+    cache.put_many([("a", [1.0, 2.0]), ("b", [3.0, 4.0])])
+    blob = cache._blob_path(cache._generation)
+    cache._blob.close()
+    with open(blob, "r+b") as f:
+        f.truncate(8)
+
+    reopened = EmbeddingCache(str(tmp_path))
+    assert reopened.get_many(["a"])[0].tolist() == [1.0, 2.0]
+    assert reopened.get_many(["b"]) == [None]
+
+
+def test_llmembed_only_sends_misses(cached_embed):
+    first = list(LLMEmbed(model="m", source="counting", batch_size=3)(["aa", "bbb", "aa", "c"]))
+    assert cached_embed.batches == [["aa", "bbb"], ["c"]]
+
+    cached_embed.batches = []
+    second = list(LLMEmbed(model="m", source="counting", batch_size=4)(["aa", "dddd", "bbb", "c"]))
+
+    assert cached_embed.batches == [["dddd"]]
+    assert second == [first[0], [4.0, 1.0, 0.5], first[1], first[3]]
+
+
+def test_llmembed_cache_is_keyed_by_truncation_settings(cached_embed):
+    list(LLMEmbed(model="m", source="counting")(["text"]))
+    list(LLMEmbed(model="m", source="counting", truncate_side="head")(["text"]))
+    list(LLMEmbed(model="m", source="counting", cache=False)(["text"]))
+    assert len(cached_embed.batches) == 3
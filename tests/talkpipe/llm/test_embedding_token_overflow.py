@@ -1,10 +1,14 @@
 """Tests for llmEmbed on_token_overflow (reactive token limit handling)."""
 
+import random
+import re
+
 import pytest
 from unittest.mock import Mock
 
-from talkpipe.llm.embedding import LLMEmbed, EmbeddingTokenOverflowError, estimate_tokens
+from talkpipe.llm.embedding import LLMEmbed, EmbeddingTokenOverflowError, TokenEstimate, estimate_tokens
 from talkpipe.llm.embedding_errors import is_token_overflow_error
+from talkpipe.llm.tokenizers import registerTokenizer
 
 TOKEN_OVERFLOW = RuntimeError("maximum context length exceeded")
 
@@ -44,6 +48,54 @@ def test_estimate_tokens_counts_encoded_ascii_text_more_densely():
     assert estimate_tokens(text) >= int(len(text) * 0.75)
 
 
+def _reference_estimate_tokens(text: str) -> int:
+    """The original per-character estimate, kept to check the vectorized one against."""
+    chars = len(text)
+    words = len(re.findall(r"\S+", text))
+    non_ascii = sum(1 for char in text if not char.isascii())
+    non_ascii_floor = chars * 1.5 if chars and non_ascii / chars >= 0.05 else non_ascii + (chars - non_ascii) / 4
+    encoded = 0.0
+    letters = [char for char in text if char.isascii() and char.isalpha()]
+    if chars >= 80 and len(letters) >= chars * 0.55:
+        vowel_ratio = sum(1 for char in letters if char in "aeiouAEIOU") / len(letters)
+        uppercase_ratio = sum(1 for char in letters if char.isupper()) / len(letters)
+        suspicious_ratio = sum(1 for char in text if char in "\\+^~[]{}|") / chars
+        if suspicious_ratio >= 0.01 and uppercase_ratio >= 0.35 and vowel_ratio <= 0.30:
+            encoded = chars * 0.75
+    return int(max(words * 1.3, chars / 4, non_ascii_floor, encoded))
+
+
+_ALPHABETS = [
+    "abcdefghij ",
+    "BCDFGHJKLMNPQRSTVWXZ\\+^~[]{}|",
+    "aeiou \t\n\u00a0\u2003\u3000\x1c",
+    "汽車行駛速度很快é🙂",
+]
+
+
+def _random_texts(seed: int = 7, count: int = 300):
+    rng = random.Random(seed)
+    for _ in range(count):
+        alphabet = "".join(rng.sample(_ALPHABETS, rng.randint(1, len(_ALPHABETS))))
+        yield "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 200)))
+
+
+def test_estimate_tokens_matches_reference_estimate():
+    for text in _random_texts():
+        assert estimate_tokens(text) == _reference_estimate_tokens(text), repr(text)
+
+
+def test_token_estimate_counts_slices_like_estimate_tokens():
+    rng = random.Random(11)
+    for text in _random_texts(count=60):
+        counts = TokenEstimate(text)
+        assert counts.count() == estimate_tokens(text)
+        for _ in range(20):
+            start = rng.randint(0, len(text))
+            end = rng.randint(start, len(text))
+            assert counts.count(start, end) == estimate_tokens(text[start:end]), (repr(text), start, end)
+
+
 def _overflow_if_long(max_len: int = 10):
     """Embed succeeds when len(text) <= max_len; otherwise token overflow."""
 
@@ -285,3 +337,33 @@ def test_num_chunks_must_be_at_least_two():
 def test_max_estimated_tokens_must_be_positive():
     with pytest.raises(ValueError, match="max_estimated_tokens"):
         LLMEmbed(model="test-model", source="ollama", max_estimated_tokens=0)
+
+
+@pytest.mark.parametrize("side", ["head", "tail", "middle"])
+def test_max_estimated_tokens_truncation_keeps_longest_slice_within_budget(side):
+    embedder = LLMEmbed(model="test-model", source="ollama", max_estimated_tokens=40, truncate_side=side)
+    for text in _random_texts(seed=3, count=40):
+        truncated = embedder._truncate_to_estimated_token_budget(text)
+        assert truncated == LLMEmbed._slice_text(text, len(truncated), side)
+        assert estimate_tokens(truncated) <= 40
+        if len(truncated) < len(text):
+            assert estimate_tokens(LLMEmbed._slice_text(text, len(truncated) + 1, side)) > 40
+
+
+def test_max_estimated_tokens_counts_with_named_tokenizer():
+    loaded = []
+
+    def word_counter(model):
+        loaded.append(model)
+        return lambda text: len(text.split())
+
+    registerTokenizer("words-embed-test", word_counter)
+    embedder = LLMEmbed(model="test-model", source="ollama", max_estimated_tokens=3, tokenizer="words-embed-test")
+
+    assert embedder._truncate_to_estimated_token_budget("one two three four five") == " three four five"
+    assert embedder._truncate_to_estimated_token_budget("six seven eight nine") == " seven eight nine"
+    assert loaded == ["test-model"]
+    assert embedder._cache_settings["tokenizer"] == "words-embed-test"
+
+    with pytest.raises(ValueError, match="Unknown tokenizer"):
+        LLMEmbed(model="test-model", source="ollama", tokenizer="nope")
@@ -0,0 +1,156 @@
+import asyncio
+import time
+
+import pytest
+
+from talkpipe.llm.chat import LLMPrompt, LlmScore
+from talkpipe.llm.config import getEmbeddingSources, getPromptSources
+from talkpipe.llm.embedding import LLMEmbed
+from talkpipe.llm.embedding_adapters_mock import MockLatencyEmbeddingAdapter, fake_embedding
+from talkpipe.llm.mock_latency import (
+    MockProviderError,
+    getMockLatencyStats,
+    getMockServer,
+    parse_mock_spec,
+    resetMockLatencyServers,
+)
+from talkpipe.llm.prompt_adapters import MockLatencyPromptAdapter
+from talkpipe.llm.rate_limit import is_overload_error, resetRateLimits
+from talkpipe.llm.single_flight import resetSingleFlightStats
+
+
+@pytest.fixture(autouse=True)
+def _reset():
+    resetMockLatencyServers()
+    resetSingleFlightStats()
+    resetRateLimits()
+    yield
+    resetMockLatencyServers()
+    resetSingleFlightStats()
+    resetRateLimits()
+
+
+def test_registered_for_prompts_and_embeddings():
+    assert "mock-latency" in getPromptSources()
+    assert "mock-latency" in getEmbeddingSources()
+
+
+def test_parse_mock_spec():
+    name, settings = parse_mock_spec("slow, latency:lognormal, median:0.4, max_concurrency:3")
+    assert name == "slow"
+    assert settings["latency"] == "lognormal"
+    assert settings["median"] == 0.4
+    assert settings["max_concurrency"] == 3
+    assert settings["dimensions"] == 384
+
+    with pytest.raises(ValueError, match="Unknown mock-latency setting"):
+        parse_mock_spec("latncy:fixed")
+    with pytest.raises(ValueError, match="latency must be one of"):
+        parse_mock_spec("latency:uniform")
+
+
+def test_lognormal_latency_is_seeded_and_has_a_tail():
+    spec = "latency:lognormal,median:0.1,sigma:0.5,tail_rate:0.1,tail_multiplier:20,seed:7"
+    first = [getMockServer("prompt", spec).sample_latency() for _ in range(300)]
+    resetMockLatencyServers()
+    second = [getMockServer("prompt", spec).sample_latency() for _ in range(300)]
+
+    assert first == second
+    ordered = sorted(first)
+    assert 0.05 < ordered[150] < 0.2
+    assert ordered[-1] > 1.0
+
+
+def test_prompt_adapter_waits_and_replies(monkeypatch):
+    adapter = MockLatencyPromptAdapter("m,median:0.03", multi_turn=False)
+
+    start = time.perf_counter()
+    reply = adapter.execute("hello there")
+
+    assert time.perf_counter() - start >= 0.03
+    assert isinstance(reply, str) and reply
+    assert getMockLatencyStats() == [{"kind": "prompt", "model": "m,median:0.03", "requests": 1, "completed": 1,
+                                      "errors": 0, "throttled": 0, "in_flight": 0, "peak_in_flight": 1}]
+
+
+def test_guided_generation_works_with_the_mock():
+    segment = LlmScore(system_prompt="score", model="m,latency:none", source="mock-latency")
+    result = list(segment(["a clear and specific statement"]))[0]
+    assert 0 <= result.score <= 10
+
+
+def test_injected_errors_are_overloads_the_rate_limiter_recognises():
+    throttled = MockLatencyPromptAdapter("m,latency:none,throttle_rate:1")
+    with pytest.raises(MockProviderError) as exc_info:
+        throttled.execute("x")
+    assert exc_info.value.status_code == 429
+    assert is_overload_error(exc_info.value)
+
+    failing = MockLatencyPromptAdapter("m,latency:none,error_rate:1")
+    with pytest.raises(MockProviderError, match="500"):
+        failing.execute("x")
+
+
+def test_capacity_limits_reject_excess_requests():
+    server = getMockServer("prompt", "max_rps:2,max_concurrency:1")
+    server.begin()
+    with pytest.raises(MockProviderError) as exc_info:
+        server.begin()
+    assert exc_info.value.status_code == 503
+    server.end()
+    server.begin()
+    server.end()
+    with pytest.raises(MockProviderError) as exc_info:
+        server.begin()
+    assert exc_info.value.status_code == 429
+
+
+def test_concurrency_overlaps_simulated_latency():
+    segment = LLMPrompt(model="m,median:0.05", source="mock-latency", multi_turn=False, max_concurrency=8)
+
+    start = time.perf_counter()
+    out = list(segment([f"question {i}" for i in range(16)]))
+
+    assert len(out) == 16
+    assert time.perf_counter() - start < 0.5
+    assert getMockLatencyStats()[0]["peak_in_flight"] > 1
+
+
+def test_streaming_follows_token_cadence():
+    adapter = MockLatencyPromptAdapter("m,latency:none,tokens_per_second:200,response_words:20", multi_turn=True)
+
+    start = time.perf_counter()
+    chunks = list(adapter.execute_stream("tell me something"))
+
+    assert len(chunks) >= 20
+    assert time.perf_counter() - start >= 19 / 200
+    assert adapter._messages[-1]["content"] == "".join(chunks)
+
+
+def test_async_calls_overlap():
+    adapter = MockLatencyPromptAdapter("m,median:0.05", multi_turn=False)
+
+    async def main():
+        return await asyncio.gather(*(adapter.achat(f"q{i}") for i in range(10)))
+
+    start = time.perf_counter()
+    assert len(asyncio.run(main())) == 10
+    assert time.perf_counter() - start < 0.3
+
+
+def test_embeddings_are_deterministic_unit_vectors():
+    adapter = MockLatencyEmbeddingAdapter("emb,latency:none,dimensions:16")
+
+    first = adapter.execute_batch(["alpha", "beta"])
+    again = MockLatencyEmbeddingAdapter("emb,latency:none,dimensions:16").execute_one("alpha")
+
+    assert len(first[0]) == 16
+    assert first[0] == again == fake_embedding("alpha", 16)
+    assert first[0] != first[1]
+    assert abs(sum(v * v for v in first[0]) - 1.0) < 1e-9
+
+
+def test_llmembed_with_mock_latency():
+    segment = LLMEmbed(model="emb,median:0.01,per_item:0.001,dimensions:8", source="mock-latency", batch_size=4)
+    vectors = list(segment(["a", "b", "c", "d", "e"]))
+    assert [len(v) for v in vectors] == [8] * 5
@@ -1,7 +1,12 @@
 import base64
+from io import BytesIO
+
+import pytest
 
 from talkpipe.llm.content import ImagePart, TextPart, UserTurn, user_turn_from_fields
 from talkpipe.llm.multimodal import (
+    getImageCacheStats,
+    resetImageCache,
     to_anthropic_user_message,
     to_ollama_user_message,
     to_openai_user_message,
@@ -51,3 +56,41 @@ def test_to_ollama_user_message_text_only():
     message = to_ollama_user_message(turn)
     assert message == {"role": "user", "content": "hello"}
     assert "images" not in message
+
+
+@pytest.fixture
+def large_png():
+    Image = pytest.importorskip("PIL.Image")
+    buffer = BytesIO()
+    Image.new("RGB", (3000, 1000), "blue").save(buffer, format="PNG")
+    resetImageCache()
+    yield buffer.getvalue()
+    resetImageCache()
+
+
+def _sent_size(encoded):
+    from PIL import Image
+
+    return Image.open(BytesIO(base64.b64decode(encoded))).size
+
+
+def test_images_are_downscaled_to_each_providers_useful_size(large_png):
+    turn = user_turn_from_fields(prompt="describe", images=large_png)
+
+    openai_url = to_openai_user_message(turn)["content"][-1]["image_url"]
+    anthropic_data = to_anthropic_user_message(turn)["content"][-1]["source"]["data"]
+    ollama_data = to_ollama_user_message(turn)["images"][0]
+
+    assert _sent_size(openai_url.split(",", 1)[1]) == (2048, 683)
+    assert _sent_size(anthropic_data) == (1568, 523)
+    assert _sent_size(ollama_data) == (3000, 1000)
+    assert getImageCacheStats()["sent_bytes"] < getImageCacheStats()["original_bytes"]
+
+
+def test_repeated_images_reuse_the_cached_encoding(large_png):
+    first = to_anthropic_user_message(user_turn_from_fields(prompt="a", images=large_png))
+    second = to_anthropic_user_message(user_turn_from_fields(prompt="b", images=large_png))
+
+    assert first["content"][-1]["source"]["data"] is second["content"][-1]["source"]["data"]
+    stats = getImageCacheStats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
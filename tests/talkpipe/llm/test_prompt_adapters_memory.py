@@ -1,6 +1,10 @@
+import threading
+
 import pytest
 
 from talkpipe.llm.prompt_adapter_base import AbstractLLMPromptAdapter
+from talkpipe.llm.prompt_adapter_memory import TokenCountedMessages
+from talkpipe.llm.tokenizers import IMAGE_TOKENS, MessageTokenCounter, count_chars, getTokenCounter, registerTokenizer
 
 
 class DummyMemoryAdapter(AbstractLLMPromptAdapter):
@@ -234,3 +238,272 @@ def test_compact_context_debug_mode_logs_archived_and_recent_payloads(monkeypatc
 
     payload_names = [name for name, _ in calls]
     assert payload_names == ["archived_messages", "recent_messages"]
+
+
+def _message(text, role="user"):
+    return {"role": role, "content": text}
+
+
+def test_token_counted_messages_tracks_every_mutation():
+    messages = TokenCountedMessages([_message("a" * 40), _message("b" * 8)])
+
+    def check():
+        expected = sum(len(m["content"]) / 4 + 6 for m in messages)
+        assert messages.tokens == expected
+
+    check()
+    messages.append(_message("c" * 400))
+    messages += [_message("d" * 4)]
+    messages.insert(0, _message("e" * 12))
+    check()
+    messages.pop()
+    messages.pop(0)
+    messages[0] = _message("f" * 100)
+    check()
+    messages[1:3] = [_message("g")]
+    del messages[0]
+    check()
+    messages.remove(messages[0])
+    assert messages == [] and messages.tokens == 0
+    messages.extend([_message("h" * 80)] * 3)
+    del messages[:2]
+    check()
+    messages.clear()
+    assert messages.tokens == 0
+
+
+def test_history_assignment_and_compaction_keep_running_count():
+    adapter = DummyMemoryAdapter(memory_mode="recent_only", unsummarized_message_count=2, context_token_trigger=50)
+    adapter._messages = [_message("x" * 40) for _ in range(5)]
+    assert isinstance(adapter._messages, TokenCountedMessages)
+    assert adapter._messages.tokens == adapter._estimate_tokens(list(adapter._messages))
+
+    adapter._compact_context_if_needed()
+
+    assert len(adapter._messages) == 2
+    assert adapter._messages.tokens == 2 * (10 + 6)
+    assert adapter._context_token_estimate() == adapter._estimate_tokens(adapter._request_messages())
+
+
+def test_per_turn_token_accounting_does_not_rescan_history():
+    calls = []
+
+    def counting(model):
+        def count(text):
+            calls.append(text)
+            return len(text)
+        return count
+
+    registerTokenizer("counting-test", counting)
+    adapter = DummyMemoryAdapter(memory_mode="summary_truncate", context_token_trigger=10**9, system_prompt="sys")
+    adapter.set_tokenizer("counting-test")
+
+    per_turn = []
+    for turn in range(200):
+        before = len(calls)
+        adapter._messages.append(_message(f"turn {turn}"))
+        adapter._compact_context_if_needed()
+        per_turn.append(len(calls) - before)
+
+    # One count for the new message plus the fixed prefix, regardless of history length.
+    assert per_turn[0] == per_turn[-1] == 2
+
+
+def test_tokenizer_counters_are_cached_per_model_and_history_is_recounted():
+    built = []
+
+    def words(model):
+        built.append(model)
+        return lambda text: len(text.split())
+
+    registerTokenizer("words-test", words)
+    assert getTokenCounter("words-test", "m1") is getTokenCounter("words-test", "m1")
+    getTokenCounter("words-test", "m2")
+    assert built == ["m1", "m2"]
+
+    adapter = DummyMemoryAdapter(model="m1")
+    adapter._messages = [_message("one two three")]
+    adapter.set_tokenizer("words-test")
+    assert adapter._messages.tokens == 3 + 6
+    assert built == ["m1", "m2"]
+
+    with pytest.raises(ValueError, match="Unknown tokenizer"):
+        adapter.set_tokenizer("no-such-tokenizer")
+
+
+def test_tokenizer_default_comes_from_config(monkeypatch):
+    registerTokenizer("config-test", lambda model: lambda text: 1)
+    monkeypatch.setattr(
+        "talkpipe.llm.prompt_adapter_memory.get_config", lambda: {"llm_tokenizer": "config-test"}
+    )
+    adapter = DummyMemoryAdapter()
+    adapter._messages = [_message("anything at all")]
+
+    assert adapter._tokenizer == "config-test"
+    assert adapter._messages.tokens == 1 + 6
+
+
+def test_default_text_estimate_matches_whole_request_count():
+    def baseline(messages):
+        # The estimate compaction used before counts were kept per message.
+        return sum(len(str(m.get("content", ""))) for m in messages) // 4 + 6 * len(messages)
+
+    adapter = DummyMemoryAdapter(memory_mode="summary_truncate", context_token_trigger=10**6, system_prompt="Be brief.")
+    for length in [1, 2, 3, 5, 7, 11, 13, 0, 9, 6]:
+        adapter._messages.append(_message("y" * length))
+        assert adapter._context_token_estimate() == baseline(adapter._request_messages())
+    adapter._summary_message = {"role": "system", "content": "an odd summary"}
+    del adapter._messages[:3]
+    assert adapter._context_token_estimate() == baseline(adapter._request_messages())
+    assert adapter._estimate_tokens(adapter._request_messages()) == baseline(adapter._request_messages())
+
+
+def test_message_counter_charges_images_a_flat_cost_instead_of_their_base64():
+    counter = MessageTokenCounter(count_chars)
+    payload = "A" * 400_000
+    blocks = {"role": "user", "content": [{"type": "text", "text": "x" * 40},
+                                          {"type": "image", "source": {"data": payload}}]}
+    ollama = {"role": "user", "content": "x" * 40, "images": [payload, payload]}
+
+    assert counter(blocks) == 10 + 6 + IMAGE_TOKENS
+    assert counter(ollama) == 10 + 6 + 2 * IMAGE_TOKENS
+
+
+class GatedSummaryAdapter(DummyMemoryAdapter):
+    """Summary calls block until the test opens the gate."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.gate = threading.Event()
+        self.summary_calls = 0
+
+    def complete_text_without_context(self, prompt: str, *, model=None, temperature=0.0, max_tokens=None) -> str:
+        self.summary_calls += 1
+        assert self.gate.wait(5)
+        return f"summary {self.summary_calls}"
+
+
+def _background_adapter():
+    adapter = GatedSummaryAdapter(memory_mode="summary_llm", context_token_trigger=100,
+                                  unsummarized_message_count=2, system_prompt=None)
+    adapter.set_background_summarization(True)
+    return adapter
+
+
+def _turns(count, start=0):
+    # 40 characters = 10 tokens + 6 overhead per message.
+    return [{"role": "user", "content": f"{i:02d}" + "x" * 38} for i in range(start, start + count)]
+
+
+def test_background_summary_starts_at_soft_threshold_and_swaps_in_next_turn():
+    adapter = _background_adapter()
+    adapter._messages = _turns(5)
+
+    adapter._compact_context_if_needed()
+    job = adapter._background_summary
+    assert job is not None and len(job.covered) == 3
+    assert len(adapter._messages) == 5 and adapter._summary_message is None
+
+    adapter.gate.set()
+    job.future.result()
+    adapter._messages.append(_turns(1, start=5)[0])
+    adapter._compact_context_if_needed()
+
+    assert adapter._summary_message == {"role": "system", "content": "summary 1"}
+    assert [m["content"][:2] for m in adapter._messages] == ["03", "04", "05"]
+
+
+def test_background_summary_not_ready_truncates_instead_of_blocking():
+    adapter = _background_adapter()
+    adapter._messages = _turns(5)
+    adapter._compact_context_if_needed()
+    job = adapter._background_summary
+
+    adapter._messages.extend(_turns(2, start=5))
+    adapter._compact_context_if_needed()
+
+    assert not job.future.done()
+    assert [m["content"][:2] for m in adapter._messages] == ["03", "04", "05", "06"]
+    assert adapter._summary_message is None
+
+    adapter.gate.set()
+    job.future.result()
+    adapter._compact_context_if_needed()
+    assert adapter._summary_message == {"role": "system", "content": "summary 1"}
+    assert len(adapter._messages) == 4
+
+
+def test_background_summary_queues_messages_truncated_while_running():
+    adapter = _background_adapter()
+    adapter._messages = _turns(5)
+    adapter._compact_context_if_needed()
+    first = adapter._background_summary
+
+    adapter._messages.extend(_turns(6, start=5))
+    adapter._compact_context_if_needed()
+    assert [m["content"][:2] for m in adapter._messages] == ["09", "10"]
+    assert len(first.backlog) == 6
+
+    adapter.gate.set()
+    first.future.result()
+    adapter._compact_context_if_needed()
+    second = adapter._background_summary
+    assert adapter._summary_message["content"] == "summary 1"
+    assert second.previous_summary == "summary 1" and len(second.covered) == 6
+
+    second.future.result()
+    adapter._compact_context_if_needed()
+    assert adapter._summary_message["content"] == "summary 2"
+
+
+def test_background_summary_survives_switching_conversations():
+    adapter = _background_adapter()
+    adapter._messages = _turns(5)
+    adapter._compact_context_if_needed()
+    job = adapter._background_summary
+    adapter._messages.extend(_turns(2, start=5))
+    adapter._compact_context_if_needed()
+    assert job.dropped and [m["content"][:2] for m in adapter._messages] == ["03", "04", "05", "06"]
+
+    conversation_a = adapter.get_conversation_state()
+    adapter.set_conversation_state(None)
+    adapter._messages.extend(_turns(1, start=20))
+    adapter._compact_context_if_needed()
+    conversation_b = adapter.get_conversation_state()
+    assert "pending_summary" not in conversation_b
+
+    adapter.gate.set()
+    job.future.result()
+    adapter.set_conversation_state(conversation_a)
+    adapter._compact_context_if_needed()
+    assert adapter._summary_message == {"role": "system", "content": "summary 1"}
+    assert [m["content"][:2] for m in adapter._messages] == ["03", "04", "05", "06"]
+
+
+def test_settle_conversation_state_keeps_messages_of_unfinished_summary():
+    from talkpipe.llm.conversation_store import ConversationStore
+
+    adapter = _background_adapter()
+    adapter._messages = _turns(5)
+    adapter._compact_context_if_needed()
+    adapter._messages.extend(_turns(2, start=5))
+    adapter._compact_context_if_needed()
+
+    store = ConversationStore(max_conversations=1, spill_path=":memory:")
+    store.put("a", adapter.get_conversation_state())
+    store.put("b", {"messages": [], "summary": None})
+    restored = store.get("a")
+
+    assert [m["content"][:2] for m in restored["messages"]] == ["00", "01", "02", "03", "04", "05", "06"]
+    assert restored["summary"] is None
+    adapter.gate.set()
+
+
+def test_background_summary_requires_summary_llm():
+    from talkpipe.llm.chat import LLMPrompt
+
+    with pytest.raises(ValueError, match="summary_llm"):
+        LLMPrompt(model="m", source="eliza", background_summary=True)
+    segment = LLMPrompt(model="m", source="eliza", memory_mode="summary_llm", context_token_trigger=50,
+                        background_summary=True)
+    assert segment.chat._summarizes_in_background()
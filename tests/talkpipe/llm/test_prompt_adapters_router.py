@@ -0,0 +1,182 @@
+import threading
+import time
+
+import pytest
+
+from talkpipe.llm import config
+from talkpipe.llm.chat import LLMPrompt
+from talkpipe.llm.prompt_adapter_base import AbstractLLMPromptAdapter
+from talkpipe.llm.prompt_adapters_router import (
+    HEDGE_MIN_SAMPLES,
+    RouterPromptAdapter,
+    parse_endpoints,
+    resetRouterEndpoints,
+)
+
+
+class FakeEndpointAdapter(AbstractLLMPromptAdapter):
+    """Endpoint whose behaviour is looked up by server URL in ``behaviour``."""
+
+    behaviour = {}
+    calls = []
+
+    def __init__(self, model, system_prompt="You are a helpful assistant.", multi_turn=True, temperature=None,
+                 output_format=None, role_map=None, debug_messages=False, server_url=None):
+        super().__init__(model, "fake", system_prompt, multi_turn, temperature, output_format, role_map)
+        self.server_url = server_url
+
+    def execute(self, prompt):
+        delay, fail = self.behaviour.get(self.server_url, (0.0, False))
+        self.calls.append((self.server_url, [m["content"] for m in self._messages] + [prompt]))
+        time.sleep(delay)
+        if fail:
+            raise ConnectionError(f"{self.server_url} is down")
+        self._messages.append({"role": "user", "content": prompt})
+        reply = f"{self.server_url}: {prompt}"
+        self._record_assistant_response(reply)
+        return reply
+
+    def is_available(self):
+        return not self.behaviour.get(self.server_url, (0.0, False))[1]
+
+
+@pytest.fixture
+def fake_endpoints(monkeypatch):
+    monkeypatch.setitem(config._promptAdapter, "fake", FakeEndpointAdapter)
+    monkeypatch.setattr(FakeEndpointAdapter, "behaviour", {})
+    monkeypatch.setattr(FakeEndpointAdapter, "calls", [])
+    resetRouterEndpoints()
+    yield FakeEndpointAdapter
+    resetRouterEndpoints()
+
+
+def test_parse_endpoints():
+    assert parse_endpoints("ollama:llama3.2:3b@http://h1:11434, openai:gpt-4.1-nano") == [
+        {"source": "ollama", "model": "llama3.2:3b", "server_url": "http://h1:11434"},
+        {"source": "openai", "model": "gpt-4.1-nano", "server_url": None},
+    ]
+    with pytest.raises(ValueError):
+        parse_endpoints("just-a-model")
+    with pytest.raises(ValueError):
+        parse_endpoints("")
+
+
+def test_routes_to_lowest_latency_endpoint(fake_endpoints):
+    fake_endpoints.behaviour.update({"slow": (0.03, False), "fast": (0.0, False)})
+    router = RouterPromptAdapter("fake:m@slow,fake:m@fast", multi_turn=False, hedge=False)
+
+    for i in range(10):
+        router.execute(f"q{i}")
+
+    used = [url for url, _ in fake_endpoints.calls]
+    # Both are tried once, then the faster one takes the traffic.
+    assert set(used[:2]) == {"slow", "fast"}
+    assert used[2:] == ["fast"] * 8
+    stats = {s["endpoint"]: s for s in router.endpoint_stats()}
+    assert stats["fake:m@fast"]["completed"] == 9
+
+
+def test_fails_over_and_cools_down_broken_endpoint(fake_endpoints):
+    fake_endpoints.behaviour.update({"down": (0.0, True), "up": (0.01, False)})
+    router = RouterPromptAdapter("fake:m@down,fake:m@up", multi_turn=False, hedge=False)
+
+    assert router.execute("a") == "up: a"
+    assert router.execute("b") == "up: b"
+    assert [url for url, _ in fake_endpoints.calls] == ["down", "up", "up"]
+    stats = {s["endpoint"]: s for s in router.endpoint_stats()}
+    assert stats["fake:m@down"]["healthy"] is False
+
+    # The health check brings a recovered endpoint back.
+    fake_endpoints.behaviour["down"] = (0.0, False)
+    assert router.is_available() is True
+    assert all(s["healthy"] for s in router.endpoint_stats())
+
+
+def test_all_endpoints_failing_raises(fake_endpoints):
+    fake_endpoints.behaviour.update({"a": (0.0, True), "b": (0.0, True)})
+    router = RouterPromptAdapter("fake:m@a,fake:m@b", hedge=False)
+
+    with pytest.raises(RuntimeError, match="All router endpoints failed"):
+        router.execute("x")
+
+
+def test_hedges_slow_requests_past_p95(fake_endpoints):
+    fake_endpoints.behaviour.update({"primary": (0.005, False), "backup": (0.005, False)})
+    router = RouterPromptAdapter("fake:m@primary,fake:m@backup", multi_turn=False)
+    primary, backup = router._endpoints
+    for _ in range(HEDGE_MIN_SAMPLES):
+        primary.record_latency(0.005)
+    backup.record_latency(0.02)
+
+    fake_endpoints.behaviour["primary"] = (0.5, False)
+    start = time.perf_counter()
+    assert router.execute("q") == "backup: q"
+    assert time.perf_counter() - start < 0.3
+
+
+def test_losing_hedged_call_failure_leaves_endpoint_healthy(fake_endpoints):
+    fake_endpoints.behaviour.update({"primary": (0.005, False), "backup": (0.005, False)})
+    router = RouterPromptAdapter("fake:m@primary,fake:m@backup", multi_turn=False)
+    primary, backup = router._endpoints
+    for _ in range(HEDGE_MIN_SAMPLES):
+        primary.record_latency(0.005)
+    backup.record_latency(0.02)
+
+    # The primary fails only after the hedged backup has answered.
+    fake_endpoints.behaviour["primary"] = (0.2, True)
+    assert router.execute("q") == "backup: q"
+    deadline = time.monotonic() + 2
+    while primary.stats()["in_flight"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    stats = primary.stats()
+    assert stats["in_flight"] == 0
+    assert stats["failures"] == 0
+    assert stats["healthy"] is True
+
+
+def test_routers_share_endpoint_load_and_health(fake_endpoints, monkeypatch):
+    release = threading.Event()
+    fake_endpoints.behaviour.update({"busy": (0.0, False), "idle": (0.0, False), "down": (0.0, True)})
+    first = RouterPromptAdapter("fake:m@busy,fake:m@idle", multi_turn=False, hedge=False)
+    second = RouterPromptAdapter("fake:m@busy,fake:m@idle", multi_turn=False, hedge=False)
+    assert first._endpoints[0] is second._endpoints[0]
+
+    # A request in flight on the first router steers the second one elsewhere.
+    original_execute = FakeEndpointAdapter.execute
+
+    def blocking_execute(adapter, prompt):
+        if adapter.server_url == "busy":
+            release.wait(2)
+        return original_execute(adapter, prompt)
+
+    monkeypatch.setattr(FakeEndpointAdapter, "execute", blocking_execute)
+    worker = threading.Thread(target=first.execute, args=("slow",))
+    worker.start()
+    deadline = time.monotonic() + 2
+    while not second._endpoints[0].stats()["in_flight"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert second.execute("fast") == "idle: fast"
+    release.set()
+    worker.join()
+    assert {s["endpoint"]: s["completed"] for s in second.endpoint_stats()} == {"fake:m@busy": 1, "fake:m@idle": 1}
+
+    # A failure seen by one router puts the endpoint on cooldown for the other.
+    third = RouterPromptAdapter("fake:m@down,fake:m@idle", multi_turn=False, hedge=False)
+    fourth = RouterPromptAdapter("fake:m@down,fake:m@idle", multi_turn=False, hedge=False)
+    assert third.execute("a") == "idle: a"
+    assert fourth.execute("b") == "idle: b"
+    assert [url for url, _ in fake_endpoints.calls].count("down") == 1
+
+
+def test_router_keeps_history_and_works_in_llmprompt(fake_endpoints):
+    segment = LLMPrompt(model="fake:m@one", source="router", system_prompt="sys")
+
+    assert list(segment(["hi", "again"])) == ["one: hi", "one: again"]
+    assert fake_endpoints.calls[-1][1] == ["hi", "one: hi", "again"]
+    assert [m["content"] for m in segment.chat._messages] == ["hi", "one: hi", "again", "one: again"]
+
+
+def test_unknown_endpoint_source():
+    with pytest.raises(ValueError, match="Unknown router endpoint source"):
+        RouterPromptAdapter("nope:model")
@@ -0,0 +1,165 @@
+from types import SimpleNamespace
+
+import pytest
+
+from talkpipe.llm.chat import LLMPrompt
+from talkpipe.llm.prompt_adapters import AnthropicPromptAdapter, OpenAIPromptAdapter
+from talkpipe.llm.prompt_cache import (
+    EPHEMERAL_CACHE_CONTROL,
+    getPromptCacheStats,
+    mark_cache_breakpoint,
+    resetPromptCacheStats,
+    usage_counts,
+)
+
+LONG_SYSTEM_PROMPT = "Follow the scoring rubric carefully. " * 200
+
+
+@pytest.fixture(autouse=True)
+def _reset_stats():
+    resetPromptCacheStats()
+    yield
+    resetPromptCacheStats()
+
+
+class DummyAnthropic:
+    class Anthropic:
+        def __new__(cls):
+            return SimpleNamespace()
+
+
+def _anthropic(monkeypatch, usage=None, **kwargs):
+    monkeypatch.setattr(AnthropicPromptAdapter, "_require_dependency", lambda *_args, **_kwargs: DummyAnthropic)
+    adapter = AnthropicPromptAdapter("claude-sonnet-4-5", **kwargs)
+    sent = []
+
+    def create(**params):
+        sent.append(params)
+        return SimpleNamespace(content=[SimpleNamespace(text="ok")], usage=usage)
+
+    adapter.client = SimpleNamespace(messages=SimpleNamespace(create=create))
+    return adapter, sent
+
+
+def test_mark_cache_breakpoint_copies_message():
+    message = {"role": "user", "content": "hi"}
+    marked = mark_cache_breakpoint(message)
+
+    assert marked["content"] == [{"type": "text", "text": "hi", "cache_control": EPHEMERAL_CACHE_CONTROL}]
+    assert message == {"role": "user", "content": "hi"}
+
+    blocks = {"role": "user", "content": [{"type": "text", "text": "a"}, {"type": "image", "source": {}}]}
+    assert mark_cache_breakpoint(blocks)["content"][-1]["cache_control"] == EPHEMERAL_CACHE_CONTROL
+    assert "cache_control" not in blocks["content"][-1]
+
+
+def test_anthropic_marks_long_stable_prefix(monkeypatch):
+    adapter, sent = _anthropic(
+        monkeypatch,
+        system_prompt=LONG_SYSTEM_PROMPT,
+        role_map="user:Example question,assistant:Example answer",
+    )
+
+    adapter.execute("first")
+    adapter.execute("second")
+
+    system = sent[-1]["system"]
+    assert system[0]["text"].startswith("Follow the scoring rubric")
+    assert system[0]["cache_control"] == EPHEMERAL_CACHE_CONTROL
+    messages = sent[-1]["messages"]
+    # Breakpoints after the few-shot preamble and after the prior history only.
+    marked = [i for i, m in enumerate(messages) if isinstance(m["content"], list)]
+    assert marked == [1, 3]
+    assert messages[-1] == {"role": "user", "content": "second"}
+    # Stored history and prefix are left untouched.
+    assert all(isinstance(m["content"], str) for m in adapter._messages + adapter._prefix_messages)
+
+
+def test_anthropic_leaves_short_or_disabled_prompts_alone(monkeypatch):
+    adapter, sent = _anthropic(monkeypatch)
+    adapter.execute("hello")
+    assert sent[0]["system"] == "You are a helpful assistant."
+    assert sent[0]["messages"] == [{"role": "user", "content": "hello"}]
+
+    adapter, sent = _anthropic(monkeypatch, system_prompt=LONG_SYSTEM_PROMPT)
+    adapter.set_prompt_caching(False)
+    adapter.execute("hello")
+    assert sent[0]["system"] == LONG_SYSTEM_PROMPT
+
+
+def test_anthropic_summary_stays_outside_cached_system_block(monkeypatch):
+    adapter, sent = _anthropic(monkeypatch, system_prompt=LONG_SYSTEM_PROMPT, memory_mode="summary_deterministic")
+    adapter._summary_message = {"role": "system", "content": "Older summary"}
+
+    adapter.execute("hi")
+
+    system = sent[0]["system"]
+    assert system[0] == {"type": "text", "text": LONG_SYSTEM_PROMPT, "cache_control": EPHEMERAL_CACHE_CONTROL}
+    assert system[1] == {"type": "text", "text": "\n\nConversation memory:\nOlder summary"}
+
+
+def test_anthropic_usage_is_recorded(monkeypatch):
+    usage = SimpleNamespace(input_tokens=50, cache_read_input_tokens=1500, cache_creation_input_tokens=0)
+    adapter, _sent = _anthropic(monkeypatch, usage=usage, system_prompt=LONG_SYSTEM_PROMPT, multi_turn=False)
+
+    adapter.execute("a")
+    adapter.execute("b")
+
+    assert adapter.last_prompt_cache_usage == {"input_tokens": 1550, "cached_tokens": 1500, "cache_write_tokens": 0}
+    [stats] = getPromptCacheStats()
+    assert stats["source"] == "anthropic"
+    assert stats["requests"] == 2
+    assert stats["cache_hits"] == 2
+    assert stats["cache_misses"] == 0
+    assert stats["cached_token_ratio"] == pytest.approx(1500 / 1550)
+
+
+def test_openai_sends_prefix_cache_key_and_records_usage(monkeypatch):
+    class DummyOpenAI:
+        NOT_GIVEN = object()
+
+        class OpenAI:
+            def __new__(cls):
+                return SimpleNamespace()
+
+    monkeypatch.setattr(OpenAIPromptAdapter, "_require_dependency", lambda *_args, **_kwargs: DummyOpenAI)
+    sent = []
+
+    def parse(**params):
+        sent.append(params)
+        usage = SimpleNamespace(input_tokens=2000, input_tokens_details=SimpleNamespace(cached_tokens=1024 * len(sent[1:])))
+        return SimpleNamespace(output_text="ok", output_parsed=None, usage=usage)
+
+    adapters = []
+    for _ in range(2):
+        adapter = OpenAIPromptAdapter("gpt-4.1-nano", system_prompt=LONG_SYSTEM_PROMPT, multi_turn=False)
+        adapter.client = SimpleNamespace(responses=SimpleNamespace(parse=parse))
+        adapters.append(adapter)
+
+    adapters[0].execute("one")
+    adapters[1].execute("two")
+
+    assert sent[0]["prompt_cache_key"] == sent[1]["prompt_cache_key"]
+    assert sent[0]["input"][0]["content"] == LONG_SYSTEM_PROMPT
+    [stats] = getPromptCacheStats()
+    assert (stats["requests"], stats["cache_hits"], stats["cached_tokens"]) == (2, 1, 1024)
+
+    other = OpenAIPromptAdapter("gpt-4.1-nano", system_prompt="Different", multi_turn=False)
+    other.client = SimpleNamespace(responses=SimpleNamespace(parse=parse))
+    other.execute("three")
+    assert sent[2]["prompt_cache_key"] != sent[0]["prompt_cache_key"]
+
+
+def test_usage_counts_handles_missing_fields():
+    assert usage_counts(None) is None
+    assert usage_counts(SimpleNamespace(input_tokens=10)) == {
+        "input_tokens": 10, "cached_tokens": 0, "cache_write_tokens": 0,
+    }
+
+
+def test_llmprompt_can_disable_prompt_caching(monkeypatch):
+    monkeypatch.setattr(AnthropicPromptAdapter, "_require_dependency", lambda *_args, **_kwargs: DummyAnthropic)
+
+    segment = LLMPrompt(model="claude-sonnet-4-5", source="anthropic", prompt_caching=False)
+    assert segment.chat._prompt_caching is False
+    assert LLMPrompt(model="claude-sonnet-4-5", source="anthropic").chat._prompt_caching is True
@@ -0,0 +1,256 @@
+import threading
+import time
+
+import pytest
+
+from talkpipe.llm.chat import LLMPrompt
+from talkpipe.llm.rate_limit import (
+    AIMDController,
+    ProviderLimiter,
+    TokenBucket,
+    configureRateLimit,
+    getRateLimiter,
+    getRateLimitStats,
+    is_overload_error,
+    resetRateLimits,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class StatusError(Exception):
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+@pytest.fixture(autouse=True)
+def clean_rate_limits():
+    resetRateLimits()
+    yield
+    resetRateLimits()
+
+
+def test_token_bucket_waits_when_empty():
+    clock = FakeClock()
+    bucket = TokenBucket(per_minute=60, clock=clock)
+
+    assert bucket.reserve(60) == 0.0
+    assert bucket.reserve(1) == pytest.approx(1.0)
+    clock.now += 2
+    assert bucket.reserve(1) == 0.0
+
+
+def test_limiter_enforces_requests_per_minute():
+    clock = FakeClock()
+    limiter = ProviderLimiter("src", "m", requests_per_minute=2, clock=clock, sleep=clock.sleep)
+
+    for _ in range(4):
+        limiter.call(lambda: None)
+
+    # Two requests fit in the initial bucket, the next two wait 30s each.
+    assert clock.now == pytest.approx(60.0)
+    assert limiter.stats()["throttled"] == 2
+
+
+def test_limiter_enforces_tokens_per_minute():
+    clock = FakeClock()
+    limiter = ProviderLimiter("src", "m", tokens_per_minute=100, clock=clock, sleep=clock.sleep)
+
+    limiter.call(lambda: None, estimated_tokens=100)
+    limiter.call(lambda: None, estimated_tokens=50)
+
+    assert clock.now == pytest.approx(30.0)
+    stats = limiter.stats()
+    assert stats["tokens_per_minute_limit"] == 100
+    assert stats["completed"] == 2
+
+
+def test_limiter_keeps_only_the_last_minute_of_calls():
+    clock = FakeClock()
+    limiter = ProviderLimiter("src", "m", clock=clock)
+
+    for _ in range(1000):
+        limiter.call(lambda: None, estimated_tokens=1)
+        clock.now += 1
+
+    # Pruned as calls complete, not only when stats() is read.
+    assert len(limiter._recent) <= 61
+    assert limiter.stats()["requests_last_minute"] == 60
+
+
+def test_aimd_backs_off_and_recovers():
+    clock = FakeClock()
+    controller = AIMDController(max_concurrency=8, min_concurrency=1, clock=clock)
+
+    controller.on_overload()
+    assert controller.limit == 4
+    # A second overload within one average latency counts as the same event.
+    controller.on_success(1.0)
+    controller.on_overload()
+    assert controller.limit == pytest.approx(4.25)
+
+    clock.now += 10
+    controller.on_overload()
+    assert controller.slots == 2
+
+    for _ in range(20):
+        controller.on_success(1.0)
+    assert controller.limit > 4
+
+
+def test_aimd_backs_off_on_latency_spike():
+    clock = FakeClock()
+    controller = AIMDController(max_concurrency=10, clock=clock)
+    for _ in range(5):
+        controller.on_success(1.0)
+
+    controller.on_success(5.0)
+
+    assert controller.limit == 5
+    assert controller.average_latency == pytest.approx(1.0)
+
+
+def test_limiter_caps_in_flight_and_reports_queue_depth():
+    limiter = ProviderLimiter("src", "m", max_concurrency=2)
+    release = threading.Event()
+    state = {"active": 0, "peak": 0}
+    lock = threading.Lock()
+
+    def work():
+        with lock:
+            state["active"] += 1
+            state["peak"] = max(state["peak"], state["active"])
+        release.wait(2)
+        with lock:
+            state["active"] -= 1
+
+    threads = [threading.Thread(target=limiter.call, args=(work,)) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    deadline = time.time() + 2
+    while limiter.stats()["queue_depth"] < 3 and time.time() < deadline:
+        time.sleep(0.01)
+
+    stats = limiter.stats()
+    assert stats["in_flight"] == 2
+    assert stats["queue_depth"] == 3
+
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert state["peak"] == 2
+    assert limiter.stats()["completed"] == 5
+
+
+def test_limiter_counts_overload_errors():
+    limiter = ProviderLimiter("src", "m", max_concurrency=4)
+
+    def fail():
+        raise StatusError("slow down", status_code=429)
+
+    with pytest.raises(StatusError):
+        limiter.call(fail)
+
+    stats = limiter.stats()
+    assert stats["overload_errors"] == 1
+    assert stats["concurrency_limit"] == 2
+
+
+@pytest.mark.parametrize(
+    "exc,expected",
+    [
+        (StatusError("x", status_code=429), True),
+        (StatusError("x", status_code=503), True),
+        (RuntimeError("Error code: 529 - overloaded_error"), True),
+        (RuntimeError("Rate limit reached for requests"), True),
+        (RuntimeError("server busy, please try again"), True),
+        (StatusError("not found", status_code=404), False),
+        (RuntimeError("connection refused"), False),
+    ],
+)
+def test_is_overload_error(exc, expected):
+    assert is_overload_error(exc) is expected
+
+
+def test_limiters_are_shared_per_source_and_model():
+    configureRateLimit("openai", requests_per_minute=100)
+    configureRateLimit("openai", model="gpt-big", requests_per_minute=10)
+
+    assert getRateLimiter("openai", "a") is getRateLimiter("openai", "a")
+    assert getRateLimiter("openai", "a") is not getRateLimiter("openai", "b")
+    assert getRateLimiter("openai", "a").requests.per_minute == 100
+    assert getRateLimiter("openai", "gpt-big").requests.per_minute == 10
+    assert getRateLimiter("ollama", "llama").requests is None
+
+
+def test_limits_read_from_config(monkeypatch):
+    monkeypatch.setattr(
+        "talkpipe.llm.rate_limit.get_config",
+        lambda: {"rate_limit_anthropic_requests_per_minute": "50", "rate_limit_anthropic_max_concurrency": "3"},
+    )
+    limiter = getRateLimiter("anthropic", "claude")
+
+    assert limiter.requests.per_minute == 50
+    assert limiter.concurrency.max_concurrency == 3
+
+
+def test_llmprompt_calls_go_through_shared_limiter(monkeypatch):
+    class EchoAdapter:
+        def __init__(self, **kwargs):
+            pass
+
+        def execute(self, prompt):
+            return prompt.upper()
+
+    monkeypatch.setattr("talkpipe.llm.chat.getPromptSources", lambda: ["echo"])
+    monkeypatch.setattr("talkpipe.llm.chat.getPromptAdapter", lambda _source: EchoAdapter)
+
+    first = LLMPrompt(model="m", source="echo", multi_turn=False)
+    second = LLMPrompt(model="m", source="echo", multi_turn=False, max_concurrency=2)
+
+    assert list(first(["a", "b"])) == ["A", "B"]
+    assert list(second(["c", "d", "e"])) == ["C", "D", "E"]
+
+    stats = [s for s in getRateLimitStats() if s["source"] == "echo"]
+    assert len(stats) == 1
+    assert stats[0]["completed"] == 5
+    assert stats[0]["requests_last_minute"] == 5
+
+
+def test_llmprompt_cache_hits_skip_the_limiter(monkeypatch, tmp_path):
+    from talkpipe.llm.prompt_adapters import OllamaPromptAdapter
+
+    class DummyResponse:
+        class message:
+            content = "answer"
+
+    calls = []
+
+    def fake_chat_completion(self, model, messages=None, **_kwargs):
+        calls.append(messages)
+        return DummyResponse()
+
+    monkeypatch.setattr(OllamaPromptAdapter, "_require_dependency", lambda *_args, **_kwargs: object())
+    monkeypatch.setattr(OllamaPromptAdapter, "_chat_completion", fake_chat_completion)
+    monkeypatch.setattr(
+        "talkpipe.llm.prompt_adapter_base.get_config",
+        lambda: {"llm_cache_path": str(tmp_path / "cache.sqlite")},
+    )
+
+    segment = LLMPrompt(model="llama3.2", source="ollama", multi_turn=False, temperature=0, cache="deterministic")
+    assert list(segment(["a", "a", "b", "a"])) == ["answer"] * 4
+
+    assert len(calls) == 2
+    stats = [s for s in getRateLimitStats() if s["source"] == "ollama"]
+    assert stats[0]["completed"] == 2
+    assert stats[0]["requests_last_minute"] == 2
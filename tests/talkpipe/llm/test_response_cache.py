@@ -0,0 +1,182 @@
+import pytest
+from pydantic import BaseModel
+
+from talkpipe.llm.chat import LLMPrompt
+from talkpipe.llm.prompt_adapters import OllamaPromptAdapter
+from talkpipe.llm.response_cache import ResponseCache, make_cache_key
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _counting_ollama(monkeypatch, reply="cached answer"):
+    calls = []
+
+    class DummyOllamaModule:
+        pass
+
+    class DummyMessage:
+        content = reply
+
+    class DummyResponse:
+        message = DummyMessage()
+
+    def fake_chat_completion(self, model, messages=None, **_kwargs):
+        calls.append(messages)
+        return DummyResponse()
+
+    monkeypatch.setattr(OllamaPromptAdapter, "_require_dependency", lambda *_args, **_kwargs: DummyOllamaModule)
+    monkeypatch.setattr(OllamaPromptAdapter, "_chat_completion", fake_chat_completion)
+    return calls
+
+
+def test_cache_key_covers_request_shape():
+    base = make_cache_key("ollama", "m", [{"role": "user", "content": "hi"}], 0, None)
+
+    assert base == make_cache_key("ollama", "m", [{"role": "user", "content": "hi"}], 0, None)
+    assert base != make_cache_key("openai", "m", [{"role": "user", "content": "hi"}], 0, None)
+    assert base != make_cache_key("ollama", "m2", [{"role": "user", "content": "hi"}], 0, None)
+    assert base != make_cache_key("ollama", "m", [{"role": "user", "content": "bye"}], 0, None)
+    assert base != make_cache_key("ollama", "m", [{"role": "user", "content": "hi"}], 0.2, None)
+    assert base != make_cache_key("ollama", "m", [{"role": "user", "content": "hi"}], 0, {"type": "object"})
+
+
+def test_response_cache_persists_across_instances(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    ResponseCache(path).put("k", "v")
+
+    assert ResponseCache(path).get("k") == "v"
+
+
+def test_response_cache_evicts_least_recently_used(tmp_path):
+    clock = FakeClock()
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"), max_entries=2, clock=clock)
+    cache.put("a", "1")
+    clock.now += 1
+    cache.put("b", "2")
+    clock.now += 1
+    assert cache.get("a") == "1"
+    clock.now += 1
+    cache.put("c", "3")
+
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    assert cache.get("c") == "3"
+
+
+def test_response_cache_expires_entries(tmp_path):
+    clock = FakeClock()
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"), ttl_seconds=60, clock=clock)
+    cache.put("a", "1")
+    clock.now += 30
+    assert cache.get("a") == "1"
+    clock.now += 31
+
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_response_cache_contains_does_not_count(tmp_path):
+    clock = FakeClock()
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"), ttl_seconds=60, clock=clock)
+    cache.put("a", "1")
+
+    assert cache.contains("a")
+    assert not cache.contains("b")
+    assert (cache.hits, cache.misses) == (0, 0)
+    clock.now += 61
+    assert not cache.contains("a")
+
+
+def test_deterministic_requests_skip_the_network_on_hit(monkeypatch, tmp_path):
+    calls = _counting_ollama(monkeypatch)
+    path = str(tmp_path / "cache.sqlite")
+
+    first = OllamaPromptAdapter("llama3.2", multi_turn=False, temperature=0)
+    first.set_response_cache("deterministic", path=path)
+    second = OllamaPromptAdapter("llama3.2", multi_turn=False, temperature=0)
+    second.set_response_cache("deterministic", path=path)
+
+    assert first.execute("hello") == "cached answer"
+    assert second.execute("hello") == "cached answer"
+    assert len(calls) == 1
+
+    second.execute("something else")
+    assert len(calls) == 2
+
+
+def test_deterministic_mode_ignores_sampled_requests(monkeypatch, tmp_path):
+    calls = _counting_ollama(monkeypatch)
+    adapter = OllamaPromptAdapter("llama3.2", multi_turn=False, temperature=0.7)
+    adapter.set_response_cache("deterministic", path=str(tmp_path / "cache.sqlite"))
+
+    adapter.execute("hello")
+    adapter.execute("hello")
+    assert len(calls) == 2
+
+    adapter.set_response_cache("always", path=str(tmp_path / "cache.sqlite"))
+    adapter.execute("hello")
+    adapter.execute("hello")
+    assert len(calls) == 3
+
+
+def test_cached_multi_turn_history_is_recorded(monkeypatch, tmp_path):
+    calls = _counting_ollama(monkeypatch)
+    path = str(tmp_path / "cache.sqlite")
+    for _ in range(2):
+        adapter = OllamaPromptAdapter("llama3.2", multi_turn=True, temperature=0)
+        adapter.set_response_cache("deterministic", path=path)
+        adapter.execute("first")
+        adapter.execute("second")
+
+    assert len(calls) == 2
+    assert adapter._messages[-1] == {"role": "assistant", "content": "cached answer"}
+
+
+def test_cached_guided_output_is_parsed(monkeypatch, tmp_path):
+    class Answer(BaseModel):
+        answer: bool
+
+    calls = _counting_ollama(monkeypatch, reply='{"answer": true}')
+    path = str(tmp_path / "cache.sqlite")
+    for _ in range(2):
+        adapter = OllamaPromptAdapter("llama3.2", multi_turn=False, temperature=0, output_format=Answer)
+        adapter.set_response_cache("deterministic", path=path)
+        assert adapter.execute("yes?") == Answer(answer=True)
+
+    assert len(calls) == 1
+
+
+def test_cache_enabled_from_config(monkeypatch, tmp_path):
+    monkeypatch.setattr(
+        "talkpipe.llm.prompt_adapter_base.get_config",
+        lambda: {"llm_cache": "deterministic", "llm_cache_path": str(tmp_path / "cfg.sqlite")},
+    )
+    _counting_ollama(monkeypatch)
+
+    adapter = OllamaPromptAdapter("llama3.2", temperature=0)
+
+    assert adapter._cache_mode == "deterministic"
+    assert adapter._response_cache.path == str(tmp_path / "cfg.sqlite")
+
+
+def test_llmprompt_cache_parameter(monkeypatch, tmp_path):
+    calls = _counting_ollama(monkeypatch)
+    monkeypatch.setattr(
+        "talkpipe.llm.prompt_adapter_base.get_config",
+        lambda: {"llm_cache_path": str(tmp_path / "seg.sqlite")},
+    )
+
+    segment = LLMPrompt(model="llama3.2", source="ollama", multi_turn=False, temperature=0,
+                        cache="deterministic", max_concurrency=2)
+    assert list(segment(["a", "b", "a", "b"])) == ["cached answer"] * 4
+    assert len(calls) <= 3
+
+    with pytest.raises(ValueError, match="Unknown cache mode"):
+        LLMPrompt(model="llama3.2", source="ollama", cache="sometimes")
@@ -0,0 +1,165 @@
+import hashlib
+
+import pytest
+
+from talkpipe.chatterlang import compiler
+from talkpipe.llm.embedding_adapters import AbstractEmbeddingAdapter
+from talkpipe.llm.semantic_cache import (
+    SemanticCache,
+    SemanticCacheSegment,
+    getSemanticCache,
+    getSemanticCacheStats,
+    resetSemanticCaches,
+)
+from talkpipe.pipe.core import AbstractSegment
+
+
+class BagOfWordsEmbedder(AbstractEmbeddingAdapter):
+    """Embeds texts as hashed word counts, so re-worded prompts land close together."""
+
+    calls = 0
+
+    def __init__(self, model):
+        super().__init__(model, "bow")
+
+    def execute_one(self, text):
+        BagOfWordsEmbedder.calls += 1
+        vector = [0.0] * 64
+        for word in text.lower().replace("?", "").split():
+            vector[hashlib.sha256(word.encode()).digest()[0] % 64] += 1.0
+        return vector
+
+
+class CountingAnswer(AbstractSegment):
+    def __init__(self):
+        super().__init__()
+        self.prompts = []
+
+    def transform(self, input_iter):
+        for prompt in input_iter:
+            self.prompts.append(prompt)
+            yield f"answer to: {prompt}"
+
+
+@pytest.fixture(autouse=True)
+def bow_embedder(monkeypatch):
+    resetSemanticCaches()
+    BagOfWordsEmbedder.calls = 0
+    monkeypatch.setattr("talkpipe.llm.semantic_cache.getEmbeddingSources", lambda: ["bow"])
+    monkeypatch.setattr("talkpipe.llm.semantic_cache.getEmbeddingAdapter", lambda source: BagOfWordsEmbedder)
+    yield
+    resetSemanticCaches()
+
+
+def test_lookup_returns_closest_entry_above_threshold():
+    cache = SemanticCache()
+    cache.store("ns", [1.0, 0.0, 0.0], "a", "A")
+    cache.store("ns", [0.0, 1.0, 0.0], "b", "B")
+
+    response, similarity = cache.lookup("ns", [0.9, 0.1, 0.0], threshold=0.9)
+    assert response == "A" and similarity > 0.99
+    assert cache.lookup("ns", [0.5, 0.5, 0.0], threshold=0.9) is None
+    assert cache.lookup("other", [1.0, 0.0, 0.0], threshold=0.9) is None
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 2, 2)
+    assert stats["namespaces"]["ns"]["hit_rate"] == 0.5
+
+
+def test_dimension_mismatch_in_a_namespace_is_rejected():
+    cache = SemanticCache()
+    cache.store("ns", [1.0, 0.0], "a", "A")
+    with pytest.raises(ValueError, match="separate namespace"):
+        cache.lookup("ns", [1.0, 0.0, 0.0], threshold=0.9)
+
+
+def test_capacity_evicts_least_recently_used_across_namespaces():
+    cache = SemanticCache(max_entries=2)
+    cache.store("x", [1.0, 0.0], "a", "A")
+    cache.store("y", [0.0, 1.0], "b", "B")
+    assert cache.lookup("x", [1.0, 0.0], threshold=0.9)[0] == "A"
+
+    cache.store("y", [1.0, 1.0], "c", "C")
+
+    assert len(cache) == 2
+    assert cache.lookup("y", [0.0, 1.0], threshold=0.99) is None
+    assert cache.lookup("x", [1.0, 0.0], threshold=0.99)[0] == "A"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_entries_expire_after_ttl():
+    now = [1000.0]
+    cache = SemanticCache(ttl_seconds=10, clock=lambda: now[0])
+    cache.store("ns", [1.0, 0.0], "old", "OLD")
+    now[0] += 5
+    cache.store("ns", [0.0, 1.0], "new", "NEW")
+    now[0] += 6
+
+    assert cache.lookup("ns", [1.0, 0.0], threshold=0.9) is None
+    assert cache.lookup("ns", [0.0, 1.0], threshold=0.9)[0] == "NEW"
+    assert cache.stats()["expired"] == 1
+
+
+def test_segment_reuses_answers_for_reworded_prompts():
+    answer = CountingAnswer()
+    segment = SemanticCacheSegment(pipeline=answer, embedding_model="m", embedding_source="bow", threshold=0.8)
+
+    out = list(segment([
+        "What is the capital of France?",
+        "what is the capital of france",
+        "How tall is Mount Everest?",
+    ]))
+
+    assert out == [
+        "answer to: What is the capital of France?",
+        "answer to: What is the capital of France?",
+        "answer to: How tall is Mount Everest?",
+    ]
+    assert answer.prompts == ["What is the capital of France?", "How tall is Mount Everest?"]
+    assert getSemanticCacheStats()[0]["hits"] == 1
+
+
+def test_segment_namespaces_keep_pipelines_apart():
+    first = SemanticCacheSegment(pipeline=CountingAnswer(), embedding_model="m", embedding_source="bow", namespace="model-a")
+    second = SemanticCacheSegment(pipeline=CountingAnswer(), embedding_model="m", embedding_source="bow", namespace="model-b")
+    shared = SemanticCacheSegment(pipeline=CountingAnswer(), embedding_model="m", embedding_source="bow", namespace="model-a")
+
+    list(first(["same question"]))
+    list(second(["same question"]))
+    list(shared(["same question"]))
+
+    assert first._pipeline.prompts == second._pipeline.prompts == ["same question"]
+    assert shared._pipeline.prompts == []
+
+
+def test_segment_field_and_set_as():
+    segment = SemanticCacheSegment(pipeline=CountingAnswer(), embedding_model="m", embedding_source="bow",
+                                   field="question", set_as="answer")
+    out = list(segment([{"question": "why is the sky blue"}]))
+    assert out == [{"question": "why is the sky blue", "answer": "answer to: why is the sky blue"}]
+
+
+def test_segment_validation():
+    with pytest.raises(ValueError, match="threshold"):
+        SemanticCacheSegment(pipeline=CountingAnswer(), embedding_model="m", embedding_source="bow", threshold=1.5)
+    with pytest.raises(ValueError, match="not supported"):
+        SemanticCacheSegment(pipeline=CountingAnswer(), embedding_model="m", embedding_source="nope")
+
+    class Silent(AbstractSegment):
+        def transform(self, input_iter):
+            return iter(())
+
+    segment = SemanticCacheSegment(pipeline=Silent(), embedding_model="m", embedding_source="bow")
+    with pytest.raises(ValueError, match="one response per prompt"):
+        list(segment(["x"]))
+
+
+def test_segment_compiles_chatterlang_pipeline():
+    script = compiler.compile(
+        """
+        CONST answer = "| lambda[expression='item.upper()']"
+        | semanticCache[pipeline=answer, embedding_model="m", embedding_source="bow", cache_name="script"]
+        """
+    )
+    assert list(script(["hello world", "Hello World", "goodbye"])) == ["HELLO WORLD", "HELLO WORLD", "GOODBYE"]
+    assert getSemanticCache("script").stats()["hits"] == 1
@@ -0,0 +1,206 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from talkpipe.llm.embedding_adapters_openai import OpenAIEmbeddingAdapter
+from talkpipe.llm.prompt_adapters import AnthropicPromptAdapter
+from talkpipe.llm.single_flight import (
+    SingleFlight,
+    configureSingleFlight,
+    getSingleFlightStats,
+    resetSingleFlightStats,
+)
+
+
+@pytest.fixture(autouse=True)
+def _reset():
+    resetSingleFlightStats()
+    yield
+    configureSingleFlight(None)
+    resetSingleFlightStats()
+
+
+def _run_together(target, count):
+    results = [None] * count
+    threads = [threading.Thread(target=lambda i=i: results.__setitem__(i, target())) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_concurrent_identical_calls_share_one_result():
+    flight = SingleFlight("prompt", "test")
+    calls = []
+
+    def slow():
+        calls.append(1)
+        time.sleep(0.05)
+        return "answer"
+
+    assert _run_together(lambda: flight.do("k", slow), 5) == ["answer"] * 5
+    assert len(calls) == 1
+    assert flight.stats() == {"kind": "prompt", "source": "test", "requests": 5, "sent": 1, "shared": 4, "in_flight": 0}
+
+    # Nothing is remembered once the call returns.
+    flight.do("k", slow)
+    assert len(calls) == 2
+
+
+def test_errors_reach_every_waiter_and_release_the_key():
+    flight = SingleFlight("prompt", "test")
+
+    def failing():
+        time.sleep(0.05)
+        raise ConnectionError("down")
+
+    def attempt():
+        try:
+            flight.do("k", failing)
+        except ConnectionError as exc:
+            return str(exc)
+
+    assert _run_together(attempt, 3) == ["down"] * 3
+    assert flight.do("k", lambda: "recovered") == "recovered"
+
+
+def test_do_many_sends_only_texts_not_in_flight():
+    flight = SingleFlight("embedding", "test")
+    sent = []
+    started = threading.Event()
+
+    def embed(texts):
+        sent.append(list(texts))
+        started.set()
+        time.sleep(0.05)
+        return [[float(len(t))] for t in texts]
+
+    first = threading.Thread(target=lambda: flight.do_many(["a", "bb"], ["a", "bb"], embed))
+    first.start()
+    started.wait()
+    result = flight.do_many(["bb", "ccc", "ccc"], ["bb", "ccc", "ccc"], embed)
+    first.join()
+
+    assert result == [[2.0], [3.0], [3.0]]
+    assert sent == [["a", "bb"], ["ccc"]]
+
+
+def test_async_callers_on_one_loop_share_a_call():
+    flight = SingleFlight("prompt", "test")
+    calls = []
+
+    async def slow():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "answer"
+
+    async def main():
+        return await asyncio.gather(*(flight.ado("k", slow) for _ in range(4)))
+
+    assert asyncio.run(main()) == ["answer"] * 4
+    assert len(calls) == 1
+
+
+class DummyAnthropic:
+    class Anthropic:
+        def __new__(cls):
+            return SimpleNamespace()
+
+
+def _anthropic(monkeypatch):
+    monkeypatch.setattr(AnthropicPromptAdapter, "_require_dependency", lambda *_args, **_kwargs: DummyAnthropic)
+    sent = []
+
+    def create(**params):
+        sent.append(params)
+        time.sleep(0.05)
+        return SimpleNamespace(content=[SimpleNamespace(text="ok")], usage=None)
+
+    def make(temperature=0):
+        adapter = AnthropicPromptAdapter("claude-sonnet-4-5", multi_turn=False, temperature=temperature)
+        adapter.client = SimpleNamespace(messages=SimpleNamespace(create=create))
+        return adapter
+
+    return make, sent
+
+
+def test_prompt_adapters_merge_identical_requests(monkeypatch):
+    make, sent = _anthropic(monkeypatch)
+    adapters = [make() for _ in range(3)]
+    it = iter(adapters)
+    lock = threading.Lock()
+
+    def execute():
+        with lock:
+            adapter = next(it)
+        return adapter.execute("same question")
+
+    assert _run_together(execute, 3) == ["ok"] * 3
+    assert len(sent) == 1
+    stats = {(s["kind"], s["source"]): s for s in getSingleFlightStats()}
+    assert stats[("prompt", "anthropic")]["shared"] == 2
+
+    # Different prompts are not merged.
+    _run_together(lambda: make().execute(f"question {threading.get_ident()}"), 2)
+    assert len(sent) == 3
+
+
+def test_single_flight_can_be_disabled(monkeypatch):
+    make, sent = _anthropic(monkeypatch)
+    configureSingleFlight(False)
+
+    _run_together(lambda: make().execute("same question"), 3)
+
+    assert len(sent) == 3
+    assert getSingleFlightStats() == []
+
+
+def test_sampled_prompts_are_not_merged_unless_asked(monkeypatch):
+    make, sent = _anthropic(monkeypatch)
+
+    _run_together(lambda: make(temperature=None).execute("same question"), 3)
+    _run_together(lambda: make(temperature=0.7).execute("same question"), 3)
+    assert len(sent) == 6
+
+    def forced():
+        adapter = make(temperature=0.7)
+        adapter.set_single_flight(True)
+        return adapter.execute("same question")
+
+    _run_together(forced, 3)
+    assert len(sent) == 7
+
+
+def test_llmprompt_single_flight_setting(monkeypatch):
+    from talkpipe.llm.chat import LLMPrompt
+
+    assert not LLMPrompt(model="m", source="eliza")._new_prompt_adapter()._merges_in_flight()
+    assert LLMPrompt(model="m", source="eliza", temperature=0)._new_prompt_adapter()._merges_in_flight()
+    assert LLMPrompt(model="m", source="eliza", single_flight=True)._new_prompt_adapter()._merges_in_flight()
+    assert not LLMPrompt(model="m", source="eliza", temperature=0,
+                         single_flight=False)._new_prompt_adapter()._merges_in_flight()
+
+
+def test_embedding_adapter_shares_vectors_as_copies(monkeypatch):
+    monkeypatch.setattr("talkpipe.llm.embedding_adapters_openai._require_openai", lambda: None)
+    monkeypatch.setattr("talkpipe.llm.embedding_adapters_openai.openai_client", lambda _openai: None)
+    adapter = OpenAIEmbeddingAdapter("text-embedding-3-small")
+    sent = []
+
+    def create(model, input):
+        sent.append(list(input))
+        time.sleep(0.05)
+        return SimpleNamespace(data=[SimpleNamespace(embedding=[float(len(t))]) for t in input])
+
+    adapter.client = SimpleNamespace(embeddings=SimpleNamespace(create=create))
+
+    results = _run_together(lambda: adapter.execute_batch(["x", "yy", "x"]), 3)
+
+    assert results == [[[1.0], [2.0], [1.0]]] * 3
+    assert sent == [["x", "yy"]]
+    results[0][0].append(99.0)
+    assert results[1][0] == [1.0]
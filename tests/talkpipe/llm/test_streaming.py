@@ -0,0 +1,187 @@
+from types import SimpleNamespace
+
+import pytest
+from pydantic import BaseModel
+
+from talkpipe.llm.chat import LLMPrompt
+from talkpipe.llm.content import StreamChunk
+from talkpipe.llm.prompt_adapters import (
+    AnthropicPromptAdapter,
+    ElizaPromptAdapter,
+    OllamaPromptAdapter,
+    OpenAIPromptAdapter,
+)
+
+
+def _ollama_streaming(monkeypatch, pieces=("Hel", "lo", " there")):
+    requests = []
+
+    class DummyOllamaModule:
+        pass
+
+    def fake_chat_completion(self, model, messages=None, stream=False, **_kwargs):
+        requests.append({"messages": list(messages), "stream": stream})
+        assert stream
+        return iter(SimpleNamespace(message=SimpleNamespace(content=p)) for p in pieces)
+
+    monkeypatch.setattr(OllamaPromptAdapter, "_require_dependency", lambda *_args, **_kwargs: DummyOllamaModule)
+    monkeypatch.setattr(OllamaPromptAdapter, "_chat_completion", fake_chat_completion)
+    return requests
+
+
+def test_ollama_stream_records_full_reply_in_history(monkeypatch):
+    requests = _ollama_streaming(monkeypatch)
+    adapter = OllamaPromptAdapter("llama3.2", multi_turn=True)
+
+    assert list(adapter.execute_stream("hi")) == ["Hel", "lo", " there"]
+    assert adapter._messages[-2:] == [
+        {"role": "user", "content": "hi"},
+        {"role": "assistant", "content": "Hello there"},
+    ]
+
+    list(adapter.execute_stream("again"))
+    assert requests[1]["messages"][-2]["content"] == "Hello there"
+
+
+def test_stream_abandoned_early_records_partial_reply(monkeypatch):
+    _ollama_streaming(monkeypatch)
+    adapter = OllamaPromptAdapter("llama3.2", multi_turn=True)
+
+    chunks = adapter.execute_stream("hi")
+    assert next(chunks) == "Hel"
+    chunks.close()
+
+    assert adapter._messages[-1] == {"role": "assistant", "content": "Hel"}
+
+
+def test_stream_uses_response_cache(monkeypatch, tmp_path):
+    requests = _ollama_streaming(monkeypatch)
+    path = str(tmp_path / "cache.sqlite")
+    for _ in range(2):
+        adapter = OllamaPromptAdapter("llama3.2", multi_turn=False, temperature=0)
+        adapter.set_response_cache("deterministic", path=path)
+        assert "".join(adapter.execute_stream("hi")) == "Hello there"
+
+    assert len(requests) == 1
+
+
+def test_stream_rejects_output_format(monkeypatch):
+    class Answer(BaseModel):
+        ans: int
+
+    _ollama_streaming(monkeypatch)
+    adapter = OllamaPromptAdapter("llama3.2", output_format=Answer)
+
+    with pytest.raises(ValueError, match="output_format"):
+        list(adapter.execute_stream("hi"))
+
+
+def test_openai_stream_yields_text_deltas(monkeypatch):
+    class DummyOpenAI:
+        NOT_GIVEN = object()
+
+        class OpenAI:
+            def __new__(cls):
+                return SimpleNamespace()
+
+    monkeypatch.setattr(OpenAIPromptAdapter, "_require_dependency", lambda *_args, **_kwargs: DummyOpenAI)
+    adapter = OpenAIPromptAdapter("gpt-4.1-nano", multi_turn=False)
+    seen = {}
+
+    def fake_request(parse, **params):
+        seen.update(params, parse=parse)
+        return iter([
+            SimpleNamespace(type="response.created"),
+            SimpleNamespace(type="response.output_text.delta", delta="Hi"),
+            SimpleNamespace(type="response.output_text.delta", delta=" you"),
+            SimpleNamespace(type="response.completed"),
+        ])
+
+    monkeypatch.setattr(adapter, "_responses_request", fake_request)
+
+    assert list(adapter.execute_stream("hello")) == ["Hi", " you"]
+    assert seen["stream"] is True and seen["parse"] is False
+    assert adapter._messages == []
+
+
+def test_anthropic_stream_yields_text_deltas(monkeypatch):
+    class DummyAnthropic:
+        class Anthropic:
+            def __new__(cls):
+                return SimpleNamespace()
+
+    monkeypatch.setattr(AnthropicPromptAdapter, "_require_dependency", lambda *_args, **_kwargs: DummyAnthropic)
+    adapter = AnthropicPromptAdapter("claude-3-5-haiku-latest", multi_turn=True)
+    seen = {}
+
+    def fake_create(**params):
+        seen.update(params)
+        return iter([
+            SimpleNamespace(type="message_start"),
+            SimpleNamespace(type="content_block_delta", delta=SimpleNamespace(type="text_delta", text="Bon")),
+            SimpleNamespace(type="content_block_delta", delta=SimpleNamespace(type="text_delta", text="jour")),
+            SimpleNamespace(type="message_stop"),
+        ])
+
+    monkeypatch.setattr(adapter, "_messages_create", fake_create)
+
+    assert list(adapter.execute_stream("hello")) == ["Bon", "jour"]
+    assert seen["stream"] is True
+    assert adapter._messages[-1] == {"role": "assistant", "content": "Bonjour"}
+
+
+def test_adapters_without_streaming_yield_one_chunk():
+    adapter = ElizaPromptAdapter("eliza", multi_turn=False)
+    chunks = list(adapter.execute_stream("I am sad"))
+
+    assert len(chunks) == 1
+    assert chunks[0]
+
+
+def test_llmprompt_stream_emits_chunks_as_items(monkeypatch):
+    _ollama_streaming(monkeypatch)
+    segment = LLMPrompt(model="llama3.2", source="ollama", multi_turn=False, stream=True, pass_prompts=True)
+
+    results = list(segment(["a", "b"]))
+
+    assert results[0] == "a"
+    assert results[1:4] == ["Hel", "lo", " there"]
+    assert all(isinstance(chunk, StreamChunk) for chunk in results[1:4])
+    assert results[4] == "b"
+    assert len({chunk.stream_id for chunk in results[1:4]}) == 1
+    assert results[5].stream_id != results[1].stream_id
+
+
+def test_llmprompt_stream_set_as_gives_iterator_field(monkeypatch):
+    requests = _ollama_streaming(monkeypatch)
+    segment = LLMPrompt(model="llama3.2", source="ollama", multi_turn=True, stream=True,
+                        field="q", set_as="reply")
+
+    outputs = segment([{"q": "one"}, {"q": "two"}])
+    first = next(outputs)
+    assert "".join(first["reply"]) == "Hello there"
+    second = next(outputs)
+    assert "".join(second["reply"]) == "Hello there"
+    # The first reply is in the history sent with the second prompt.
+    assert requests[1]["messages"][-2]["content"] == "Hello there"
+    assert list(outputs) == []
+    assert len(requests) == 2
+
+
+def test_llmprompt_stream_validation(monkeypatch):
+    _ollama_streaming(monkeypatch)
+    with pytest.raises(ValueError, match="max_concurrency"):
+        LLMPrompt(model="llama3.2", source="ollama", multi_turn=False, stream=True, max_concurrency=2)
+
+
+def test_llmprompt_stream_drains_unread_reply_before_next_prompt(monkeypatch):
+    _ollama_streaming(monkeypatch)
+    segment = LLMPrompt(model="llama3.2", source="ollama", multi_turn=True, stream=True,
+                        field="q", set_as="reply")
+
+    outputs = segment([{"q": "one"}, {"q": "two"}])
+    first = next(outputs)
+    second = next(outputs)
+
+    assert list(first["reply"]) == []
+    assert "".join(second["reply"]) == "Hello there"
@@ -98,3 +98,47 @@ def test_llm_vision_prompt_missing_image_field():
 
     with pytest.raises(ValueError, match="Image field 'path'"):
         list(segment.transform([{"other": "value"}]))
+
+
+def test_llm_vision_prompt_max_concurrency_preserves_order(png_file, monkeypatch):
+    import threading
+    import time
+
+    lock = threading.Lock()
+    state = {"active": 0, "peak": 0}
+
+    class SlowVisionAdapter:
+        def __init__(self, **kwargs):
+            pass
+
+        def execute_turn(self, user_turn):
+            with lock:
+                state["active"] += 1
+                state["peak"] = max(state["peak"], state["active"])
+            n = int(user_turn.parts[0].text)
+            time.sleep(0.04 - 0.005 * n)
+            with lock:
+                state["active"] -= 1
+            return f"seen {n}"
+
+    monkeypatch.setattr("talkpipe.llm.vision.getPromptSources", lambda: ["slow"])
+    monkeypatch.setattr("talkpipe.llm.vision.getPromptAdapter", lambda _source: SlowVisionAdapter)
+
+    segment = LLMVisionPrompt(
+        image_field="path",
+        model="m",
+        source="slow",
+        prompt_field="n",
+        set_as="out",
+        max_concurrency=3,
+    )
+    items = [{"path": str(png_file), "n": str(i)} for i in range(6)]
+    results = list(segment.transform(items))
+
+    assert [r["out"] for r in results] == [f"seen {i}" for i in range(6)]
+    assert state["peak"] == 3
+
+
+def test_llm_vision_prompt_max_concurrency_requires_single_turn():
+    with pytest.raises(ValueError, match="multi_turn"):
+        LLMVisionPrompt(image_field="path", model="m", source=OLLAMA_SOURCE, multi_turn=True, max_concurrency=2)
@@ -60,6 +60,16 @@ class TestReduceTSNE:
         assert isinstance(result[0], np.ndarray)
         assert not np.isnan(result[0]).any()  # No NaN values
 
+    def test_transform_accepts_float32_vectors(self):
+        """float32 vector lists, as llmEmbed emits with vector_format="numpy", are stacked as float32."""
+        np.random.seed(42)
+        vectors = list(np.random.rand(30, 8).astype(np.float32))
+
+        result = list(ReduceTSNE(perplexity=10, random_state=42).transform([vectors]))
+
+        assert result[0].shape == (30, 2)
+        assert result[0].dtype == np.float32
+
     def test_transform_with_multiple_inputs(self):
         """Test transformation of multiple input arrays."""
         # Create multiple datasets
@@ -118,6 +118,21 @@ def test_runtime_component():
 
     sav("A string")
     assert list(gav()) == ["A string"]
+
+
+def test_as_function_lazy():
+
+    @core.field_segment()
+    def add_two(item: int) -> int:
+        return item + 2
+
+    f = add_two().as_function(single_in=True, lazy=True)
+    result = f(1)
+    assert not isinstance(result, list)
+    assert list(result) == [3]
+
+    f = add_two().as_function(lazy=True)
+    assert list(f([1, 2])) == [3, 4]
     
 
 def test_function_segment():
@@ -0,0 +1,103 @@
+import pytest
+
+from talkpipe.llm.embedding import estimate_tokens
+from talkpipe.pipelines.basic_rag import ConstructRAGPrompt
+from talkpipe.pipelines.context_packing import PackRAGContext, compress_text, pack_context
+from talkpipe.search.abstract import SearchResult
+
+
+def _result(score, doc_id, text, title=None):
+    document = {"text": text}
+    if title:
+        document["title"] = title
+    return SearchResult(score=score, doc_id=doc_id, document=document)
+
+
+def test_search_results_are_ranked_by_score():
+    background = [_result(0.2, "low", "Cats sleep a lot."), _result(0.9, "high", "Dogs bark at night.")]
+    packed = pack_context(background)
+    assert packed == ["Text: Dogs bark at night.", "Text: Cats sleep a lot."]
+
+
+def test_strings_are_ranked_by_query_overlap():
+    background = ["Paris has many museums.", "The capital of France is Paris.", "Bananas are yellow."]
+    packed = pack_context(background, query="What is the capital of France?")
+    assert packed[0] == "The capital of France is Paris."
+    assert packed[-1] == "Bananas are yellow."
+
+
+def test_near_duplicates_are_dropped():
+    background = [
+        _result(0.9, "a", "The quick brown fox jumps over the lazy dog."),
+        _result(0.8, "b", "The quick brown fox jumps over the lazy dog!"),
+        _result(0.7, "c", "An entirely different passage about rivers."),
+    ]
+    packed = pack_context(background, dedup_threshold=0.9)
+    assert len(packed) == 2
+    assert "rivers" in packed[1]
+
+
+def test_token_budget_packs_best_chunks_that_fit():
+    long_text = "word " * 200
+    background = [_result(0.9, "a", "short and best"), _result(0.8, "b", long_text), _result(0.7, "c", "short too")]
+    budget = estimate_tokens("Text: short and best") + estimate_tokens("Text: short too")
+
+    packed = pack_context(background, context_token_budget=budget)
+
+    assert packed == ["Text: short and best", "Text: short too"]
+    assert sum(estimate_tokens(chunk) for chunk in packed) <= budget
+
+
+def test_oversized_top_chunk_is_truncated_to_the_budget():
+    packed = pack_context("word " * 400, query="x", context_token_budget=100)
+
+    assert len(packed) == 1
+    assert packed[0].startswith("word word")
+    assert packed[0].endswith("word")
+    assert 90 <= estimate_tokens(packed[0]) <= 100
+
+    # Lower-ranked chunks still fill what is left.
+    background = [_result(0.9, "a", "word " * 400), _result(0.8, "b", "tiny")]
+    packed = pack_context(background, context_token_budget=100)
+    assert packed[0].startswith("Text: word")
+    assert sum(estimate_tokens(chunk) for chunk in packed) <= 100
+
+
+def test_extractive_compression_keeps_query_sentences_in_order():
+    text = "Rome is old. The Eiffel Tower is in Paris. Pasta is tasty. Paris is the capital of France."
+    assert compress_text(text, "Where is Paris?", 2) == "The Eiffel Tower is in Paris. Paris is the capital of France."
+    assert compress_text("One sentence only.", "query", 2) == "One sentence only."
+
+    result = _result(0.9, "a", text, title="Travel notes. Europe.")
+    packed = pack_context([result], query="What is the capital of France?", sentences_per_chunk=1)
+    assert packed == ["Title: Travel notes. Europe.\nText: Paris is the capital of France."]
+
+
+def test_pack_context_validation():
+    with pytest.raises(ValueError, match="dedup_threshold"):
+        pack_context(["a"], dedup_threshold=0)
+    with pytest.raises(ValueError, match="sentences_per_chunk"):
+        pack_context(["a"], sentences_per_chunk=0)
+    with pytest.raises(ValueError, match="Unsupported"):
+        pack_context([42])
+
+
+def test_pack_rag_context_segment():
+    segment = PackRAGContext(background_field="background", query_field="question", set_as="packed")
+    item = {"question": "dogs?", "background": ["dogs bark", "dogs bark", "cats purr"]}
+
+    result = list(segment([item]))[0]
+
+    assert result["packed"] == ["dogs bark", "cats purr"]
+
+
+def test_construct_rag_prompt_packs_background_when_configured():
+    background = [_result(0.9, "a", "Relevant fact. " * 40), _result(0.5, "b", "Small fact.")]
+    segment = ConstructRAGPrompt(prompt_directive="Answer.", background_field="background",
+                                 content_field="question", context_token_budget=20)
+
+    prompt = list(segment([{"question": "facts?", "background": background}]))[0]
+
+    # The top chunk is cut to the budget, leaving no room for the second.
+    assert 0 < prompt.count("Relevant fact.") < 40
+    assert "Small fact." not in prompt
@@ -881,6 +881,46 @@ def test_make_vector_database_passes_on_token_overflow(monkeypatch, tmp_path):
         embedding_source="fake-source",
         path=str(tmp_path / "db"),
         on_token_overflow="truncate",
+        embedding_batch_size=16,
+        embedding_max_concurrency=4,
     )
 
     assert captured["on_token_overflow"] == "truncate"
+    assert captured["batch_size"] == 16
+    assert captured["max_concurrency"] == 4
+
+
+def test_build_rag_database_pipelines_embedding_batches(tmp_path, rag_corpus, monkeypatch):
+    from talkpipe.llm.embedding_adapters import AbstractEmbeddingAdapter
+    from talkpipe.pipelines import vector_databases as vdb
+
+    batches = []
+
+    class RecordingAdapter(AbstractEmbeddingAdapter):
+        def __init__(self, model):
+            super().__init__(model, "recording")
+
+        def execute_batch(self, texts):
+            batches.append(list(texts))
+            return [[1.0, 0.5, 0.25] for _ in texts]
+
+        def execute_one(self, text):
+            return self.execute_batch([text])[0]
+
+    monkeypatch.setattr("talkpipe.llm.embedding.getEmbeddingSources", lambda: ["recording"])
+    monkeypatch.setattr("talkpipe.llm.embedding.getEmbeddingAdapter", lambda source: RecordingAdapter)
+
+    result = vdb.build_rag_database(
+        rag_corpus,
+        path=str(tmp_path / "db"),
+        embedding_model="fake-model",
+        embedding_source="recording",
+        overwrite=True,
+        embedding_batch_size=2,
+        embedding_max_concurrency=2,
+    )
+
+    assert result.chunks_indexed == 2
+    assert result.chunks_skipped == 0
+    # The preflight probe, then both chunks in one batch.
+    assert [len(batch) for batch in batches] == [1, 2]
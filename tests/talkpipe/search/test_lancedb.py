@@ -1,4 +1,5 @@
 import pytest
+import numpy as np
 from unittest import mock
 import tempfile
 import os
@@ -567,6 +568,23 @@ def test_add_vectors_batch_operation(temp_db_path):
     assert doc3["category"] == "C"
 
 
+def test_float32_arrays_round_trip(temp_db_path):
+    """float32 arrays are stored and searched without converting to lists."""
+    store = LanceDBDocumentStore(temp_db_path, "test_table")
+    vectors = np.array([[1.0, 0.0, 0.0], [0.0, 1.0, 0.0]], dtype=np.float32)
+
+    validated = store._validate_vector(vectors[0])
+    assert validated.dtype == np.float32
+    assert np.shares_memory(validated, vectors)
+
+    store.add_vectors([(vectors[0], {"text": "x"}, "x"), (vectors[1], {"text": "y"}, "y")])
+    results = store.vector_search(np.array([0.1, 0.9, 0.0], dtype=np.float32), limit=1)
+    assert results[0].doc_id == "y"
+
+    with pytest.raises(ValueError, match="only numbers"):
+        store._validate_vector(["a", "b", "c"])
+
+
 def test_add_vectors_empty_list(temp_db_path):
     """Test add_vectors with empty list returns empty list."""
     store = LanceDBDocumentStore(temp_db_path, "test_table")
@@ -1,5 +1,5 @@
 import pytest
-from talkpipe.util.iterators import bypass
+from talkpipe.util.iterators import bypass, ordered_concurrent_map
 
 
 def test_bypass():
@@ -42,3 +42,44 @@ def test_bypass():
     result = list(bypass(data, predicate, handler))
     assert result == [30, 300, 50, 500, 90, 900]
 
+
+
+def test_ordered_concurrent_map_preserves_order_and_bounds_in_flight():
+    import threading
+    import time
+
+    lock = threading.Lock()
+    state = {"active": 0, "peak": 0}
+
+    def work(x):
+        with lock:
+            state["active"] += 1
+            state["peak"] = max(state["peak"], state["active"])
+        time.sleep(0.02 * (5 - x % 5))
+        with lock:
+            state["active"] -= 1
+        return x * x
+
+    assert list(ordered_concurrent_map(work, range(10), max_workers=3)) == [x * x for x in range(10)]
+    assert state["peak"] == 3
+
+
+def test_ordered_concurrent_map_sequential_and_errors():
+    seen = []
+
+    def work(x):
+        seen.append(x)
+        return x + 1
+
+    gen = ordered_concurrent_map(work, [1, 2, 3], max_workers=1)
+    assert next(gen) == 2
+    assert seen == [1]
+    assert list(gen) == [3, 4]
+
+    def boom(x):
+        if x == 2:
+            raise RuntimeError("bad item")
+        return x
+
+    with pytest.raises(RuntimeError, match="bad item"):
+        list(ordered_concurrent_map(boom, range(5), max_workers=2))